@@ -106,10 +106,7 @@ class ProcessLLMRequest:
         tmgr = self.ctx.get_llm_tool_manager()
         if (persona and persona.get("tools") is None) or not persona:
             # select all
-            toolset = tmgr.get_full_tool_set()
-            for tool in toolset:
-                if not tool.active:
-                    toolset.remove_tool(tool.name)
+            toolset = tmgr.get_active_tool_set()
         else:
             toolset = ToolSet()
             if persona["tools"]:
@@ -195,7 +195,7 @@ class Main(star.Star):
             ),
         )
 
-    @llm_tool(name="web_search")
+    @llm_tool(name="web_search", concurrency_safe=True)
     async def search_from_search_engine(
         self,
         event: AstrMessageEvent,
@@ -259,7 +259,7 @@ class Main(star.Star):
         self.baidu_initialized = True
         logger.info("Successfully initialized Baidu AI Search MCP server.")
 
-    @llm_tool(name="fetch_url")
+    @llm_tool(name="fetch_url", concurrency_safe=True)
     async def fetch_website_content(self, event: AstrMessageEvent, url: str) -> str:
         """Fetch the content of a website with the given web url
 
@@ -270,7 +270,7 @@ class Main(star.Star):
         resp = await self._get_from_url(url)
         return resp
 
-    @llm_tool("web_search_tavily")
+    @llm_tool("web_search_tavily", concurrency_safe=True)
     async def search_from_tavily(
         self,
         event: AstrMessageEvent,
@@ -346,7 +346,7 @@ class Main(star.Star):
         ret = json.dumps({"results": ret_ls}, ensure_ascii=False)
         return ret
 
-    @llm_tool("tavily_extract_web_page")
+    @llm_tool("tavily_extract_web_page", concurrency_safe=True)
     async def tavily_extract_web_page(
         self,
         event: AstrMessageEvent,
@@ -29,6 +29,9 @@ class ContextConfig:
     """Number of recent messages to keep during LLM-based compression."""
     llm_compress_provider: "Provider | None" = None
     """LLM provider used for compression tasks. If None, truncation strategy is used."""
+    token_counter: str = "estimate"
+    """Tokenizer used by the default token counter: "estimate", or a BPE encoding
+    such as "cl100k_base" whose vocab file is stored in data/tokenizers."""
     custom_token_counter: TokenCounter | None = None
     """Custom token counting method. If None, the default method is used."""
     custom_compressor: ContextCompressor | None = None
@@ -1,8 +1,16 @@
 import json
+import os
+import re
+from collections import OrderedDict
 from typing import Protocol, runtime_checkable
 
+from astrbot.core.log import LogManager
+
 from ..message import Message, TextPart
 
+# 本模块在 astrbot.core 初始化期间被导入，无法使用 `from astrbot.core import logger`
+logger = LogManager.GetLogger(log_name="astrbot")
+
 
 @runtime_checkable
 class TokenCounter(Protocol):
@@ -28,11 +36,112 @@ class TokenCounter(Protocol):
         ...
 
 
-class EstimateTokenCounter:
-    """Estimate token counter implementation.
-    Provides a simple estimation of token count based on character types.
+@runtime_checkable
+class Tokenizer(Protocol):
+    """Counts the tokens of a single piece of text."""
+
+    name: str
+
+    def count(self, text: str) -> int: ...
+
+
+_CJK_RE = re.compile("[\u4e00-\u9fff]")
+
+
+class EstimateTokenizer:
+    """Estimate the token count based on character types, without any vocab."""
+
+    name = "estimate"
+
+    def count(self, text: str) -> int:
+        # subn 在 C 层完成扫描，避免为每个字符创建 Python 对象
+        chinese_count = _CJK_RE.subn("", text)[1]
+        other_count = len(text) - chinese_count
+        return int(chinese_count * 0.6 + other_count * 0.3)
+
+
+BPE_ENCODINGS = {
+    "cl100k_base": r"""'(?i:[sdmt]|ll|ve|re)|[^\r\n\p{L}\p{N}]?+\p{L}++|\p{N}{1,3}+| ?[^\s\p{L}\p{N}]++[\r\n]*+|\s++$|\s*[\r\n]|\s+(?!\S)|\s""",
+    "o200k_base": "|".join(
+        [
+            r"""[^\r\n\p{L}\p{N}]?[\p{Lu}\p{Lt}\p{Lm}\p{Lo}\p{M}]*[\p{Ll}\p{Lm}\p{Lo}\p{M}]+(?i:'s|'t|'re|'ve|'m|'ll|'d)?""",
+            r"""[^\r\n\p{L}\p{N}]?[\p{Lu}\p{Lt}\p{Lm}\p{Lo}\p{M}]+[\p{Ll}\p{Lm}\p{Lo}\p{M}]*(?i:'s|'t|'re|'ve|'m|'ll|'d)?""",
+            r"""\p{N}{1,3}""",
+            r""" ?[^\s\p{L}\p{N}]+[\r\n/]*""",
+            r"""\s*[\r\n]+""",
+            r"""\s+(?!\S)""",
+            r"""\s+""",
+        ]
+    ),
+}
+"""Supported BPE encodings and their pre-tokenization patterns."""
+
+
+class BPETokenizer:
+    """Count tokens with a tiktoken-format BPE vocab file stored locally.
+
+    The vocab file is never downloaded. Put `<encoding>.tiktoken` into
+    `data/tokenizers/` (or pass `vocab_path`) to enable it.
+    """
+
+    def __init__(self, encoding: str, vocab_path: str | None = None):
+        if encoding not in BPE_ENCODINGS:
+            raise ValueError(f"Unsupported BPE encoding: {encoding}")
+        import tiktoken
+        from tiktoken.load import load_tiktoken_bpe
+
+        if vocab_path is None:
+            vocab_path = os.path.join(get_tokenizer_dir(), f"{encoding}.tiktoken")
+        if not os.path.exists(vocab_path):
+            raise FileNotFoundError(vocab_path)
+
+        self.name = encoding
+        self._encoding = tiktoken.Encoding(
+            name=encoding,
+            pat_str=BPE_ENCODINGS[encoding],
+            mergeable_ranks=load_tiktoken_bpe(vocab_path),
+            special_tokens={},
+        )
+
+    def count(self, text: str) -> int:
+        return len(self._encoding.encode_ordinary(text))
+
+
+def get_tokenizer_dir() -> str:
+    from astrbot.core.utils.astrbot_path import get_astrbot_data_path
+
+    return os.path.join(get_astrbot_data_path(), "tokenizers")
+
+
+def _tool_call_text(tc) -> str:
+    return json.dumps(tc if isinstance(tc, dict) else tc.model_dump())
+
+
+def _tool_call_key(tc) -> tuple | str:
+    if isinstance(tc, dict):
+        func = tc.get("function")
+        if isinstance(func, dict) and len(tc) <= 3 and len(func) == 2:
+            return (tc.get("id"), func.get("name"), func.get("arguments"))
+        return _tool_call_text(tc)
+    return (tc.id, tc.function.name, tc.function.arguments)
+
+
+class MemoizedTokenCounter:
+    """Token counter with per-message memoization.
+
+    Token counts are cached by the hash of each message's text and tool calls.
+    The history sent to the LLM only grows by a few messages per round, so each
+    call only needs to tokenize the new messages. The tokenizer defaults to a
+    character based estimation; see `get_token_counter` for BPE tokenizers.
     """
 
+    def __init__(self, tokenizer: Tokenizer | None = None, max_cache_size=8192):
+        self.tokenizer = tokenizer or EstimateTokenizer()
+        self.max_cache_size = max_cache_size
+        self._cache: OrderedDict[tuple, int] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
     def count_tokens(
         self, messages: list[Message], trusted_token_usage: int = 0
     ) -> int:
@@ -43,22 +152,101 @@ class EstimateTokenCounter:
         for msg in messages:
             content = msg.content
             if isinstance(content, str):
-                total += self._estimate_tokens(content)
+                content_key = content
             elif isinstance(content, list):
-                # 处理多模态内容
-                for part in content:
-                    if isinstance(part, TextPart):
-                        total += self._estimate_tokens(part.text)
+                # 处理多模态内容，只计算文本部分
+                content_key = tuple(
+                    part.text for part in content if isinstance(part, TextPart)
+                )
+            else:
+                content_key = None
+            tool_calls = msg.tool_calls or ()
+            key = (content_key, tuple(_tool_call_key(tc) for tc in tool_calls))
+            total += self._cached(key, msg)
+        return total
 
-            # 处理 Tool Calls
-            if msg.tool_calls:
-                for tc in msg.tool_calls:
-                    tc_str = json.dumps(tc if isinstance(tc, dict) else tc.model_dump())
-                    total += self._estimate_tokens(tc_str)
+    def _count_message(self, msg: Message) -> int:
+        total = 0
+        content = msg.content
+        if isinstance(content, str):
+            total += self._estimate_tokens(content)
+        elif isinstance(content, list):
+            for part in content:
+                if isinstance(part, TextPart):
+                    total += self._estimate_tokens(part.text)
+        # 处理 Tool Calls
+        for tc in msg.tool_calls or ():
+            total += self._estimate_tokens(_tool_call_text(tc))
+        return total
 
+    def _cached(self, key: tuple, msg: Message) -> int:
+        tokens = self._cache.get(key)
+        if tokens is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return tokens
+        self.misses += 1
+        tokens = self._cache[key] = self._count_message(msg)
+        if len(self._cache) > self.max_cache_size:
+            self._cache.popitem(last=False)
+        return tokens
+
+    def count_dict_tokens(self, message: dict) -> int:
+        """Estimate the tokens of a single OpenAI-formatted message dict."""
+        total = 0
+        content = message.get("content")
+        if isinstance(content, str):
+            total += self._estimate_tokens(content)
+        elif isinstance(content, list):
+            for part in content:
+                if isinstance(part, dict) and part.get("type") == "text":
+                    total += self._estimate_tokens(part.get("text") or "")
+        if tool_calls := message.get("tool_calls"):
+            total += self._estimate_tokens(json.dumps(tool_calls))
         return total
 
     def _estimate_tokens(self, text: str) -> int:
-        chinese_count = len([c for c in text if "\u4e00" <= c <= "\u9fff"])
-        other_count = len(text) - chinese_count
-        return int(chinese_count * 0.6 + other_count * 0.3)
+        return self.tokenizer.count(text)
+
+
+class EstimateTokenCounter(MemoizedTokenCounter):
+    """Estimate token counter implementation.
+    Provides a simple estimation of token count based on character types.
+    """
+
+    def __init__(self, max_cache_size=8192):
+        super().__init__(EstimateTokenizer(), max_cache_size)
+
+
+_counters: dict[str, MemoizedTokenCounter] = {}
+
+
+def get_token_counter(name: str = "estimate") -> MemoizedTokenCounter:
+    """Get the shared token counter of a tokenizer.
+
+    Args:
+        name: "estimate", or a BPE encoding in `BPE_ENCODINGS`. A BPE encoding
+            whose vocab file is unavailable falls back to the estimation.
+
+    Counters are shared process-wide so that the memoized counts survive
+    across agent runs.
+    """
+    counter = _counters.get(name)
+    if counter is not None:
+        return counter
+    tokenizer: Tokenizer | None = None
+    if name != "estimate":
+        try:
+            tokenizer = BPETokenizer(name)
+        except ImportError:
+            logger.warning(
+                f"未安装 tiktoken，无法使用 {name} 分词器，将使用估算方式计算 Token。"
+            )
+        except FileNotFoundError as e:
+            logger.warning(
+                f"未找到 {name} 分词器的词表文件 {e}，将使用估算方式计算 Token。"
+            )
+        except Exception as e:
+            logger.warning(f"加载 {name} 分词器失败: {e}，将使用估算方式计算 Token。")
+    counter = _counters[name] = MemoizedTokenCounter(tokenizer)
+    return counter
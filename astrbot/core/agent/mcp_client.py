@@ -1,8 +1,11 @@
 import asyncio
+import contextlib
 import logging
+import time
+from collections.abc import Awaitable, Callable
 from contextlib import AsyncExitStack
 from datetime import timedelta
-from typing import Generic
+from typing import Any, Generic
 
 from tenacity import (
     before_sleep_log,
@@ -42,6 +45,7 @@ def _prepare_config(config: dict) -> dict:
         first_key = next(iter(config["mcpServers"]))
         config = config["mcpServers"][first_key]
     config.pop("active", None)
+    config.pop("max_concurrency", None)
     return config
 
 
@@ -107,8 +111,53 @@ async def _quick_test_mcp_connection(config: dict) -> tuple[bool, str]:
         return False, f"{e!s}"
 
 
+class MCPCallStats:
+    """Latency and error histogram of the tool calls to one MCP server."""
+
+    LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.latency_counts = [0] * (len(self.LATENCY_BUCKETS_MS) + 1)
+        """Call counts per latency bucket, the last one is for calls slower than all buckets"""
+        self.error_counts: dict[str, int] = {}
+        """Error counts per exception type"""
+
+    def record(self, elapsed_ms: float, error: str | None = None) -> None:
+        """Record a call. `error` is the error type name, None if the call succeeded."""
+        self.calls += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        for i, bound in enumerate(self.LATENCY_BUCKETS_MS):
+            if elapsed_ms <= bound:
+                self.latency_counts[i] += 1
+                break
+        else:
+            self.latency_counts[-1] += 1
+        if error is not None:
+            self.errors += 1
+            self.error_counts[error] = self.error_counts.get(error, 0) + 1
+
+    def to_dict(self) -> dict[str, Any]:
+        labels = [f"<={b}ms" for b in self.LATENCY_BUCKETS_MS]
+        labels.append(f">{self.LATENCY_BUCKETS_MS[-1]}ms")
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "in_flight": self.in_flight,
+            "avg_ms": round(self.total_ms / self.calls, 2) if self.calls else 0,
+            "max_ms": round(self.max_ms, 2),
+            "latency_histogram": dict(zip(labels, self.latency_counts)),
+            "error_histogram": dict(self.error_counts),
+        }
+
+
 class MCPClient:
-    def __init__(self):
+    def __init__(self, max_concurrency: int = 16):
         # Initialize session and client objects
         self.session: mcp.ClientSession | None = None
         self.exit_stack = AsyncExitStack()
@@ -119,12 +168,24 @@ class MCPClient:
         self.tools: list[mcp.Tool] = []
         self.server_errlogs: list[str] = []
         self.running_event = asyncio.Event()
+        self.connected_event = asyncio.Event()
+        """Set when a session is initialized and cleared while it is (re)connecting"""
 
         # Store connection config for reconnection
         self._mcp_server_config: dict | None = None
         self._server_name: str | None = None
         self._reconnect_lock = asyncio.Lock()  # Lock for thread-safe reconnection
         self._reconnecting: bool = False  # For logging and debugging
+        self._generation = 0
+        """Incremented on every new session, so concurrent callers reconnect only once"""
+
+        # A session multiplexes requests by JSON-RPC id, so calls share it concurrently
+        self._call_semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        self.stats = MCPCallStats()
+
+        self.on_tools_changed: Callable[[MCPClient], Awaitable[None]] | None = None
+        """Called after the tool list is refreshed on a `tools/list_changed` notification"""
+        self._refresh_task: asyncio.Task | None = None
 
     async def connect_to_server(self, mcp_server_config: dict, name: str):
         """Connect to MCP server
@@ -180,6 +241,7 @@ class MCPClient:
                         *streams,
                         read_timeout_seconds=read_timeout,
                         logging_callback=logging_callback,  # type: ignore
+                        message_handler=self._message_handler,  # type: ignore
                     ),
                 )
             else:
@@ -206,6 +268,7 @@ class MCPClient:
                         write_stream=write_s,
                         read_timeout_seconds=read_timeout,
                         logging_callback=logging_callback,  # type: ignore
+                        message_handler=self._message_handler,  # type: ignore
                     ),
                 )
 
@@ -232,9 +295,34 @@ class MCPClient:
 
             # Create a new client session
             self.session = await self.exit_stack.enter_async_context(
-                mcp.ClientSession(*stdio_transport),
+                mcp.ClientSession(
+                    *stdio_transport,
+                    message_handler=self._message_handler,  # type: ignore
+                ),
             )
         await self.session.initialize()
+        self._generation += 1
+        self.connected_event.set()
+
+    async def _message_handler(self, message) -> None:
+        if isinstance(message, mcp.types.ServerNotification) and isinstance(
+            message.root, mcp.types.ToolListChangedNotification
+        ):
+            # Do not block the session's receive loop
+            if self._refresh_task is None or self._refresh_task.done():
+                self._refresh_task = asyncio.create_task(self.refresh_tools())
+
+    async def refresh_tools(self) -> None:
+        """Re-list the tools of the server and notify `on_tools_changed`"""
+        try:
+            await self.list_tools_and_save()
+            logger.info(f"MCP server {self._server_name} tool list changed, refreshed.")
+            if self.on_tools_changed:
+                await self.on_tools_changed(self)
+        except Exception as e:
+            logger.warning(
+                f"Failed to refresh tools of MCP server {self._server_name}: {e}"
+            )
 
     async def list_tools_and_save(self) -> mcp.ListToolsResult:
         """List all tools from the server and save them to self.tools"""
@@ -244,19 +332,25 @@ class MCPClient:
         self.tools = response.tools
         return response
 
-    async def _reconnect(self) -> None:
+    async def _reconnect(self, generation: int | None = None) -> None:
         """Reconnect to the MCP server using the stored configuration.
 
         Uses asyncio.Lock to ensure thread-safe reconnection in concurrent environments.
 
+        Args:
+            generation: the session generation the caller failed on. If another caller
+                has already replaced that session, the reconnection is skipped.
+
         Raises:
             Exception: raised when reconnection fails
         """
         async with self._reconnect_lock:
             # Check if already reconnecting (useful for logging)
-            if self._reconnecting:
+            if self._reconnecting or (
+                generation is not None and generation != self._generation
+            ):
                 logger.debug(
-                    f"MCP Client {self._server_name} is already reconnecting, skipping"
+                    f"MCP Client {self._server_name} is already reconnected, skipping"
                 )
                 return
 
@@ -275,6 +369,7 @@ class MCPClient:
 
                 # Mark old session as invalid
                 self.session = None
+                self.connected_event.clear()
 
                 # Create new exit stack for new connection
                 self.exit_stack = AsyncExitStack()
@@ -323,9 +418,18 @@ class MCPClient:
             reraise=True,
         )
         async def _call_with_retry():
+            if not self.session and self._mcp_server_config:
+                # The server may still be connecting, e.g. when its tools were
+                # restored from the cache at startup
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(
+                        self.connected_event.wait(),
+                        read_timeout_seconds.total_seconds(),
+                    )
             if not self.session:
                 raise ValueError("MCP session is not available for MCP function tools.")
 
+            generation = self._generation
             try:
                 return await self.session.call_tool(
                     name=tool_name,
@@ -337,14 +441,32 @@ class MCPClient:
                     f"MCP tool {tool_name} call failed (ClosedResourceError), attempting to reconnect..."
                 )
                 # Attempt to reconnect
-                await self._reconnect()
+                await self._reconnect(generation)
                 # Reraise the exception to trigger tenacity retry
                 raise
 
-        return await _call_with_retry()
+        async with self._call_semaphore:
+            self.stats.in_flight += 1
+            start = time.perf_counter()
+            error: str | None = None
+            try:
+                result = await _call_with_retry()
+                if getattr(result, "isError", False):
+                    error = "ToolError"
+                return result
+            except BaseException as e:
+                error = type(e).__name__
+                raise
+            finally:
+                self.stats.in_flight -= 1
+                self.stats.record((time.perf_counter() - start) * 1000, error)
 
     async def cleanup(self):
         """Clean up resources including old exit stacks from reconnections"""
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+        self.connected_event.clear()
         # Close current exit stack
         try:
             await self.exit_stack.aclose()
@@ -371,6 +493,9 @@ class MCPTool(FunctionTool, Generic[TContext]):
             description=mcp_tool.description or "",
             parameters=mcp_tool.inputSchema,
         )
+        # 只读的 MCP 工具可以并发调用
+        annotations = getattr(mcp_tool, "annotations", None)
+        self.concurrency_safe = bool(annotations and annotations.readOnlyHint)
         self.mcp_tool = mcp_tool
         self.mcp_client = mcp_client
         self.mcp_server_name = mcp_server_name
@@ -1,8 +1,10 @@
+import asyncio
 import copy
 import sys
 import time
 import traceback
 import typing as T
+import weakref
 
 from mcp.types import (
     BlobResourceContents,
@@ -43,6 +45,19 @@ if sys.version_info >= (3, 12):
 else:
     from typing_extensions import override
 
+# 并行工具调用的全局并发上限，同一事件循环内所有 Agent 共享
+_tool_call_limiters: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, dict[int, asyncio.Semaphore]
+] = weakref.WeakKeyDictionary()
+
+
+def _get_tool_call_limiter(limit: int) -> asyncio.Semaphore:
+    limiters = _tool_call_limiters.setdefault(asyncio.get_running_loop(), {})
+    limit = max(1, limit)
+    if limit not in limiters:
+        limiters[limit] = asyncio.Semaphore(limit)
+    return limiters[limit]
+
 
 class ToolLoopAgentRunner(BaseAgentRunner[TContext]):
     @override
@@ -63,14 +78,24 @@ class ToolLoopAgentRunner(BaseAgentRunner[TContext]):
         llm_compress_provider: Provider | None = None,
         # truncate by turns compressor
         truncate_turns: int = 1,
+        # "estimate" or a BPE encoding, see ContextConfig.token_counter
+        token_counter: str = "estimate",
         # customize
         custom_token_counter: TokenCounter | None = None,
         custom_compressor: ContextCompressor | None = None,
         tool_schema_mode: str | None = "full",
+        # parallel tool calls: run adjacent concurrency_safe tool calls of one step concurrently
+        parallel_tool_calls: bool = False,
+        max_parallel_tool_calls: int = 4,
+        # per-call timeout in parallel mode, defaults to run_context.tool_call_timeout
+        parallel_tool_call_timeout: float | None = None,
         **kwargs: T.Any,
     ) -> None:
         self.req = request
         self.streaming = streaming
+        self.parallel_tool_calls = parallel_tool_calls
+        self.max_parallel_tool_calls = max_parallel_tool_calls
+        self.parallel_tool_call_timeout = parallel_tool_call_timeout
         self.enforce_max_turns = enforce_max_turns
         self.llm_compress_instruction = llm_compress_instruction
         self.llm_compress_keep_recent = llm_compress_keep_recent
@@ -90,6 +115,7 @@ class ToolLoopAgentRunner(BaseAgentRunner[TContext]):
             llm_compress_instruction=self.llm_compress_instruction,
             llm_compress_keep_recent=self.llm_compress_keep_recent,
             llm_compress_provider=self.llm_compress_provider,
+            token_counter=token_counter,
             custom_token_counter=self.custom_token_counter,
             custom_compressor=self.custom_compressor,
         )
@@ -353,216 +379,319 @@ class ToolLoopAgentRunner(BaseAgentRunner[TContext]):
         req: ProviderRequest,
         llm_response: LLMResponse,
     ) -> T.AsyncGenerator[MessageChain | list[ToolCallMessageSegment], None]:
-        """处理函数工具调用。"""
+        """处理函数工具调用。
+
+        开启 parallel_tool_calls 后，相邻的 concurrency_safe 工具调用会被并发执行，
+        其 tool_call 事件会先按顺序发出，执行结果则按照原始调用顺序重新组装。
+        """
         tool_call_result_blocks: list[ToolCallMessageSegment] = []
         logger.info(f"Agent 使用工具: {llm_response.tools_call_name}")
 
-        # 执行函数调用
-        for func_tool_name, func_tool_args, func_tool_id in zip(
-            llm_response.tools_call_name,
-            llm_response.tools_call_args,
-            llm_response.tools_call_ids,
-        ):
+        tool_calls = list(
+            zip(
+                llm_response.tools_call_name,
+                llm_response.tools_call_args,
+                llm_response.tools_call_ids,
+            )
+        )
+        func_tool_id = None
+        for batch in self._split_tool_call_batches(req, tool_calls):
+            for func_tool_name, func_tool_args, func_tool_id in batch:
+                yield MessageChain(
+                    type="tool_call",
+                    chain=[
+                        Json(
+                            data={
+                                "id": func_tool_id,
+                                "name": func_tool_name,
+                                "args": func_tool_args,
+                                "ts": time.time(),
+                            }
+                        )
+                    ],
+                )
+            if not req.func_tool:
+                return
+
+            if len(batch) == 1:
+                async for item in self._execute_tool_call(req, llm_response, *batch[0]):
+                    if isinstance(item, ToolCallMessageSegment):
+                        tool_call_result_blocks.append(item)
+                    else:
+                        yield item
+                continue
+
+            outputs = await self._execute_tool_calls_concurrently(
+                req, llm_response, batch
+            )
+            for items in outputs:
+                for item in items:
+                    if isinstance(item, ToolCallMessageSegment):
+                        tool_call_result_blocks.append(item)
+                    else:
+                        yield item
+
+        # yield the last tool call result
+        if tool_call_result_blocks:
+            last_tcr_content = str(tool_call_result_blocks[-1].content)
             yield MessageChain(
-                type="tool_call",
+                type="tool_call_result",
                 chain=[
                     Json(
                         data={
                             "id": func_tool_id,
-                            "name": func_tool_name,
-                            "args": func_tool_args,
                             "ts": time.time(),
+                            "result": last_tcr_content,
                         }
                     )
                 ],
             )
-            try:
-                if not req.func_tool:
-                    return
-                func_tool = req.func_tool.get_tool(func_tool_name)
-                logger.info(f"使用工具：{func_tool_name}，参数：{func_tool_args}")
-
-                if not func_tool:
-                    logger.warning(f"未找到指定的工具: {func_tool_name}，将跳过。")
-                    tool_call_result_blocks.append(
+
+        # 处理函数调用响应
+        if tool_call_result_blocks:
+            yield tool_call_result_blocks
+
+    def _split_tool_call_batches(
+        self,
+        req: ProviderRequest,
+        tool_calls: list[tuple[str, dict, str]],
+    ) -> list[list[tuple[str, dict, str]]]:
+        """将工具调用按顺序划分为批次。
+
+        未开启并行时每个调用单独成批；开启后相邻的 concurrency_safe 调用合并为一批，
+        其余调用仍单独执行，作为前后批次之间的屏障。
+        """
+        if not self.parallel_tool_calls or not req.func_tool:
+            return [[call] for call in tool_calls]
+        batches: list[list[tuple[str, dict, str]]] = []
+        current: list[tuple[str, dict, str]] = []
+        for call in tool_calls:
+            func_tool = req.func_tool.get_tool(call[0])
+            if func_tool is None or func_tool.concurrency_safe:
+                current.append(call)
+                continue
+            if current:
+                batches.append(current)
+                current = []
+            batches.append([call])
+        if current:
+            batches.append(current)
+        return batches
+
+    async def _execute_tool_calls_concurrently(
+        self,
+        req: ProviderRequest,
+        llm_response: LLMResponse,
+        batch: list[tuple[str, dict, str]],
+    ) -> list[list[MessageChain | ToolCallMessageSegment]]:
+        """并发执行一批工具调用，返回按原始顺序排列的每个调用的输出。"""
+        semaphore = _get_tool_call_limiter(self.max_parallel_tool_calls)
+        timeout = self.parallel_tool_call_timeout or self.run_context.tool_call_timeout
+
+        async def _run(
+            func_tool_name: str, func_tool_args: dict, func_tool_id: str
+        ) -> list[MessageChain | ToolCallMessageSegment]:
+            items: list[MessageChain | ToolCallMessageSegment] = []
+
+            async def _collect():
+                async for item in self._execute_tool_call(
+                    req, llm_response, func_tool_name, func_tool_args, func_tool_id
+                ):
+                    items.append(item)
+
+            async with semaphore:
+                try:
+                    await asyncio.wait_for(_collect(), timeout=timeout or None)
+                except asyncio.TimeoutError:
+                    logger.warning(
+                        f"工具 {func_tool_name} 执行超时（{timeout} 秒），已取消。"
+                    )
+                    if any(
+                        isinstance(item, ToolCallMessageSegment)
+                        and item.tool_call_id == func_tool_id
+                        for item in items
+                    ):
+                        # 结果已经产出，超时发生在之后的钩子中，不再补充错误结果
+                        return items
+                    items.append(
                         ToolCallMessageSegment(
                             role="tool",
                             tool_call_id=func_tool_id,
-                            content=f"error: Tool {func_tool_name} not found.",
+                            content=f"error: tool {func_tool_name} execution timeout after {timeout} seconds.",
                         ),
                     )
-                    continue
+                    func_tool = req.func_tool.get_tool(func_tool_name)  # type: ignore
+                    if func_tool:
+                        try:
+                            await self.agent_hooks.on_tool_end(
+                                self.run_context,
+                                func_tool,
+                                func_tool_args,
+                                None,
+                                llm_response=llm_response,
+                            )
+                        except Exception as e:
+                            logger.error(
+                                f"Error in on_tool_end hook: {e}", exc_info=True
+                            )
+            return items
 
-                valid_params = {}  # 参数过滤：只传递函数实际需要的参数
+        return list(await asyncio.gather(*(_run(*call) for call in batch)))
 
-                # 获取实际的 handler 函数
-                if func_tool.handler:
-                    logger.debug(
-                        f"工具 {func_tool_name} 期望的参数: {func_tool.parameters}",
-                    )
-                    if func_tool.parameters and func_tool.parameters.get("properties"):
-                        expected_params = set(func_tool.parameters["properties"].keys())
+    async def _execute_tool_call(
+        self,
+        req: ProviderRequest,
+        llm_response: LLMResponse,
+        func_tool_name: str,
+        func_tool_args: dict,
+        func_tool_id: str,
+    ) -> T.AsyncGenerator[MessageChain | ToolCallMessageSegment, None]:
+        """执行单个工具调用，产出需要发送的消息和工具调用结果。"""
+        try:
+            func_tool = req.func_tool.get_tool(func_tool_name)  # type: ignore
+            logger.info(f"使用工具：{func_tool_name}，参数：{func_tool_args}")
+
+            if not func_tool:
+                logger.warning(f"未找到指定的工具: {func_tool_name}，将跳过。")
+                yield ToolCallMessageSegment(
+                    role="tool",
+                    tool_call_id=func_tool_id,
+                    content=f"error: Tool {func_tool_name} not found.",
+                )
+                return
 
-                        valid_params = {
-                            k: v
-                            for k, v in func_tool_args.items()
-                            if k in expected_params
-                        }
+            valid_params = {}  # 参数过滤：只传递函数实际需要的参数
 
-                    # 记录被忽略的参数
-                    ignored_params = set(func_tool_args.keys()) - set(
-                        valid_params.keys(),
-                    )
-                    if ignored_params:
-                        logger.warning(
-                            f"工具 {func_tool_name} 忽略非期望参数: {ignored_params}",
-                        )
-                else:
-                    # 如果没有 handler（如 MCP 工具），使用所有参数
-                    valid_params = func_tool_args
+            # 获取实际的 handler 函数
+            if func_tool.handler:
+                logger.debug(
+                    f"工具 {func_tool_name} 期望的参数: {func_tool.parameters}",
+                )
+                if func_tool.parameters and func_tool.parameters.get("properties"):
+                    expected_params = set(func_tool.parameters["properties"].keys())
 
-                try:
-                    await self.agent_hooks.on_tool_start(
-                        self.run_context,
-                        func_tool,
-                        valid_params,
-                        llm_response=llm_response,
+                    valid_params = {
+                        k: v for k, v in func_tool_args.items() if k in expected_params
+                    }
+
+                # 记录被忽略的参数
+                ignored_params = set(func_tool_args.keys()) - set(
+                    valid_params.keys(),
+                )
+                if ignored_params:
+                    logger.warning(
+                        f"工具 {func_tool_name} 忽略非期望参数: {ignored_params}",
                     )
-                except Exception as e:
-                    logger.error(f"Error in on_tool_start hook: {e}", exc_info=True)
+            else:
+                # 如果没有 handler（如 MCP 工具），使用所有参数
+                valid_params = func_tool_args
 
-                executor = self.tool_executor.execute(
-                    tool=func_tool,
-                    run_context=self.run_context,
-                    **valid_params,  # 只传递有效的参数
+            try:
+                await self.agent_hooks.on_tool_start(
+                    self.run_context,
+                    func_tool,
+                    valid_params,
+                    llm_response=llm_response,
                 )
+            except Exception as e:
+                logger.error(f"Error in on_tool_start hook: {e}", exc_info=True)
 
-                _final_resp: CallToolResult | None = None
-                async for resp in executor:  # type: ignore
-                    if isinstance(resp, CallToolResult):
-                        res = resp
-                        _final_resp = resp
-                        if isinstance(res.content[0], TextContent):
-                            tool_call_result_blocks.append(
-                                ToolCallMessageSegment(
-                                    role="tool",
-                                    tool_call_id=func_tool_id,
-                                    content=res.content[0].text,
-                                ),
-                            )
-                        elif isinstance(res.content[0], ImageContent):
-                            tool_call_result_blocks.append(
-                                ToolCallMessageSegment(
-                                    role="tool",
-                                    tool_call_id=func_tool_id,
-                                    content="The tool has successfully returned an image and sent directly to the user. You can describe it in your next response.",
-                                ),
-                            )
-                            yield MessageChain(type="tool_direct_result").base64_image(
-                                res.content[0].data,
-                            )
-                        elif isinstance(res.content[0], EmbeddedResource):
-                            resource = res.content[0].resource
-                            if isinstance(resource, TextResourceContents):
-                                tool_call_result_blocks.append(
-                                    ToolCallMessageSegment(
-                                        role="tool",
-                                        tool_call_id=func_tool_id,
-                                        content=resource.text,
-                                    ),
-                                )
-                            elif (
-                                isinstance(resource, BlobResourceContents)
-                                and resource.mimeType
-                                and resource.mimeType.startswith("image/")
-                            ):
-                                tool_call_result_blocks.append(
-                                    ToolCallMessageSegment(
-                                        role="tool",
-                                        tool_call_id=func_tool_id,
-                                        content="The tool has successfully returned an image and sent directly to the user. You can describe it in your next response.",
-                                    ),
-                                )
-                                yield MessageChain(
-                                    type="tool_direct_result",
-                                ).base64_image(resource.blob)
-                            else:
-                                tool_call_result_blocks.append(
-                                    ToolCallMessageSegment(
-                                        role="tool",
-                                        tool_call_id=func_tool_id,
-                                        content="The tool has returned a data type that is not supported.",
-                                    ),
-                                )
-
-                    elif resp is None:
-                        # Tool 直接请求发送消息给用户
-                        # 这里我们将直接结束 Agent Loop
-                        # 发送消息逻辑在 ToolExecutor 中处理了
-                        logger.warning(
-                            f"{func_tool_name} 没有返回值，或者已将结果直接发送给用户。"
+            executor = self.tool_executor.execute(
+                tool=func_tool,
+                run_context=self.run_context,
+                **valid_params,  # 只传递有效的参数
+            )
+
+            _final_resp: CallToolResult | None = None
+            async for resp in executor:  # type: ignore
+                if isinstance(resp, CallToolResult):
+                    res = resp
+                    _final_resp = resp
+                    if isinstance(res.content[0], TextContent):
+                        yield ToolCallMessageSegment(
+                            role="tool",
+                            tool_call_id=func_tool_id,
+                            content=res.content[0].text,
                         )
-                        self._transition_state(AgentState.DONE)
-                        self.stats.end_time = time.time()
-                        tool_call_result_blocks.append(
-                            ToolCallMessageSegment(
-                                role="tool",
-                                tool_call_id=func_tool_id,
-                                content="The tool has no return value, or has sent the result directly to the user.",
-                            ),
+                    elif isinstance(res.content[0], ImageContent):
+                        yield ToolCallMessageSegment(
+                            role="tool",
+                            tool_call_id=func_tool_id,
+                            content="The tool has successfully returned an image and sent directly to the user. You can describe it in your next response.",
                         )
-                    else:
-                        # 不应该出现其他类型
-                        logger.warning(
-                            f"Tool 返回了不支持的类型: {type(resp)}。",
+                        yield MessageChain(type="tool_direct_result").base64_image(
+                            res.content[0].data,
                         )
-                        tool_call_result_blocks.append(
-                            ToolCallMessageSegment(
+                    elif isinstance(res.content[0], EmbeddedResource):
+                        resource = res.content[0].resource
+                        if isinstance(resource, TextResourceContents):
+                            yield ToolCallMessageSegment(
                                 role="tool",
                                 tool_call_id=func_tool_id,
-                                content="*The tool has returned an unsupported type. Please tell the user to check the definition and implementation of this tool.*",
-                            ),
-                        )
+                                content=resource.text,
+                            )
+                        elif (
+                            isinstance(resource, BlobResourceContents)
+                            and resource.mimeType
+                            and resource.mimeType.startswith("image/")
+                        ):
+                            yield ToolCallMessageSegment(
+                                role="tool",
+                                tool_call_id=func_tool_id,
+                                content="The tool has successfully returned an image and sent directly to the user. You can describe it in your next response.",
+                            )
+                            yield MessageChain(
+                                type="tool_direct_result",
+                            ).base64_image(resource.blob)
+                        else:
+                            yield ToolCallMessageSegment(
+                                role="tool",
+                                tool_call_id=func_tool_id,
+                                content="The tool has returned a data type that is not supported.",
+                            )
 
-                try:
-                    await self.agent_hooks.on_tool_end(
-                        self.run_context,
-                        func_tool,
-                        func_tool_args,
-                        _final_resp,
-                        llm_response=llm_response,
+                elif resp is None:
+                    # Tool 直接请求发送消息给用户
+                    # 这里我们将直接结束 Agent Loop
+                    # 发送消息逻辑在 ToolExecutor 中处理了
+                    logger.warning(
+                        f"{func_tool_name} 没有返回值，或者已将结果直接发送给用户。"
                     )
-                except Exception as e:
-                    logger.error(f"Error in on_tool_end hook: {e}", exc_info=True)
-            except Exception as e:
-                logger.warning(traceback.format_exc())
-                tool_call_result_blocks.append(
-                    ToolCallMessageSegment(
+                    self._transition_state(AgentState.DONE)
+                    self.stats.end_time = time.time()
+                    yield ToolCallMessageSegment(
                         role="tool",
                         tool_call_id=func_tool_id,
-                        content=f"error: {e!s}",
-                    ),
-                )
-
-        # yield the last tool call result
-        if tool_call_result_blocks:
-            last_tcr_content = str(tool_call_result_blocks[-1].content)
-            yield MessageChain(
-                type="tool_call_result",
-                chain=[
-                    Json(
-                        data={
-                            "id": func_tool_id,
-                            "ts": time.time(),
-                            "result": last_tcr_content,
-                        }
+                        content="The tool has no return value, or has sent the result directly to the user.",
+                    )
+                else:
+                    # 不应该出现其他类型
+                    logger.warning(
+                        f"Tool 返回了不支持的类型: {type(resp)}。",
+                    )
+                    yield ToolCallMessageSegment(
+                        role="tool",
+                        tool_call_id=func_tool_id,
+                        content="*The tool has returned an unsupported type. Please tell the user to check the definition and implementation of this tool.*",
                     )
-                ],
-            )
 
-        # 处理函数调用响应
-        if tool_call_result_blocks:
-            yield tool_call_result_blocks
+            try:
+                await self.agent_hooks.on_tool_end(
+                    self.run_context,
+                    func_tool,
+                    func_tool_args,
+                    _final_resp,
+                    llm_response=llm_response,
+                )
+            except Exception as e:
+                logger.error(f"Error in on_tool_end hook: {e}", exc_info=True)
+        except Exception as e:
+            logger.warning(traceback.format_exc())
+            yield ToolCallMessageSegment(
+                role="tool",
+                tool_call_id=func_tool_id,
+                content=f"error: {e!s}",
+            )
 
     def _build_tool_requery_context(
         self, tool_names: list[str]
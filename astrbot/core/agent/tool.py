@@ -58,6 +58,12 @@ class FunctionTool(ToolSchema, Generic[TContext]):
     Whether the tool is active. This field is a special field for AstrBot.
     You can ignore it when integrating with other frameworks.
     """
+    concurrency_safe: bool = False
+    """
+    Whether the tool can run concurrently with other tool calls of the same LLM response.
+    Only takes effect when parallel tool calls are enabled for the agent runner.
+    Tools that mutate shared state (e.g. the event result) should keep it False.
+    """
 
     def __repr__(self):
         return f"FuncTool(name={self.name}, parameters={self.parameters}, description={self.description})"
@@ -69,16 +75,82 @@ class FunctionTool(ToolSchema, Generic[TContext]):
         )
 
 
+def _memoized(tool: FunctionTool, key: tuple, build: Callable[[], Any]) -> Any:
+    """Memoize a per-tool schema fragment on the tool instance.
+
+    The fragment is rebuilt when the tool's name, description or parameters object changes.
+    Mutating `parameters` in place is not detected.
+    """
+    memo: dict | None = getattr(tool, "_schema_memo", None)
+    if memo is None:
+        memo = {}
+        tool._schema_memo = memo  # type: ignore[attr-defined]
+    stamp = (tool.name, tool.description, tool.parameters)
+    cached = memo.get(key)
+    if (
+        cached is not None
+        and cached[0][0] == stamp[0]
+        and cached[0][1] == stamp[1]
+        and cached[0][2] is stamp[2]
+    ):
+        return cached[1]
+    value = build()
+    memo[key] = (stamp, value)
+    return value
+
+
 @dataclass
 class ToolSet:
     """A set of function tools that can be used in function calling.
 
     This class provides methods to add, remove, and retrieve tools, as well as
     convert the tools to different API formats (OpenAI, Anthropic, Google GenAI).
+
+    Tools are indexed by name, and the converted schemas are cached until the set changes.
+    Modifications made through the methods of this class bump `version`; if a tool is
+    modified in place, call `mark_changed()`.
     """
 
     tools: list[FunctionTool] = Field(default_factory=list)
 
+    def __post_init__(self):
+        self._version = 0
+        self._index: dict[str, FunctionTool] = {}
+        self._index_state: tuple | None = None
+        self._indexed_tools: list[FunctionTool] | None = None
+        self._schema_cache: dict[tuple, Any] = {}
+
+    @property
+    def version(self) -> int:
+        """A counter that increases every time the set is modified."""
+        return self._version
+
+    def mark_changed(self):
+        """Invalidate the name index and the cached schemas."""
+        self._version += 1
+        self._index_state = None
+        self._schema_cache.clear()
+
+    def _ensure_index(self) -> dict[str, FunctionTool]:
+        # `tools` is a public attribute and may be replaced or appended to directly,
+        # so the list identity and length are checked as well.
+        state = (self._version, len(self.tools))
+        if self._index_state != state or self._indexed_tools is not self.tools:
+            self._schema_cache.clear()
+            index = {}
+            for tool in self.tools:
+                index.setdefault(tool.name, tool)
+            self._index = index
+            self._index_state = state
+            self._indexed_tools = self.tools
+        return self._index
+
+    def _cached_schema(self, key: tuple, build: Callable[[], Any]) -> Any:
+        self._ensure_index()
+        if key not in self._schema_cache:
+            self._schema_cache[key] = build()
+        return self._schema_cache[key]
+
     def empty(self) -> bool:
         """Check if the tool set is empty."""
         return len(self.tools) == 0
@@ -86,22 +158,26 @@ class ToolSet:
     def add_tool(self, tool: FunctionTool):
         """Add a tool to the set."""
         # 检查是否已存在同名工具
-        for i, existing_tool in enumerate(self.tools):
-            if existing_tool.name == tool.name:
-                self.tools[i] = tool
-                return
-        self.tools.append(tool)
+        existing = self._ensure_index().get(tool.name)
+        if existing is not None:
+            for i, existing_tool in enumerate(self.tools):
+                if existing_tool is existing:
+                    self.tools[i] = tool
+                    break
+        else:
+            self.tools.append(tool)
+        self.mark_changed()
 
     def remove_tool(self, name: str):
         """Remove a tool by its name."""
+        if name not in self._ensure_index():
+            return
         self.tools = [tool for tool in self.tools if tool.name != name]
+        self.mark_changed()
 
     def get_tool(self, name: str) -> FunctionTool | None:
         """Get a tool by its name."""
-        for tool in self.tools:
-            if tool.name == name:
-                return tool
-        return None
+        return self._ensure_index().get(name)
 
     def get_light_tool_set(self) -> "ToolSet":
         """Return a light tool set with only name/description."""
@@ -151,6 +227,7 @@ class ToolSet:
         func_args: list,
         desc: str,
         handler: Callable[..., Awaitable[Any]],
+        concurrency_safe: bool = False,
     ):
         """Add a function tool to the set."""
         params = {
@@ -167,6 +244,7 @@ class ToolSet:
             parameters=params,
             description=desc,
             handler=handler,
+            concurrency_safe=concurrency_safe,
         )
         self.add_tool(_func)
 
@@ -187,38 +265,81 @@ class ToolSet:
 
     def openai_schema(self, omit_empty_parameter_field: bool = False) -> list[dict]:
         """Convert tools to OpenAI API function calling schema format."""
-        result = []
-        for tool in self.tools:
-            func_def = {"type": "function", "function": {"name": tool.name}}
-            if tool.description:
-                func_def["function"]["description"] = tool.description
-
-            if tool.parameters is not None:
-                if (
-                    tool.parameters and tool.parameters.get("properties")
-                ) or not omit_empty_parameter_field:
-                    func_def["function"]["parameters"] = tool.parameters
+        key = ("openai", omit_empty_parameter_field)
+        return list(
+            self._cached_schema(
+                key,
+                lambda: [
+                    _memoized(
+                        tool,
+                        key,
+                        lambda tool=tool: self._openai_tool_schema(
+                            tool, omit_empty_parameter_field
+                        ),
+                    )
+                    for tool in self.tools
+                ],
+            )
+        )
 
-            result.append(func_def)
-        return result
+    @staticmethod
+    def _openai_tool_schema(
+        tool: FunctionTool, omit_empty_parameter_field: bool
+    ) -> dict:
+        func_def = {"type": "function", "function": {"name": tool.name}}
+        if tool.description:
+            func_def["function"]["description"] = tool.description
+
+        if tool.parameters is not None:
+            if (
+                tool.parameters and tool.parameters.get("properties")
+            ) or not omit_empty_parameter_field:
+                func_def["function"]["parameters"] = tool.parameters
+        return func_def
 
     def anthropic_schema(self) -> list[dict]:
         """Convert tools to Anthropic API format."""
-        result = []
-        for tool in self.tools:
-            input_schema = {"type": "object"}
-            if tool.parameters:
-                input_schema["properties"] = tool.parameters.get("properties", {})
-                input_schema["required"] = tool.parameters.get("required", [])
-            tool_def = {"name": tool.name, "input_schema": input_schema}
-            if tool.description:
-                tool_def["description"] = tool.description
-            result.append(tool_def)
-        return result
+        key = ("anthropic",)
+        return list(
+            self._cached_schema(
+                key,
+                lambda: [
+                    _memoized(
+                        tool, key, lambda tool=tool: self._anthropic_tool_schema(tool)
+                    )
+                    for tool in self.tools
+                ],
+            )
+        )
+
+    @staticmethod
+    def _anthropic_tool_schema(tool: FunctionTool) -> dict:
+        input_schema = {"type": "object"}
+        if tool.parameters:
+            input_schema["properties"] = tool.parameters.get("properties", {})
+            input_schema["required"] = tool.parameters.get("required", [])
+        tool_def = {"name": tool.name, "input_schema": input_schema}
+        if tool.description:
+            tool_def["description"] = tool.description
+        return tool_def
 
     def google_schema(self) -> dict:
         """Convert tools to Google GenAI API format."""
+        key = ("google",)
+        tools = self._cached_schema(
+            key,
+            lambda: [
+                _memoized(tool, key, lambda tool=tool: self._google_tool_schema(tool))
+                for tool in self.tools
+            ],
+        )
+        declarations = {}
+        if tools:
+            declarations["function_declarations"] = list(tools)
+        return declarations
 
+    @staticmethod
+    def _google_tool_schema(tool: FunctionTool) -> dict:
         def convert_schema(schema: dict) -> dict:
             """Convert schema to Gemini API format."""
             supported_types = {
@@ -280,19 +401,12 @@ class ToolSet:
 
             return result
 
-        tools = []
-        for tool in self.tools:
-            d: dict[str, Any] = {"name": tool.name}
-            if tool.description:
-                d["description"] = tool.description
-            if tool.parameters:
-                d["parameters"] = convert_schema(tool.parameters)
-            tools.append(d)
-
-        declarations = {}
-        if tools:
-            declarations["function_declarations"] = tools
-        return declarations
+        d: dict[str, Any] = {"name": tool.name}
+        if tool.description:
+            d["description"] = tool.description
+        if tool.parameters:
+            d["parameters"] = convert_schema(tool.parameters)
+        return d
 
     @deprecated(reason="Use openai_schema() instead", version="4.0.0")
     def get_func_desc_openai_style(self, omit_empty_parameter_field: bool = False):
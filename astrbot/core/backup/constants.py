@@ -9,12 +9,14 @@ from astrbot.core.db.po import (
     Attachment,
     CommandConfig,
     CommandConflict,
+    ConversationMessage,
     ConversationV2,
     Persona,
     PlatformMessageHistory,
     PlatformSession,
     PlatformStat,
     Preference,
+    SessionConversation,
 )
 from astrbot.core.knowledge_base.models import (
     KBDocument,
@@ -38,8 +40,10 @@ from astrbot.core.utils.astrbot_path import (
 MAIN_DB_MODELS: dict[str, type[SQLModel]] = {
     "platform_stats": PlatformStat,
     "conversations": ConversationV2,
+    "conversation_messages": ConversationMessage,
     "personas": Persona,
     "preferences": Preference,
+    "session_conversations": SessionConversation,
     "platform_message_history": PlatformMessageHistory,
     "platform_sessions": PlatformSession,
     "attachments": Attachment,
@@ -74,4 +78,11 @@ def get_backup_directories() -> dict[str, str]:
 
 
 # 备份清单版本号
-BACKUP_MANIFEST_VERSION = "1.1"
+# 1.2: 主数据库改为按表存放的 NDJSON 文件（databases/main_db/<table>.ndjson）
+BACKUP_MANIFEST_VERSION = "1.2"
+
+# 主数据库 NDJSON 文件所在的目录
+MAIN_DB_NDJSON_DIR = "databases/main_db"
+
+# 流式导出/导入时每批处理的记录数
+STREAM_BATCH_SIZE = 1000
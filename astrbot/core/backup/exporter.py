@@ -2,6 +2,7 @@
 
 负责将所有数据导出为 ZIP 备份文件。
 导出格式为 JSON，这是数据库无关的方案，支持未来向 MySQL/PostgreSQL 迁移。
+主数据库的每张表以 NDJSON（每行一条记录）格式流式写入，内存占用与表的大小无关。
 """
 
 import hashlib
@@ -12,7 +13,7 @@ from datetime import datetime, timezone
 from pathlib import Path
 from typing import TYPE_CHECKING, Any
 
-from sqlalchemy import select
+from sqlalchemy import func, select
 
 from astrbot.core import logger
 from astrbot.core.config.default import VERSION
@@ -27,6 +28,8 @@ from .constants import (
     BACKUP_MANIFEST_VERSION,
     KB_METADATA_MODELS,
     MAIN_DB_MODELS,
+    MAIN_DB_NDJSON_DIR,
+    STREAM_BATCH_SIZE,
     get_backup_directories,
 )
 
@@ -64,6 +67,8 @@ class AstrBotExporter:
         self.kb_manager = kb_manager
         self.config_path = config_path
         self._checksums: dict[str, str] = {}
+        self._attachments: list[dict] = []
+        """导出附件文件所需的附件记录（仅 attachment_id 与 path）"""
 
     async def export_all(
         self,
@@ -96,12 +101,7 @@ class AstrBotExporter:
                 # 1. 导出主数据库
                 if progress_callback:
                     await progress_callback("main_db", 0, 100, "正在导出主数据库...")
-                main_data = await self._export_main_database()
-                main_db_json = json.dumps(
-                    main_data, ensure_ascii=False, indent=2, default=str
-                )
-                zf.writestr("databases/main_db.json", main_db_json)
-                self._add_checksum("databases/main_db.json", main_db_json)
+                main_stats = await self._export_main_database(zf, progress_callback)
                 if progress_callback:
                     await progress_callback("main_db", 100, 100, "主数据库导出完成")
 
@@ -171,7 +171,7 @@ class AstrBotExporter:
                 # 4. 导出附件文件
                 if progress_callback:
                     await progress_callback("attachments", 0, 100, "正在导出附件...")
-                await self._export_attachments(zf, main_data.get("attachments", []))
+                await self._export_attachments(zf, self._attachments)
                 if progress_callback:
                     await progress_callback("attachments", 100, 100, "附件导出完成")
 
@@ -187,7 +187,9 @@ class AstrBotExporter:
                 # 6. 生成 manifest
                 if progress_callback:
                     await progress_callback("manifest", 0, 100, "正在生成清单...")
-                manifest = self._generate_manifest(main_data, kb_meta_data, dir_stats)
+                manifest = self._generate_manifest(
+                    main_stats, kb_meta_data, dir_stats, self._attachments
+                )
                 manifest_json = json.dumps(manifest, ensure_ascii=False, indent=2)
                 zf.writestr("manifest.json", manifest_json)
                 if progress_callback:
@@ -203,26 +205,80 @@ class AstrBotExporter:
                 os.remove(zip_path)
             raise
 
-    async def _export_main_database(self) -> dict[str, list[dict]]:
-        """导出主数据库所有表"""
-        export_data: dict[str, list[dict]] = {}
+    async def _export_main_database(
+        self,
+        zf: zipfile.ZipFile,
+        progress_callback: Any | None = None,
+    ) -> dict[str, int]:
+        """以 NDJSON 格式流式导出主数据库所有表
+
+        通过服务端游标分批读取记录并逐行写入 ZIP，边写边计算校验和。
+
+        Returns:
+            dict: 每张表导出的记录数
+        """
+        stats: dict[str, int] = {}
+        self._attachments = []
 
         async with self.main_db.get_db() as session:
             for table_name, model_class in MAIN_DB_MODELS.items():
+                path = f"{MAIN_DB_NDJSON_DIR}/{table_name}.ndjson"
+                hasher = hashlib.sha256()
+                count = 0
                 try:
-                    result = await session.execute(select(model_class))
-                    records = result.scalars().all()
-                    export_data[table_name] = [
-                        self._model_to_dict(record) for record in records
-                    ]
-                    logger.debug(
-                        f"导出表 {table_name}: {len(export_data[table_name])} 条记录"
+                    total = await self._count_rows(session, model_class)
+                    result = await session.stream_scalars(
+                        select(model_class).execution_options(
+                            yield_per=STREAM_BATCH_SIZE
+                        )
                     )
+                    with zf.open(path, "w", force_zip64=True) as f:
+                        async for records in result.partitions(STREAM_BATCH_SIZE):
+                            lines = []
+                            for record in records:
+                                row = self._model_to_dict(record)
+                                if table_name == "attachments":
+                                    self._attachments.append(
+                                        {
+                                            "attachment_id": row.get("attachment_id"),
+                                            "path": row.get("path"),
+                                        }
+                                    )
+                                lines.append(
+                                    json.dumps(row, ensure_ascii=False, default=str)
+                                )
+                            if not lines:
+                                continue
+                            chunk = ("\n".join(lines) + "\n").encode("utf-8")
+                            f.write(chunk)
+                            hasher.update(chunk)
+                            count += len(lines)
+                            if progress_callback:
+                                await progress_callback(
+                                    "main_db",
+                                    count,
+                                    max(total, count),
+                                    f"正在导出表 {table_name}...",
+                                )
+                    logger.debug(f"导出表 {table_name}: {count} 条记录")
                 except Exception as e:
-                    logger.warning(f"导出表 {table_name} 失败: {e}")
-                    export_data[table_name] = []
+                    # 只写入了部分记录的表不能带着校验和进入备份，直接让导出失败
+                    raise RuntimeError(f"导出表 {table_name} 失败: {e}") from e
+                self._checksums[path] = f"sha256:{hasher.hexdigest()}"
+                stats[table_name] = count
 
-        return export_data
+        return stats
+
+    @staticmethod
+    async def _count_rows(session: Any, model_class: Any) -> int:
+        """统计表的记录数，仅用于进度显示"""
+        try:
+            result = await session.execute(
+                select(func.count()).select_from(model_class)
+            )
+            return int(result.scalar_one())
+        except Exception:
+            return 0
 
     async def _export_kb_metadata(self) -> dict[str, list[dict]]:
         """导出知识库元数据库"""
@@ -277,11 +333,21 @@ class AstrBotExporter:
     ) -> None:
         """导出 FAISS 索引文件"""
         try:
-            index_path = kb_helper.kb_dir / "index.faiss"
-            if index_path.exists():
-                archive_path = f"databases/kb_{kb_id}/index.faiss"
-                zf.write(str(index_path), archive_path)
-                logger.debug(f"导出 FAISS 索引: {archive_path}")
+            # 先将 WAL 中尚未保存的写操作落盘
+            vec_db = getattr(kb_helper, "vec_db", None)
+            if vec_db is not None and hasattr(vec_db, "embedding_storage"):
+                await vec_db.embedding_storage.save_index()
+            # ivf_pq 索引的原始向量保存在 index.faiss.raw 中，重建索引时需要
+            for file_name in (
+                "index.faiss",
+                "index.faiss.meta.json",
+                "index.faiss.raw",
+            ):
+                index_path = kb_helper.kb_dir / file_name
+                if index_path.exists():
+                    archive_path = f"databases/kb_{kb_id}/{file_name}"
+                    zf.write(str(index_path), archive_path)
+                    logger.debug(f"导出 FAISS 索引: {archive_path}")
         except Exception as e:
             logger.warning(f"导出 FAISS 索引失败: {e}")
 
@@ -408,11 +474,19 @@ class AstrBotExporter:
 
     def _generate_manifest(
         self,
-        main_data: dict[str, list[dict]],
+        main_stats: dict[str, int],
         kb_meta_data: dict[str, list[dict]],
         dir_stats: dict[str, dict[str, int]] | None = None,
+        attachments: list[dict] | None = None,
     ) -> dict:
-        """生成备份清单"""
+        """生成备份清单
+
+        Args:
+            main_stats: 主数据库每张表导出的记录数
+            kb_meta_data: 知识库元数据
+            dir_stats: 每个目录的统计信息
+            attachments: 附件记录
+        """
         if dir_stats is None:
             dir_stats = {}
         # 收集知识库 ID
@@ -423,7 +497,7 @@ class AstrBotExporter:
 
         # 收集附件文件列表
         attachment_files = []
-        for attachment in main_data.get("attachments", []):
+        for attachment in attachments or []:
             attachment_id = attachment.get("attachment_id", "")
             path = attachment.get("path", "")
             if attachment_id and path:
@@ -452,8 +526,11 @@ class AstrBotExporter:
                 "main_db": "v4",
                 "kb_db": "v1",
             },
+            "formats": {
+                "main_db": "ndjson",
+            },
             "tables": {
-                "main_db": list(main_data.keys()),
+                "main_db": list(main_stats.keys()),
                 "kb_metadata": list(kb_meta_data.keys()),
                 "kb_documents": kb_document_tables,
             },
@@ -464,9 +541,7 @@ class AstrBotExporter:
             "directories": list(dir_stats.keys()),
             "checksums": self._checksums,
             "statistics": {
-                "main_db": {
-                    table: len(records) for table, records in main_data.items()
-                },
+                "main_db": dict(main_stats),
                 "kb_metadata": {
                     table: len(records) for table, records in kb_meta_data.items()
                 },
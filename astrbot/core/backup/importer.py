@@ -5,20 +5,27 @@
 - 主版本（前两位）不同时直接拒绝导入
 - 小版本（第三位）不同时提示警告，用户可选择强制导入
 - 版本匹配时也需要用户确认
+
+主数据库按表逐行流式读取并分批写入，导入前先校验文件的校验和；
+导入进度会记录到备份文件旁的断点文件中，中断后可以从断点继续导入。
 """
 
+import asyncio
+import hashlib
+import io
 import json
 import os
 import shutil
 import zipfile
+from collections.abc import Iterator
 from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
 from typing import TYPE_CHECKING, Any
 
-from sqlalchemy import delete
+from sqlalchemy import delete, insert
 
-from astrbot.core import logger
+from astrbot.core import logger, sp
 from astrbot.core.config.default import VERSION
 from astrbot.core.db import BaseDatabase
 from astrbot.core.utils.astrbot_path import (
@@ -31,6 +38,8 @@ from astrbot.core.utils.version_comparator import VersionComparator
 from .constants import (
     KB_METADATA_MODELS,
     MAIN_DB_MODELS,
+    MAIN_DB_NDJSON_DIR,
+    STREAM_BATCH_SIZE,
     get_backup_directories,
 )
 
@@ -59,6 +68,17 @@ def _get_major_version(version_str: str) -> str:
     return "0.0"
 
 
+def _import_state_path(zip_path: str) -> str:
+    """导入断点文件的路径"""
+    return f"{zip_path}.import_state.json"
+
+
+def _remove_import_state(zip_path: str) -> None:
+    state_path = _import_state_path(zip_path)
+    if os.path.exists(state_path):
+        os.remove(state_path)
+
+
 CMD_CONFIG_FILE_PATH = os.path.join(get_astrbot_data_path(), "cmd_config.json")
 KB_PATH = get_astrbot_knowledge_base_path()
 
@@ -91,6 +111,8 @@ class ImportPreCheckResult:
     error: str = ""
     # 备份包含的内容摘要
     backup_summary: dict = field(default_factory=dict)
+    # 是否存在可继续的中断导入
+    resumable: bool = False
 
     def to_dict(self) -> dict:
         return {
@@ -104,6 +126,7 @@ class ImportPreCheckResult:
             "warnings": self.warnings,
             "error": self.error,
             "backup_summary": self.backup_summary,
+            "resumable": self.resumable,
         }
 
 
@@ -166,6 +189,7 @@ class AstrBotImporter:
         self.kb_manager = kb_manager
         self.config_path = config_path
         self.kb_root_dir = kb_root_dir
+        self._attachments: list[dict] = []
 
     def pre_check(self, zip_path: str) -> ImportPreCheckResult:
         """预检查备份文件
@@ -216,6 +240,9 @@ class AstrBotImporter:
                 version_check = self._check_version_compatibility(result.backup_version)
                 result.version_status = version_check["status"]
                 result.can_import = version_check["can_import"]
+                result.resumable = (
+                    self._load_import_state(zip_path, manifest) is not None
+                )
 
                 # 版本信息由前端根据 version_status 和 i18n 生成显示
                 # 不再将版本消息添加到 warnings 列表中，避免中文硬编码
@@ -284,6 +311,7 @@ class AstrBotImporter:
         zip_path: str,
         mode: str = "replace",  # "replace" 清空后导入
         progress_callback: Any | None = None,
+        resume: bool = False,
     ) -> ImportResult:
         """从 ZIP 文件导入所有数据
 
@@ -291,6 +319,7 @@ class AstrBotImporter:
             zip_path: ZIP 备份文件路径
             mode: 导入模式，目前仅支持 "replace"（清空后导入）
             progress_callback: 进度回调函数，接收参数 (stage, current, total, message)
+            resume: 从上次中断的位置继续导入主数据库，不再清空已导入的数据
 
         Returns:
             ImportResult: 导入结果
@@ -333,15 +362,29 @@ class AstrBotImporter:
                 if progress_callback:
                     await progress_callback("main_db", 0, 100, "正在导入主数据库...")
 
+                self._attachments = []
                 try:
-                    main_data_content = zf.read("databases/main_db.json")
-                    main_data = json.loads(main_data_content)
+                    if self._is_ndjson_backup(zf, manifest):
+                        imported = await self._import_main_database_stream(
+                            zf, manifest, zip_path, mode, resume, progress_callback
+                        )
+                    else:
+                        # 1.1 及更早版本的备份：整个主数据库存放在一个 JSON 文件中
+                        main_data_content = zf.read("databases/main_db.json")
+                        main_data = json.loads(main_data_content)
 
-                    if mode == "replace":
-                        await self._clear_main_db()
+                        if mode == "replace":
+                            await self._clear_main_db()
 
-                    imported = await self._import_main_database(main_data)
+                        imported = await self._import_main_database(main_data)
+                        self._attachments = main_data.get("attachments", [])
                     result.imported_tables.update(imported)
+                    # preferences 表被直接改写，需要丢弃偏好设置缓存
+                    sp.invalidate_cache()
+                    # platform_stats 被直接改写，需要重新计算各平台的消息总数
+                    await self.main_db.rebuild_platform_stats_rollup()
+                    # 旧版备份只有 sel_conv_id 偏好设置，补齐会话当前选择的对话
+                    await self.main_db.backfill_session_conversations()
                 except Exception as e:
                     result.add_error(f"导入主数据库失败: {e}")
                     return result
@@ -393,9 +436,7 @@ class AstrBotImporter:
                 if progress_callback:
                     await progress_callback("attachments", 0, 100, "正在导入附件...")
 
-                attachment_count = await self._import_attachments(
-                    zf, main_data.get("attachments", [])
-                )
+                attachment_count = await self._import_attachments(zf, self._attachments)
                 result.imported_files["attachments"] = attachment_count
 
                 if progress_callback:
@@ -511,6 +552,191 @@ class AstrBotImporter:
 
         return imported
 
+    @staticmethod
+    def _is_ndjson_backup(zf: zipfile.ZipFile, manifest: dict) -> bool:
+        """主数据库是否以按表的 NDJSON 文件存放"""
+        if manifest.get("formats", {}).get("main_db") == "ndjson":
+            return True
+        prefix = f"{MAIN_DB_NDJSON_DIR}/"
+        return any(name.startswith(prefix) for name in zf.namelist())
+
+    @staticmethod
+    def _verify_checksums(
+        zf: zipfile.ZipFile, checksums: dict[str, str], paths: list[str]
+    ) -> None:
+        """流式计算文件的校验和并与 manifest 比对，不一致时抛出 ValueError"""
+        for path in paths:
+            expected = checksums.get(path)
+            if not expected or not expected.startswith("sha256:"):
+                continue
+            hasher = hashlib.sha256()
+            with zf.open(path) as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    hasher.update(chunk)
+            if f"sha256:{hasher.hexdigest()}" != expected:
+                raise ValueError(f"备份文件 {path} 校验失败，文件可能已损坏")
+
+    @staticmethod
+    def _load_import_state(zip_path: str, manifest: dict) -> dict | None:
+        """读取与该备份匹配的导入断点"""
+        state_path = _import_state_path(zip_path)
+        if not os.path.exists(state_path):
+            return None
+        try:
+            with open(state_path, encoding="utf-8") as f:
+                state = json.load(f)
+        except Exception as e:
+            logger.warning(f"读取导入断点失败: {e}")
+            return None
+        if state.get("exported_at") != manifest.get("exported_at"):
+            return None
+        return state
+
+    @staticmethod
+    def _save_import_state(zip_path: str, state: dict) -> None:
+        state_path = _import_state_path(zip_path)
+        tmp_path = f"{state_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, state_path)
+
+    async def _import_main_database_stream(
+        self,
+        zf: zipfile.ZipFile,
+        manifest: dict,
+        zip_path: str,
+        mode: str,
+        resume: bool,
+        progress_callback: Any | None = None,
+    ) -> dict[str, int]:
+        """逐行读取每张表的 NDJSON 文件并分批写入主数据库
+
+        每批写入后更新断点文件，resume 为 True 时跳过已写入的记录。
+
+        Returns:
+            dict: 每张表导入的记录数
+        """
+        names = set(zf.namelist())
+        tables = [
+            table
+            for table in manifest.get("tables", {}).get("main_db", [])
+            if f"{MAIN_DB_NDJSON_DIR}/{table}.ndjson" in names
+        ]
+        paths = [f"{MAIN_DB_NDJSON_DIR}/{table}.ndjson" for table in tables]
+        await asyncio.to_thread(
+            self._verify_checksums, zf, manifest.get("checksums", {}), paths
+        )
+
+        state = None
+        if resume:
+            state = await asyncio.to_thread(self._load_import_state, zip_path, manifest)
+        # 断点在每批提交之后才保存，中断时最后一批可能已经写入，续传时跳过已存在的记录
+        resumed = state is not None
+        if state is None:
+            if mode == "replace":
+                await self._clear_main_db()
+            state = {"exported_at": manifest.get("exported_at"), "tables": {}}
+        else:
+            logger.info(f"从上次中断的位置继续导入: {state['tables']}")
+
+        totals = manifest.get("statistics", {}).get("main_db", {})
+        total_rows = sum(totals.get(table, 0) for table in tables)
+        done_rows = sum(state["tables"].values())
+        imported: dict[str, int] = {}
+
+        for table_name, path in zip(tables, paths):
+            model_class = MAIN_DB_MODELS.get(table_name)
+            if not model_class:
+                logger.warning(f"未知的表: {table_name}")
+                continue
+
+            skip = state["tables"].get(table_name, 0)
+            count = 0
+            for batch, line_no in self._iter_ndjson_batches(zf, path, table_name, skip):
+                count += await self._insert_batch(
+                    table_name, model_class, batch, ignore_existing=resumed
+                )
+                done_rows += len(batch)
+                state["tables"][table_name] = line_no
+                await asyncio.to_thread(self._save_import_state, zip_path, state)
+                if progress_callback:
+                    await progress_callback(
+                        "main_db",
+                        done_rows,
+                        max(total_rows, done_rows),
+                        f"正在导入表 {table_name}...",
+                    )
+
+            imported[table_name] = skip + count
+            logger.debug(f"导入表 {table_name}: {skip + count} 条记录")
+
+        # 主数据库导入完成，不再需要断点
+        await asyncio.to_thread(_remove_import_state, zip_path)
+        return imported
+
+    def _iter_ndjson_batches(
+        self, zf: zipfile.ZipFile, path: str, table_name: str, skip: int
+    ) -> Iterator[tuple[list[dict], int]]:
+        """逐行读取 NDJSON 文件，按批返回 (记录列表, 已读取的行数)
+
+        跳过前 skip 条已导入的记录，但仍会从中收集附件记录。
+        """
+        line_no = 0
+        batch: list[dict] = []
+        with zf.open(path) as raw:
+            for line in io.TextIOWrapper(raw, encoding="utf-8"):
+                if not line.strip():
+                    continue
+                line_no += 1
+                row = json.loads(line)
+                if table_name == "attachments":
+                    self._attachments.append(
+                        {
+                            "attachment_id": row.get("attachment_id"),
+                            "path": row.get("path"),
+                        }
+                    )
+                if line_no <= skip:
+                    continue
+                batch.append(row)
+                if len(batch) >= STREAM_BATCH_SIZE:
+                    yield batch, line_no
+                    batch = []
+        if batch:
+            yield batch, line_no
+
+    async def _insert_batch(
+        self,
+        table_name: str,
+        model_class: type,
+        rows: list[dict],
+        ignore_existing: bool = False,
+    ) -> int:
+        """在一个事务中写入一批记录。ignore_existing 为 True 时跳过主键已存在的记录"""
+        objs = []
+        for row in rows:
+            try:
+                row = self._convert_datetime_fields(row, model_class)
+                objs.append(model_class(**row))
+            except Exception as e:
+                logger.warning(f"导入记录到 {table_name} 失败: {e}")
+        if not objs:
+            return 0
+        async with self.main_db.get_db() as session:
+            async with session.begin():
+                if ignore_existing:
+                    table = model_class.__table__  # type: ignore[attr-defined]
+                    await session.execute(
+                        insert(table).prefix_with("OR IGNORE"),
+                        [
+                            {col.name: getattr(obj, col.name) for col in table.columns}
+                            for obj in objs
+                        ],
+                    )
+                else:
+                    session.add_all(objs)
+        return len(objs)
+
     async def _import_knowledge_bases(
         self,
         zf: zipfile.ZipFile,
@@ -563,13 +789,19 @@ class AstrBotImporter:
                 except Exception as e:
                     result.add_warning(f"导入知识库 {kb_id} 的文档失败: {e}")
 
-            # 导入 FAISS 索引
-            faiss_path = f"databases/kb_{kb_id}/index.faiss"
-            if faiss_path in zf.namelist():
+            # 导入 FAISS 索引及其元数据
+            for file_name in (
+                "index.faiss",
+                "index.faiss.meta.json",
+                "index.faiss.raw",
+            ):
+                faiss_path = f"databases/kb_{kb_id}/{file_name}"
+                if faiss_path not in zf.namelist():
+                    continue
                 try:
-                    target_path = kb_dir / "index.faiss"
+                    target_path = kb_dir / file_name
                     with zf.open(faiss_path) as src, open(target_path, "wb") as dst:
-                        dst.write(src.read())
+                        shutil.copyfileobj(src, dst)
                 except Exception as e:
                     result.add_warning(f"导入知识库 {kb_id} 的 FAISS 索引失败: {e}")
 
@@ -582,7 +814,7 @@ class AstrBotImporter:
                         target_path = kb_dir / rel_path
                         target_path.parent.mkdir(parents=True, exist_ok=True)
                         with zf.open(name) as src, open(target_path, "wb") as dst:
-                            dst.write(src.read())
+                            shutil.copyfileobj(src, dst)
                     except Exception as e:
                         result.add_warning(f"导入媒体文件 {name} 失败: {e}")
 
@@ -644,7 +876,7 @@ class AstrBotImporter:
 
                     target_path.parent.mkdir(parents=True, exist_ok=True)
                     with zf.open(name) as src, open(target_path, "wb") as dst:
-                        dst.write(src.read())
+                        shutil.copyfileobj(src, dst)
                     count += 1
                 except Exception as e:
                     logger.warning(f"导入附件 {name} 失败: {e}")
@@ -722,7 +954,7 @@ class AstrBotImporter:
                         target_path.parent.mkdir(parents=True, exist_ok=True)
 
                         with zf.open(name) as src, open(target_path, "wb") as dst:
-                            dst.write(src.read())
+                            shutil.copyfileobj(src, dst)
                         file_count += 1
                     except Exception as e:
                         result.add_warning(f"导入文件 {name} 失败: {e}")
@@ -4,8 +4,7 @@ import asyncio
 import os
 import shutil
 import subprocess
-import sys
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Any
 
 from astrbot.api import logger
@@ -17,6 +16,7 @@ from astrbot.core.utils.astrbot_path import (
 
 from ..olayer import FileSystemComponent, PythonComponent, ShellComponent
 from .base import ComputerBooter
+from .python_pool import OutputCallback, PythonWorkerPool
 
 _BLOCKED_COMMAND_PATTERNS = [
     " rm -rf ",
@@ -102,38 +102,31 @@ class LocalShellComponent(ShellComponent):
 
 @dataclass
 class LocalPythonComponent(PythonComponent):
+    pool: PythonWorkerPool = field(default_factory=PythonWorkerPool)
+
     async def exec(
         self,
         code: str,
         kernel_id: str | None = None,
         timeout: int = 30,
         silent: bool = False,
+        on_output: OutputCallback | None = None,
     ) -> dict[str, Any]:
-        def _run() -> dict[str, Any]:
-            try:
-                result = subprocess.run(
-                    [os.environ.get("PYTHON", sys.executable), "-c", code],
-                    timeout=timeout,
-                    capture_output=True,
-                    text=True,
-                )
-                stdout = "" if silent else result.stdout
-                stderr = result.stderr if result.returncode != 0 else ""
-                return {
-                    "data": {
-                        "output": {"text": stdout, "images": []},
-                        "error": stderr,
-                    }
-                }
-            except subprocess.TimeoutExpired:
-                return {
-                    "data": {
-                        "output": {"text": "", "images": []},
-                        "error": "Execution timed out.",
-                    }
-                }
-
-        return await asyncio.to_thread(_run)
+        """在预热的解释器中执行代码。相同 kernel_id 的代码共享变量；on_output 用于实时获取输出"""
+        stdout, stderr, error = await self.pool.execute(
+            code,
+            session_id=kernel_id or "",
+            timeout=timeout,
+            silent=silent,
+            on_output=on_output,
+        )
+        return {
+            "data": {
+                "output": {"text": stdout, "images": []},
+                "stderr": stderr,
+                "error": error,
+            }
+        }
 
 
 @dataclass
@@ -197,15 +190,29 @@ class LocalFileSystemComponent(FileSystemComponent):
 
 
 class LocalBooter(ComputerBooter):
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        pool_size: int = 2,
+        max_executions: int = 100,
+        max_memory_mb: int = 1024,
+        preload: list[str] | None = None,
+    ) -> None:
         self._fs = LocalFileSystemComponent()
-        self._python = LocalPythonComponent()
+        self._python = LocalPythonComponent(
+            pool=PythonWorkerPool(
+                size=pool_size,
+                max_executions=max_executions,
+                max_memory_mb=max_memory_mb,
+                preload=preload,
+            )
+        )
         self._shell = LocalShellComponent()
 
     async def boot(self, session_id: str) -> None:
         logger.info(f"Local computer booter initialized for session: {session_id}")
 
     async def shutdown(self) -> None:
+        await self._python.pool.close()
         logger.info("Local computer booter shutdown complete.")
 
     @property
@@ -0,0 +1,267 @@
+"""本地 Python 代码执行的预热进程池。
+
+- 预先启动若干个独立的 Python 解释器（python_worker.py），执行代码时无需再付出解释器启动
+  和重复导入 numpy、pandas 等库的开销；
+- 同一会话的代码总是在同一个进程中执行，并共享一个命名空间，多步骤的数据分析可以复用上一步的变量。
+  只有全局命名空间按会话隔离，同一进程中的会话共享已导入的模块、工作目录和环境变量等进程级状态；
+- 进程执行次数或内存占用超过上限后会被回收并替换，超时的进程会被直接终止；
+- 用户代码的 stdout 输出会实时回调给调用方，stderr 输出随结果一并返回。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import itertools
+import json
+import os
+import sys
+from collections.abc import Awaitable, Callable
+
+from astrbot.api import logger
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(__file__), "python_worker.py")
+
+OutputCallback = Callable[[str], Awaitable[None] | None]
+
+
+class PythonWorker:
+    """一个预热的 Python 解释器进程"""
+
+    def __init__(self, python: str, preload: list[str]) -> None:
+        self.python = python
+        self.preload = preload
+        self.proc: asyncio.subprocess.Process | None = None
+        self.executions = 0
+        self.memory_kb = 0
+        self.sessions: set[str] = set()
+        self.lock = asyncio.Lock()
+        self._ids = itertools.count()
+        self._stderr_task: asyncio.Task | None = None
+
+    @property
+    def alive(self) -> bool:
+        return self.proc is not None and self.proc.returncode is None
+
+    async def start(self):
+        self.proc = await asyncio.create_subprocess_exec(
+            self.python,
+            "-u",
+            WORKER_SCRIPT,
+            *self.preload,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            limit=16 * 1024 * 1024,
+        )
+        self._stderr_task = asyncio.create_task(self._drain_stderr())
+        msg = await self._read()
+        if msg is None or msg.get("type") != "ready":
+            await self.close()
+            raise RuntimeError("Python worker failed to start.")
+
+    async def _drain_stderr(self):
+        # 必须持续读取 stderr，否则管道写满后子进程会阻塞
+        assert self.proc and self.proc.stderr
+        async for line in self.proc.stderr:
+            logger.debug(f"[python worker] {line.decode(errors='replace').rstrip()}")
+
+    async def _read(self) -> dict | None:
+        assert self.proc and self.proc.stdout
+        while True:
+            line = await self.proc.stdout.readline()
+            if not line:
+                return None
+            try:
+                return json.loads(line)
+            except ValueError:
+                continue
+
+    async def _send(self, msg: dict):
+        assert self.proc and self.proc.stdin
+        self.proc.stdin.write((json.dumps(msg, ensure_ascii=False) + "\n").encode())
+        await self.proc.stdin.drain()
+
+    async def execute(
+        self,
+        code: str,
+        session_id: str,
+        silent: bool = False,
+        on_output: OutputCallback | None = None,
+    ) -> tuple[str, str, str]:
+        """执行代码，返回 (stdout, stderr, error)。调用方需持有 self.lock"""
+        req_id = str(next(self._ids))
+        await self._send(
+            {"id": req_id, "session": session_id, "code": code, "silent": silent}
+        )
+        self.executions += 1
+        self.sessions.add(session_id)
+        output: list[str] = []
+        errors: list[str] = []
+        while True:
+            msg = await self._read()
+            if msg is None:
+                raise RuntimeError("Python worker exited unexpectedly.")
+            if msg.get("id") != req_id:
+                continue
+            if msg.get("type") == "stdout":
+                output.append(msg["data"])
+                if on_output:
+                    ret = on_output(msg["data"])
+                    if inspect.isawaitable(ret):
+                        await ret
+            elif msg.get("type") == "stderr":
+                errors.append(msg["data"])
+            elif msg.get("type") == "result":
+                self.memory_kb = msg.get("memory_kb", 0)
+                return "".join(output), "".join(errors), msg.get("error", "")
+
+    async def drop_session(self, session_id: str):
+        if session_id in self.sessions and self.alive:
+            self.sessions.discard(session_id)
+            await self._send({"type": "drop", "session": session_id})
+
+    async def close(self):
+        if self.proc and self.proc.returncode is None:
+            self.proc.kill()
+            await self.proc.wait()
+        if self._stderr_task:
+            self._stderr_task.cancel()
+            self._stderr_task = None
+
+
+class PythonWorkerPool:
+    def __init__(
+        self,
+        size: int = 2,
+        max_executions: int = 100,
+        max_memory_mb: int = 1024,
+        preload: list[str] | None = None,
+        python: str | None = None,
+    ) -> None:
+        """Args:
+        size: 预热的解释器数量
+        max_executions: 单个解释器最多执行的次数，超过后回收
+        max_memory_mb: 单个解释器的内存占用上限，超过后回收
+        preload: 解释器启动时预先导入的模块，如 numpy、pandas
+        python: 解释器路径，默认为环境变量 PYTHON 或当前解释器
+
+        """
+        self.size = max(1, size)
+        self.max_executions = max_executions
+        self.max_memory_mb = max_memory_mb
+        self.preload = preload or []
+        self.python = python or os.environ.get("PYTHON", sys.executable)
+        self._workers: list[PythonWorker] = []
+        self._affinity: dict[str, PythonWorker] = {}
+        """会话 -> 持有该会话命名空间的解释器"""
+        self._start_lock = asyncio.Lock()
+        self._bg_tasks: set[asyncio.Task] = set()
+        self.recycled = 0
+
+    async def _spawn(self) -> PythonWorker:
+        worker = PythonWorker(self.python, self.preload)
+        await worker.start()
+        return worker
+
+    async def _ensure_started(self):
+        async with self._start_lock:
+            self._workers = [w for w in self._workers if w.alive]
+            missing = self.size - len(self._workers)
+            if missing <= 0:
+                return
+            workers = await asyncio.gather(
+                *(self._spawn() for _ in range(missing)), return_exceptions=True
+            )
+            for w in workers:
+                if isinstance(w, BaseException):
+                    logger.error(f"启动 Python 执行进程失败: {w}")
+                else:
+                    self._workers.append(w)
+            if not self._workers:
+                raise RuntimeError("No Python worker available.")
+
+    def _pick(self, session_id: str) -> PythonWorker:
+        worker = self._affinity.get(session_id)
+        if worker is None or worker not in self._workers:
+            # 新会话分配给会话数最少、且空闲的解释器
+            worker = min(
+                self._workers,
+                key=lambda w: (w.lock.locked(), len(w.sessions), w.executions),
+            )
+            self._affinity[session_id] = worker
+        return worker
+
+    async def execute(
+        self,
+        code: str,
+        session_id: str = "",
+        timeout: float = 30,
+        silent: bool = False,
+        on_output: OutputCallback | None = None,
+    ) -> tuple[str, str, str]:
+        """在会话对应的解释器中执行代码，返回 (stdout, stderr, error)"""
+        await self._ensure_started()
+        worker = self._pick(session_id)
+        async with worker.lock:
+            if not worker.alive:
+                self._retire(worker)
+                return await self.execute(code, session_id, timeout, silent, on_output)
+            try:
+                stdout, stderr, error = await asyncio.wait_for(
+                    worker.execute(code, session_id, silent, on_output), timeout
+                )
+            except asyncio.TimeoutError:
+                # 无法安全地中断正在执行的代码，直接终止并替换该解释器
+                self._retire(worker)
+                await worker.close()
+                return "", "", "Execution timed out. The session state has been reset."
+            except RuntimeError as e:
+                self._retire(worker)
+                await worker.close()
+                return "", "", f"{e} The session state has been reset."
+
+            if worker.executions >= self.max_executions or (
+                self.max_memory_mb and worker.memory_kb > self.max_memory_mb * 1024
+            ):
+                logger.info(
+                    f"回收 Python 执行进程（已执行 {worker.executions} 次，"
+                    f"内存 {worker.memory_kb // 1024} MB）。",
+                )
+                self._retire(worker)
+                await worker.close()
+            return stdout, stderr, error
+
+    def _retire(self, worker: PythonWorker):
+        """移出进程池，并在后台补充新的解释器"""
+        if worker in self._workers:
+            self._workers.remove(worker)
+            self.recycled += 1
+        for session_id in worker.sessions:
+            if self._affinity.get(session_id) is worker:
+                self._affinity.pop(session_id, None)
+        task = asyncio.create_task(self._ensure_started())
+        self._bg_tasks.add(task)
+        task.add_done_callback(self._bg_tasks.discard)
+
+    async def reset_session(self, session_id: str):
+        """清空会话的命名空间"""
+        worker = self._affinity.pop(session_id, None)
+        if worker is not None:
+            async with worker.lock:
+                await worker.drop_session(session_id)
+
+    async def close(self):
+        for task in list(self._bg_tasks):
+            task.cancel()
+        workers, self._workers = self._workers, []
+        self._affinity.clear()
+        await asyncio.gather(*(w.close() for w in workers), return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "workers": len(self._workers),
+            "busy": sum(1 for w in self._workers if w.lock.locked()),
+            "sessions": len(self._affinity),
+            "recycled": self.recycled,
+        }
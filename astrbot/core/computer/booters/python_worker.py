@@ -0,0 +1,119 @@
+"""Python 执行进程。由 PythonWorkerPool 以独立解释器启动，只依赖标准库。
+
+通过原始 stdin 接收 JSON 行格式的执行请求，通过原始 stdout 返回 JSON 行格式的输出和结果。
+用户代码的 stdout 和 stderr 输出会被实时转发；同一会话的代码共享一个命名空间。
+"""
+
+import io
+import json
+import os
+import sys
+import traceback
+
+_proto = os.fdopen(os.dup(1), "w", encoding="utf-8", buffering=1)
+_requests = os.fdopen(os.dup(0), encoding="utf-8")
+# 用户代码（及其子进程）直接写 fd 1 的内容不能混入协议流，转到 stderr
+os.dup2(2, 1)
+# 用户代码调用 input() 或读取 fd 0 时不能读走后续的请求，改为读到 EOF
+_devnull = os.open(os.devnull, os.O_RDONLY)
+os.dup2(_devnull, 0)
+os.close(_devnull)
+
+
+def _send(msg: dict):
+    _proto.write(json.dumps(msg, ensure_ascii=False) + "\n")
+    _proto.flush()
+
+
+class _StreamWriter(io.TextIOBase):
+    def __init__(self, req_id: str, stream: str, silent: bool = False):
+        self.req_id = req_id
+        self.stream = stream
+        self.silent = silent
+        self._buf: list[str] = []
+        self._size = 0
+
+    def writable(self):
+        return True
+
+    def write(self, s: str) -> int:
+        if self.silent or not s:
+            return len(s)
+        self._buf.append(s)
+        self._size += len(s)
+        if "\n" in s or self._size >= 4096:
+            self.flush()
+        return len(s)
+
+    def flush(self):
+        if self._buf:
+            _send({"id": self.req_id, "type": self.stream, "data": "".join(self._buf)})
+            self._buf = []
+            self._size = 0
+
+
+def _memory_kb() -> int:
+    try:
+        import resource
+
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # macOS 的单位是字节
+        return rss // 1024 if sys.platform == "darwin" else rss
+    except Exception:
+        return 0
+
+
+def main():
+    namespaces: dict[str, dict] = {}
+    for name in sys.argv[1:]:
+        try:
+            __import__(name)
+        except Exception:
+            pass
+    _send({"type": "ready", "pid": os.getpid()})
+
+    for line in _requests:
+        try:
+            req = json.loads(line)
+        except ValueError:
+            continue
+        req_id = req.get("id", "")
+        session = req.get("session") or ""
+        if req.get("type") == "drop":
+            namespaces.pop(session, None)
+            continue
+
+        ns = namespaces.get(session)
+        if ns is None:
+            ns = namespaces[session] = {"__name__": "__main__"}
+        writer = _StreamWriter(req_id, "stdout", bool(req.get("silent")))
+        err_writer = _StreamWriter(req_id, "stderr")
+        error = ""
+        sys.stdout = writer
+        sys.stderr = err_writer
+        try:
+            exec(compile(req.get("code", ""), "<string>", "exec"), ns)
+        except SystemExit as e:
+            if e.code not in (None, 0):
+                error = f"SystemExit: {e.code}"
+        except BaseException:
+            # 去掉 worker 自身的栈帧
+            etype, value, tb = sys.exc_info()
+            error = "".join(traceback.format_exception(etype, value, tb.tb_next))
+        finally:
+            sys.stdout = sys.__stdout__
+            sys.stderr = sys.__stderr__
+            writer.flush()
+            err_writer.flush()
+        _send(
+            {
+                "id": req_id,
+                "type": "result",
+                "error": error,
+                "memory_kb": _memory_kb(),
+            }
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -31,7 +31,22 @@ class ShipyardBooter(ComputerBooter):
         self._ship = ship
 
     async def shutdown(self) -> None:
-        pass
+        """Delete the remote ship and close the HTTP session."""
+        ship = getattr(self, "_ship", None)
+        try:
+            if ship is not None:
+                # SDK 没有提供删除接口，直接调用 Bay API
+                session = await self._sandbox_client._get_session()
+                endpoint = self._sandbox_client.endpoint_url
+                async with session.delete(f"{endpoint}/ship/{ship.id}") as response:
+                    if response.status not in (200, 204, 404):
+                        error_text = await response.text()
+                        raise Exception(
+                            f"Failed to delete ship: {response.status} {error_text}"
+                        )
+                logger.info(f"Deleted sandbox ship: {ship.id}")
+        finally:
+            await self._sandbox_client.close()
 
     @property
     def fs(self) -> FileSystemComponent:
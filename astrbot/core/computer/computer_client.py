@@ -1,6 +1,7 @@
+import asyncio
+import json
 import os
 import shutil
-import uuid
 from pathlib import Path
 
 from astrbot.api import logger
@@ -13,8 +14,13 @@ from astrbot.core.utils.astrbot_path import (
 
 from .booters.base import ComputerBooter
 from .booters.local import LocalBooter
+from .sandbox_pool import SandboxPool
 
-session_booter: dict[str, ComputerBooter] = {}
+sandbox_pools: dict[str, SandboxPool] = {}
+"""配置文件 ID -> 沙箱预热池"""
+_sandbox_pool_cfgs: dict[str, str] = {}
+"""配置文件 ID -> 创建预热池时的沙箱配置"""
+_closing_pools: set[asyncio.Task] = set()
 local_booter: ComputerBooter | None = None
 
 
@@ -50,49 +56,90 @@ async def _sync_skills_to_sandbox(booter: ComputerBooter) -> None:
                 logger.warning(f"Failed to remove temp skills zip: {zip_path}")
 
 
+def _create_booter(sandbox_cfg: dict) -> ComputerBooter:
+    booter_type = sandbox_cfg.get("booter", "shipyard")
+    if booter_type == "shipyard":
+        from .booters.shipyard import ShipyardBooter
+
+        ep = sandbox_cfg.get("shipyard_endpoint", "")
+        token = sandbox_cfg.get("shipyard_access_token", "")
+        ttl = sandbox_cfg.get("shipyard_ttl", 3600)
+        max_sessions = sandbox_cfg.get("shipyard_max_sessions", 10)
+
+        return ShipyardBooter(
+            endpoint_url=ep, access_token=token, ttl=ttl, session_num=max_sessions
+        )
+    elif booter_type == "boxlite":
+        from .booters.boxlite import BoxliteBooter
+
+        return BoxliteBooter()
+    else:
+        raise ValueError(f"Unknown booter type: {booter_type}")
+
+
+def get_sandbox_pool(conf_id: str, sandbox_cfg: dict) -> SandboxPool:
+    """获取配置文件对应的预热池。沙箱配置变化后，旧的预热池及其沙箱会在后台关闭"""
+    fingerprint = json.dumps(sandbox_cfg, sort_keys=True, default=str)
+    pool = sandbox_pools.get(conf_id)
+    if pool is not None and _sandbox_pool_cfgs.get(conf_id) == fingerprint:
+        return pool
+    # 提前检查驱动器类型，避免后台预热反复失败
+    booter_type = sandbox_cfg.get("booter", "shipyard")
+    if booter_type not in ("shipyard", "boxlite"):
+        raise ValueError(f"Unknown booter type: {booter_type}")
+    if pool is not None:
+        logger.info(f"配置文件 {conf_id} 的沙箱配置已变化，重建沙箱预热池。")
+        task = asyncio.create_task(pool.close())
+        _closing_pools.add(task)
+        task.add_done_callback(_closing_pools.discard)
+    pool = SandboxPool(
+        factory=lambda: _create_booter(sandbox_cfg),
+        prepare=_sync_skills_to_sandbox,
+        warm_size=sandbox_cfg.get("pool_size", 1),
+        idle_ttl=sandbox_cfg.get("idle_ttl", 1800),
+        health_check_interval=sandbox_cfg.get("health_check_interval", 60),
+        # 配置变化后使用新的启动 ID，避免连接到正在被旧预热池关闭的沙箱
+        key=f"{conf_id}:{fingerprint}",
+    )
+    sandbox_pools[conf_id] = pool
+    _sandbox_pool_cfgs[conf_id] = fingerprint
+    return pool
+
+
 async def get_booter(
     context: Context,
     session_id: str,
 ) -> ComputerBooter:
     config = context.get_config(umo=session_id)
-
+    conf_id = context.astrbot_config_mgr.get_conf_info(session_id)["id"]
     sandbox_cfg = config.get("provider_settings", {}).get("sandbox", {})
-    booter_type = sandbox_cfg.get("booter", "shipyard")
+    try:
+        return await get_sandbox_pool(conf_id, sandbox_cfg).acquire(session_id)
+    except Exception as e:
+        logger.error(f"Error booting sandbox for session {session_id}: {e}")
+        raise e
+
+
+def warm_up_sandbox_pool(context: Context) -> None:
+    """启动时预热默认配置的沙箱"""
+    sandbox_cfg = context.get_config().get("provider_settings", {}).get("sandbox", {})
+    if not sandbox_cfg.get("enable", False):
+        return
+    try:
+        pool = get_sandbox_pool("default", sandbox_cfg)
+        pool.start()
+    except Exception as e:
+        logger.error(f"预热沙箱失败: {e}")
+
 
-    if session_id in session_booter:
-        booter = session_booter[session_id]
-        if not await booter.available():
-            # rebuild
-            session_booter.pop(session_id, None)
-    if session_id not in session_booter:
-        uuid_str = uuid.uuid5(uuid.NAMESPACE_DNS, session_id).hex
-        if booter_type == "shipyard":
-            from .booters.shipyard import ShipyardBooter
-
-            ep = sandbox_cfg.get("shipyard_endpoint", "")
-            token = sandbox_cfg.get("shipyard_access_token", "")
-            ttl = sandbox_cfg.get("shipyard_ttl", 3600)
-            max_sessions = sandbox_cfg.get("shipyard_max_sessions", 10)
-
-            client = ShipyardBooter(
-                endpoint_url=ep, access_token=token, ttl=ttl, session_num=max_sessions
-            )
-        elif booter_type == "boxlite":
-            from .booters.boxlite import BoxliteBooter
-
-            client = BoxliteBooter()
-        else:
-            raise ValueError(f"Unknown booter type: {booter_type}")
-
-        try:
-            await client.boot(uuid_str)
-            await _sync_skills_to_sandbox(client)
-        except Exception as e:
-            logger.error(f"Error booting sandbox for session {session_id}: {e}")
-            raise e
-
-        session_booter[session_id] = client
-    return session_booter[session_id]
+async def shutdown_sandbox_pools() -> None:
+    pools = list(sandbox_pools.values())
+    sandbox_pools.clear()
+    _sandbox_pool_cfgs.clear()
+    for pool in pools:
+        await pool.close()
+    if _closing_pools:
+        await asyncio.gather(*_closing_pools, return_exceptions=True)
 
 
 def get_local_booter() -> ComputerBooter:
@@ -100,3 +147,11 @@ def get_local_booter() -> ComputerBooter:
     if local_booter is None:
         local_booter = LocalBooter()
     return local_booter
+
+
+async def shutdown_local_booter() -> None:
+    """关闭本地执行环境，终止预热的 Python 解释器"""
+    global local_booter
+    if local_booter is not None:
+        await local_booter.shutdown()
+        local_booter = None
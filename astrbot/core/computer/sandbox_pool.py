@@ -0,0 +1,229 @@
+"""沙箱预热池。
+
+- 预先启动若干个已同步 Skills 的沙箱，会话首次调用工具时直接取用，不必等待冷启动和上传 Skills；
+- 会话与沙箱绑定，之后的调用直接复用，不在请求路径上检查沙箱是否可用；
+- 后台任务定期检查沙箱健康状态、回收长时间未使用的沙箱，并补充预热池；
+- 沙箱的启动 ID 由预热池的 key 和会话（或预热序号）确定，重启后可以重新连接到仍在运行的远程沙箱。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+
+from astrbot.api import logger
+
+from .booters.base import ComputerBooter
+
+
+@dataclass
+class PooledSandbox:
+    booter: ComputerBooter
+    boot_id: str
+    session_id: str | None = None
+    last_used: float = field(default_factory=time.monotonic)
+
+
+class SandboxPool:
+    def __init__(
+        self,
+        factory: Callable[[], ComputerBooter],
+        prepare: Callable[[ComputerBooter], Awaitable[None]] | None = None,
+        warm_size: int = 1,
+        idle_ttl: float = 1800,
+        health_check_interval: float = 60,
+        key: str = "",
+    ) -> None:
+        """Args:
+        factory: 创建一个未启动的沙箱
+        prepare: 沙箱启动后的准备工作，如同步 Skills
+        warm_size: 预热的空闲沙箱数量
+        idle_ttl: 会话的沙箱在多长时间未使用后被回收
+        health_check_interval: 后台健康检查的间隔
+        key: 预热池的标识，参与生成沙箱的启动 ID
+
+        """
+        self.factory = factory
+        self.key = key
+        self._warm_seq = 0
+        self.prepare = prepare
+        self.warm_size = max(0, warm_size)
+        self.idle_ttl = idle_ttl
+        self.health_check_interval = health_check_interval
+
+        self._idle: list[PooledSandbox] = []
+        self._sessions: dict[str, PooledSandbox] = {}
+        self._booting = 0
+        self._session_locks: dict[str, asyncio.Lock] = {}
+        self._session_lock_users: dict[str, int] = {}
+        self._refill_task: asyncio.Task | None = None
+        self._maintain_task: asyncio.Task | None = None
+        self.warm_hits = 0
+        self.cold_boots = 0
+        self.evicted = 0
+
+    def _boot_id(self, session_id: str | None) -> str:
+        if session_id is None:
+            name = f"{self.key}:warm:{self._warm_seq}"
+            self._warm_seq += 1
+        else:
+            name = f"{self.key}:{session_id}" if self.key else session_id
+        return uuid.uuid5(uuid.NAMESPACE_DNS, name).hex
+
+    async def _boot(self, session_id: str | None = None) -> PooledSandbox:
+        booter = self.factory()
+        boot_id = self._boot_id(session_id)
+        await booter.boot(boot_id)
+        try:
+            if self.prepare:
+                await self.prepare(booter)
+        except BaseException:
+            await _shutdown(booter)
+            raise
+        return PooledSandbox(booter=booter, boot_id=boot_id)
+
+    async def acquire(self, session_id: str) -> ComputerBooter:
+        """获取会话绑定的沙箱。没有绑定时优先取用预热的沙箱"""
+        sandbox = self._sessions.get(session_id)
+        if sandbox is not None:
+            sandbox.last_used = time.monotonic()
+            return sandbox.booter
+
+        lock = self._session_locks.setdefault(session_id, asyncio.Lock())
+        self._session_lock_users[session_id] = (
+            self._session_lock_users.get(session_id, 0) + 1
+        )
+        try:
+            async with lock:
+                sandbox = self._sessions.get(session_id)
+                if sandbox is None:
+                    if self._idle:
+                        sandbox = self._idle.pop()
+                        self.warm_hits += 1
+                    else:
+                        self.cold_boots += 1
+                        sandbox = await self._boot(session_id)
+                    sandbox.session_id = session_id
+                    self._sessions[session_id] = sandbox
+        finally:
+            # 最后一个使用者退出时移除锁，沙箱启动失败时也不会残留
+            self._session_lock_users[session_id] -= 1
+            if not self._session_lock_users[session_id]:
+                del self._session_lock_users[session_id]
+                self._session_locks.pop(session_id, None)
+        sandbox.last_used = time.monotonic()
+        self.start()
+        return sandbox.booter
+
+    async def release(self, session_id: str) -> None:
+        """解除会话与沙箱的绑定并关闭沙箱"""
+        sandbox = self._sessions.pop(session_id, None)
+        if sandbox is not None:
+            await _shutdown(sandbox.booter)
+
+    def start(self) -> None:
+        """启动后台维护任务，并补充预热池"""
+        if self._maintain_task is None or self._maintain_task.done():
+            self._maintain_task = asyncio.create_task(self._maintain_loop())
+        self._schedule_refill()
+
+    def _schedule_refill(self) -> None:
+        if self._refill_task is None or self._refill_task.done():
+            self._refill_task = asyncio.create_task(self.refill())
+
+    async def refill(self) -> None:
+        """启动沙箱，直到预热池达到 warm_size"""
+        missing = self.warm_size - len(self._idle) - self._booting
+        if missing <= 0:
+            return
+        self._booting += missing
+        try:
+            results = await asyncio.gather(
+                *(self._boot() for _ in range(missing)), return_exceptions=True
+            )
+        finally:
+            self._booting -= missing
+        for result in results:
+            if isinstance(result, BaseException):
+                logger.error(f"预热沙箱失败: {result}")
+            else:
+                self._idle.append(result)
+
+    async def _maintain_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            try:
+                await self.maintain()
+            except Exception as e:
+                logger.error(f"维护沙箱预热池时发生错误: {e}")
+
+    async def maintain(self) -> None:
+        """回收空闲超时和不可用的沙箱，并补充预热池"""
+        now = time.monotonic()
+        expired = [
+            sid
+            for sid, sb in self._sessions.items()
+            if now - sb.last_used > self.idle_ttl
+        ]
+        for sid in expired:
+            logger.info(f"会话 {sid} 的沙箱长时间未使用，已回收。")
+            self.evicted += 1
+            await self.release(sid)
+
+        sandboxes = [*self._idle, *self._sessions.values()]
+        healths = await asyncio.gather(
+            *(_available(sb.booter) for sb in sandboxes),
+        )
+        for sandbox, healthy in zip(sandboxes, healths):
+            if healthy:
+                continue
+            logger.warning(f"沙箱 {sandbox.boot_id} 不可用，已移除。")
+            self.evicted += 1
+            if sandbox in self._idle:
+                self._idle.remove(sandbox)
+            if (
+                sandbox.session_id is not None
+                and self._sessions.get(sandbox.session_id) is sandbox
+            ):
+                # 会话下次调用工具时会重新分配沙箱
+                del self._sessions[sandbox.session_id]
+            await _shutdown(sandbox.booter)
+        await self.refill()
+
+    async def close(self) -> None:
+        for task in (self._maintain_task, self._refill_task):
+            if task is not None:
+                task.cancel()
+        self._maintain_task = self._refill_task = None
+        sandboxes = [*self._idle, *self._sessions.values()]
+        self._idle.clear()
+        self._sessions.clear()
+        await asyncio.gather(*(_shutdown(sb.booter) for sb in sandboxes))
+
+    def stats(self) -> dict:
+        return {
+            "idle": len(self._idle),
+            "sessions": len(self._sessions),
+            "booting": self._booting,
+            "warm_hits": self.warm_hits,
+            "cold_boots": self.cold_boots,
+            "evicted": self.evicted,
+        }
+
+
+async def _available(booter: ComputerBooter) -> bool:
+    try:
+        return bool(await booter.available())
+    except Exception as e:
+        logger.error(f"检查沙箱可用性失败: {e}")
+        return False
+
+
+async def _shutdown(booter: ComputerBooter) -> None:
+    try:
+        await booter.shutdown()
+    except Exception as e:
+        logger.warning(f"关闭沙箱失败: {e}")
@@ -29,6 +29,7 @@ def handle_result(result: dict) -> ToolExecResult:
     data = result.get("data", {})
     output = data.get("output", {})
     error = data.get("error", "")
+    stderr = data.get("stderr", "")
     images: list[dict] = output.get("images", [])
     text: str = output.get("text", "")
 
@@ -36,6 +37,10 @@ def handle_result(result: dict) -> ToolExecResult:
 
     if error:
         resp.content.append(mcp.types.TextContent(type="text", text=f"error: {error}"))
+    if stderr:
+        resp.content.append(
+            mcp.types.TextContent(type="text", text=f"stderr: {stderr}")
+        )
 
     if images:
         for img in images:
@@ -88,7 +93,11 @@ class LocalPythonTool(FunctionTool):
 
         sb = get_local_booter()
         try:
-            result = await sb.python.exec(code, silent=silent)
+            result = await sb.python.exec(
+                code,
+                kernel_id=context.context.event.unified_msg_origin,
+                silent=silent,
+            )
             return handle_result(result)
         except Exception as e:
             return f"Error executing code: {str(e)}"
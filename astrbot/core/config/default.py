@@ -26,6 +26,8 @@ DEFAULT_CONFIG = {
             "time": 60,
             "count": 30,
             "strategy": "stall",  # stall, discard
+            "algorithm": "token_bucket",  # token_bucket, gcra
+            "overrides": [],
         },
         "reply_prefix": "",
         "forward_threshold": 1500,
@@ -93,6 +95,7 @@ DEFAULT_CONFIG = {
         ),
         "llm_compress_keep_recent": 4,
         "llm_compress_provider_id": "",
+        "context_token_counter": "estimate",  # estimate, cl100k_base, o200k_base
         "max_context_length": -1,
         "dequeue_context_length": 1,
         "streaming_response": False,
@@ -106,6 +109,8 @@ DEFAULT_CONFIG = {
         "reachability_check": False,
         "max_agent_step": 30,
         "tool_call_timeout": 60,
+        "parallel_tool_calls": False,
+        "max_parallel_tool_calls": 4,
         "tool_schema_mode": "full",
         "llm_safety_mode": True,
         "safety_mode_strategy": "system_prompt",  # TODO: llm judge
@@ -121,6 +126,9 @@ DEFAULT_CONFIG = {
             "shipyard_access_token": "",
             "shipyard_ttl": 3600,
             "shipyard_max_sessions": 10,
+            "pool_size": 1,
+            "idle_ttl": 1800,
+            "health_check_interval": 60,
         },
         "skills": {"runtime": "sandbox"},
     },
@@ -170,6 +178,23 @@ DEFAULT_CONFIG = {
         "port": 6185,
         "disable_access_log": True,
     },
+    "event_bus": {
+        "max_concurrency": 32,
+        "max_session_queue": 100,
+        "max_total_queue": 5000,
+        "overflow_policy": "drop_oldest",  # drop_oldest, drop_newest
+        # 每条消息的事件日志限流：每秒条数与突发条数，<= 0 表示不限流
+        "event_log_rate": 20,
+        "event_log_burst": 100,
+    },
+    "platform_message_history": {
+        # 消息历史的保留天数，<= 0 表示不按时间清理
+        "retention_days": 0,
+        # 每个会话最多保留的消息条数，<= 0 表示不限制
+        "max_per_session": 0,
+        # 清理任务的执行间隔（秒）
+        "cleanup_interval": 3600,
+    },
     "platform": [],
     "platform_specific": {
         # 平台特异配置：按平台分类，平台下按功能分组
@@ -738,6 +763,14 @@ CONFIG_METADATA_2 = {
                                 "type": "string",
                                 "options": ["stall", "discard"],
                             },
+                            "algorithm": {
+                                "type": "string",
+                                "options": ["token_bucket", "gcra"],
+                            },
+                            "overrides": {
+                                "type": "list",
+                                "items": {"type": "string"},
+                            },
                         },
                     },
                     "no_permission_reply": {
@@ -2151,6 +2184,10 @@ CONFIG_METADATA_2 = {
                     "prompt_prefix": {
                         "type": "string",
                     },
+                    "context_token_counter": {
+                        "type": "string",
+                        "options": ["estimate", "cl100k_base", "o200k_base"],
+                    },
                     "max_context_length": {
                         "type": "int",
                     },
@@ -2184,6 +2221,12 @@ CONFIG_METADATA_2 = {
                     "tool_call_timeout": {
                         "type": "int",
                     },
+                    "parallel_tool_calls": {
+                        "type": "bool",
+                    },
+                    "max_parallel_tool_calls": {
+                        "type": "int",
+                    },
                     "tool_schema_mode": {
                         "type": "string",
                     },
@@ -2643,6 +2686,30 @@ CONFIG_METADATA_3 = {
                             "provider_settings.sandbox.booter": "shipyard",
                         },
                     },
+                    "provider_settings.sandbox.pool_size": {
+                        "description": "预热沙箱数量",
+                        "type": "int",
+                        "hint": "预先启动并同步好 Skills 的空闲沙箱数量，会话首次使用沙箱时无需等待启动。设为 0 则按需启动。",
+                        "condition": {
+                            "provider_settings.sandbox.enable": True,
+                        },
+                    },
+                    "provider_settings.sandbox.idle_ttl": {
+                        "description": "沙箱空闲回收时间",
+                        "type": "int",
+                        "hint": "会话的沙箱超过该时间（秒）未被使用时将被回收。",
+                        "condition": {
+                            "provider_settings.sandbox.enable": True,
+                        },
+                    },
+                    "provider_settings.sandbox.health_check_interval": {
+                        "description": "沙箱健康检查间隔",
+                        "type": "int",
+                        "hint": "后台检查沙箱可用性、回收空闲沙箱的间隔（秒）。",
+                        "condition": {
+                            "provider_settings.sandbox.enable": True,
+                        },
+                    },
                 },
                 "condition": {
                     "provider_settings.agent_runner_type": "local",
@@ -2724,6 +2791,16 @@ CONFIG_METADATA_3 = {
                             "provider_settings.agent_runner_type": "local",
                         },
                     },
+                    "provider_settings.context_token_counter": {
+                        "description": "上下文 Token 计数方式",
+                        "type": "string",
+                        "options": ["estimate", "cl100k_base", "o200k_base"],
+                        "labels": ["按字符估算", "cl100k_base 词表", "o200k_base 词表"],
+                        "hint": "用于判断是否超出模型上下文窗口。使用词表时需要安装 tiktoken，并将对应的 <名称>.tiktoken 词表文件放到 data/tokenizers 目录下，否则降级为按字符估算。",
+                        "condition": {
+                            "provider_settings.agent_runner_type": "local",
+                        },
+                    },
                 },
                 "condition": {
                     "provider_settings.agent_runner_type": "local",
@@ -2816,6 +2893,22 @@ CONFIG_METADATA_3 = {
                             "provider_settings.agent_runner_type": "local",
                         },
                     },
+                    "provider_settings.parallel_tool_calls": {
+                        "description": "并行执行工具调用",
+                        "type": "bool",
+                        "hint": "启用后，模型在同一轮中发起的多个可并发工具（如网页搜索、知识库查询、只读的 MCP 工具）会被同时执行，单个调用的超时时间为上方的工具调用超时时间。",
+                        "condition": {
+                            "provider_settings.agent_runner_type": "local",
+                        },
+                    },
+                    "provider_settings.max_parallel_tool_calls": {
+                        "description": "最大并行工具调用数",
+                        "type": "int",
+                        "condition": {
+                            "provider_settings.agent_runner_type": "local",
+                            "provider_settings.parallel_tool_calls": True,
+                        },
+                    },
                     "provider_settings.tool_schema_mode": {
                         "description": "工具调用模式",
                         "type": "string",
@@ -2952,6 +3045,18 @@ CONFIG_METADATA_3 = {
                         "type": "string",
                         "options": ["stall", "discard"],
                     },
+                    "platform_settings.rate_limit.algorithm": {
+                        "description": "速率限制算法",
+                        "type": "string",
+                        "options": ["token_bucket", "gcra"],
+                        "hint": "两种算法均允许在时间窗口内突发处理设定数量的消息，并按 计数/时间 的速率恢复额度。",
+                    },
+                    "platform_settings.rate_limit.overrides": {
+                        "description": "按平台或会话覆盖速率限制",
+                        "type": "list",
+                        "items": {"type": "string"},
+                        "hint": "格式为 <平台 ID 或会话 ID>=<计数>/<时间(秒)>，例如 aiocqhttp:GroupMessage:123=10/60。会话 ID 可使用 /sid 获取，会话规则优先于平台规则。",
+                    },
                 },
             },
             "content_safety": {
@@ -1,4 +1,4 @@
-"""AstrBot 会话-对话管理器, 维护两个本地存储, 其中一个是 json 格式的shared_preferences, 另外一个是数据库.
+"""AstrBot 会话-对话管理器, 会话当前所在的对话记录在数据库的 session_conversations 表中, 并在内存中缓存.
 
 在 AstrBot 中, 会话和对话是独立的, 会话用于标记对话窗口, 例如群聊"123456789"可以建立一个会话,
 在一个会话中可以建立多个对话, 并且支持对话的切换和删除
@@ -56,22 +56,50 @@ class ConversationManager:
                     f"会话删除回调执行失败 (session: {unified_msg_origin}): {e}",
                 )
 
-    def _convert_conv_from_v2_to_v1(self, conv_v2: ConversationV2) -> Conversation:
-        """将 ConversationV2 对象转换为 Conversation 对象"""
+    def _convert_conv_from_v2_to_v1(
+        self,
+        conv_v2: ConversationV2,
+        messages: list[dict] | None = None,
+    ) -> Conversation:
+        """将 ConversationV2 对象转换为 Conversation 对象
+
+        Args:
+            messages: 从 conversation_messages 表读取的对话历史。为空时回退到尚未迁移的 content 字段。
+
+        """
         created_at = int(conv_v2.created_at.timestamp())
         updated_at = int(conv_v2.updated_at.timestamp())
+        if not messages:
+            messages = conv_v2.content or []
         return Conversation(
             platform_id=conv_v2.platform_id,
             user_id=conv_v2.user_id,
             cid=conv_v2.conversation_id,
-            history=json.dumps(conv_v2.content or []),
+            history=json.dumps(messages),
             title=conv_v2.title,
             persona_id=conv_v2.persona_id,
             created_at=created_at,
             updated_at=updated_at,
             token_usage=conv_v2.token_usage,
+            messages=messages,
         )
 
+    async def _convert_convs_from_v2_to_v1(
+        self,
+        convs_v2: list[ConversationV2],
+    ) -> list[Conversation]:
+        """批量转换，一次查询取出所有对话的历史"""
+        messages_map = await self.db.get_conversations_messages(
+            [conv.conversation_id for conv in convs_v2],
+        )
+        return [
+            self._convert_conv_from_v2_to_v1(
+                conv,
+                messages_map.get(conv.conversation_id),
+            )
+            for conv in convs_v2
+        ]
+
     async def new_conversation(
         self,
         unified_msg_origin: str,
@@ -103,7 +131,9 @@ class ConversationManager:
             persona_id=persona_id,
         )
         self.session_conversations[unified_msg_origin] = conv.conversation_id
-        await sp.session_put(unified_msg_origin, "sel_conv_id", conv.conversation_id)
+        await self.db.set_session_conversation_id(
+            unified_msg_origin, conv.conversation_id
+        )
         return conv.conversation_id
 
     async def switch_conversation(self, unified_msg_origin: str, conversation_id: str):
@@ -115,7 +145,7 @@ class ConversationManager:
 
         """
         self.session_conversations[unified_msg_origin] = conversation_id
-        await sp.session_put(unified_msg_origin, "sel_conv_id", conversation_id)
+        await self.db.set_session_conversation_id(unified_msg_origin, conversation_id)
 
     async def delete_conversation(
         self,
@@ -136,7 +166,11 @@ class ConversationManager:
             curr_cid = await self.get_curr_conversation_id(unified_msg_origin)
             if curr_cid == conversation_id:
                 self.session_conversations.pop(unified_msg_origin, None)
-                await sp.session_remove(unified_msg_origin, "sel_conv_id")
+                await self._clear_selected_conversation(unified_msg_origin)
+
+    async def _clear_selected_conversation(self, unified_msg_origin: str) -> None:
+        await self.db.remove_session_conversation_id(unified_msg_origin)
+        await sp.session_remove(unified_msg_origin, "sel_conv_id")
 
     async def delete_conversations_by_user_id(self, unified_msg_origin: str):
         """删除会话的所有对话
@@ -147,7 +181,7 @@ class ConversationManager:
         """
         await self.db.delete_conversations_by_user_id(user_id=unified_msg_origin)
         self.session_conversations.pop(unified_msg_origin, None)
-        await sp.session_remove(unified_msg_origin, "sel_conv_id")
+        await self._clear_selected_conversation(unified_msg_origin)
 
         # 触发会话删除回调（级联清理）
         await self._trigger_session_deleted(unified_msg_origin)
@@ -163,7 +197,13 @@ class ConversationManager:
         """
         ret = self.session_conversations.get(unified_msg_origin, None)
         if not ret:
-            ret = await sp.session_get(unified_msg_origin, "sel_conv_id", None)
+            ret = await self.db.get_session_conversation_id(unified_msg_origin)
+            if not ret:
+                # 旧版本及其备份中的 sel_conv_id 偏好设置，读取后迁移到数据库
+                ret = await sp.session_get(unified_msg_origin, "sel_conv_id", None)
+                if ret:
+                    await self.db.set_session_conversation_id(unified_msg_origin, ret)
+                    await sp.session_remove(unified_msg_origin, "sel_conv_id")
             if ret:
                 self.session_conversations[unified_msg_origin] = ret
         return ret
@@ -173,6 +213,8 @@ class ConversationManager:
         unified_msg_origin: str,
         conversation_id: str,
         create_if_not_exists: bool = False,
+        last_turns: int | None = None,
+        max_tokens: int | None = None,
     ) -> Conversation | None:
         """获取会话的对话.
 
@@ -180,8 +222,10 @@ class ConversationManager:
             unified_msg_origin (str): 统一的消息来源字符串。格式为 platform_name:message_type:session_id
             conversation_id (str): 对话 ID, 是 uuid 格式的字符串
             create_if_not_exists (bool): 如果对话不存在,是否创建一个新的对话
+            last_turns (int | None): 只读取最近多少轮对话, 参见 `get_history_window`
+            max_tokens (int | None): 只读取估算 token 总数不超过该值的最近历史, 参见 `get_history_window`
         Returns:
-            conversation (Conversation): 对话对象
+            conversation (Conversation): 对话对象。指定了窗口时 history 只包含窗口内的消息
 
         """
         conv = await self.db.get_conversation_by_id(cid=conversation_id)
@@ -191,9 +235,36 @@ class ConversationManager:
             conv = await self.db.get_conversation_by_id(cid=conversation_id)
         conv_res = None
         if conv:
-            conv_res = self._convert_conv_from_v2_to_v1(conv)
+            messages = await self.get_history_window(
+                conv.conversation_id,
+                last_turns=last_turns,
+                max_tokens=max_tokens,
+            )
+            conv_res = self._convert_conv_from_v2_to_v1(conv, messages)
         return conv_res
 
+    async def get_history_window(
+        self,
+        conversation_id: str,
+        last_turns: int | None = None,
+        max_tokens: int | None = None,
+    ) -> list[dict]:
+        """获取对话最近的一段历史，只读取所需的消息。
+
+        Args:
+            conversation_id (str): 对话 ID, 是 uuid 格式的字符串
+            last_turns (int | None): 最多返回最近多少轮对话（以 user 消息为一轮的开始）
+            max_tokens (int | None): 返回的消息估算 token 总数上限, 至少包含最近一轮
+        Returns:
+            messages (list[dict]): OpenAI 格式的消息列表
+
+        """
+        return await self.db.get_conversation_messages(
+            conversation_id,
+            last_turns=last_turns,
+            max_tokens=max_tokens,
+        )
+
     async def get_conversations(
         self,
         unified_msg_origin: str | None = None,
@@ -212,11 +283,7 @@ class ConversationManager:
             user_id=unified_msg_origin,
             platform_id=platform_id,
         )
-        convs_res = []
-        for conv in convs:
-            conv_res = self._convert_conv_from_v2_to_v1(conv)
-            convs_res.append(conv_res)
-        return convs_res
+        return await self._convert_convs_from_v2_to_v1(list(convs))
 
     async def get_filtered_conversations(
         self,
@@ -244,11 +311,7 @@ class ConversationManager:
             search_query=search_query,
             **kwargs,
         )
-        convs_res = []
-        for conv in convs:
-            conv_res = self._convert_conv_from_v2_to_v1(conv)
-            convs_res.append(conv_res)
-        return convs_res, cnt
+        return await self._convert_convs_from_v2_to_v1(list(convs)), cnt
 
     async def update_conversation(
         self,
@@ -264,7 +327,8 @@ class ConversationManager:
         Args:
             unified_msg_origin (str): 统一的消息来源字符串。格式为 platform_name:message_type:session_id
             conversation_id (str): 对话 ID, 是 uuid 格式的字符串
-            history (List[Dict]): 对话历史记录, 是一个字典列表, 每个字典包含 role 和 content 字段
+            history (List[Dict]): 对话历史记录, 是一个字典列表, 每个字典包含 role 和 content 字段。
+                只重写与已存储的历史第一处不同之后的消息
             token_usage (int | None): token 使用量。None 表示不更新
 
         """
@@ -280,6 +344,39 @@ class ConversationManager:
                 token_usage=token_usage,
             )
 
+    async def update_history_window(
+        self,
+        conversation_id: str,
+        window: list[dict],
+        history: list[dict],
+        token_usage: int | None = None,
+    ) -> None:
+        """保存基于最近一段历史生成的新历史.
+
+        Args:
+            conversation_id (str): 对话 ID, 是 uuid 格式的字符串
+            window (list[dict]): 读取时得到的最近一段历史, 例如 `get_history_window` 的返回值
+            history (list[dict]): 在 window 之后追加了新消息的历史, 可能截断或压缩了 window
+            token_usage (int | None): token 使用量。None 表示不更新
+
+        window 未被修改时只追加新增的消息; 否则只比较并重写 window 对应的记录,
+        更早的消息保持不变。
+
+        """
+        if history[: len(window)] == window:
+            await self.db.append_conversation_messages(
+                conversation_id,
+                history[len(window) :],
+                token_usage=token_usage,
+            )
+        else:
+            await self.db.replace_recent_conversation_messages(
+                conversation_id,
+                len(window),
+                history,
+                token_usage=token_usage,
+            )
+
     async def update_conversation_title(
         self,
         unified_msg_origin: str,
@@ -343,7 +440,6 @@ class ConversationManager:
         conv = await self.db.get_conversation_by_id(cid=cid)
         if not conv:
             raise Exception(f"Conversation with id {cid} not found")
-        history = conv.content or []
         if isinstance(user_message, UserMessageSegment):
             user_msg_dict = user_message.model_dump()
         else:
@@ -352,11 +448,9 @@ class ConversationManager:
             assistant_msg_dict = assistant_message.model_dump()
         else:
             assistant_msg_dict = assistant_message
-        history.append(user_msg_dict)
-        history.append(assistant_msg_dict)
-        await self.db.update_conversation(
-            cid=cid,
-            content=history,
+        await self.db.append_conversation_messages(
+            cid,
+            [user_msg_dict, assistant_msg_dict],
         )
 
     async def get_human_readable_context(
@@ -378,7 +472,7 @@ class ConversationManager:
         conversation = await self.get_conversation(unified_msg_origin, conversation_id)
         if not conversation:
             return [], 0
-        history = json.loads(conversation.history)
+        history = conversation.messages or []
 
         # contexts_groups 存放按顺序的段落（每个段落是一个 str 列表），
         # 之后会被展平成一个扁平的 str 列表返回。
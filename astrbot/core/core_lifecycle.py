@@ -19,6 +19,11 @@ from asyncio import Queue
 from astrbot.api import logger, sp
 from astrbot.core import LogBroker
 from astrbot.core.astrbot_config_mgr import AstrBotConfigManager
+from astrbot.core.computer.computer_client import (
+    shutdown_local_booter,
+    shutdown_sandbox_pools,
+    warm_up_sandbox_pool,
+)
 from astrbot.core.config.default import VERSION
 from astrbot.core.conversation_mgr import ConversationManager
 from astrbot.core.db import BaseDatabase
@@ -34,6 +39,7 @@ from astrbot.core.star.star_handler import EventType, star_handlers_registry, st
 from astrbot.core.umop_config_router import UmopConfigRouter
 from astrbot.core.updator import AstrBotUpdator
 from astrbot.core.utils.llm_metadata import update_llm_metadata
+from astrbot.core.utils.media_cache import media_cache
 from astrbot.core.utils.migra_helper import migra
 
 from . import astrbot_config, html_renderer
@@ -132,7 +138,14 @@ class AstrBotCoreLifecycle:
         self.conversation_manager = ConversationManager(self.db)
 
         # 初始化平台消息历史管理器
-        self.platform_message_history_manager = PlatformMessageHistoryManager(self.db)
+        history_cfg = self.astrbot_config.get("platform_message_history", {})
+        self.platform_message_history_manager = PlatformMessageHistoryManager(
+            self.db,
+            retention_days=history_cfg.get("retention_days", 0),
+            max_per_session=history_cfg.get("max_per_session", 0),
+            cleanup_interval=history_cfg.get("cleanup_interval", 3600),
+        )
+        self.platform_message_history_manager.ensure_cleaner()
 
         # 初始化知识库管理器
         self.kb_manager = KnowledgeBaseManager(self.provider_manager)
@@ -184,6 +197,9 @@ class AstrBotCoreLifecycle:
         # 根据配置实例化各个平台适配器
         await self.platform_manager.initialize()
 
+        # 在后台预热沙箱，使会话首次调用沙箱工具时无需等待冷启动
+        warm_up_sandbox_pool(self.star_context)
+
         # 初始化关闭控制面板的事件
         self.dashboard_shutdown_event = asyncio.Event()
 
@@ -271,8 +287,16 @@ class AstrBotCoreLifecycle:
         await self.provider_manager.terminate()
         await self.platform_manager.terminate()
         await self.kb_manager.terminate()
+        await self.platform_message_history_manager.close()
+        await self.db.flush_platform_stats()
         self.dashboard_shutdown_event.set()
 
+        await self.event_bus.dispatcher.close()
+        await media_cache.close()
+        html_renderer.close()
+        await shutdown_local_booter()
+        await shutdown_sandbox_pools()
+
         # 再次遍历curr_tasks等待每个任务真正结束
         for task in self.curr_tasks:
             try:
@@ -287,6 +311,8 @@ class AstrBotCoreLifecycle:
         await self.provider_manager.terminate()
         await self.platform_manager.terminate()
         await self.kb_manager.terminate()
+        await self.platform_message_history_manager.close()
+        await self.db.flush_platform_stats()
         self.dashboard_shutdown_event.set()
         threading.Thread(
             target=self.astrbot_updator._reboot,
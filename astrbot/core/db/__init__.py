@@ -95,6 +95,31 @@ class BaseDatabase(abc.ABC):
         """Get platform statistics within the specified offset in seconds and group by platform_id."""
         ...
 
+    @abc.abstractmethod
+    async def flush_platform_stats(self) -> None:
+        """Write the buffered platform statistics to the database."""
+        ...
+
+    @abc.abstractmethod
+    async def rebuild_platform_stats_rollup(self) -> None:
+        """Recompute the per-platform total message counts from platform_stats."""
+        ...
+
+    @abc.abstractmethod
+    async def get_hourly_platform_stats(self, offset_sec: int = 86400) -> Stats:
+        """Get hourly message counts of each platform within the offset, ordered by time."""
+        ...
+
+    @abc.abstractmethod
+    async def get_grouped_platform_stats(self, offset_sec: int = 86400) -> Stats:
+        """Get message counts within the offset grouped by platform_id."""
+        ...
+
+    @abc.abstractmethod
+    async def get_platform_message_total(self) -> int:
+        """Get the total message count of all platforms."""
+        ...
+
     @abc.abstractmethod
     async def get_conversations(
         self,
@@ -133,6 +158,22 @@ class BaseDatabase(abc.ABC):
         """Get conversations filtered by platform IDs and search query."""
         ...
 
+    @abc.abstractmethod
+    async def search_conversation_messages(
+        self,
+        query: str,
+        platform_ids: list[str] | None = None,
+        limit: int = 20,
+        cursor: str | None = None,
+    ) -> tuple[list[dict], str | None]:
+        """Full-text search over conversation messages, best matches first.
+
+        Each hit has `message_id`, `conversation_id`, `seq`, `role`, `title`,
+        `user_id`, `platform_id`, `rank` and a highlighted `snippet`. Pass the
+        returned cursor back to get the next page; it is None on the last page.
+        """
+        ...
+
     @abc.abstractmethod
     async def create_conversation(
         self,
@@ -170,6 +211,57 @@ class BaseDatabase(abc.ABC):
         """Delete all conversations for a specific user."""
         ...
 
+    @abc.abstractmethod
+    async def append_conversation_messages(
+        self,
+        cid: str,
+        messages: list[dict],
+        token_usage: int | None = None,
+    ) -> None:
+        """Append OpenAI-formatted messages to the end of a conversation."""
+        ...
+
+    @abc.abstractmethod
+    async def replace_recent_conversation_messages(
+        self,
+        cid: str,
+        count: int,
+        messages: list[dict],
+        token_usage: int | None = None,
+    ) -> None:
+        """Replace the latest `count` stored messages of a conversation with `messages`.
+
+        Only those rows are compared and rewritten; older messages are kept as is.
+        """
+        ...
+
+    @abc.abstractmethod
+    async def get_conversation_messages(
+        self,
+        cid: str,
+        last_turns: int | None = None,
+        max_tokens: int | None = None,
+    ) -> list[dict]:
+        """Get the messages of a conversation in order.
+
+        When `last_turns` or `max_tokens` is given, only the most recent window is
+        returned. The window always starts at a user message and contains at least
+        the latest turn.
+        """
+        ...
+
+    @abc.abstractmethod
+    async def get_conversations_messages(
+        self,
+        cids: list[str],
+    ) -> dict[str, list[dict]]:
+        """Get the full message lists of several conversations, keyed by conversation ID.
+
+        Conversations whose history has not been migrated from `conversations.content`
+        are absent from the result.
+        """
+        ...
+
     @abc.abstractmethod
     async def insert_platform_message_history(
         self,
@@ -203,6 +295,41 @@ class BaseDatabase(abc.ABC):
         """Get platform message history for a specific user."""
         ...
 
+    @abc.abstractmethod
+    async def list_platform_message_history(
+        self,
+        platform_id: str,
+        user_id: str,
+        limit: int = 200,
+        cursor: str | None = None,
+    ) -> tuple[list[PlatformMessageHistory], str | None]:
+        """Get platform message history for a specific user, newest first.
+
+        Returns the records and a cursor for the next (older) page, or None on
+        the last page. Unlike `get_platform_message_history`, the cost of a page
+        does not grow with its position.
+        """
+        ...
+
+    @abc.abstractmethod
+    async def prune_platform_message_history(
+        self,
+        before: datetime.datetime | None = None,
+        max_per_session: int = 0,
+        batch_size: int = 1000,
+    ) -> int:
+        """Delete platform message history created before `before` and keep at
+        most `max_per_session` (<= 0 means unlimited) newest records per chat.
+
+        Returns the number of deleted records.
+        """
+        ...
+
+    @abc.abstractmethod
+    async def flush_platform_message_history(self) -> None:
+        """Wait until the queued platform message history records are written."""
+        ...
+
     @abc.abstractmethod
     async def get_platform_message_history_by_id(
         self,
@@ -211,6 +338,23 @@ class BaseDatabase(abc.ABC):
         """Get a platform message history record by its ID."""
         ...
 
+    @abc.abstractmethod
+    async def search_platform_message_history(
+        self,
+        query: str,
+        platform_id: str | None = None,
+        user_id: str | None = None,
+        limit: int = 20,
+        cursor: str | None = None,
+    ) -> tuple[list[dict], str | None]:
+        """Full-text search over platform message history, best matches first.
+
+        Each hit has `message_id`, `platform_id`, `user_id`, `sender_name`, `rank`
+        and a highlighted `snippet`. Pagination works as in
+        `search_conversation_messages`.
+        """
+        ...
+
     @abc.abstractmethod
     async def insert_attachment(
         self,
@@ -500,6 +644,26 @@ class BaseDatabase(abc.ABC):
     #     """Get all LLM messages for a specific conversation."""
     #     ...
 
+    @abc.abstractmethod
+    async def get_session_conversation_id(self, umo: str) -> str | None:
+        """Get the ID of the conversation selected by a session."""
+        ...
+
+    @abc.abstractmethod
+    async def set_session_conversation_id(self, umo: str, cid: str) -> None:
+        """Select a conversation for a session."""
+        ...
+
+    @abc.abstractmethod
+    async def backfill_session_conversations(self) -> None:
+        """Select conversations for sessions that only have a legacy `sel_conv_id` preference."""
+        ...
+
+    @abc.abstractmethod
+    async def remove_session_conversation_id(self, umo: str) -> None:
+        """Clear the selected conversation of a session."""
+        ...
+
     @abc.abstractmethod
     async def get_session_conversations(
         self,
@@ -0,0 +1,169 @@
+"""FTS5 full-text indexes over conversation messages and platform message history.
+
+The indexes are plain FTS5 tables keyed by the rowid of the source row and kept
+in sync by triggers, so every write path (including bulk deletes and backup
+imports) updates them without application code. Text is extracted from the
+JSON columns with SQLite's JSON functions.
+
+The `trigram` tokenizer is used so that substring search works for languages
+without word separators (e.g. Chinese). Trigram queries need at least three
+characters; shorter queries fall back to `instr` over the indexed text, which is
+still far smaller than the JSON it was extracted from.
+"""
+
+import sqlite3
+
+CONVERSATION_FTS = "conversation_messages_fts"
+MESSAGE_HISTORY_FTS = "platform_message_history_fts"
+
+TRIGRAM_MIN_CHARS = 3
+
+# Only user and assistant turns are indexed; tool results and system prompts
+# are large and not useful for searching.
+_INDEXED_ROLES = "('user', 'assistant')"
+
+# `value` of a non-object element is not JSON (a string element is returned as
+# plain text), so json_extract is only applied to object elements. A CASE is
+# used because SQLite does not guarantee short-circuit evaluation of AND.
+_CONVERSATION_TEXT = """
+CASE json_type(new.content, '$.content')
+    WHEN 'text' THEN json_extract(new.content, '$.content')
+    WHEN 'array' THEN (
+        SELECT group_concat(json_extract(value, '$.text'), ' ')
+        FROM json_each(new.content, '$.content')
+        WHERE CASE WHEN json_each.type = 'object'
+            THEN json_extract(value, '$.type') = 'text' ELSE 0 END
+    )
+    ELSE ''
+END
+"""
+
+_MESSAGE_HISTORY_TEXT = """
+CASE json_type(new.content, '$.message')
+    WHEN 'text' THEN json_extract(new.content, '$.message')
+    WHEN 'array' THEN coalesce((
+        SELECT group_concat(json_extract(value, '$.text'), ' ')
+        FROM json_each(new.content, '$.message')
+        WHERE CASE WHEN json_each.type = 'object'
+            THEN json_extract(value, '$.text') IS NOT NULL ELSE 0 END
+    ), '')
+    ELSE ''
+END
+"""
+
+# `new` is the trigger row; the backfill statements alias the source table as
+# `new` so that the same expressions can be reused.
+_CONVERSATION_INSERT = f"""
+INSERT INTO {CONVERSATION_FTS} (rowid, text, conversation_id, seq, role)
+SELECT new.id, {_CONVERSATION_TEXT}, new.conversation_id, new.seq, new.role
+"""
+
+_MESSAGE_HISTORY_INSERT = f"""
+INSERT INTO {MESSAGE_HISTORY_FTS} (rowid, text, sender_name, platform_id, user_id)
+SELECT new.id, {_MESSAGE_HISTORY_TEXT}, coalesce(new.sender_name, ''),
+    new.platform_id, new.user_id
+"""
+
+FTS_TABLES = {
+    CONVERSATION_FTS: f"""
+CREATE VIRTUAL TABLE {CONVERSATION_FTS} USING fts5(
+    text,
+    conversation_id UNINDEXED,
+    seq UNINDEXED,
+    role UNINDEXED,
+    tokenize = 'trigram'
+)
+""",
+    MESSAGE_HISTORY_FTS: f"""
+CREATE VIRTUAL TABLE {MESSAGE_HISTORY_FTS} USING fts5(
+    text,
+    sender_name,
+    platform_id UNINDEXED,
+    user_id UNINDEXED,
+    tokenize = 'trigram'
+)
+""",
+}
+
+FTS_BACKFILL = {
+    CONVERSATION_FTS: f"""
+{_CONVERSATION_INSERT}
+FROM conversation_messages AS new WHERE new.role IN {_INDEXED_ROLES}
+""",
+    MESSAGE_HISTORY_FTS: f"""
+{_MESSAGE_HISTORY_INSERT}
+FROM platform_message_history AS new
+""",
+}
+
+FTS_TRIGGERS = [
+    f"""
+CREATE TRIGGER IF NOT EXISTS {CONVERSATION_FTS}_ai
+AFTER INSERT ON conversation_messages BEGIN
+    {_CONVERSATION_INSERT} WHERE new.role IN {_INDEXED_ROLES};
+END
+""",
+    f"""
+CREATE TRIGGER IF NOT EXISTS {CONVERSATION_FTS}_ad
+AFTER DELETE ON conversation_messages BEGIN
+    DELETE FROM {CONVERSATION_FTS} WHERE rowid = old.id;
+END
+""",
+    f"""
+CREATE TRIGGER IF NOT EXISTS {CONVERSATION_FTS}_au
+AFTER UPDATE ON conversation_messages BEGIN
+    DELETE FROM {CONVERSATION_FTS} WHERE rowid = old.id;
+    {_CONVERSATION_INSERT} WHERE new.role IN {_INDEXED_ROLES};
+END
+""",
+    f"""
+CREATE TRIGGER IF NOT EXISTS {MESSAGE_HISTORY_FTS}_ai
+AFTER INSERT ON platform_message_history BEGIN
+    {_MESSAGE_HISTORY_INSERT};
+END
+""",
+    f"""
+CREATE TRIGGER IF NOT EXISTS {MESSAGE_HISTORY_FTS}_ad
+AFTER DELETE ON platform_message_history BEGIN
+    DELETE FROM {MESSAGE_HISTORY_FTS} WHERE rowid = old.id;
+END
+""",
+    f"""
+CREATE TRIGGER IF NOT EXISTS {MESSAGE_HISTORY_FTS}_au
+AFTER UPDATE ON platform_message_history BEGIN
+    DELETE FROM {MESSAGE_HISTORY_FTS} WHERE rowid = old.id;
+    {_MESSAGE_HISTORY_INSERT};
+END
+""",
+]
+
+
+def trigram_supported() -> bool:
+    """The trigram tokenizer was added in SQLite 3.34."""
+    return sqlite3.sqlite_version_info >= (3, 34, 0)
+
+
+def match_expression(query: str) -> str | None:
+    """Build an FTS5 MATCH expression that searches `query` as a substring.
+
+    Every whitespace-separated term must appear. Returns None when a term is too
+    short for the trigram index, in which case callers fall back to `instr`.
+    """
+    terms = query.split()
+    if not terms or any(len(term) < TRIGRAM_MIN_CHARS for term in terms):
+        return None
+    return " AND ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+def encode_cursor(rank: float, rowid: int) -> str:
+    return f"{rank!r}:{rowid}"
+
+
+def decode_cursor(cursor: str | None) -> tuple[float, int] | None:
+    if not cursor:
+        return None
+    try:
+        rank, rowid = cursor.rsplit(":", 1)
+        return float(rank), int(rowid)
+    except ValueError:
+        return None
@@ -0,0 +1,96 @@
+"""平台消息历史批量写入器。
+
+过去每条消息历史都在一个独立的事务中插入。写入器把同一时刻到达的插入请求排队，
+由一个后台任务通过一次事务批量写入 `platform_message_history`（group commit）。
+调用方仍然会等待自己的记录写入完成，因此返回的记录带有主键，且不会因延迟写入而丢失数据；
+没有并发写入时，写入器不会引入额外的等待。
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+
+from astrbot.core.db.po import PlatformMessageHistory
+from astrbot.core.log import LogManager
+
+# 本模块在 astrbot.core 初始化期间被导入，无法使用 `from astrbot.core import logger`
+logger = LogManager.GetLogger(log_name="astrbot")
+
+WriteFn = Callable[[list[PlatformMessageHistory]], Awaitable[None]]
+
+
+class PlatformMessageHistoryWriter:
+    """将并发的消息历史插入合并为批量事务。"""
+
+    def __init__(self, write_fn: WriteFn, max_batch: int = 200) -> None:
+        """Args:
+        write_fn: 批量写入函数，在一个事务中插入传入的全部记录
+        max_batch: 单个事务最多写入的记录数
+
+        """
+        self.write_fn = write_fn
+        self.max_batch = max_batch
+        self._pending: list[
+            tuple[PlatformMessageHistory, asyncio.Future[PlatformMessageHistory]]
+        ] = []
+        self._drain_task: asyncio.Task | None = None
+        self.batch_count = 0
+
+    async def insert(self, record: PlatformMessageHistory) -> PlatformMessageHistory:
+        """排队写入一条记录，并等待其所在的批次提交"""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((record, future))
+        if self._drain_task is None or self._drain_task.done():
+            # 任务在下一轮事件循环才开始执行，同一轮中到达的插入会合并到同一批次
+            self._drain_task = asyncio.create_task(self._drain())
+        return await future
+
+    async def _drain(self) -> None:
+        while self._pending:
+            batch = self._pending[: self.max_batch]
+            del self._pending[: self.max_batch]
+            try:
+                await self.write_fn([record for record, _ in batch])
+                self.batch_count += 1
+            except Exception as e:
+                if len(batch) == 1:
+                    self._fail(batch[0][1], e)
+                    continue
+                # 一条无效的记录会让整个事务回滚，逐条重试，只让出错的调用方失败
+                logger.warning(f"批量写入平台消息历史失败，逐条重试: {e}")
+                for record, future in batch:
+                    try:
+                        await self.write_fn([record])
+                    except Exception as record_error:
+                        self._fail(future, record_error)
+                    else:
+                        self._succeed(record, future)
+                continue
+            for record, future in batch:
+                self._succeed(record, future)
+
+    @staticmethod
+    def _succeed(
+        record: PlatformMessageHistory,
+        future: asyncio.Future[PlatformMessageHistory],
+    ) -> None:
+        # 调用方被取消时 future 已完成，记录仍然会写入
+        if not future.done():
+            future.set_result(record)
+
+    @staticmethod
+    def _fail(future: asyncio.Future[PlatformMessageHistory], e: Exception) -> None:
+        logger.error(f"写入平台消息历史失败: {e}")
+        if not future.done():
+            future.set_exception(e)
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    async def close(self) -> None:
+        """等待排队中的记录全部写入"""
+        if self._drain_task is not None:
+            await self._drain_task
+            self._drain_task = None
@@ -174,6 +174,7 @@ async def migration_platform_table(
                         f"迁移平台统计数据失败: {platform_id}, {platform_type}, 时间戳: {bucket_end}",
                         exc_info=True,
                     )
+    await db_helper.rebuild_platform_stats_rollup()
     logger.info(f"成功迁移 {len(platform_stats_v3)} 条旧的平台数据到新表。")
 
 
@@ -304,7 +305,7 @@ async def migration_preferences(
             session = MessageSesion.from_str(session_str=umo)
             platform_id = get_platform_id(platform_id_map, session.platform_name)
             session.platform_id = platform_id
-            await sp.put_async("umo", str(session), "sel_conv_id", conversation_id)
+            await db_helper.set_session_conversation_id(str(session), conversation_id)
             logger.info(f"迁移会话 {umo} 的对话数据到新表成功，平台 ID: {platform_id}")
         except Exception as e:
             logger.error(f"迁移会话 {umo} 的对话数据失败: {e}", exc_info=True)
@@ -0,0 +1,84 @@
+"""Migration script to move conversation history into the conversation_messages table.
+
+Before this migration, the whole history of a conversation was stored as a JSON list
+in `conversations.content` and rewritten on every turn.
+
+Changes:
+- Copies each message of `conversations.content` into `conversation_messages`
+- Clears `conversations.content` for migrated conversations
+"""
+
+from sqlalchemy import text
+from sqlmodel import col, select, update
+
+from astrbot.api import logger, sp
+from astrbot.core.db import BaseDatabase
+from astrbot.core.db.po import ConversationMessage, ConversationV2
+from astrbot.core.db.sqlite import SQLiteDatabase
+
+BATCH_SIZE = 200
+
+
+async def migrate_conversation_messages(db_helper: BaseDatabase):
+    """Move `conversations.content` into the append-only `conversation_messages` table."""
+    migration_done = await db_helper.get_preference(
+        "global", "global", "migration_done_conversation_messages_1"
+    )
+    if migration_done:
+        return
+
+    logger.info("开始执行数据库迁移（对话历史迁移至 conversation_messages 表）...")
+
+    migrated = 0
+    last_id = 0
+    try:
+        while True:
+            async with db_helper.get_db() as session:
+                async with session.begin():
+                    result = await session.execute(
+                        select(
+                            ConversationV2.inner_conversation_id,
+                            ConversationV2.conversation_id,
+                            ConversationV2.content,
+                        )
+                        .where(
+                            col(ConversationV2.inner_conversation_id) > last_id,
+                            text("json_array_length(conversations.content) > 0"),
+                        )
+                        .order_by(col(ConversationV2.inner_conversation_id))
+                        .limit(BATCH_SIZE),
+                    )
+                    rows = result.tuples().all()
+                    if not rows:
+                        break
+
+                    for inner_id, cid, content in rows:
+                        last_id = inner_id
+                        existing = (
+                            await session.execute(
+                                select(ConversationMessage.id)
+                                .where(col(ConversationMessage.conversation_id) == cid)
+                                .limit(1),
+                            )
+                        ).first()
+                        if existing is None:
+                            session.add_all(
+                                SQLiteDatabase._new_conversation_messages(
+                                    cid, content, 0
+                                ),
+                            )
+                        await session.execute(
+                            update(ConversationV2)
+                            .where(col(ConversationV2.conversation_id) == cid)
+                            .values(content=[]),
+                        )
+                        migrated += 1
+
+        await sp.put_async(
+            "global", "global", "migration_done_conversation_messages_1", True
+        )
+        logger.info(f"对话历史迁移完成，共迁移 {migrated} 个对话")
+
+    except Exception as e:
+        logger.error(f"迁移过程中发生错误: {e}", exc_info=True)
+        raise
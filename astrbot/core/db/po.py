@@ -3,7 +3,7 @@ from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from typing import TypedDict
 
-from sqlmodel import JSON, Field, SQLModel, Text, UniqueConstraint
+from sqlmodel import JSON, Field, Index, SQLModel, Text, UniqueConstraint
 
 
 class TimestampMixin(SQLModel):
@@ -38,6 +38,20 @@ class PlatformStat(SQLModel, table=True):
     )
 
 
+class PlatformStatRollup(SQLModel, table=True):
+    """Accumulated message count of each platform.
+
+    Kept in sync with `platform_stats` on every batched flush so that the total
+    message count can be read without scanning all hourly rows.
+    """
+
+    __tablename__: str = "platform_stats_rollup"
+
+    platform_id: str = Field(primary_key=True)
+    platform_type: str = Field(primary_key=True)
+    count: int = Field(default=0, nullable=False)
+
+
 class ConversationV2(TimestampMixin, SQLModel, table=True):
     __tablename__: str = "conversations"
 
@@ -72,6 +86,58 @@ class ConversationV2(TimestampMixin, SQLModel, table=True):
     )
 
 
+class ConversationMessage(SQLModel, table=True):
+    """A single OpenAI-formatted message of a conversation.
+
+    Messages are stored append-only, ordered by `seq` (0-based position in the
+    conversation history). `ConversationV2.content` is only kept for legacy
+    data that has not been migrated yet.
+    """
+
+    __tablename__: str = "conversation_messages"
+
+    id: int | None = Field(
+        default=None,
+        primary_key=True,
+        sa_column_kwargs={"autoincrement": True},
+    )
+    conversation_id: str = Field(max_length=36, nullable=False)
+    seq: int = Field(nullable=False)
+    role: str = Field(nullable=False)
+    content: dict = Field(sa_type=JSON, nullable=False)
+    """the whole message dict, e.g. {"role": "user", "content": "..."}"""
+    token_count: int = Field(default=0, nullable=False)
+    """estimated token count of this message, used by windowed reads"""
+    content_hash: str = Field(default="", max_length=40, nullable=False)
+    """sha1 of the canonical JSON of `content`, compared instead of decoding it"""
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (
+        UniqueConstraint(
+            "conversation_id",
+            "seq",
+            name="uix_conversation_message_seq",
+        ),
+    )
+
+
+class SessionConversation(SQLModel, table=True):
+    """The conversation currently selected by a session (unified_msg_origin).
+
+    Replaces the `sel_conv_id` preference, whose JSON value cannot be joined to
+    `conversations` through an index.
+    """
+
+    __tablename__: str = "session_conversations"
+
+    umo: str = Field(primary_key=True)
+    conversation_id: str = Field(max_length=36, nullable=False, index=True)
+    updated_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_column_kwargs={"onupdate": lambda: datetime.now(timezone.utc)},
+    )
+
+
 class PersonaFolder(TimestampMixin, SQLModel, table=True):
     """Persona 文件夹，支持递归层级结构。
 
@@ -188,6 +254,18 @@ class PlatformMessageHistory(TimestampMixin, SQLModel, table=True):
     )  # Name of the sender in the platform
     content: dict = Field(sa_type=JSON, nullable=False)  # a message chain list
 
+    __table_args__ = (
+        # History of one chat is read newest first, see `list_platform_message_history`.
+        Index(
+            "idx_platform_message_history_session",
+            "platform_id",
+            "user_id",
+            "created_at",
+        ),
+        # Used by the retention job to find expired rows.
+        Index("idx_platform_message_history_created_at", "created_at"),
+    )
+
 
 class PlatformSession(TimestampMixin, SQLModel, table=True):
     """Platform session table for managing user sessions across different platforms.
@@ -387,6 +465,8 @@ class Conversation:
     updated_at: int = 0
     token_usage: int = 0
     """对话的总 token 数量。AstrBot 会保留最近一次 LLM 请求返回的总 token 数，方便统计。token_usage 可能为 0，表示未知。"""
+    messages: list[dict] | None = field(default=None, repr=False, compare=False)
+    """结构化的对话列表，history 是它的 JSON 字符串形式。读取时优先使用此字段以避免重复解析。"""
 
 
 class Personality(TypedDict):
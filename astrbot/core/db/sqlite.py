@@ -1,4 +1,7 @@
 import asyncio
+import functools
+import hashlib
+import json
 import threading
 import typing as T
 from collections.abc import Awaitable, Callable
@@ -6,21 +9,26 @@ from datetime import datetime, timedelta, timezone
 
 from sqlalchemy import CursorResult
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlmodel import col, delete, desc, func, or_, select, text, update
+from sqlmodel import and_, col, delete, desc, func, or_, select, text, update
 
-from astrbot.core.db import BaseDatabase
+from astrbot.core.agent.context.token_counter import EstimateTokenCounter
+from astrbot.core.db import BaseDatabase, fts
+from astrbot.core.db.message_history_writer import PlatformMessageHistoryWriter
 from astrbot.core.db.po import (
     Attachment,
     ChatUIProject,
     CommandConfig,
     CommandConflict,
+    ConversationMessage,
     ConversationV2,
     Persona,
     PersonaFolder,
     PlatformMessageHistory,
     PlatformSession,
     PlatformStat,
+    PlatformStatRollup,
     Preference,
+    SessionConversation,
     SessionProjectRelation,
     SQLModel,
 )
@@ -30,16 +38,55 @@ from astrbot.core.db.po import (
 from astrbot.core.db.po import (
     Stats as DeprecatedStats,
 )
+from astrbot.core.db.stats_aggregator import PlatformStatsAggregator
+from astrbot.core.log import LogManager
+
+# 本模块在 astrbot.core 初始化期间被导入，无法使用 `from astrbot.core import logger`
+logger = LogManager.GetLogger(log_name="astrbot")
 
 NOT_GIVEN = T.TypeVar("NOT_GIVEN")
 TxResult = T.TypeVar("TxResult")
 
+_REBUILD_ROLLUP_SQL = """
+INSERT INTO platform_stats_rollup (platform_id, platform_type, count)
+SELECT platform_id, platform_type, SUM(count) FROM platform_stats
+GROUP BY platform_id, platform_type
+"""
+
+_BACKFILL_SESSION_CONVERSATIONS_SQL = """
+INSERT OR IGNORE INTO session_conversations (umo, conversation_id, updated_at)
+SELECT scope_id, json_extract(value, '$.val'), updated_at FROM preferences
+WHERE scope = 'umo' AND key = 'sel_conv_id'
+    AND json_extract(value, '$.val') IS NOT NULL
+"""
+
+
+def _encode_history_cursor(created_at: datetime, record_id: int | None) -> str:
+    # SQLite 中保存的时间不带时区
+    return f"{created_at.replace(tzinfo=None).isoformat()}|{record_id}"
+
+
+def _decode_history_cursor(cursor: str | None) -> tuple[datetime, int] | None:
+    if not cursor:
+        return None
+    try:
+        created_at, record_id = cursor.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(record_id)
+    except ValueError:
+        return None
+
 
 class SQLiteDatabase(BaseDatabase):
     def __init__(self, db_path: str) -> None:
         self.db_path = db_path
         self.DATABASE_URL = f"sqlite+aiosqlite:///{db_path}"
         self.inited = False
+        self.fts_enabled = False
+        """Whether the FTS5 search indexes are available."""
+        self.stats_aggregator = PlatformStatsAggregator(self._write_platform_stats)
+        self.message_history_writer = PlatformMessageHistoryWriter(
+            self._write_platform_message_history
+        )
         super().__init__()
 
     async def initialize(self) -> None:
@@ -55,6 +102,10 @@ class SQLiteDatabase(BaseDatabase):
             # 确保 personas 表有 folder_id、sort_order、skills 列（前向兼容）
             await self._ensure_persona_folder_columns(conn)
             await self._ensure_persona_skills_column(conn)
+            await self._ensure_platform_stats_rollup(conn)
+            await self._ensure_session_conversations(conn)
+            await self._ensure_platform_message_history_indexes(conn)
+            self.fts_enabled = await self._ensure_fts_indexes(conn)
             await conn.commit()
 
     async def _ensure_persona_folder_columns(self, conn) -> None:
@@ -89,6 +140,49 @@ class SQLiteDatabase(BaseDatabase):
         if "skills" not in columns:
             await conn.execute(text("ALTER TABLE personas ADD COLUMN skills JSON"))
 
+    async def _ensure_platform_stats_rollup(self, conn) -> None:
+        """旧版数据库没有 platform_stats_rollup 表，首次启动时根据 platform_stats 回填。"""
+        result = await conn.execute(text("SELECT 1 FROM platform_stats_rollup LIMIT 1"))
+        if result.first() is None:
+            await conn.execute(text(_REBUILD_ROLLUP_SQL))
+
+    async def _ensure_session_conversations(self, conn) -> None:
+        """旧版数据库把会话当前的对话存放在 sel_conv_id 偏好设置中，启动时补齐缺失的记录。"""
+        await conn.execute(text(_BACKFILL_SESSION_CONVERSATIONS_SQL))
+
+    async def _ensure_platform_message_history_indexes(self, conn) -> None:
+        """create_all 不会为已存在的表补建索引，旧版数据库在这里补建。"""
+        for index in PlatformMessageHistory.__table__.indexes:  # type: ignore[attr-defined]
+            await conn.run_sync(functools.partial(index.create, checkfirst=True))
+
+    async def _ensure_fts_indexes(self, conn) -> bool:
+        """创建全文索引及同步触发器，首次创建时根据现有数据回填。
+
+        SQLite 不支持 FTS5 或 trigram 分词器时返回 False，搜索退化为 LIKE。
+        """
+        if not fts.trigram_supported():
+            logger.warning("当前 SQLite 版本不支持 trigram 分词器，全文搜索不可用。")
+            return False
+        try:
+            # 建表、回填和触发器放在同一个保存点中，失败时整体回滚，
+            # 不会留下未回填完整的索引表导致下次启动时跳过回填
+            async with conn.begin_nested():
+                result = await conn.execute(
+                    text("SELECT name FROM sqlite_master WHERE type = 'table'"),
+                )
+                existing = {row[0] for row in result.fetchall()}
+                for table, ddl in fts.FTS_TABLES.items():
+                    if table in existing:
+                        continue
+                    await conn.execute(text(ddl))
+                    await conn.execute(text(fts.FTS_BACKFILL[table]))
+                for trigger in fts.FTS_TRIGGERS:
+                    await conn.execute(text(trigger))
+        except Exception as e:
+            logger.warning(f"创建全文索引失败，全文搜索不可用: {e}")
+            return False
+        return True
+
     # ====
     # Platform Statistics
     # ====
@@ -100,17 +194,24 @@ class SQLiteDatabase(BaseDatabase):
         count=1,
         timestamp=None,
     ) -> None:
-        """Insert a new platform statistic record."""
+        """Insert a new platform statistic record.
+
+        The count is buffered in memory and written in batches, see `flush_platform_stats`.
+        """
+        self.stats_aggregator.record(platform_id, platform_type, count, timestamp)
+
+    async def flush_platform_stats(self) -> None:
+        await self.stats_aggregator.flush()
+
+    async def _write_platform_stats(self, rows) -> None:
+        """Upsert buffered hourly counts and the per-platform rollup in one transaction."""
+        totals: dict[tuple[str, str], int] = {}
+        for _, platform_id, platform_type, count in rows:
+            key = (platform_id, platform_type)
+            totals[key] = totals.get(key, 0) + count
         async with self.get_db() as session:
             session: AsyncSession
             async with session.begin():
-                if timestamp is None:
-                    timestamp = datetime.now().replace(
-                        minute=0,
-                        second=0,
-                        microsecond=0,
-                    )
-                current_hour = timestamp
                 await session.execute(
                     text("""
                     INSERT INTO platform_stats (timestamp, platform_id, platform_type, count)
@@ -118,14 +219,49 @@ class SQLiteDatabase(BaseDatabase):
                     ON CONFLICT(timestamp, platform_id, platform_type) DO UPDATE SET
                         count = platform_stats.count + EXCLUDED.count
                     """),
-                    {
-                        "timestamp": current_hour,
-                        "platform_id": platform_id,
-                        "platform_type": platform_type,
-                        "count": count,
-                    },
+                    [
+                        {
+                            "timestamp": timestamp,
+                            "platform_id": platform_id,
+                            "platform_type": platform_type,
+                            "count": count,
+                        }
+                        for timestamp, platform_id, platform_type, count in rows
+                    ],
+                )
+                await session.execute(
+                    text("""
+                    INSERT INTO platform_stats_rollup (platform_id, platform_type, count)
+                    VALUES (:platform_id, :platform_type, :count)
+                    ON CONFLICT(platform_id, platform_type) DO UPDATE SET
+                        count = platform_stats_rollup.count + EXCLUDED.count
+                    """),
+                    [
+                        {
+                            "platform_id": platform_id,
+                            "platform_type": platform_type,
+                            "count": count,
+                        }
+                        for (platform_id, platform_type), count in totals.items()
+                    ],
                 )
 
+    async def rebuild_platform_stats_rollup(self) -> None:
+        """Recompute the rollup table after `platform_stats` was written directly, e.g. by migrations."""
+        await self.flush_platform_stats()
+        async with self.get_db() as session:
+            session: AsyncSession
+            async with session.begin():
+                await session.execute(delete(PlatformStatRollup))
+                await session.execute(text(_REBUILD_ROLLUP_SQL))
+
+    async def backfill_session_conversations(self) -> None:
+        """Copy `sel_conv_id` preferences without a session_conversations row, e.g. after a backup import."""
+        async with self.get_db() as session:
+            session: AsyncSession
+            async with session.begin():
+                await session.execute(text(_BACKFILL_SESSION_CONVERSATIONS_SQL))
+
     async def count_platform_stats(self) -> int:
         """Count the number of platform statistics records."""
         async with self.get_db() as session:
@@ -155,6 +291,73 @@ class SQLiteDatabase(BaseDatabase):
             )
             return list(result.scalars().all())
 
+    async def get_hourly_platform_stats(self, offset_sec=86400):
+        start_time = datetime.now() - timedelta(seconds=offset_sec)
+        counts: dict[tuple[datetime, str], int] = {}
+        async with self.get_db() as session:
+            session: AsyncSession
+            result = await session.execute(
+                select(
+                    PlatformStat.timestamp,
+                    PlatformStat.platform_id,
+                    PlatformStat.count,
+                ).where(PlatformStat.timestamp >= start_time),
+            )
+            for timestamp, platform_id, count in result.all():
+                key = (timestamp, platform_id)
+                counts[key] = counts.get(key, 0) + count
+        for timestamp, platform_id, _, count in self.stats_aggregator.pending_rows(
+            start_time,
+        ):
+            key = (timestamp, platform_id)
+            counts[key] = counts.get(key, 0) + count
+
+        stats = DeprecatedStats()
+        for (timestamp, platform_id), count in sorted(counts.items()):
+            stats.platform.append(
+                DeprecatedPlatformStat(
+                    name=platform_id,
+                    count=count,
+                    timestamp=int(timestamp.timestamp()),
+                ),
+            )
+        return stats
+
+    async def get_grouped_platform_stats(self, offset_sec=86400):
+        start_time = datetime.now() - timedelta(seconds=offset_sec)
+        counts: dict[str, int] = {}
+        async with self.get_db() as session:
+            session: AsyncSession
+            result = await session.execute(
+                select(PlatformStat.platform_id, func.sum(PlatformStat.count))
+                .where(PlatformStat.timestamp >= start_time)
+                .group_by(PlatformStat.platform_id),
+            )
+            for platform_id, count in result.all():
+                counts[platform_id] = count or 0
+        for _, platform_id, _, count in self.stats_aggregator.pending_rows(start_time):
+            counts[platform_id] = counts.get(platform_id, 0) + count
+
+        stats = DeprecatedStats()
+        for platform_id, count in counts.items():
+            stats.platform.append(
+                DeprecatedPlatformStat(
+                    name=platform_id,
+                    count=count,
+                    timestamp=int(start_time.timestamp()),
+                ),
+            )
+        return stats
+
+    async def get_platform_message_total(self) -> int:
+        async with self.get_db() as session:
+            session: AsyncSession
+            result = await session.execute(
+                select(func.sum(PlatformStatRollup.count)),
+            )
+            total = result.scalar_one_or_none() or 0
+        return total + self.stats_aggregator.pending_count
+
     # ====
     # Conversation Management
     # ====
@@ -211,14 +414,8 @@ class SQLiteDatabase(BaseDatabase):
                     col(ConversationV2.platform_id).in_(platform_ids),
                 )
             if search_query:
-                search_query = search_query.encode("unicode_escape").decode("utf-8")
                 base_query = base_query.where(
-                    or_(
-                        col(ConversationV2.title).ilike(f"%{search_query}%"),
-                        col(ConversationV2.content).ilike(f"%{search_query}%"),
-                        col(ConversationV2.user_id).ilike(f"%{search_query}%"),
-                        col(ConversationV2.conversation_id).ilike(f"%{search_query}%"),
-                    ),
+                    self._conversation_search_filter(search_query),
                 )
             if "message_types" in kwargs and len(kwargs["message_types"]) > 0:
                 for msg_type in kwargs["message_types"]:
@@ -230,23 +427,179 @@ class SQLiteDatabase(BaseDatabase):
                     col(ConversationV2.platform_id).in_(kwargs["platforms"]),
                 )
 
-            # Get total count matching the filters
-            count_query = select(func.count()).select_from(base_query.subquery())
-            total_count = await session.execute(count_query)
-            total = total_count.scalar_one()
-
-            # Get paginated results
+            # Get paginated results together with the total count in one pass
             offset = (page - 1) * page_size
             result_query = (
-                base_query.order_by(desc(ConversationV2.created_at))
+                base_query.add_columns(func.count().over().label("total"))
+                .order_by(desc(ConversationV2.created_at))
                 .offset(offset)
                 .limit(page_size)
             )
             result = await session.execute(result_query)
-            conversations = result.scalars().all()
+            rows = result.all()
+            conversations = [row[0] for row in rows]
+            if rows:
+                total = rows[0][1]
+            else:
+                # Page is out of range, count separately
+                count_query = select(func.count()).select_from(base_query.subquery())
+                total = (await session.execute(count_query)).scalar_one()
 
             return conversations, total
 
+    def _conversation_search_filter(self, search_query: str):
+        """Match the title, IDs or message text of a conversation."""
+        pattern = f"%{search_query}%"
+        # legacy history that has not been migrated is still stored as escaped JSON
+        escaped = search_query.encode("unicode_escape").decode("utf-8")
+        conditions = [
+            col(ConversationV2.title).ilike(pattern),
+            col(ConversationV2.user_id).ilike(pattern),
+            col(ConversationV2.conversation_id).ilike(pattern),
+            col(ConversationV2.content).ilike(f"%{escaped}%"),
+        ]
+        if self.fts_enabled:
+            where, params = self._fts_where(fts.CONVERSATION_FTS, search_query)
+            conditions.append(
+                col(ConversationV2.conversation_id).in_(
+                    select(text("conversation_id"))
+                    .select_from(text(fts.CONVERSATION_FTS))
+                    .where(text(where).bindparams(**params)),
+                ),
+            )
+        else:
+            conditions.append(
+                col(ConversationV2.conversation_id).in_(
+                    select(ConversationMessage.conversation_id).where(
+                        col(ConversationMessage.content).ilike(f"%{escaped}%"),
+                    ),
+                ),
+            )
+        return or_(*conditions)
+
+    @staticmethod
+    def _fts_where(table: str, query: str) -> tuple[str, dict]:
+        """Build the WHERE clause that matches `query` against an FTS table."""
+        match = fts.match_expression(query)
+        if match is not None:
+            return f"{table} MATCH :fts_query", {"fts_query": match}
+        # too short for the trigram index
+        return (
+            f"instr(lower({table}.text), lower(:fts_query)) > 0",
+            {"fts_query": query.strip()},
+        )
+
+    async def _fts_search(
+        self,
+        table: str,
+        columns: str,
+        query: str,
+        filters: list[str],
+        params: dict,
+        limit: int,
+        cursor: str | None,
+    ) -> tuple[list[dict], str | None]:
+        """Run a ranked, keyset-paginated search over an FTS table.
+
+        Results are ordered by bm25 rank (best first), then rowid. The returned
+        cursor is passed back to fetch the next page.
+        """
+        where, match_params = self._fts_where(table, query)
+        ranked = "MATCH" in where
+        rank = f"{table}.rank" if ranked else "0.0"
+        conditions = [where, *filters]
+        after = fts.decode_cursor(cursor)
+        if after is not None:
+            conditions.append(
+                f"({rank} > :after_rank OR ({rank} = :after_rank "
+                f"AND {table}.rowid > :after_id))",
+            )
+            params = {**params, "after_rank": after[0], "after_id": after[1]}
+        sql = (
+            f"SELECT {table}.rowid AS rowid, {rank} AS rank, "
+            f"snippet({table}, 0, '<mark>', '</mark>', '…', 24) AS snippet, "
+            f"{columns} "
+            f"WHERE {' AND '.join(conditions)} "
+            f"ORDER BY {rank}, {table}.rowid LIMIT :limit"
+        )
+        async with self.get_db() as session:
+            session: AsyncSession
+            result = await session.execute(
+                text(sql),
+                {**params, **match_params, "limit": limit + 1},
+            )
+            rows = [dict(row) for row in result.mappings().all()]
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = fts.encode_cursor(rows[-1]["rank"], rows[-1]["rowid"])
+        return rows, next_cursor
+
+    async def search_conversation_messages(
+        self,
+        query,
+        platform_ids=None,
+        limit=20,
+        cursor=None,
+    ):
+        if not self.fts_enabled or not query.strip():
+            return [], None
+        filters = []
+        params = {}
+        if platform_ids:
+            names = [f":platform_{i}" for i in range(len(platform_ids))]
+            filters.append(f"c.platform_id IN ({', '.join(names)})")
+            params.update({f"platform_{i}": p for i, p in enumerate(platform_ids)})
+        table = fts.CONVERSATION_FTS
+        rows, next_cursor = await self._fts_search(
+            table,
+            f"{table}.conversation_id AS conversation_id, {table}.seq AS seq, "
+            f"{table}.role AS role, c.title AS title, c.user_id AS user_id, "
+            f"c.platform_id AS platform_id FROM {table} "
+            f"JOIN conversations AS c ON c.conversation_id = {table}.conversation_id",
+            query,
+            filters,
+            params,
+            limit,
+            cursor,
+        )
+        for row in rows:
+            row["message_id"] = row.pop("rowid")
+        return rows, next_cursor
+
+    async def search_platform_message_history(
+        self,
+        query,
+        platform_id=None,
+        user_id=None,
+        limit=20,
+        cursor=None,
+    ):
+        if not self.fts_enabled or not query.strip():
+            return [], None
+        table = fts.MESSAGE_HISTORY_FTS
+        filters = []
+        params = {}
+        if platform_id:
+            filters.append(f"{table}.platform_id = :platform_id")
+            params["platform_id"] = platform_id
+        if user_id:
+            filters.append(f"{table}.user_id = :user_id")
+            params["user_id"] = user_id
+        rows, next_cursor = await self._fts_search(
+            table,
+            f"{table}.platform_id AS platform_id, {table}.user_id AS user_id, "
+            f"{table}.sender_name AS sender_name FROM {table}",
+            query,
+            filters,
+            params,
+            limit,
+            cursor,
+        )
+        for row in rows:
+            row["message_id"] = row.pop("rowid")
+        return rows, next_cursor
+
     async def create_conversation(
         self,
         user_id,
@@ -270,13 +623,19 @@ class SQLiteDatabase(BaseDatabase):
             async with session.begin():
                 new_conversation = ConversationV2(
                     user_id=user_id,
-                    content=content or [],
+                    content=[],
                     platform_id=platform_id,
                     title=title,
                     persona_id=persona_id,
                     **kwargs,
                 )
                 session.add(new_conversation)
+                if content:
+                    session.add_all(
+                        self._new_conversation_messages(
+                            new_conversation.conversation_id, content, 0
+                        ),
+                    )
                 return new_conversation
 
     async def update_conversation(
@@ -294,7 +653,9 @@ class SQLiteDatabase(BaseDatabase):
                 if persona_id is not None:
                     values["persona_id"] = persona_id
                 if content is not None:
-                    values["content"] = content
+                    await self._migrate_legacy_content(session, cid)
+                    await self._sync_conversation_messages(session, cid, content)
+                    values["updated_at"] = datetime.now(timezone.utc)
                 if token_usage is not None:
                     values["token_usage"] = token_usage
                 if not values:
@@ -307,6 +668,11 @@ class SQLiteDatabase(BaseDatabase):
         async with self.get_db() as session:
             session: AsyncSession
             async with session.begin():
+                await session.execute(
+                    delete(ConversationMessage).where(
+                        col(ConversationMessage.conversation_id) == cid,
+                    ),
+                )
                 await session.execute(
                     delete(ConversationV2).where(
                         col(ConversationV2.conversation_id) == cid,
@@ -317,108 +683,348 @@ class SQLiteDatabase(BaseDatabase):
         async with self.get_db() as session:
             session: AsyncSession
             async with session.begin():
+                await session.execute(
+                    delete(ConversationMessage).where(
+                        col(ConversationMessage.conversation_id).in_(
+                            select(ConversationV2.conversation_id).where(
+                                col(ConversationV2.user_id) == user_id,
+                            ),
+                        ),
+                    ),
+                )
                 await session.execute(
                     delete(ConversationV2).where(
                         col(ConversationV2.user_id) == user_id
                     ),
                 )
 
-    async def get_session_conversations(
+    # ====
+    # Conversation Messages
+    # ====
+
+    @staticmethod
+    def _message_hash(message: dict) -> str:
+        canonical = json.dumps(message, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def _new_conversation_messages(
+        cls,
+        cid: str,
+        messages: list[dict],
+        start_seq: int,
+    ) -> list[ConversationMessage]:
+        counter = EstimateTokenCounter()
+        return [
+            ConversationMessage(
+                conversation_id=cid,
+                seq=start_seq + i,
+                role=str(message.get("role", "")),
+                content=message,
+                token_count=counter.count_dict_tokens(message),
+                content_hash=cls._message_hash(message),
+            )
+            for i, message in enumerate(messages)
+        ]
+
+    async def _count_conversation_messages(self, session: AsyncSession, cid) -> int:
+        result = await session.execute(
+            select(func.count(col(ConversationMessage.id))).where(
+                col(ConversationMessage.conversation_id) == cid,
+            ),
+        )
+        return result.scalar_one()
+
+    async def _migrate_legacy_content(self, session: AsyncSession, cid) -> int:
+        """Move history still stored in `conversations.content` to the messages table.
+
+        Returns the number of messages stored for the conversation.
+        """
+        count = await self._count_conversation_messages(session, cid)
+        result = await session.execute(
+            select(ConversationV2.content).where(
+                col(ConversationV2.conversation_id) == cid,
+            ),
+        )
+        legacy = result.scalar_one_or_none()
+        if not legacy:
+            return count
+        if count == 0:
+            session.add_all(self._new_conversation_messages(cid, legacy, 0))
+            await session.flush()
+            count = len(legacy)
+        await session.execute(
+            update(ConversationV2)
+            .where(col(ConversationV2.conversation_id) == cid)
+            .values(content=[]),
+        )
+        return count
+
+    async def _sync_conversation_messages(
         self,
-        page=1,
-        page_size=20,
-        search_query=None,
-        platform=None,
-    ) -> tuple[list[dict], int]:
-        """Get paginated session conversations with joined conversation and persona details."""
+        session: AsyncSession,
+        cid,
+        messages: list[dict],
+        start_seq: int = 0,
+    ) -> None:
+        """Make the stored messages from `start_seq` on equal to `messages`.
+
+        Stored rows are compared by `content_hash`, so their content is never read
+        or decoded. Rows from the first difference on (edits, truncation,
+        compression) are replaced and the rest of `messages` is appended.
+        """
+        unchanged = start_seq
+        result = await session.execute(
+            select(ConversationMessage.seq, ConversationMessage.content_hash)
+            .where(
+                col(ConversationMessage.conversation_id) == cid,
+                col(ConversationMessage.seq) >= start_seq,
+            )
+            .order_by(ConversationMessage.seq),
+        )
+        rows = result.tuples().all()
+        for seq, content_hash in rows:
+            index = seq - start_seq
+            if (
+                seq != unchanged
+                or index >= len(messages)
+                or content_hash != self._message_hash(messages[index])
+            ):
+                break
+            unchanged += 1
+        if unchanged < start_seq + len(rows):
+            await session.execute(
+                delete(ConversationMessage).where(
+                    col(ConversationMessage.conversation_id) == cid,
+                    col(ConversationMessage.seq) >= unchanged,
+                ),
+            )
+        session.add_all(
+            self._new_conversation_messages(
+                cid, messages[unchanged - start_seq :], unchanged
+            ),
+        )
+
+    @staticmethod
+    def _touch_conversation_values(token_usage) -> dict:
+        values = {"updated_at": datetime.now(timezone.utc)}
+        if token_usage is not None:
+            values["token_usage"] = token_usage
+        return values
+
+    async def append_conversation_messages(self, cid, messages, token_usage=None):
         async with self.get_db() as session:
             session: AsyncSession
-            offset = (page - 1) * page_size
+            async with session.begin():
+                count = await self._migrate_legacy_content(session, cid)
+                session.add_all(self._new_conversation_messages(cid, messages, count))
+                await session.execute(
+                    update(ConversationV2)
+                    .where(col(ConversationV2.conversation_id) == cid)
+                    .values(**self._touch_conversation_values(token_usage)),
+                )
 
-            base_query = (
-                select(
-                    col(Preference.scope_id).label("session_id"),
-                    func.json_extract(Preference.value, "$.val").label(
-                        "conversation_id",
-                    ),  # type: ignore
-                    col(ConversationV2.persona_id).label("persona_id"),
-                    col(ConversationV2.title).label("title"),
-                    col(Persona.persona_id).label("persona_name"),
-                )
-                .select_from(Preference)
-                .outerjoin(
-                    ConversationV2,
-                    func.json_extract(Preference.value, "$.val")
-                    == ConversationV2.conversation_id,
+    async def replace_recent_conversation_messages(
+        self, cid, count, messages, token_usage=None
+    ):
+        async with self.get_db() as session:
+            session: AsyncSession
+            async with session.begin():
+                total = await self._migrate_legacy_content(session, cid)
+                await self._sync_conversation_messages(
+                    session, cid, messages, start_seq=max(total - count, 0)
                 )
-                .outerjoin(
-                    Persona,
-                    col(ConversationV2.persona_id) == Persona.persona_id,
+                await session.execute(
+                    update(ConversationV2)
+                    .where(col(ConversationV2.conversation_id) == cid)
+                    .values(**self._touch_conversation_values(token_usage)),
                 )
-                .where(Preference.scope == "umo", Preference.key == "sel_conv_id")
-            )
 
-            # 搜索筛选
-            if search_query:
-                search_pattern = f"%{search_query}%"
-                base_query = base_query.where(
-                    or_(
-                        col(Preference.scope_id).ilike(search_pattern),
-                        col(ConversationV2.title).ilike(search_pattern),
-                        col(Persona.persona_id).ilike(search_pattern),
-                    ),
+    async def get_conversation_messages(self, cid, last_turns=None, max_tokens=None):
+        async with self.get_db() as session:
+            session: AsyncSession
+            start_seq = 0
+            if last_turns is not None and last_turns > 0:
+                result = await session.execute(
+                    select(ConversationMessage.seq)
+                    .where(
+                        col(ConversationMessage.conversation_id) == cid,
+                        col(ConversationMessage.role) == "user",
+                    )
+                    .order_by(desc(ConversationMessage.seq))
+                    .offset(last_turns - 1)
+                    .limit(1),
                 )
+                start_seq = result.scalar_one_or_none() or 0
 
-            # 平台筛选
-            if platform:
-                platform_pattern = f"{platform}:%"
-                base_query = base_query.where(
-                    col(Preference.scope_id).like(platform_pattern),
+            if max_tokens is not None:
+                # 只读取 seq / role / token_count，从最新的消息向前累加
+                result = await session.execute(
+                    select(
+                        ConversationMessage.seq,
+                        ConversationMessage.role,
+                        ConversationMessage.token_count,
+                    )
+                    .where(
+                        col(ConversationMessage.conversation_id) == cid,
+                        col(ConversationMessage.seq) >= start_seq,
+                    )
+                    .order_by(desc(ConversationMessage.seq)),
                 )
+                total = 0
+                window_start = None
+                latest_user = None
+                for seq, role, token_count in result.tuples():
+                    total += token_count
+                    if role != "user":
+                        continue
+                    if latest_user is None:
+                        latest_user = seq
+                    if total > max_tokens:
+                        break
+                    window_start = seq
+                # 至少保留最近一轮对话
+                if window_start is None:
+                    window_start = latest_user
+                if window_start is not None:
+                    start_seq = window_start
 
-            # 排序
-            base_query = base_query.order_by(Preference.scope_id)
+            result = await session.execute(
+                select(ConversationMessage.content)
+                .where(
+                    col(ConversationMessage.conversation_id) == cid,
+                    col(ConversationMessage.seq) >= start_seq,
+                )
+                .order_by(ConversationMessage.seq),
+            )
+            messages = list(result.scalars().all())
+            if messages:
+                return messages
 
-            # 分页结果
-            result_query = base_query.offset(offset).limit(page_size)
-            result = await session.execute(result_query)
-            rows = result.fetchall()
+            # 尚未迁移的旧数据
+            result = await session.execute(
+                select(ConversationV2.content).where(
+                    col(ConversationV2.conversation_id) == cid,
+                ),
+            )
+            return result.scalar_one_or_none() or []
 
-            # 查询总数（应用相同的筛选条件）
-            count_base_query = (
-                select(func.count(col(Preference.scope_id)))
-                .select_from(Preference)
-                .outerjoin(
-                    ConversationV2,
-                    func.json_extract(Preference.value, "$.val")
-                    == ConversationV2.conversation_id,
-                )
-                .outerjoin(
-                    Persona,
-                    col(ConversationV2.persona_id) == Persona.persona_id,
-                )
-                .where(Preference.scope == "umo", Preference.key == "sel_conv_id")
+    async def get_conversations_messages(self, cids):
+        if not cids:
+            return {}
+        async with self.get_db() as session:
+            session: AsyncSession
+            result = await session.execute(
+                select(ConversationMessage.conversation_id, ConversationMessage.content)
+                .where(col(ConversationMessage.conversation_id).in_(cids))
+                .order_by(ConversationMessage.conversation_id, ConversationMessage.seq),
             )
+            grouped: dict[str, list[dict]] = {}
+            for cid, content in result.tuples():
+                grouped.setdefault(cid, []).append(content)
+            return grouped
 
-            # 应用相同的搜索和平台筛选条件到计数查询
-            if search_query:
-                search_pattern = f"%{search_query}%"
-                count_base_query = count_base_query.where(
-                    or_(
-                        col(Preference.scope_id).ilike(search_pattern),
-                        col(ConversationV2.title).ilike(search_pattern),
-                        col(Persona.persona_id).ilike(search_pattern),
+    async def get_session_conversation_id(self, umo):
+        async with self.get_db() as session:
+            session: AsyncSession
+            result = await session.execute(
+                select(SessionConversation.conversation_id).where(
+                    col(SessionConversation.umo) == umo,
+                ),
+            )
+            return result.scalar_one_or_none()
+
+    async def set_session_conversation_id(self, umo, cid):
+        async with self.get_db() as session:
+            session: AsyncSession
+            async with session.begin():
+                await session.merge(
+                    SessionConversation(
+                        umo=umo,
+                        conversation_id=cid,
+                        updated_at=datetime.now(timezone.utc),
                     ),
                 )
 
-            if platform:
-                platform_pattern = f"{platform}:%"
-                count_base_query = count_base_query.where(
-                    col(Preference.scope_id).like(platform_pattern),
+    async def remove_session_conversation_id(self, umo):
+        async with self.get_db() as session:
+            session: AsyncSession
+            async with session.begin():
+                await session.execute(
+                    delete(SessionConversation).where(
+                        col(SessionConversation.umo) == umo,
+                    ),
                 )
 
-            total_result = await session.execute(count_base_query)
-            total = total_result.scalar() or 0
+    @staticmethod
+    def _session_conversations_query(search_query=None, platform=None):
+        """Selected conversation of every session, joined through indexed columns."""
+        query = (
+            select(
+                col(SessionConversation.umo).label("session_id"),
+                col(SessionConversation.conversation_id).label("conversation_id"),
+                col(ConversationV2.persona_id).label("persona_id"),
+                col(ConversationV2.title).label("title"),
+                col(Persona.persona_id).label("persona_name"),
+            )
+            .select_from(SessionConversation)
+            .outerjoin(
+                ConversationV2,
+                col(SessionConversation.conversation_id)
+                == ConversationV2.conversation_id,
+            )
+            .outerjoin(
+                Persona,
+                col(ConversationV2.persona_id) == Persona.persona_id,
+            )
+        )
+
+        # 搜索筛选
+        if search_query:
+            search_pattern = f"%{search_query}%"
+            query = query.where(
+                or_(
+                    col(SessionConversation.umo).ilike(search_pattern),
+                    col(ConversationV2.title).ilike(search_pattern),
+                    col(Persona.persona_id).ilike(search_pattern),
+                ),
+            )
+
+        # 平台筛选：umo 以 "平台:" 开头，按主键范围查找
+        if platform:
+            prefix = f"{platform}:"
+            query = query.where(
+                col(SessionConversation.umo) >= prefix,
+                col(SessionConversation.umo) < prefix[:-1] + ";",
+            )
+
+        return query.order_by(SessionConversation.umo)
+
+    async def get_session_conversations(
+        self,
+        page=1,
+        page_size=20,
+        search_query=None,
+        platform=None,
+    ) -> tuple[list[dict], int]:
+        """Get paginated session conversations with joined conversation and persona details."""
+        async with self.get_db() as session:
+            session: AsyncSession
+            offset = (page - 1) * page_size
+            base_query = self._session_conversations_query(search_query, platform)
+
+            # 分页结果，总数通过窗口函数在同一次查询中得到
+            result = await session.execute(
+                base_query.add_columns(func.count().over().label("total"))
+                .offset(offset)
+                .limit(page_size),
+            )
+            rows = result.fetchall()
+            if rows:
+                total = rows[0].total
+            else:
+                count_query = select(func.count()).select_from(base_query.subquery())
+                total = (await session.execute(count_query)).scalar() or 0
 
             sessions_data = [
                 {
@@ -440,19 +1046,28 @@ class SQLiteDatabase(BaseDatabase):
         sender_id=None,
         sender_name=None,
     ):
-        """Insert a new platform message history record."""
+        """Insert a new platform message history record.
+
+        Concurrent inserts are committed together in one transaction by
+        `message_history_writer`; the call returns once its record is written.
+        """
+        new_history = PlatformMessageHistory(
+            platform_id=platform_id,
+            user_id=user_id,
+            content=content,
+            sender_id=sender_id,
+            sender_name=sender_name,
+        )
+        return await self.message_history_writer.insert(new_history)
+
+    async def flush_platform_message_history(self) -> None:
+        await self.message_history_writer.close()
+
+    async def _write_platform_message_history(self, records) -> None:
         async with self.get_db() as session:
             session: AsyncSession
             async with session.begin():
-                new_history = PlatformMessageHistory(
-                    platform_id=platform_id,
-                    user_id=user_id,
-                    content=content,
-                    sender_id=sender_id,
-                    sender_name=sender_name,
-                )
-                session.add(new_history)
-                return new_history
+                session.add_all(records)
 
     async def delete_platform_message_offset(
         self,
@@ -491,11 +1106,146 @@ class SQLiteDatabase(BaseDatabase):
                     PlatformMessageHistory.platform_id == platform_id,
                     PlatformMessageHistory.user_id == user_id,
                 )
-                .order_by(desc(PlatformMessageHistory.created_at))
+                .order_by(
+                    desc(PlatformMessageHistory.created_at),
+                    desc(PlatformMessageHistory.id),
+                )
             )
             result = await session.execute(query.offset(offset).limit(page_size))
             return result.scalars().all()
 
+    async def list_platform_message_history(
+        self,
+        platform_id,
+        user_id,
+        limit=200,
+        cursor=None,
+    ):
+        """Get platform message history newest first, paginated by keyset.
+
+        Each page is a range scan of the (platform_id, user_id, created_at) index
+        starting right after the cursor, so late pages cost the same as the first.
+        """
+        if limit < 1:
+            raise ValueError(f"limit must be at least 1, got {limit}")
+        async with self.get_db() as session:
+            session: AsyncSession
+            query = select(PlatformMessageHistory).where(
+                col(PlatformMessageHistory.platform_id) == platform_id,
+                col(PlatformMessageHistory.user_id) == user_id,
+            )
+            after = _decode_history_cursor(cursor)
+            if after is not None:
+                created_at, last_id = after
+                query = query.where(
+                    or_(
+                        col(PlatformMessageHistory.created_at) < created_at,
+                        and_(
+                            col(PlatformMessageHistory.created_at) == created_at,
+                            col(PlatformMessageHistory.id) < last_id,
+                        ),
+                    ),
+                )
+            query = query.order_by(
+                desc(PlatformMessageHistory.created_at),
+                desc(PlatformMessageHistory.id),
+            ).limit(limit + 1)
+            records = list((await session.execute(query)).scalars().all())
+            next_cursor = None
+            if len(records) > limit:
+                records = records[:limit]
+                last = records[-1]
+                next_cursor = _encode_history_cursor(last.created_at, last.id)
+            return records, next_cursor
+
+    async def prune_platform_message_history(
+        self,
+        before=None,
+        max_per_session=0,
+        batch_size=1000,
+    ):
+        """Delete expired platform message history and cap the size of every chat.
+
+        Rows are deleted in batches of `batch_size`, each in its own transaction,
+        so the job never holds the write lock for long.
+        """
+        removed = 0
+        if before is not None:
+            expired = (
+                select(PlatformMessageHistory.id)
+                .where(col(PlatformMessageHistory.created_at) < before)
+                .limit(batch_size)
+            )
+            while True:
+                async with self.get_db() as session:
+                    session: AsyncSession
+                    async with session.begin():
+                        result = T.cast(
+                            CursorResult,
+                            await session.execute(
+                                delete(PlatformMessageHistory).where(
+                                    col(PlatformMessageHistory.id).in_(expired),
+                                ),
+                            ),
+                        )
+                removed += result.rowcount
+                if result.rowcount < batch_size:
+                    break
+
+        if max_per_session > 0:
+            async with self.get_db() as session:
+                session: AsyncSession
+                oversized = await session.execute(
+                    select(
+                        PlatformMessageHistory.platform_id,
+                        PlatformMessageHistory.user_id,
+                    )
+                    .group_by(
+                        PlatformMessageHistory.platform_id,
+                        PlatformMessageHistory.user_id,
+                    )
+                    .having(func.count() > max_per_session),
+                )
+                chats = oversized.all()
+            for platform_id, user_id in chats:
+                # 保留最新的 max_per_session 条，其余按索引顺序跳过后删除
+                stale = (
+                    select(PlatformMessageHistory.id)
+                    .where(
+                        col(PlatformMessageHistory.platform_id) == platform_id,
+                        col(PlatformMessageHistory.user_id) == user_id,
+                    )
+                    .order_by(
+                        desc(PlatformMessageHistory.created_at),
+                        desc(PlatformMessageHistory.id),
+                    )
+                    .limit(-1)
+                    .offset(max_per_session)
+                )
+                async with self.get_db() as session:
+                    session: AsyncSession
+                    async with session.begin():
+                        result = T.cast(
+                            CursorResult,
+                            await session.execute(
+                                delete(PlatformMessageHistory).where(
+                                    col(PlatformMessageHistory.id).in_(stale),
+                                ),
+                            ),
+                        )
+                removed += result.rowcount
+
+        if removed and self.fts_enabled:
+            # 合并全文索引中因删除产生的碎片
+            async with self.engine.begin() as conn:
+                await conn.execute(
+                    text(
+                        f"INSERT INTO {fts.MESSAGE_HISTORY_FTS}"
+                        f"({fts.MESSAGE_HISTORY_FTS}) VALUES ('optimize')"
+                    ),
+                )
+        return removed
+
     async def get_platform_message_history_by_id(
         self, message_id: int
     ) -> PlatformMessageHistory | None:
@@ -0,0 +1,143 @@
+"""平台消息统计聚合器。
+
+每条消息都会调用一次 `insert_platform_stats`，过去每次调用都是一个独立的 UPSERT 事务。
+聚合器在内存中按 (小时, platform_id, platform_type) 累加计数，并在定时器到期或待写入的
+桶数量达到上限时，通过一次事务批量写入 `platform_stats`。
+
+尚未写入数据库的计数可以通过 `pending_rows` 获取，统计查询会将其与数据库中的数据合并，
+因此延迟写入不会导致仪表盘上的数据滞后。
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from datetime import datetime
+
+from astrbot.core.log import LogManager
+
+# 本模块在 astrbot.core 初始化期间被导入，无法使用 `from astrbot.core import logger`
+logger = LogManager.GetLogger(log_name="astrbot")
+
+StatKey = tuple[datetime, str, str]
+"""(整点时间, platform_id, platform_type)"""
+StatRow = tuple[datetime, str, str, int]
+
+FlushFn = Callable[[list[StatRow]], Awaitable[None]]
+
+
+def hour_bucket(timestamp: datetime | None = None) -> datetime:
+    """将时间向下取整到小时"""
+    if timestamp is None:
+        timestamp = datetime.now()
+    return timestamp.replace(minute=0, second=0, microsecond=0)
+
+
+class PlatformStatsAggregator:
+    """按小时聚合平台消息计数，并定时批量写入数据库。"""
+
+    def __init__(
+        self,
+        flush_fn: FlushFn,
+        flush_interval: float = 10.0,
+        max_pending: int = 256,
+    ) -> None:
+        """Args:
+        flush_fn: 批量写入函数，接收 (整点时间, platform_id, platform_type, count) 列表
+        flush_interval: 首次记录后等待多少秒再写入
+        max_pending: 待写入的桶数量达到该值时立即写入
+
+        """
+        self.flush_fn = flush_fn
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending: dict[StatKey, int] = {}
+        self._inflight: dict[StatKey, int] = {}
+        """正在写入数据库的计数，写入完成前仍计入查询结果"""
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._flush_task: asyncio.Task | None = None
+        self._lock: asyncio.Lock | None = None
+        self.flush_count = 0
+
+    def record(
+        self,
+        platform_id: str,
+        platform_type: str,
+        count: int = 1,
+        timestamp: datetime | None = None,
+    ) -> None:
+        """记录消息计数。只修改内存中的计数器，不产生任何 I/O。"""
+        key = (hour_bucket(timestamp), platform_id, platform_type)
+        self._pending[key] = self._pending.get(key, 0) + count
+        self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        if self._flush_task is not None and not self._flush_task.done():
+            # 正在写入，写入完成后会重新检查是否需要调度
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # 没有运行中的事件循环时，等待下一次 flush 调用
+            return
+        if len(self._pending) >= self.max_pending:
+            if self._flush_handle is not None:
+                self._flush_handle.cancel()
+            self._start_flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(
+                self.flush_interval,
+                self._start_flush,
+            )
+
+    def _start_flush(self) -> None:
+        self._flush_handle = None
+        self._flush_task = asyncio.create_task(self.flush())
+
+    async def flush(self) -> None:
+        """将内存中的计数写入数据库"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._flush_handle is not None:
+                self._flush_handle.cancel()
+                self._flush_handle = None
+            if not self._pending:
+                return
+            self._inflight, self._pending = self._pending, {}
+            rows = [(*key, count) for key, count in self._inflight.items()]
+            try:
+                await self.flush_fn(rows)
+                self.flush_count += 1
+            except Exception as e:
+                logger.error(f"写入平台统计数据失败，将在下次重试: {e}")
+                for key, count in self._inflight.items():
+                    self._pending[key] = self._pending.get(key, 0) + count
+            finally:
+                self._inflight = {}
+        if self._pending and self._flush_handle is None:
+            self._flush_task = None
+            self._schedule_flush()
+
+    async def close(self) -> None:
+        """取消定时器并写入剩余的计数"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        await self.flush()
+
+    def pending_rows(self, start_time: datetime | None = None) -> list[StatRow]:
+        """获取尚未写入数据库的计数"""
+        merged: dict[StatKey, int] = dict(self._inflight)
+        for key, count in self._pending.items():
+            merged[key] = merged.get(key, 0) + count
+        return [
+            (*key, count)
+            for key, count in merged.items()
+            # 与数据库查询保持一致：整点时间不早于 start_time 的桶
+            if start_time is None or key[0] >= start_time
+        ]
+
+    @property
+    def pending_count(self) -> int:
+        return sum(row[3] for row in self.pending_rows())
@@ -4,21 +4,291 @@ except ModuleNotFoundError:
     raise ImportError(
         "faiss 未安装。请使用 'pip install faiss-cpu' 或 'pip install faiss-gpu' 安装。",
     )
+import asyncio
+import json
+import math
 import os
+import struct
+import zlib
 
 import numpy as np
 
+from astrbot import logger
+
+INDEX_TYPES = ("flat", "hnsw", "ivf_flat", "ivf_pq")
+"""支持的索引类型。flat 为暴力检索；hnsw 为图索引；ivf_flat / ivf_pq 为倒排索引，需要训练。"""
+
+TRAINED_INDEX_TYPES = ("ivf_flat", "ivf_pq")
+
+DEFAULT_INDEX_PARAMS = {
+    "hnsw": {"M": 32, "ef_construction": 40, "ef_search": 64},
+    "ivf_flat": {"nlist": None, "nprobe": 16, "train_threshold": 10000},
+    "ivf_pq": {
+        "nlist": None,
+        "nprobe": 16,
+        "m": None,
+        "nbits": 8,
+        "train_threshold": 10000,
+    },
+}
+
+SHRINK_RATIO = 0.5
+"""已训练的 IVF 索引在向量数量降到 train_threshold 的该比例以下时才切回 flat"""
+
+_WAL_ADD = 1
+_WAL_REMOVE = 2
+_WAL_HEADER = struct.Struct("<BQI")  # op, seq, count
+_WAL_CRC = struct.Struct("<I")
+
 
 class EmbeddingStorage:
-    def __init__(self, dimension: int, path: str | None = None):
+    """基于 FAISS 的向量存储。
+
+    - 支持 flat / hnsw / ivf_flat / ivf_pq 多种索引类型。IVF 索引在向量数量达到
+      train_threshold 之前使用 flat 索引，达到后在后台线程中训练并切换。
+    - 写入操作先追加到 WAL（`<path>.wal`），索引文件本身延迟批量保存，避免每次写入都
+      全量 `faiss.write_index`。启动时会重放索引文件之后的 WAL 记录。
+    - HNSW 不支持删除，删除的向量以墓碑的形式记录，在检索时过滤，并在墓碑比例过高时
+      自动压缩（重建）索引。
+    - ivf_pq 只保存有损的压缩编码，原始向量以与 WAL 相同的格式追加到 `<path>.raw`，
+      重建索引时从中读取，而不是使用有损的重建向量训练。
+    """
+
+    def __init__(
+        self,
+        dimension: int,
+        path: str | None = None,
+        index_type: str = "flat",
+        index_params: dict | None = None,
+        save_delay: float = 5.0,
+        max_pending_ops: int = 64,
+        compact_ratio: float = 0.2,
+    ):
+        """
+        Args:
+            dimension (int): 向量维度
+            path (str | None): 索引文件路径, 为 None 时不持久化
+            index_type (str): 索引类型, 见 INDEX_TYPES
+            index_params (dict | None): 索引参数, 未提供的参数使用 DEFAULT_INDEX_PARAMS
+            save_delay (float): 写入后延迟保存索引文件的秒数
+            max_pending_ops (int): 未保存的写操作达到该数量时立即保存
+            compact_ratio (float): HNSW 墓碑比例超过该值时自动压缩索引
+
+        """
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"不支持的索引类型: {index_type}")
         self.dimension = dimension
         self.path = path
+        self.wal_path = f"{path}.wal" if path else None
+        self.raw_path = f"{path}.raw" if path else None
+        self.meta_path = f"{path}.meta.json" if path else None
+        self.index_type = index_type
+        self.index_params = self._merge_params(index_type, index_params)
+        self.save_delay = save_delay
+        self.max_pending_ops = max_pending_ops
+        self.compact_ratio = compact_ratio
+
+        self.active_type = "flat"
+        """当前实际使用的索引类型。IVF 索引训练前为 flat"""
+        self.dead_positions: set[int] = set()
+        """HNSW 索引中已删除向量的内部位置（墓碑）"""
+        self._id_arr: np.ndarray | None = None
+        self._seq = 0
+        self._pending_ops = 0
+        self._lock = asyncio.Lock()
+        self._save_task: asyncio.Task | None = None
+        self._rebuild_task: asyncio.Task | None = None
+        self._rebuild_log: list[tuple[int, np.ndarray, np.ndarray | None]] | None = None
+        self._rebuild_target: str | None = None
+        self._raw_mem = bytearray()
+        """不持久化时 ivf_pq 原始向量的日志"""
+
         self.index = None
         if path and os.path.exists(path):
             self.index = faiss.read_index(path)
+            meta = self._read_meta()
+            self.active_type = meta.get("active_type") or self._detect_type(
+                self.index,
+            )
+            self.dead_positions = set(meta.get("dead_positions", []))
+            self._seq = meta.get("seq", 0)
+        else:
+            self.active_type = self._desired_active_type(0)
+            self.index = self._create_index(self.active_type)
+        self._configure_search_params()
+        self._replay_wal()
+
+    # ==== 索引构建 ====
+
+    @staticmethod
+    def _merge_params(index_type: str, index_params: dict | None) -> dict:
+        params = dict(DEFAULT_INDEX_PARAMS.get(index_type, {}))
+        params.update({k: v for k, v in (index_params or {}).items() if v is not None})
+        return params
+
+    @staticmethod
+    def _detect_type(index) -> str:
+        if isinstance(index, faiss.IndexIVFPQ):
+            return "ivf_pq"
+        if isinstance(index, faiss.IndexIVF):
+            return "ivf_flat"
+        if isinstance(index, faiss.IndexIDMap) and isinstance(
+            faiss.downcast_index(index.index),
+            faiss.IndexHNSW,
+        ):
+            return "hnsw"
+        return "flat"
+
+    @property
+    def ntotal(self) -> int:
+        """有效向量数量"""
+        assert self.index is not None, "FAISS index is not initialized."
+        return self.index.ntotal - len(self.dead_positions)
+
+    def _train_threshold(self) -> int:
+        threshold = max(int(self.index_params["train_threshold"]), 1)
+        if self.index_type == "ivf_pq":
+            # PQ 的每个子量化器有 2**nbits 个聚类中心，训练样本不能少于该数量
+            threshold = max(threshold, 2 ** int(self.index_params["nbits"]))
+        return threshold
+
+    def _desired_active_type(self, ntotal: int) -> str:
+        if self.index_type not in TRAINED_INDEX_TYPES:
+            return self.index_type
+        threshold = self._train_threshold()
+        if self.active_type == self.index_type:
+            # 已训练的索引降到阈值的一定比例以下才切回 flat，避免在阈值附近反复重建
+            return "flat" if ntotal < threshold * SHRINK_RATIO else self.index_type
+        return self.index_type if ntotal >= threshold else "flat"
+
+    def _nlist(self, n: int) -> int:
+        if self.index_params.get("nlist"):
+            return max(1, min(int(self.index_params["nlist"]), n))
+        # 经验值 4*sqrt(n)，同时保证每个聚类中心至少有 39 个训练样本
+        return max(1, min(int(4 * math.sqrt(n)), n // 39))
+
+    def _pq_m(self) -> int:
+        if self.index_params.get("m"):
+            return int(self.index_params["m"])
+        for m in (64, 48, 32, 24, 16, 12, 8, 4, 2):
+            if self.dimension % m == 0:
+                return m
+        return 1
+
+    def _create_index(self, index_type: str, train_vectors: np.ndarray | None = None):
+        """创建指定类型的空索引, IVF 索引会使用 train_vectors 进行训练"""
+        d = self.dimension
+        if index_type == "flat":
+            return faiss.IndexIDMap(faiss.IndexFlatL2(d))
+        if index_type == "hnsw":
+            base = faiss.IndexHNSWFlat(d, int(self.index_params["M"]))
+            base.hnsw.efConstruction = int(self.index_params["ef_construction"])
+            return faiss.IndexIDMap(base)
+
+        if train_vectors is None or len(train_vectors) == 0:
+            raise ValueError(f"{index_type} 索引需要训练数据")
+        quantizer = faiss.IndexFlatL2(d)
+        nlist = self._nlist(len(train_vectors))
+        if index_type == "ivf_flat":
+            index = faiss.IndexIVFFlat(quantizer, d, nlist)
+        else:
+            index = faiss.IndexIVFPQ(
+                quantizer,
+                d,
+                nlist,
+                self._pq_m(),
+                int(self.index_params["nbits"]),
+            )
+        index.train(train_vectors)
+        return index
+
+    def _build_index(self, index_type: str, vectors: np.ndarray, ids: np.ndarray):
+        index = self._create_index(index_type, vectors)
+        if len(ids):
+            index.add_with_ids(vectors, ids)
+        return index
+
+    def _configure_search_params(self):
+        if self.active_type == "hnsw":
+            hnsw_index = faiss.downcast_index(self.index.index)
+            hnsw_index.hnsw.efSearch = int(
+                self.index_params.get(
+                    "ef_search",
+                    DEFAULT_INDEX_PARAMS["hnsw"]["ef_search"],
+                ),
+            )
+        elif self.active_type in TRAINED_INDEX_TYPES:
+            self.index.nprobe = int(
+                self.index_params.get(
+                    "nprobe",
+                    DEFAULT_INDEX_PARAMS["ivf_flat"]["nprobe"],
+                ),
+            )
+        self._id_arr = None
+
+    def _extract_vectors(self) -> tuple[np.ndarray, np.ndarray]:
+        """导出当前索引中所有有效的向量和 ID。ivf_pq 的向量从原始向量日志中读取。"""
+        index = self.index
+        if self.active_type in TRAINED_INDEX_TYPES:
+            invlists = index.invlists
+            parts = [
+                faiss.rev_swig_ptr(invlists.get_ids(i), invlists.list_size(i)).copy()
+                for i in range(index.nlist)
+                if invlists.list_size(i)
+            ]
+            ids = np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+            if not len(ids):
+                return np.empty((0, self.dimension), dtype=np.float32), ids
+            raw = self._read_raw_vectors() if self.active_type == "ivf_pq" else {}
+            missing = np.array([i for i in ids if int(i) not in raw], dtype=np.int64)
+            reconstructed = {}
+            if len(missing):
+                if self.active_type == "ivf_pq":
+                    logger.warning(
+                        f"{len(missing)} 个向量缺少原始数据, 将使用 ivf_pq 的有损重建向量",
+                    )
+                index.set_direct_map_type(faiss.DirectMap.Hashtable)
+                try:
+                    reconstructed = dict(
+                        zip(missing.tolist(), index.reconstruct_batch(missing))
+                    )
+                finally:
+                    index.set_direct_map_type(faiss.DirectMap.NoMap)
+            vectors = np.stack(
+                [raw.get(int(i), reconstructed.get(int(i))) for i in ids],
+            ).astype(np.float32)
+            return vectors, ids
+
+        ids = faiss.vector_to_array(index.id_map)
+        vectors = index.index.reconstruct_n(0, index.ntotal)
+        if self.dead_positions:
+            alive = np.ones(len(ids), dtype=bool)
+            alive[list(self.dead_positions)] = False
+            ids, vectors = ids[alive], vectors[alive]
+        return vectors, ids
+
+    # ==== 写入 ====
+
+    def _add(self, vectors: np.ndarray, ids: np.ndarray):
+        self.index.add_with_ids(vectors, ids)
+        self._id_arr = None
+        if self._rebuild_log is not None:
+            self._rebuild_log.append((_WAL_ADD, ids, vectors))
+
+    def _remove(self, ids: np.ndarray):
+        if self.active_type == "hnsw":
+            positions = np.nonzero(np.isin(self._get_id_arr(), ids))[0]
+            self.dead_positions.update(int(p) for p in positions)
         else:
-            base_index = faiss.IndexFlatL2(dimension)
-            self.index = faiss.IndexIDMap(base_index)
+            self.index.remove_ids(ids)
+            self._id_arr = None
+        if self._rebuild_log is not None:
+            self._rebuild_log.append((_WAL_REMOVE, ids, None))
+
+    def _get_id_arr(self) -> np.ndarray:
+        if self._id_arr is None:
+            self._id_arr = faiss.vector_to_array(self.index.id_map)
+        return self._id_arr
 
     async def insert(self, vector: np.ndarray, id: int):
         """插入向量
@@ -35,8 +305,7 @@ class EmbeddingStorage:
             raise ValueError(
                 f"向量维度不匹配, 期望: {self.dimension}, 实际: {vector.shape[0]}",
             )
-        self.index.add_with_ids(vector.reshape(1, -1), np.array([id]))
-        await self.save_index()
+        await self.insert_batch(vector.reshape(1, -1), [id])
 
     async def insert_batch(self, vectors: np.ndarray, ids: list[int]):
         """批量插入向量
@@ -53,8 +322,38 @@ class EmbeddingStorage:
             raise ValueError(
                 f"向量维度不匹配, 期望: {self.dimension}, 实际: {vectors.shape[1]}",
             )
-        self.index.add_with_ids(vectors, np.array(ids))
-        await self.save_index()
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        id_array = np.array(ids, dtype=np.int64)
+        async with self._lock:
+            await self._log_op(_WAL_ADD, id_array, vectors)
+            self._add(vectors, id_array)
+        await self._after_write()
+
+    async def delete(self, ids: list[int]):
+        """删除向量
+
+        Args:
+            ids (list[int]): 要删除的向量ID列表
+
+        """
+        assert self.index is not None, "FAISS index is not initialized."
+        if not ids:
+            return
+        id_array = np.array(ids, dtype=np.int64)
+        async with self._lock:
+            await self._log_op(_WAL_REMOVE, id_array, None)
+            self._remove(id_array)
+        await self._after_write()
+
+    async def _after_write(self):
+        if self.path:
+            if self._pending_ops >= self.max_pending_ops:
+                await self.save_index()
+            elif self._save_task is None or self._save_task.done():
+                self._save_task = asyncio.create_task(self._delayed_save())
+        self._maybe_schedule_rebuild()
+
+    # ==== 检索 ====
 
     async def search(self, vector: np.ndarray, k: int) -> tuple:
         """搜索最相似的向量
@@ -68,28 +367,316 @@ class EmbeddingStorage:
         """
         assert self.index is not None, "FAISS index is not initialized."
         faiss.normalize_L2(vector)
+        if self.active_type == "hnsw" and self.dead_positions:
+            return self._search_skip_dead(vector, k)
         distances, indices = self.index.search(vector, k)
         return distances, indices
 
-    async def delete(self, ids: list[int]):
-        """删除向量
+    def _search_skip_dead(self, vector: np.ndarray, k: int) -> tuple:
+        """在内部 HNSW 索引上多取墓碑数量的结果, 过滤墓碑后映射回外部 ID"""
+        index = self.index
+        fetch_k = min(k + len(self.dead_positions), max(index.ntotal, 1))
+        distances, positions = index.index.search(vector, fetch_k)
+        id_arr = self._get_id_arr()
+        out_d = np.full((len(vector), k), np.inf, dtype=np.float32)
+        out_i = np.full((len(vector), k), -1, dtype=np.int64)
+        for row in range(len(vector)):
+            n = 0
+            for dist, pos in zip(distances[row], positions[row]):
+                if pos < 0 or int(pos) in self.dead_positions:
+                    continue
+                out_d[row, n] = dist
+                out_i[row, n] = id_arr[pos]
+                n += 1
+                if n == k:
+                    break
+        return out_d, out_i
 
-        Args:
-            ids (list[int]): 要删除的向量ID列表
+    # ==== 重建与压缩 ====
 
-        """
-        assert self.index is not None, "FAISS index is not initialized."
-        id_array = np.array(ids, dtype=np.int64)
-        self.index.remove_ids(id_array)
-        await self.save_index()
+    def _maybe_schedule_rebuild(self):
+        """索引类型与期望不一致(如 IVF 达到训练阈值)或墓碑过多时, 在后台重建索引"""
+        if self._rebuild_task is not None and not self._rebuild_task.done():
+            return
+        target = self._desired_active_type(self.ntotal)
+        too_many_dead = len(self.dead_positions) > self.compact_ratio * max(
+            self.index.ntotal,
+            1,
+        )
+        if target == self.active_type and not too_many_dead:
+            return
+        self._rebuild_task = asyncio.create_task(self._rebuild(target))
+        self._rebuild_task.add_done_callback(self._on_rebuild_done)
 
-    async def save_index(self):
-        """保存索引
+    @staticmethod
+    def _on_rebuild_done(task: asyncio.Task):
+        if not task.cancelled() and task.exception():
+            logger.error(f"后台重建向量索引失败: {task.exception()}")
+
+    async def _rebuild(self, index_type: str):
+        async with self._lock:
+            vectors, ids = await asyncio.to_thread(self._extract_vectors)
+            self._rebuild_log = []
+            self._rebuild_target = index_type
+            if index_type == "ivf_pq":
+                # 以原始向量重写日志（同时压缩已删除的向量），之后的写入继续追加
+                await asyncio.to_thread(self._write_raw, vectors, ids)
+            else:
+                await asyncio.to_thread(self._drop_raw)
+        logger.info(
+            f"正在重建向量索引 ({self.active_type} -> {index_type}), 向量数: {len(ids)}",
+        )
+        try:
+            new_index = await asyncio.to_thread(
+                self._build_index,
+                index_type,
+                vectors,
+                ids,
+            )
+            async with self._lock:
+                log, self._rebuild_log = self._rebuild_log or [], None
+                self.index = new_index
+                self.active_type = index_type
+                self.dead_positions = set()
+                self._configure_search_params()
+                # 重放重建期间发生的写操作
+                for op, op_ids, op_vectors in log:
+                    if op == _WAL_ADD:
+                        self._add(op_vectors, op_ids)
+                    else:
+                        self._remove(op_ids)
+                self._pending_ops += 1
+                if self.path:
+                    await asyncio.to_thread(self._write_snapshot)
+                    self._pending_ops = 0
+        finally:
+            self._rebuild_log = None
+            self._rebuild_target = None
+        logger.info(f"向量索引重建完成, 当前索引类型: {index_type}")
+
+    async def rebuild(
+        self,
+        index_type: str | None = None,
+        index_params: dict | None = None,
+    ) -> dict:
+        """重建并压缩索引, 可同时切换索引类型或参数
 
         Args:
-            path (str): 保存索引的路径
+            index_type (str | None): 新的索引类型, 为 None 时保持不变
+            index_params (dict | None): 新的索引参数, 为 None 时保持不变
+
+        Returns:
+            dict: 重建后的索引统计信息
 
         """
-        if self.index is None:
+        if self._rebuild_task is not None and not self._rebuild_task.done():
+            await asyncio.wait([self._rebuild_task])
+        self.set_index_config(index_type, index_params, schedule=False)
+        await self._rebuild(self._desired_active_type(self.ntotal))
+        return self.stats()
+
+    def set_index_config(
+        self,
+        index_type: str | None = None,
+        index_params: dict | None = None,
+        schedule: bool = True,
+    ):
+        """更新索引配置, schedule 为 True 时按需在后台切换索引"""
+        if index_type is not None:
+            if index_type not in INDEX_TYPES:
+                raise ValueError(f"不支持的索引类型: {index_type}")
+            if index_type != self.index_type and index_params is None:
+                index_params = {}
+            self.index_type = index_type
+        if index_params is not None:
+            self.index_params = self._merge_params(self.index_type, index_params)
+            self._configure_search_params()
+        if schedule:
+            self._maybe_schedule_rebuild()
+
+    def stats(self) -> dict:
+        return {
+            "index_type": self.index_type,
+            "active_type": self.active_type,
+            "index_params": self.index_params,
+            "ntotal": self.ntotal,
+            "deleted": len(self.dead_positions),
+            "pending_ops": self._pending_ops,
+            "rebuilding": self._rebuild_task is not None
+            and not self._rebuild_task.done(),
+        }
+
+    # ==== 持久化 ====
+
+    @property
+    def _keeps_raw(self) -> bool:
+        """是否需要记录原始向量：当前或正在切换到的索引为 ivf_pq"""
+        return "ivf_pq" in (self.active_type, self._rebuild_target)
+
+    @staticmethod
+    def _frame(op: int, seq: int, ids: np.ndarray, vectors: np.ndarray | None) -> bytes:
+        payload = ids.tobytes() + (vectors.tobytes() if vectors is not None else b"")
+        return (
+            _WAL_HEADER.pack(op, seq, len(ids))
+            + payload
+            + _WAL_CRC.pack(zlib.crc32(payload))
+        )
+
+    async def _log_op(self, op: int, ids: np.ndarray, vectors: np.ndarray | None):
+        self._seq += 1
+        self._pending_ops += 1
+        keeps_raw = self._keeps_raw
+        if not self.wal_path and not keeps_raw:
+            return
+        frame = self._frame(op, self._seq, ids, vectors)
+        await asyncio.to_thread(self._append_frame, frame, keeps_raw)
+
+    def _append_frame(self, frame: bytes, keeps_raw: bool):
+        if keeps_raw:
+            if self.raw_path:
+                with open(self.raw_path, "ab") as f:
+                    f.write(frame)
+            else:
+                self._raw_mem += frame
+        if self.wal_path:
+            with open(self.wal_path, "ab") as f:
+                f.write(frame)
+
+    def _iter_frames(self, data: bytes):
+        """解析 WAL 格式的记录，返回 (op, seq, ids, vectors) 以及已解析的字节数"""
+        offset = 0
+        frames = []
+        while offset + _WAL_HEADER.size <= len(data):
+            op, seq, count = _WAL_HEADER.unpack_from(data, offset)
+            payload_size = count * 8
+            if op == _WAL_ADD:
+                payload_size += count * self.dimension * 4
+            end = offset + _WAL_HEADER.size + payload_size
+            if end + _WAL_CRC.size > len(data):
+                break
+            payload = data[offset + _WAL_HEADER.size : end]
+            (crc,) = _WAL_CRC.unpack_from(data, end)
+            if crc != zlib.crc32(payload):
+                break
+            offset = end + _WAL_CRC.size
+            ids = np.frombuffer(payload[: count * 8], dtype=np.int64).copy()
+            vectors = None
+            if op == _WAL_ADD:
+                vectors = np.frombuffer(payload[count * 8 :], dtype=np.float32)
+                vectors = vectors.reshape(count, self.dimension).copy()
+            frames.append((op, seq, ids, vectors))
+        return frames, offset
+
+    def _read_raw_vectors(self) -> dict[int, np.ndarray]:
+        """读取 ivf_pq 的原始向量日志"""
+        if self.raw_path:
+            if not os.path.exists(self.raw_path):
+                return {}
+            with open(self.raw_path, "rb") as f:
+                data = f.read()
+        else:
+            data = bytes(self._raw_mem)
+        raw: dict[int, np.ndarray] = {}
+        for op, _, ids, vectors in self._iter_frames(data)[0]:
+            if op == _WAL_ADD:
+                raw.update(zip(ids.tolist(), vectors))  # type: ignore[arg-type]
+            else:
+                for i in ids.tolist():
+                    raw.pop(i, None)
+        return raw
+
+    def _write_raw(self, vectors: np.ndarray, ids: np.ndarray):
+        frame = self._frame(_WAL_ADD, 0, ids, vectors) if len(ids) else b""
+        if not self.raw_path:
+            self._raw_mem = bytearray(frame)
+            return
+        tmp_path = f"{self.raw_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(frame)
+        os.replace(tmp_path, self.raw_path)
+
+    def _drop_raw(self):
+        self._raw_mem = bytearray()
+        if self.raw_path and os.path.exists(self.raw_path):
+            os.remove(self.raw_path)
+
+    def _replay_wal(self):
+        """重放索引文件保存之后写入 WAL 的操作"""
+        if not self.wal_path or not os.path.exists(self.wal_path):
+            return
+        with open(self.wal_path, "rb") as f:
+            data = f.read()
+        frames, offset = self._iter_frames(data)
+        replayed = 0
+        for op, seq, ids, vectors in frames:
+            if seq <= self._seq:
+                continue
+            if op == _WAL_ADD:
+                if self.active_type != "hnsw":
+                    # 索引文件与 WAL 之间的崩溃可能导致重复, 先移除再添加
+                    self.index.remove_ids(ids)
+                self._add(vectors, ids)
+            elif op == _WAL_REMOVE:
+                self._remove(ids)
+            self._seq = seq
+            replayed += 1
+        if offset < len(data):
+            logger.warning(
+                f"向量索引 WAL 尾部存在不完整的记录, 已忽略: {self.wal_path}"
+            )
+        if replayed:
+            logger.info(f"已从 WAL 恢复 {replayed} 个向量索引写操作: {self.wal_path}")
+            self._pending_ops += replayed
+
+    def _read_meta(self) -> dict:
+        if not self.meta_path or not os.path.exists(self.meta_path):
+            return {}
+        try:
+            with open(self.meta_path, encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"读取向量索引元数据失败: {e}")
+            return {}
+
+    def _write_snapshot(self):
+        """将索引与元数据原子地写入磁盘, 然后清空 WAL"""
+        meta = {
+            "active_type": self.active_type,
+            "seq": self._seq,
+            "dead_positions": sorted(self.dead_positions),
+        }
+        # 两个文件都写好后再替换, 元数据最后替换, 旧的 seq 只会导致 WAL 被重放
+        tmp_path = f"{self.path}.tmp"
+        faiss.write_index(self.index, tmp_path)
+        tmp_meta = f"{self.meta_path}.tmp"
+        with open(tmp_meta, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self.path)  # type: ignore
+        os.replace(tmp_meta, self.meta_path)  # type: ignore
+        with open(self.wal_path, "wb"):  # type: ignore
+            pass
+
+    async def _delayed_save(self):
+        await asyncio.sleep(self.save_delay)
+        await self.save_index()
+
+    async def save_index(self):
+        """立即保存索引到磁盘, 并清空 WAL"""
+        if self.index is None or not self.path:
             return
-        faiss.write_index(self.index, self.path)
+        async with self._lock:
+            if self._pending_ops == 0 and await asyncio.to_thread(
+                os.path.exists, self.path
+            ):
+                return
+            await asyncio.to_thread(self._write_snapshot)
+            self._pending_ops = 0
+
+    async def close(self):
+        """停止后台任务并保存未持久化的修改"""
+        current = asyncio.current_task()
+        for task in (self._save_task, self._rebuild_task):
+            if task is not None and task is not current and not task.done():
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+        await self.save_index()
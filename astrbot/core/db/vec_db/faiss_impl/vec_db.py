@@ -20,6 +20,8 @@ class FaissVecDB(BaseVecDB):
         index_store_path: str,
         embedding_provider: EmbeddingProvider,
         rerank_provider: RerankProvider | None = None,
+        index_type: str = "flat",
+        index_params: dict | None = None,
     ):
         self.doc_store_path = doc_store_path
         self.index_store_path = index_store_path
@@ -28,6 +30,8 @@ class FaissVecDB(BaseVecDB):
         self.embedding_storage = EmbeddingStorage(
             embedding_provider.get_dim(),
             index_store_path,
+            index_type=index_type,
+            index_params=index_params,
         )
         self.embedding_provider = embedding_provider
         self.rerank_provider = rerank_provider
@@ -178,8 +182,26 @@ class FaissVecDB(BaseVecDB):
         await self.embedding_storage.delete([int_id])
 
     async def close(self):
+        await self.embedding_storage.close()
         await self.document_storage.close()
 
+    async def rebuild_index(
+        self,
+        index_type: str | None = None,
+        index_params: dict | None = None,
+    ) -> dict:
+        """重建并压缩向量索引, 可同时切换索引类型
+
+        Returns:
+            dict: 重建后的索引统计信息
+
+        """
+        return await self.embedding_storage.rebuild(index_type, index_params)
+
+    def index_stats(self) -> dict:
+        """获取向量索引的统计信息"""
+        return self.embedding_storage.stats()
+
     async def count_documents(self, metadata_filter: dict | None = None) -> int:
         """计算文档数量
 
@@ -7,15 +7,20 @@ class:
 
 工作流程:
 1. 维护一个异步队列, 来接受各种消息事件
-2. 无限循环的调度函数, 从事件队列中获取新的事件, 打印日志并创建一个新的异步任务来执行管道调度器的处理逻辑
+2. 无限循环的调度函数, 从事件队列中获取新的事件, 打印日志并交给 SessionEventDispatcher,
+   由其在全局并发上限内按会话串行、会话间轮转地执行管道调度器的处理逻辑
+
+每条消息的事件日志经过限流, 超出速率的日志被省略并在下一条日志中注明省略的条数.
 """
 
-import asyncio
 from asyncio import Queue
 
 from astrbot.core import logger
 from astrbot.core.astrbot_config_mgr import AstrBotConfigManager
+from astrbot.core.event_dispatcher import SessionEventDispatcher
+from astrbot.core.log import LogRateLimiter
 from astrbot.core.pipeline.scheduler import PipelineScheduler
+from astrbot.core.utils.session_waiter import WAITING_ORIGINS
 
 from .platform import AstrMessageEvent
 
@@ -33,6 +38,19 @@ class EventBus:
         # abconf uuid -> scheduler
         self.pipeline_scheduler_mapping = pipeline_scheduler_mapping
         self.astrbot_config_mgr = astrbot_config_mgr
+        bus_config = astrbot_config_mgr.default_conf.get("event_bus", {})
+        self.dispatcher = SessionEventDispatcher(
+            max_concurrency=bus_config.get("max_concurrency", 32),
+            max_session_queue=bus_config.get("max_session_queue", 100),
+            max_total_queue=bus_config.get("max_total_queue", 5000),
+            overflow_policy=bus_config.get("overflow_policy", "drop_oldest"),
+        )
+        log_rate = bus_config.get("event_log_rate", 20)
+        self.event_log_limiter = (
+            LogRateLimiter(log_rate, bus_config.get("event_log_burst", 100))
+            if log_rate > 0
+            else None
+        )
 
     async def dispatch(self):
         while True:
@@ -45,7 +63,23 @@ class EventBus:
                     f"PipelineScheduler not found for id: {conf_info['id']}, event ignored."
                 )
                 continue
-            asyncio.create_task(scheduler.execute(event))
+            umo = event.unified_msg_origin
+            self.dispatcher.submit(
+                umo,
+                lambda scheduler=scheduler, event=event: scheduler.execute(event),
+                priority=self._is_priority_event(event),
+                bypass=umo in WAITING_ORIGINS,
+            )
+
+    def _is_priority_event(self, event: AstrMessageEvent) -> bool:
+        """私聊和管理员的消息优先处理"""
+        if event.is_private_chat():
+            return True
+        conf = self.astrbot_config_mgr.get_conf(event.unified_msg_origin)
+        return str(event.get_sender_id()) in map(str, conf.get("admins_id", []))
+
+    def stats(self) -> dict:
+        return self.dispatcher.stats()
 
     def _print_event(self, event: AstrMessageEvent, conf_name: str):
         """用于记录事件信息
@@ -54,13 +88,25 @@ class EventBus:
             event (AstrMessageEvent): 事件对象
 
         """
+        limiter = self.event_log_limiter
+        if limiter is not None and not limiter.allow():
+            return
+        suppressed = limiter.take_suppressed() if limiter is not None else 0
         # 如果有发送者名称: [平台名] 发送者名称/发送者ID: 消息概要
-        if event.get_sender_name():
-            logger.info(
-                f"[{conf_name}] [{event.get_platform_id()}({event.get_platform_name()})] {event.get_sender_name()}/{event.get_sender_id()}: {event.get_message_outline()}",
-            )
         # 没有发送者名称: [平台名] 发送者ID: 消息概要
-        else:
-            logger.info(
-                f"[{conf_name}] [{event.get_platform_id()}({event.get_platform_name()})] {event.get_sender_id()}: {event.get_message_outline()}",
-            )
+        sender_name = event.get_sender_name()
+        sender_id = event.get_sender_id()
+        logger.info(
+            "[%s] [%s(%s)] %s: %s%s",
+            conf_name,
+            event.get_platform_id(),
+            event.get_platform_name(),
+            f"{sender_name}/{sender_id}" if sender_name else sender_id,
+            event.get_message_outline(),
+            f" (省略了 {suppressed} 条消息日志)" if suppressed else "",
+            extra={
+                "umo": event.unified_msg_origin,
+                "sender_id": sender_id,
+                "conf_name": conf_name,
+            },
+        )
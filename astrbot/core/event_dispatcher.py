@@ -0,0 +1,238 @@
+"""按会话调度消息事件的分发器。
+
+- 同一会话 (unified_msg_origin) 的事件按到达顺序串行处理；
+- 所有会话共享一个全局并发上限，有事件等待的会话按轮转顺序获得执行机会，
+  单个繁忙的群聊无法占满所有并发；
+- 私聊和管理员的消息进入高优先级队列，会被优先调度；
+- 每个会话和全局的等待队列都有上限，超出时按配置的策略丢弃事件。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+
+from astrbot.core import logger
+
+OVERFLOW_POLICIES = ("drop_oldest", "drop_newest")
+
+Job = Callable[[], Awaitable[None]]
+
+
+@dataclass
+class _QueuedJob:
+    job: Job
+    priority: bool
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class DispatcherMetrics:
+    processed: int = 0
+    dropped: int = 0
+    bypassed: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+
+    def record_wait(self, wait: float):
+        self.processed += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+
+
+class SessionEventDispatcher:
+    """带全局并发上限、会话内串行、会话间轮转的事件分发器。"""
+
+    def __init__(
+        self,
+        max_concurrency: int = 32,
+        max_session_queue: int = 100,
+        max_total_queue: int = 5000,
+        overflow_policy: str = "drop_oldest",
+        priority_ratio: int = 4,
+    ) -> None:
+        """Args:
+        max_concurrency: 同时处理的事件数量上限
+        max_session_queue: 单个会话中等待处理的事件数量上限
+        max_total_queue: 所有会话中等待处理的事件数量上限，高优先级事件不受此限制
+        overflow_policy: 队列已满时的策略。drop_oldest 丢弃最早的等待事件，drop_newest 丢弃新事件
+        priority_ratio: 连续调度多少个高优先级会话后，让普通会话获得一次执行机会
+
+        """
+        if overflow_policy not in OVERFLOW_POLICIES:
+            logger.warning(
+                f"未知的事件队列溢出策略 {overflow_policy}，将使用 drop_oldest。"
+            )
+            overflow_policy = "drop_oldest"
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_session_queue = max(1, max_session_queue)
+        self.max_total_queue = max(1, max_total_queue)
+        self.overflow_policy = overflow_policy
+        self.priority_ratio = max(1, priority_ratio)
+
+        self._queues: dict[str, deque[_QueuedJob]] = {}
+        """会话 -> 等待处理的事件，只包含未在执行的事件"""
+        self._running: set[str] = set()
+        """正在处理事件的会话"""
+        self._ready: tuple[deque[str], deque[str]] = (deque(), deque())
+        """等待调度的会话，分别为高优先级和普通优先级"""
+        self._in_ready: set[str] = set()
+        self._queued = 0
+        self._active = 0
+        self._high_streak = 0
+        self._tasks: set[asyncio.Task] = set()
+        self.metrics = DispatcherMetrics()
+
+    def submit(
+        self,
+        key: str,
+        job: Job,
+        priority: bool = False,
+        bypass: bool = False,
+    ) -> bool:
+        """提交一个事件处理任务。
+
+        Args:
+            key: 会话标识，同一会话的任务会按提交顺序串行执行
+            job: 返回协程的函数，在获得执行机会时才会被调用
+            priority: 是否为高优先级任务
+            bypass: 为 True 时立即执行，不受会话串行和并发上限约束。用于等待会话输入
+                (session_waiter) 的场景，否则正在等待的 Handler 会阻塞其所在的会话
+
+        Returns:
+            是否已被接受。溢出策略为 drop_newest 且队列已满时返回 False。
+
+        """
+        if bypass:
+            self.metrics.bypassed += 1
+            self._spawn(job())
+            return True
+
+        queue = self._queues.get(key)
+        if queue is None:
+            queue = self._queues[key] = deque()
+
+        accepted = True
+        if len(queue) >= self.max_session_queue:
+            accepted = self._shed(queue, key)
+        elif self._queued >= self.max_total_queue and not priority:
+            longest = max(self._queues, key=lambda k: len(self._queues[k]))
+            accepted = self._shed(self._queues[longest], longest, new_key=key)
+        if not accepted:
+            if not queue and key not in self._running:
+                del self._queues[key]
+            return False
+
+        queue.append(_QueuedJob(job, priority))
+        self._queued += 1
+        self._mark_ready(key)
+        self._pump()
+        return True
+
+    def _shed(self, queue: deque[_QueuedJob], key: str, new_key: str = "") -> bool:
+        """队列已满时按策略丢弃事件，返回新事件是否仍可入队"""
+        self.metrics.dropped += 1
+        if self.overflow_policy == "drop_newest" or not queue:
+            self._log_drop(new_key or key)
+            return False
+        queue.popleft()
+        self._queued -= 1
+        self._log_drop(key)
+        return True
+
+    def _log_drop(self, key: str):
+        dropped = self.metrics.dropped
+        # 避免在消息洪峰时刷屏
+        if dropped == 1 or dropped % 100 == 0:
+            logger.warning(
+                f"事件队列已满，已丢弃会话 {key} 的事件（累计丢弃 {dropped} 个）。",
+            )
+
+    def _mark_ready(self, key: str):
+        if key in self._running or key in self._in_ready:
+            return
+        queue = self._queues.get(key)
+        if not queue:
+            return
+        self._in_ready.add(key)
+        self._ready[0 if queue[0].priority else 1].append(key)
+
+    def _next_ready(self) -> str | None:
+        high, normal = self._ready
+        if high and (not normal or self._high_streak < self.priority_ratio):
+            self._high_streak += 1
+            return high.popleft()
+        if normal:
+            self._high_streak = 0
+            return normal.popleft()
+        return None
+
+    def _pump(self):
+        while self._active < self.max_concurrency:
+            key = self._next_ready()
+            if key is None:
+                return
+            self._in_ready.discard(key)
+            queue = self._queues.get(key)
+            if not queue:
+                # 等待的事件已被丢弃
+                self._queues.pop(key, None)
+                continue
+            item = queue.popleft()
+            self._queued -= 1
+            self._running.add(key)
+            self._active += 1
+            self.metrics.record_wait(time.monotonic() - item.enqueued_at)
+            self._spawn(self._run(key, item.job))
+
+    def _spawn(self, coro: Awaitable):
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, key: str, job: Job):
+        try:
+            await job()
+        except Exception as e:
+            logger.error(f"处理会话 {key} 的事件时发生错误: {e}", exc_info=True)
+        finally:
+            self._active -= 1
+            self._running.discard(key)
+            if self._queues.get(key):
+                # 放到队尾，让其他会话先获得执行机会
+                self._mark_ready(key)
+            else:
+                self._queues.pop(key, None)
+            self._pump()
+
+    async def close(self):
+        """取消所有正在处理的事件并清空队列"""
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._queues.clear()
+        self._ready[0].clear()
+        self._ready[1].clear()
+        self._in_ready.clear()
+        self._queued = 0
+
+    def stats(self) -> dict:
+        depths = [len(q) for q in self._queues.values()]
+        processed = self.metrics.processed
+        return {
+            "running": self._active,
+            "queued": self._queued,
+            "waiting_sessions": len(self._in_ready),
+            "max_session_depth": max(depths, default=0),
+            "processed": processed,
+            "dropped": self.metrics.dropped,
+            "bypassed": self.metrics.bypassed,
+            "avg_wait_ms": round(self.metrics.total_wait / processed * 1000, 2)
+            if processed
+            else 0,
+            "max_wait_ms": round(self.metrics.max_wait * 1000, 2),
+            "max_concurrency": self.max_concurrency,
+        }
@@ -70,10 +70,33 @@ class KBSQLiteDatabase:
             await conn.execute(text("PRAGMA temp_store=MEMORY"))
             await conn.execute(text("PRAGMA mmap_size=134217728"))
             await conn.execute(text("PRAGMA optimize"))
+            # 确保 knowledge_bases 表有索引配置列（前向兼容）
+            await self._ensure_kb_index_columns(conn)
             await conn.commit()
 
         self.inited = True
 
+    async def _ensure_kb_index_columns(self, conn) -> None:
+        """确保 knowledge_bases 表有 index_type 和 index_params 列。
+
+        这是为了支持旧版数据库的平滑升级。新版数据库通过 SQLModel
+        的 metadata.create_all 自动创建这些列。
+        """
+        result = await conn.execute(text("PRAGMA table_info(knowledge_bases)"))
+        columns = {row[1] for row in result.fetchall()}
+
+        if "index_type" not in columns:
+            await conn.execute(
+                text(
+                    "ALTER TABLE knowledge_bases ADD COLUMN index_type VARCHAR(20) "
+                    "DEFAULT 'flat'"
+                )
+            )
+        if "index_params" not in columns:
+            await conn.execute(
+                text("ALTER TABLE knowledge_bases ADD COLUMN index_params JSON")
+            )
+
     async def migrate_to_v1(self) -> None:
         """执行知识库数据库 v1 迁移
 
@@ -26,6 +26,7 @@ from .models import KBDocument, KBMedia, KnowledgeBase
 from .parsers.url_parser import extract_text_from_url
 from .parsers.util import select_parser
 from .prompts import TEXT_REPAIR_SYSTEM_PROMPT
+from .retrieval.sparse_index import SparseChunk, SparseIndex
 
 
 class RateLimiter:
@@ -108,6 +109,7 @@ Text chunk to process:
 class KBHelper:
     vec_db: BaseVecDB
     kb: KnowledgeBase
+    sparse_index: SparseIndex
 
     def __init__(
         self,
@@ -130,8 +132,22 @@ class KBHelper:
         self.kb_medias_dir.mkdir(parents=True, exist_ok=True)
         self.kb_files_dir.mkdir(parents=True, exist_ok=True)
 
+        self.sparse_index = SparseIndex(str(self.kb_dir / "sparse_index.db"))
+
     async def initialize(self):
         await self._ensure_vec_db()
+        await self._ensure_sparse_index()
+
+    async def _ensure_sparse_index(self):
+        """初始化稀疏索引, 与向量库块数量不一致时(如旧版本知识库)全量重建"""
+        await self.sparse_index.initialize()
+        vec_db: FaissVecDB = self.vec_db  # type: ignore
+        chunk_cnt = await vec_db.count_documents()
+        if chunk_cnt != self.sparse_index.doc_count:
+            logger.info(
+                f"知识库 {self.kb.kb_name} 的稀疏索引与向量库不一致, 正在重建...",
+            )
+            await self.sparse_index.rebuild_from(vec_db.document_storage)
 
     async def get_ep(self) -> EmbeddingProvider:
         if not self.kb.embedding_provider_id:
@@ -169,6 +185,8 @@ class KBHelper:
             index_store_path=str(self.kb_dir / "index.faiss"),
             embedding_provider=ep,
             rerank_provider=rp,
+            index_type=self.kb.index_type or "flat",
+            index_params=self.kb.index_params,
         )
         await vec_db.initialize()
         self.vec_db = vec_db
@@ -185,6 +203,7 @@ class KBHelper:
     async def terminate(self):
         if self.vec_db:
             await self.vec_db.close()
+        await self.sparse_index.close()
 
     async def upload_document(
         self,
@@ -279,8 +298,10 @@ class KBHelper:
                 )
             contents = []
             metadatas = []
+            chunk_ids = []
             for idx, chunk_text in enumerate(chunks_text):
                 contents.append(chunk_text)
+                chunk_ids.append(str(uuid.uuid4()))
                 metadatas.append(
                     {
                         "kb_id": self.kb.kb_id,
@@ -297,15 +318,32 @@ class KBHelper:
                 if progress_callback:
                     await progress_callback("embedding", current, total)
 
-            await self.vec_db.insert_batch(
+            int_ids = await self.vec_db.insert_batch(
                 contents=contents,
                 metadatas=metadatas,
+                ids=chunk_ids,
                 batch_size=batch_size,
                 tasks_limit=tasks_limit,
                 max_retries=max_retries,
                 progress_callback=embedding_progress_callback,
             )
 
+            # 增量更新稀疏索引
+            await self.sparse_index.add_chunks(
+                [
+                    SparseChunk(
+                        id=int_id,
+                        chunk_id=chunk_id,
+                        kb_doc_id=doc_id,
+                        chunk_index=idx,
+                        text=content,
+                    )
+                    for idx, (int_id, chunk_id, content) in enumerate(
+                        zip(int_ids, chunk_ids, contents)
+                    )
+                ],
+            )
+
             # 保存文档的元数据
             doc = KBDocument(
                 doc_id=doc_id,
@@ -366,6 +404,7 @@ class KBHelper:
             doc_id=doc_id,
             vec_db=self.vec_db,  # type: ignore
         )
+        await self.sparse_index.remove_document(doc_id)
         await self.kb_db.update_kb_stats(
             kb_id=self.kb.kb_id,
             vec_db=self.vec_db,  # type: ignore
@@ -376,6 +415,7 @@ class KBHelper:
         """删除单个文本块及其相关数据"""
         vec_db: FaissVecDB = self.vec_db  # type: ignore
         await vec_db.delete(chunk_id)
+        await self.sparse_index.remove_chunk(chunk_id)
         await self.kb_db.update_kb_stats(
             kb_id=self.kb.kb_id,
             vec_db=self.vec_db,  # type: ignore
@@ -383,6 +423,27 @@ class KBHelper:
         await self.refresh_kb()
         await self.refresh_document(doc_id)
 
+    def apply_index_config(self):
+        """将知识库的索引配置应用到向量库, 必要时在后台切换索引"""
+        vec_db: FaissVecDB = self.vec_db  # type: ignore
+        vec_db.embedding_storage.set_index_config(
+            self.kb.index_type or "flat",
+            self.kb.index_params or {},
+        )
+
+    async def rebuild_index(self) -> dict:
+        """按照知识库的索引配置重建并压缩向量索引
+
+        Returns:
+            dict: 重建后的索引统计信息
+
+        """
+        vec_db: FaissVecDB = self.vec_db  # type: ignore
+        return await vec_db.rebuild_index(
+            self.kb.index_type or "flat",
+            self.kb.index_params or {},
+        )
+
     async def refresh_kb(self):
         if self.kb:
             kb = await self.kb_db.get_kb_by_id(self.kb.kb_id)
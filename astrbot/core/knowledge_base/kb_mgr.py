@@ -2,6 +2,7 @@ import traceback
 from pathlib import Path
 
 from astrbot.core import logger
+from astrbot.core.db.vec_db.faiss_impl.embedding_storage import INDEX_TYPES
 from astrbot.core.provider.manager import ProviderManager
 
 # from .chunking.fixed_size import FixedSizeChunker
@@ -19,6 +20,13 @@ DB_PATH = Path(FILES_PATH) / "kb.db"
 CHUNKER = RecursiveCharacterChunker()
 
 
+def _check_index_type(index_type: str | None) -> None:
+    if index_type is not None and index_type not in INDEX_TYPES:
+        raise ValueError(
+            f"不支持的索引类型: {index_type}, 可选值: {', '.join(INDEX_TYPES)}",
+        )
+
+
 class KnowledgeBaseManager:
     kb_db: KBSQLiteDatabase
     retrieval_manager: RetrievalManager
@@ -90,10 +98,13 @@ class KnowledgeBaseManager:
         top_k_dense: int | None = None,
         top_k_sparse: int | None = None,
         top_m_final: int | None = None,
+        index_type: str | None = None,
+        index_params: dict | None = None,
     ) -> KBHelper:
         """创建新的知识库实例"""
         if embedding_provider_id is None:
             raise ValueError("创建知识库时必须提供embedding_provider_id")
+        _check_index_type(index_type)
         kb = KnowledgeBase(
             kb_name=kb_name,
             description=description,
@@ -105,6 +116,8 @@ class KnowledgeBaseManager:
             top_k_dense=top_k_dense if top_k_dense is not None else 50,
             top_k_sparse=top_k_sparse if top_k_sparse is not None else 50,
             top_m_final=top_m_final if top_m_final is not None else 5,
+            index_type=index_type or "flat",
+            index_params=index_params,
         )
         try:
             async with self.kb_db.get_db() as session:
@@ -171,8 +184,11 @@ class KnowledgeBaseManager:
         top_k_dense: int | None = None,
         top_k_sparse: int | None = None,
         top_m_final: int | None = None,
+        index_type: str | None = None,
+        index_params: dict | None = None,
     ) -> KBHelper | None:
         """更新知识库实例"""
+        _check_index_type(index_type)
         kb_helper = await self.get_kb(kb_id)
         if not kb_helper:
             return None
@@ -197,13 +213,56 @@ class KnowledgeBaseManager:
             kb.top_k_sparse = top_k_sparse
         if top_m_final is not None:
             kb.top_m_final = top_m_final
+        index_changed = False
+        if index_type is not None and index_type != kb.index_type:
+            kb.index_type = index_type
+            kb.index_params = index_params
+            index_changed = True
+        elif index_params is not None and index_params != kb.index_params:
+            kb.index_params = index_params
+            index_changed = True
         async with self.kb_db.get_db() as session:
             session.add(kb)
             await session.commit()
             await session.refresh(kb)
 
+        if index_changed:
+            # 索引类型的切换在后台进行
+            kb_helper.apply_index_config()
+
         return kb_helper
 
+    async def rebuild_kb_index(
+        self,
+        kb_id: str,
+        index_type: str | None = None,
+        index_params: dict | None = None,
+    ) -> dict | None:
+        """重建并压缩知识库的向量索引, 可同时切换索引类型
+
+        Returns:
+            dict | None: 重建后的索引统计信息, 知识库不存在时返回 None
+
+        """
+        _check_index_type(index_type)
+        kb_helper = await self.get_kb(kb_id)
+        if not kb_helper:
+            return None
+
+        kb = kb_helper.kb
+        if index_type is not None or index_params is not None:
+            if index_type is not None and index_type != kb.index_type:
+                kb.index_type = index_type
+                kb.index_params = index_params
+            elif index_params is not None:
+                kb.index_params = index_params
+            async with self.kb_db.get_db() as session:
+                session.add(kb)
+                await session.commit()
+                await session.refresh(kb)
+
+        return await kb_helper.rebuild_index()
+
     async def retrieve(
         self,
         query: str,
@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime, timezone
 
-from sqlmodel import Field, MetaData, SQLModel, Text, UniqueConstraint
+from sqlmodel import JSON, Field, MetaData, SQLModel, Text, UniqueConstraint
 
 
 class BaseKBModel(SQLModel, table=False):
@@ -40,6 +40,9 @@ class KnowledgeBase(BaseKBModel, table=True):
     top_k_dense: int | None = Field(default=50, nullable=True)
     top_k_sparse: int | None = Field(default=50, nullable=True)
     top_m_final: int | None = Field(default=5, nullable=True)
+    # 向量索引配置: flat / hnsw / ivf_flat / ivf_pq
+    index_type: str | None = Field(default="flat", max_length=20, nullable=True)
+    index_params: dict | None = Field(default=None, sa_type=JSON)
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     updated_at: datetime = Field(
         default_factory=lambda: datetime.now(timezone.utc),
@@ -5,6 +5,7 @@
 
 import time
 from dataclasses import dataclass
+from typing import TYPE_CHECKING
 
 from astrbot import logger
 from astrbot.core.db.vec_db.base import Result
@@ -14,7 +15,8 @@ from astrbot.core.knowledge_base.retrieval.rank_fusion import RankFusion
 from astrbot.core.knowledge_base.retrieval.sparse_retriever import SparseRetriever
 from astrbot.core.provider.provider import RerankProvider
 
-from ..kb_helper import KBHelper
+if TYPE_CHECKING:
+    from ..kb_helper import KBHelper
 
 
 @dataclass
@@ -62,7 +64,7 @@ class RetrievalManager:
         self,
         query: str,
         kb_ids: list[str],
-        kb_id_helper_map: dict[str, KBHelper],
+        kb_id_helper_map: dict[str, "KBHelper"],
         top_k_fusion: int = 20,
         top_m_final: int = 5,
     ) -> list[RetrievalResult]:
@@ -98,6 +100,7 @@ class RetrievalManager:
                     "top_k_sparse": kb.top_k_sparse or 50,
                     "top_m_final": kb.top_m_final or 5,
                     "vec_db": kb_helper.vec_db,
+                    "sparse_index": kb_helper.sparse_index,
                     "rerank_provider_id": kb.rerank_provider_id,
                 }
                 new_kb_ids.append(kb_id)
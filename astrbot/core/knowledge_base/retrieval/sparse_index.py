@@ -0,0 +1,324 @@
+"""持久化稀疏倒排索引
+
+为单个知识库维护一份存储在磁盘上的 BM25 倒排索引 (与 FAISS 索引同目录),
+在上传 / 删除文档块时增量更新, 查询时仅读取查询词对应的倒排列表。
+"""
+
+import asyncio
+import heapq
+import json
+import math
+import os
+from collections import Counter
+from dataclasses import dataclass
+
+import jieba
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from astrbot.core import logger
+
+_STOPWORDS_PATH = os.path.join(os.path.dirname(__file__), "hit_stopwords.txt")
+_stopwords: frozenset[str] | None = None
+
+
+def load_stopwords() -> frozenset[str]:
+    """加载(并缓存)哈工大停用词表"""
+    global _stopwords
+    if _stopwords is None:
+        with open(_STOPWORDS_PATH, encoding="utf-8") as f:
+            _stopwords = frozenset(
+                word.strip() for word in f.read().splitlines() if word.strip()
+            )
+    return _stopwords
+
+
+def tokenize(content: str) -> list[str]:
+    """使用 jieba 分词并去除停用词"""
+    stopwords = load_stopwords()
+    return [word for word in jieba.cut(content) if word not in stopwords]
+
+
+@dataclass
+class SparseChunk:
+    """待写入稀疏索引的文本块"""
+
+    id: int
+    """文本块在向量库 documents 表中的整数 ID"""
+    chunk_id: str
+    kb_doc_id: str
+    chunk_index: int
+    text: str
+
+
+@dataclass
+class SparseHit:
+    """稀疏索引命中结果"""
+
+    id: int
+    chunk_id: str
+    kb_doc_id: str
+    chunk_index: int
+    score: float
+
+
+class SparseIndex:
+    """基于 SQLite 的 BM25 倒排索引
+
+    - sparse_chunks: 每个文本块一行, 记录文档长度
+    - sparse_postings: (term, id) -> tf 的倒排列表
+
+    文档总数与总长度缓存在内存中, 写入时同步更新。
+    """
+
+    def __init__(self, db_path: str, k1: float = 1.5, b: float = 0.75):
+        self.db_path = db_path
+        self.k1 = k1
+        self.b = b
+        self.engine: AsyncEngine | None = None
+        self._doc_count = 0
+        self._total_length = 0
+        self._write_lock = asyncio.Lock()
+
+    async def initialize(self):
+        if self.engine is None:
+            self.engine = create_async_engine(
+                f"sqlite+aiosqlite:///{self.db_path}",
+                echo=False,
+            )
+        async with self.engine.begin() as conn:
+            await conn.execute(text("PRAGMA journal_mode=WAL"))
+            await conn.execute(
+                text(
+                    "CREATE TABLE IF NOT EXISTS sparse_chunks ("
+                    "id INTEGER PRIMARY KEY, "
+                    "chunk_id TEXT NOT NULL UNIQUE, "
+                    "kb_doc_id TEXT NOT NULL, "
+                    "chunk_index INTEGER NOT NULL, "
+                    "length INTEGER NOT NULL)",
+                ),
+            )
+            await conn.execute(
+                text(
+                    "CREATE INDEX IF NOT EXISTS idx_sparse_chunks_kb_doc_id "
+                    "ON sparse_chunks(kb_doc_id)",
+                ),
+            )
+            await conn.execute(
+                text(
+                    "CREATE TABLE IF NOT EXISTS sparse_postings ("
+                    "term TEXT NOT NULL, "
+                    "id INTEGER NOT NULL, "
+                    "tf INTEGER NOT NULL, "
+                    "PRIMARY KEY (term, id)) WITHOUT ROWID",
+                ),
+            )
+            await conn.execute(
+                text(
+                    "CREATE INDEX IF NOT EXISTS idx_sparse_postings_id "
+                    "ON sparse_postings(id)",
+                ),
+            )
+        await self._refresh_stats()
+
+    async def _refresh_stats(self):
+        assert self.engine is not None, "Sparse index is not initialized."
+        async with self.engine.connect() as conn:
+            row = (
+                await conn.execute(
+                    text(
+                        "SELECT COUNT(*), COALESCE(SUM(length), 0) FROM sparse_chunks"
+                    ),
+                )
+            ).one()
+        self._doc_count, self._total_length = int(row[0]), int(row[1])
+
+    @property
+    def doc_count(self) -> int:
+        return self._doc_count
+
+    async def add_chunks(self, chunks: list[SparseChunk]):
+        """增量写入文本块。分词在线程池中进行, 避免阻塞事件循环。"""
+        if not chunks:
+            return
+        assert self.engine is not None, "Sparse index is not initialized."
+        token_lists = await asyncio.to_thread(
+            lambda: [tokenize(chunk.text) for chunk in chunks],
+        )
+
+        chunk_rows = []
+        posting_rows = []
+        for chunk, tokens in zip(chunks, token_lists):
+            chunk_rows.append(
+                {
+                    "id": chunk.id,
+                    "chunk_id": chunk.chunk_id,
+                    "kb_doc_id": chunk.kb_doc_id,
+                    "chunk_index": chunk.chunk_index,
+                    "length": len(tokens),
+                },
+            )
+            posting_rows.extend(
+                {"term": term, "id": chunk.id, "tf": tf}
+                for term, tf in Counter(tokens).items()
+            )
+
+        async with self._write_lock:
+            async with self.engine.begin() as conn:
+                # 相同 ID 重复写入时先清理旧的倒排列表
+                await conn.execute(
+                    text("DELETE FROM sparse_postings WHERE id = :id"),
+                    [{"id": row["id"]} for row in chunk_rows],
+                )
+                await conn.execute(
+                    text(
+                        "INSERT OR REPLACE INTO sparse_chunks "
+                        "(id, chunk_id, kb_doc_id, chunk_index, length) "
+                        "VALUES (:id, :chunk_id, :kb_doc_id, :chunk_index, :length)",
+                    ),
+                    chunk_rows,
+                )
+                if posting_rows:
+                    await conn.execute(
+                        text(
+                            "INSERT INTO sparse_postings (term, id, tf) "
+                            "VALUES (:term, :id, :tf)",
+                        ),
+                        posting_rows,
+                    )
+            await self._refresh_stats()
+
+    async def remove_chunk(self, chunk_id: str):
+        """删除单个文本块"""
+        await self._remove("chunk_id", chunk_id)
+
+    async def remove_document(self, kb_doc_id: str):
+        """删除某个知识库文档下的所有文本块"""
+        await self._remove("kb_doc_id", kb_doc_id)
+
+    async def _remove(self, column: str, value: str):
+        assert self.engine is not None, "Sparse index is not initialized."
+        async with self._write_lock:
+            async with self.engine.begin() as conn:
+                await conn.execute(
+                    text(
+                        "DELETE FROM sparse_postings WHERE id IN "
+                        f"(SELECT id FROM sparse_chunks WHERE {column} = :value)",
+                    ),
+                    {"value": value},
+                )
+                await conn.execute(
+                    text(f"DELETE FROM sparse_chunks WHERE {column} = :value"),
+                    {"value": value},
+                )
+            await self._refresh_stats()
+
+    async def clear(self):
+        assert self.engine is not None, "Sparse index is not initialized."
+        async with self._write_lock:
+            async with self.engine.begin() as conn:
+                await conn.execute(text("DELETE FROM sparse_postings"))
+                await conn.execute(text("DELETE FROM sparse_chunks"))
+            await self._refresh_stats()
+
+    async def search(self, query: str, top_k: int) -> list[SparseHit]:
+        """BM25 检索, 只读取查询词的倒排列表"""
+        assert self.engine is not None, "Sparse index is not initialized."
+        if self._doc_count == 0 or top_k <= 0:
+            return []
+        query_terms = Counter(tokenize(query))
+        if not query_terms:
+            return []
+
+        terms = list(query_terms)
+        placeholders = ", ".join(f":t{i}" for i in range(len(terms)))
+        params = {f"t{i}": term for i, term in enumerate(terms)}
+        async with self.engine.connect() as conn:
+            rows = (
+                await conn.execute(
+                    text(
+                        "SELECT p.term, p.id, p.tf, c.length "
+                        "FROM sparse_postings p JOIN sparse_chunks c ON c.id = p.id "
+                        f"WHERE p.term IN ({placeholders})",
+                    ),
+                    params,
+                )
+            ).all()
+        if not rows:
+            return []
+
+        df = Counter(row[0] for row in rows)
+        n = self._doc_count
+        avgdl = self._total_length / n if n else 0.0
+        # 使用非负的 BM25 idf 变体, 避免高频词得到负分
+        idf = {
+            term: math.log((n - freq + 0.5) / (freq + 0.5) + 1.0)
+            for term, freq in df.items()
+        }
+
+        k1, b = self.k1, self.b
+        scores: dict[int, float] = {}
+        for term, doc_int_id, tf, length in rows:
+            norm = k1 * (1 - b + b * length / avgdl) if avgdl else k1
+            scores[doc_int_id] = scores.get(doc_int_id, 0.0) + (
+                query_terms[term] * idf[term] * tf * (k1 + 1) / (tf + norm)
+            )
+
+        top = heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+        ids = [doc_int_id for doc_int_id, _ in top]
+        placeholders = ", ".join(f":i{i}" for i in range(len(ids)))
+        async with self.engine.connect() as conn:
+            meta_rows = (
+                await conn.execute(
+                    text(
+                        "SELECT id, chunk_id, kb_doc_id, chunk_index "
+                        f"FROM sparse_chunks WHERE id IN ({placeholders})",
+                    ),
+                    {f"i{i}": doc_int_id for i, doc_int_id in enumerate(ids)},
+                )
+            ).all()
+        meta = {row[0]: row for row in meta_rows}
+        return [
+            SparseHit(
+                id=doc_int_id,
+                chunk_id=meta[doc_int_id][1],
+                kb_doc_id=meta[doc_int_id][2],
+                chunk_index=meta[doc_int_id][3],
+                score=score,
+            )
+            for doc_int_id, score in top
+            if doc_int_id in meta
+        ]
+
+    async def rebuild_from(self, document_storage, batch_size: int = 1000):
+        """从向量库的文档存储全量重建索引 (用于旧知识库迁移或索引不一致时)"""
+        await self.clear()
+        offset = 0
+        while True:
+            docs = await document_storage.get_documents(
+                metadata_filters={},
+                offset=offset,
+                limit=batch_size,
+            )
+            if not docs:
+                break
+            chunks = []
+            for doc in docs:
+                md = json.loads(doc["metadata"] or "{}")
+                chunks.append(
+                    SparseChunk(
+                        id=doc["id"],
+                        chunk_id=doc["doc_id"],
+                        kb_doc_id=md.get("kb_doc_id", ""),
+                        chunk_index=md.get("chunk_index", 0),
+                        text=doc["text"],
+                    ),
+                )
+            await self.add_chunks(chunks)
+            offset += len(docs)
+        logger.info(f"稀疏索引重建完成: {self.db_path}, 共 {self._doc_count} 个块")
+
+    async def close(self):
+        if self.engine:
+            await self.engine.dispose()
+            self.engine = None
@@ -4,7 +4,6 @@
 """
 
 import json
-import os
 from dataclasses import dataclass
 
 import jieba
@@ -12,6 +11,10 @@ from rank_bm25 import BM25Okapi
 
 from astrbot.core.db.vec_db.faiss_impl import FaissVecDB
 from astrbot.core.knowledge_base.kb_db_sqlite import KBSQLiteDatabase
+from astrbot.core.knowledge_base.retrieval.sparse_index import (
+    SparseIndex,
+    load_stopwords,
+)
 
 
 @dataclass
@@ -31,7 +34,7 @@ class SparseRetriever:
 
     职责:
     - 基于关键词的文档检索
-    - 使用 BM25 算法计算相关度
+    - 使用 BM25 算法计算相关度 (基于每个知识库的持久化倒排索引)
     """
 
     def __init__(self, kb_db: KBSQLiteDatabase):
@@ -42,15 +45,7 @@ class SparseRetriever:
 
         """
         self.kb_db = kb_db
-        self._index_cache = {}  # 缓存 BM25 索引
-
-        with open(
-            os.path.join(os.path.dirname(__file__), "hit_stopwords.txt"),
-            encoding="utf-8",
-        ) as f:
-            self.hit_stopwords = {
-                word.strip() for word in set(f.read().splitlines()) if word.strip()
-            }
+        self.hit_stopwords = load_stopwords()
 
     async def retrieve(
         self,
@@ -60,6 +55,9 @@ class SparseRetriever:
     ) -> list[SparseResult]:
         """执行稀疏检索
 
+        优先使用知识库的持久化倒排索引 (只读取查询词的倒排列表),
+        未提供索引的知识库回退为全量构建 BM25。
+
         Args:
             query: 查询文本
             kb_ids: 知识库 ID 列表
@@ -69,13 +67,76 @@ class SparseRetriever:
             List[SparseResult]: 检索结果列表
 
         """
-        # 1. 获取所有相关块
         top_k_sparse = 0
-        chunks = []
+        results: list[SparseResult] = []
+        fallback_kb_ids = []
         for kb_id in kb_ids:
-            vec_db: FaissVecDB = kb_options.get(kb_id, {}).get("vec_db")
+            options = kb_options.get(kb_id, {})
+            vec_db: FaissVecDB = options.get("vec_db")
             if not vec_db:
                 continue
+            kb_top_k = options.get("top_k_sparse", 50)
+            top_k_sparse += kb_top_k
+            sparse_index: SparseIndex | None = options.get("sparse_index")
+            if sparse_index is None:
+                fallback_kb_ids.append(kb_id)
+                continue
+            results.extend(
+                await self._retrieve_from_index(
+                    query, kb_id, vec_db, sparse_index, kb_top_k
+                ),
+            )
+
+        if fallback_kb_ids:
+            results.extend(
+                await self._retrieve_full_scan(query, fallback_kb_ids, kb_options),
+            )
+
+        results.sort(key=lambda x: x.score, reverse=True)
+        return results[:top_k_sparse]
+
+    async def _retrieve_from_index(
+        self,
+        query: str,
+        kb_id: str,
+        vec_db: FaissVecDB,
+        sparse_index: SparseIndex,
+        top_k: int,
+    ) -> list[SparseResult]:
+        hits = await sparse_index.search(query, top_k)
+        if not hits:
+            return []
+        docs = await vec_db.document_storage.get_documents(
+            metadata_filters={},
+            ids=[hit.id for hit in hits],
+            limit=None,
+            offset=None,
+        )
+        texts = {doc["id"]: doc["text"] for doc in docs}
+        return [
+            SparseResult(
+                chunk_id=hit.chunk_id,
+                chunk_index=hit.chunk_index,
+                doc_id=hit.kb_doc_id,
+                kb_id=kb_id,
+                content=texts[hit.id],
+                score=hit.score,
+            )
+            for hit in hits
+            if hit.id in texts
+        ]
+
+    async def _retrieve_full_scan(
+        self,
+        query: str,
+        kb_ids: list[str],
+        kb_options: dict,
+    ) -> list[SparseResult]:
+        """为每次查询构建 BM25 索引的全量检索"""
+        # 1. 获取所有相关块
+        chunks = []
+        for kb_id in kb_ids:
+            vec_db: FaissVecDB = kb_options.get(kb_id, {}).get("vec_db")
             result = await vec_db.document_storage.get_documents(
                 metadata_filters={},
                 limit=None,
@@ -93,7 +154,6 @@ class SparseRetriever:
                 for doc, chunk_md in zip(result, chunk_mds)
             ]
             chunks.extend(result)
-            top_k_sparse += kb_options.get(kb_id, {}).get("top_k_sparse", 50)
 
         if not chunks:
             return []
@@ -116,7 +176,6 @@ class SparseRetriever:
         ]
         scores = bm25.get_scores(tokenized_query)
 
-        # 5. 排序并返回 Top-K
         results = []
         for idx, score in enumerate(scores):
             chunk = chunks[idx]
@@ -130,7 +189,4 @@ class SparseRetriever:
                     score=float(score),
                 ),
             )
-
-        results.sort(key=lambda x: x.score, reverse=True)
-        # return results[: len(results) // len(kb_ids)]
-        return results[:top_k_sparse]
+        return results
@@ -7,6 +7,7 @@ const:
 class:
     LogBroker: 日志代理类, 用于缓存和分发日志消息
     LogQueueHandler: 日志处理器, 用于将日志消息发送到 LogBroker
+    LogRateLimiter: 令牌桶限流器, 用于限制每条消息都会打印的日志
     LogManager: 日志管理器, 用于创建和配置日志记录器
 
 function:
@@ -14,19 +15,29 @@ function:
     get_short_level_name: 将日志级别名称转换为四个字母的缩写
 
 工作流程:
-1. 通过 LogManager.GetLogger() 获取日志器, 配置了控制台输出和多个格式化过滤器
+1. 通过 LogManager.GetLogger() 获取日志器. 日志器只把日志记录放入内存队列,
+   由后台线程中的 QueueListener 交给各个输出端(控制台、LogBroker)格式化并输出,
+   记录日志的线程不做任何 I/O
 2. 通过 set_queue_handler() 设置日志处理器, 将日志消息发送到 LogBroker
 3. logBroker 维护一个订阅者列表, 负责将日志分发给所有订阅者
 4. 订阅者可以使用 register() 方法注册到 LogBroker, 订阅日志流
+
+日志记录携带结构化字段(日志器名称、来源文件、行号以及通过 extra 传入的字段),
+格式化推迟到输出端进行. 参数均为不可变类型时, 连消息本身的格式化也在后台线程完成.
 """
 
 import asyncio
+import atexit
+import copy
 import logging
 import os
+import queue
 import sys
+import threading
 import time
 from asyncio import Queue
 from collections import deque
+from logging.handlers import QueueHandler, QueueListener
 
 import colorlog
 
@@ -44,6 +55,16 @@ log_color_config = {
     "RESET": "reset",
     "asctime": "green",
 }
+# 可以安全地推迟到后台线程格式化的日志参数类型
+_IMMUTABLE_ARG_TYPES = (str, int, float, bool, bytes, type(None))
+# LogRecord 的内置属性, 其余属性视为通过 extra 传入的结构化字段
+_RECORD_ATTRS = frozenset(logging.makeLogRecord({}).__dict__) | {
+    "message",
+    "asctime",
+    "plugin_tag",
+    "short_levelname",
+    "astrbot_version_tag",
+}
 
 
 def is_plugin_path(pathname):
@@ -83,6 +104,68 @@ def get_short_level_name(level_name):
     return level_map.get(level_name, level_name[:4].upper())
 
 
+class PluginFilter(logging.Filter):
+    """插件过滤器类, 用于标记日志来源是插件还是核心组件"""
+
+    def filter(self, record):
+        record.plugin_tag = "[Plug]" if is_plugin_path(record.pathname) else "[Core]"
+        return True
+
+
+class FileNameFilter(logging.Filter):
+    """文件名过滤器类, 用于修改日志记录的文件名格式
+    例如: 将文件路径 /path/to/file.py 转换为 file.<file> 格式
+    """
+
+    # 获取这个文件和父文件夹的名字：<folder>.<file> 并且去除 .py
+    def filter(self, record):
+        dirname = os.path.dirname(record.pathname)
+        record.filename = (
+            os.path.basename(dirname)
+            + "."
+            + os.path.basename(record.pathname).replace(".py", "")
+        )
+        return True
+
+
+class LevelNameFilter(logging.Filter):
+    """短日志级别名称过滤器类, 用于将日志级别名称转换为四个字母的缩写"""
+
+    # 添加短日志级别名称
+    def filter(self, record):
+        record.short_levelname = get_short_level_name(record.levelname)
+        return True
+
+
+class AstrBotVersionTagFilter(logging.Filter):
+    """在 WARNING 及以上级别日志后追加当前 AstrBot 版本号。"""
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            record.astrbot_version_tag = f" [v{VERSION}]"
+        else:
+            record.astrbot_version_tag = ""
+        return True
+
+
+def _add_record_filters(handler: logging.Handler) -> None:
+    """为输出端添加补充日志字段的过滤器"""
+    handler.addFilter(PluginFilter())  # 添加插件过滤器
+    handler.addFilter(FileNameFilter())  # 添加文件名过滤器
+    handler.addFilter(LevelNameFilter())  # 添加级别名称过滤器
+    handler.addFilter(AstrBotVersionTagFilter())  # 追加版本号（WARNING 及以上）
+
+
+def _record_fields(record: logging.LogRecord) -> dict:
+    """提取通过 extra 传入的结构化字段"""
+    fields = {}
+    for key, value in record.__dict__.items():
+        if key in _RECORD_ATTRS or key.startswith("_"):
+            continue
+        fields[key] = value if isinstance(value, _IMMUTABLE_ARG_TYPES) else str(value)
+    return fields
+
+
 class LogBroker:
     """日志代理类, 用于缓存和分发日志消息
 
@@ -92,6 +175,8 @@ class LogBroker:
     def __init__(self):
         self.log_cache = deque(maxlen=CACHED_SIZE)  # 环形缓冲区, 保存最近的日志
         self.subscribers: list[Queue] = []  # 订阅者列表
+        # 订阅者所在的事件循环. 日志在后台线程中发布, 需要投递回订阅者的事件循环
+        self._loops: dict[Queue, asyncio.AbstractEventLoop | None] = {}
 
     def register(self) -> Queue:
         """注册新的订阅者, 并给每个订阅者返回一个带有日志缓存的队列
@@ -101,6 +186,10 @@ class LogBroker:
 
         """
         q = Queue(maxsize=CACHED_SIZE + 10)
+        try:
+            self._loops[q] = asyncio.get_running_loop()
+        except RuntimeError:
+            self._loops[q] = None
         self.subscribers.append(q)
         return q
 
@@ -112,6 +201,7 @@ class LogBroker:
 
         """
         self.subscribers.remove(q)
+        self._loops.pop(q, None)
 
     def publish(self, log_entry: dict):
         """发布新日志到所有订阅者, 使用非阻塞方式投递, 避免一个订阅者阻塞整个系统
@@ -122,13 +212,32 @@ class LogBroker:
 
         """
         self.log_cache.append(log_entry)
-        for q in self.subscribers:
+        for q in list(self.subscribers):
+            loop = self._loops.get(q)
+            if loop is None or _running_loop() is loop:
+                _put_nowait(q, log_entry)
+                continue
             try:
-                q.put_nowait(log_entry)
-            except asyncio.QueueFull:
+                loop.call_soon_threadsafe(_put_nowait, q, log_entry)
+            except RuntimeError:
+                # 订阅者的事件循环已关闭
                 pass
 
 
+def _running_loop() -> asyncio.AbstractEventLoop | None:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def _put_nowait(q: Queue, log_entry: dict) -> None:
+    try:
+        q.put_nowait(log_entry)
+    except asyncio.QueueFull:
+        pass
+
+
 class LogQueueHandler(logging.Handler):
     """日志处理器, 用于将日志消息发送到 LogBroker
 
@@ -141,7 +250,7 @@ class LogQueueHandler(logging.Handler):
 
     def emit(self, record):
         """日志处理的入口方法, 接受一个日志记录, 转换为字符串后由 LogBroker 发布
-        这个方法会在每次日志记录时被调用
+        这个方法在 QueueListener 的后台线程中被调用
 
         Args:
             record (logging.LogRecord): 日志记录对象, 包含日志信息
@@ -151,18 +260,89 @@ class LogQueueHandler(logging.Handler):
         self.log_broker.publish(
             {
                 "level": record.levelname,
-                "time": time.time(),
+                "time": record.created,
                 "data": log_entry,
+                "name": record.name,
+                "message": record.getMessage(),
+                "filename": record.filename,
+                "lineno": record.lineno,
+                "fields": _record_fields(record),
             },
         )
 
 
+class StructuredQueueHandler(QueueHandler):
+    """只把日志记录放入队列的处理器, 格式化和输出由 QueueListener 的后台线程完成"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        if record.exc_info:
+            # 异常和调用栈在记录日志后可能发生变化, 需要立即格式化
+            record.exc_text = _EXC_FORMATTER.formatException(record.exc_info)
+            record.exc_info = None
+        if not isinstance(record.msg, str) or (
+            record.args
+            and not (
+                isinstance(record.args, tuple)
+                and all(isinstance(a, _IMMUTABLE_ARG_TYPES) for a in record.args)
+            )
+        ):
+            # 参数可能在之后被修改, 在记录日志的线程中完成格式化
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+
+_EXC_FORMATTER = logging.Formatter()
+
+
+class LogRateLimiter:
+    """令牌桶限流器, 用于限制每条消息都会打印的 INFO 日志
+
+    超出速率的日志被丢弃并计数, 下一条被放行的日志可以附带被省略的条数.
+    """
+
+    def __init__(self, rate: float = 20, burst: int = 100):
+        """Args:
+        rate: 每秒补充的令牌数
+        burst: 令牌桶容量, 即允许的突发日志条数
+
+        """
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+        self.suppressed = 0
+
+    def allow(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._last) * self.rate
+            )
+            self._last = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            self.suppressed += 1
+            return False
+
+    def take_suppressed(self) -> int:
+        """返回自上次调用以来被省略的日志条数并清零"""
+        with self._lock:
+            count, self.suppressed = self.suppressed, 0
+            return count
+
+
 class LogManager:
     """日志管理器, 用于创建和配置日志记录器
 
     提供了获取默认日志记录器logger和设置队列处理器的方法
     """
 
+    _listeners: dict[str, QueueListener] = {}
+
     @classmethod
     def GetLogger(cls, log_name: str = "default"):
         """获取指定名称的日志记录器logger
@@ -193,57 +373,54 @@ class LogManager:
             log_colors=log_color_config,
         )
 
-        class PluginFilter(logging.Filter):
-            """插件过滤器类, 用于标记日志来源是插件还是核心组件"""
-
-            def filter(self, record):
-                record.plugin_tag = (
-                    "[Plug]" if is_plugin_path(record.pathname) else "[Core]"
-                )
-                return True
+        console_handler.setFormatter(console_formatter)  # 设置处理器的格式化器
+        _add_record_filters(console_handler)
+
+        # 日志器只把记录放入队列, 控制台输出在后台线程中完成
+        log_queue: queue.SimpleQueue = queue.SimpleQueue()
+        queue_handler = StructuredQueueHandler(log_queue)
+        queue_handler.setLevel(logging.DEBUG)
+        listener = QueueListener(log_queue, console_handler, respect_handler_level=True)
+        listener.start()
+        if not cls._listeners:
+            atexit.register(cls.shutdown)
+        cls._listeners[log_name] = listener
 
-        class FileNameFilter(logging.Filter):
-            """文件名过滤器类, 用于修改日志记录的文件名格式
-            例如: 将文件路径 /path/to/file.py 转换为 file.<file> 格式
-            """
-
-            # 获取这个文件和父文件夹的名字：<folder>.<file> 并且去除 .py
-            def filter(self, record):
-                dirname = os.path.dirname(record.pathname)
-                record.filename = (
-                    os.path.basename(dirname)
-                    + "."
-                    + os.path.basename(record.pathname).replace(".py", "")
-                )
-                return True
+        logger.setLevel(logging.DEBUG)  # 设置日志级别为DEBUG
+        logger.addHandler(queue_handler)  # 添加处理器到logger
 
-        class LevelNameFilter(logging.Filter):
-            """短日志级别名称过滤器类, 用于将日志级别名称转换为四个字母的缩写"""
+        return logger
 
-            # 添加短日志级别名称
-            def filter(self, record):
-                record.short_levelname = get_short_level_name(record.levelname)
-                return True
+    @classmethod
+    def add_sink(cls, logger: logging.Logger, handler: logging.Handler) -> None:
+        """为日志器添加输出端. 由 GetLogger 创建的日志器的输出端运行在后台线程中
 
-        class AstrBotVersionTagFilter(logging.Filter):
-            """在 WARNING 及以上级别日志后追加当前 AstrBot 版本号。"""
+        Args:
+            logger (logging.Logger): 日志记录器
+            handler (logging.Handler): 输出端
 
-            def filter(self, record):
-                if record.levelno >= logging.WARNING:
-                    record.astrbot_version_tag = f" [v{VERSION}]"
-                else:
-                    record.astrbot_version_tag = ""
-                return True
+        """
+        _add_record_filters(handler)
+        listener = cls._listeners.get(logger.name)
+        if listener is None:
+            logger.addHandler(handler)
+            return
+        listener.handlers = (*listener.handlers, handler)
 
-        console_handler.setFormatter(console_formatter)  # 设置处理器的格式化器
-        logger.addFilter(PluginFilter())  # 添加插件过滤器
-        logger.addFilter(FileNameFilter())  # 添加文件名过滤器
-        logger.addFilter(LevelNameFilter())  # 添加级别名称过滤器
-        logger.addFilter(AstrBotVersionTagFilter())  # 追加版本号（WARNING 及以上）
-        logger.setLevel(logging.DEBUG)  # 设置日志级别为DEBUG
-        logger.addHandler(console_handler)  # 添加处理器到logger
+    @classmethod
+    def flush(cls) -> None:
+        """等待队列中的日志全部输出"""
+        for listener in cls._listeners.values():
+            if listener._thread is not None:
+                listener.stop()
+                listener.start()
 
-        return logger
+    @classmethod
+    def shutdown(cls) -> None:
+        """输出队列中剩余的日志并停止后台线程"""
+        for listener in cls._listeners.values():
+            if listener._thread is not None:
+                listener.stop()
 
     @classmethod
     def set_queue_handler(cls, logger: logging.Logger, log_broker: LogBroker):
@@ -256,7 +433,10 @@ class LogManager:
         """
         handler = LogQueueHandler(log_broker)
         handler.setLevel(logging.DEBUG)
-        if logger.handlers:
+        listener = cls._listeners.get(logger.name)
+        if listener is not None and listener.handlers:
+            handler.setFormatter(listener.handlers[0].formatter)
+        elif logger.handlers:
             handler.setFormatter(logger.handlers[0].formatter)
         else:
             # 为队列处理器设置相同格式的formatter
@@ -265,4 +445,4 @@ class LogManager:
                     "[%(asctime)s] [%(short_levelname)s] %(plugin_tag)s[%(filename)s:%(lineno)d]: %(message)s",
                 ),
             )
-        logger.addHandler(handler)
+        cls.add_sink(logger, handler)
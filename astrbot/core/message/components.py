@@ -32,7 +32,11 @@ from pydantic.v1 import BaseModel
 
 from astrbot.core import astrbot_config, file_token_service, logger
 from astrbot.core.utils.astrbot_path import get_astrbot_data_path
-from astrbot.core.utils.io import download_file, download_image_by_url, file_to_base64
+from astrbot.core.utils.io import (
+    download_file,
+    download_image_by_url,
+    file_to_base64_async,
+)
 
 
 class ComponentType(str, Enum):
@@ -176,14 +180,14 @@ class Record(BaseMessageComponent):
         if not self.file:
             raise Exception(f"not a valid file: {self.file}")
         if self.file.startswith("file:///"):
-            bs64_data = file_to_base64(self.file[8:])
+            bs64_data = await file_to_base64_async(self.file[8:])
         elif self.file.startswith("http"):
             file_path = await download_image_by_url(self.file)
-            bs64_data = file_to_base64(file_path)
+            bs64_data = await file_to_base64_async(file_path)
         elif self.file.startswith("base64://"):
             bs64_data = self.file
         elif os.path.exists(self.file):
-            bs64_data = file_to_base64(self.file)
+            bs64_data = await file_to_base64_async(self.file)
         else:
             raise Exception(f"not a valid file: {self.file}")
         bs64_data = bs64_data.removeprefix("base64://")
@@ -466,14 +470,14 @@ class Image(BaseMessageComponent):
         if not url:
             raise ValueError("No valid file or URL provided")
         if url.startswith("file:///"):
-            bs64_data = file_to_base64(url[8:])
+            bs64_data = await file_to_base64_async(url[8:])
         elif url.startswith("http"):
             image_file_path = await download_image_by_url(url)
-            bs64_data = file_to_base64(image_file_path)
+            bs64_data = await file_to_base64_async(image_file_path)
         elif url.startswith("base64://"):
             bs64_data = url
         elif os.path.exists(url):
-            bs64_data = file_to_base64(url)
+            bs64_data = await file_to_base64_async(url)
         else:
             raise Exception(f"not a valid file: {url}")
         bs64_data = bs64_data.removeprefix("base64://")
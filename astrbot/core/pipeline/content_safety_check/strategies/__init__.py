@@ -1,7 +1,44 @@
 import abc
+import hashlib
+import time
+from collections import OrderedDict
 
 
 class ContentSafetyStrategy(abc.ABC):
     @abc.abstractmethod
-    def check(self, content: str) -> tuple[bool, str]:
+    async def check(self, content: str) -> tuple[bool, str]:
         raise NotImplementedError
+
+
+class VerdictCache:
+    """远程审核结果的缓存，按文本的哈希索引，超出容量时淘汰最久未使用的结果"""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, tuple[bool, str]]] = OrderedDict()
+
+    @staticmethod
+    def key(content: str) -> str:
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def get(self, content: str) -> tuple[bool, str] | None:
+        key = self.key(content)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[0] > self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def put(self, content: str, verdict: tuple[bool, str]) -> None:
+        key = self.key(content)
+        self._entries[key] = (time.monotonic(), verdict)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
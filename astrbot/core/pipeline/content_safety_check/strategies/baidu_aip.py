@@ -1,8 +1,10 @@
 """使用此功能应该先 pip install baidu-aip"""
 
+import asyncio
+
 from aip import AipContentCensor
 
-from . import ContentSafetyStrategy
+from . import ContentSafetyStrategy, VerdictCache
 
 
 class BaiduAipStrategy(ContentSafetyStrategy):
@@ -11,9 +13,50 @@ class BaiduAipStrategy(ContentSafetyStrategy):
         self.api_key = ak
         self.secret_key = sk
         self.client = AipContentCensor(self.app_id, self.api_key, self.secret_key)
+        self.cache = VerdictCache()
+        self._inflight: dict[str, asyncio.Future[tuple[bool, str] | None]] = {}
+
+    async def check(self, content: str) -> tuple[bool, str]:
+        key = VerdictCache.key(content)
+        while True:
+            cached = self.cache.get(content)
+            if cached is not None:
+                return cached
+            # 相同内容的并发审核（如同一消息的请求与回复）只请求一次
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                return await self._request(content, key)
+            verdict = await asyncio.shield(inflight)
+            if verdict is not None:
+                return verdict
+            # 发起请求的一方被取消，由等待者重新请求
+
+    async def _request(self, content: str, key: str) -> tuple[bool, str]:
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            # SDK 使用同步的 HTTP 请求，放到线程中执行，避免阻塞事件循环
+            res = await asyncio.to_thread(self.client.textCensorUserDefined, content)
+            verdict = self._parse(res)
+            if "conclusionType" in res:
+                # 请求出错时不缓存结果
+                self.cache.put(content, verdict)
+            future.set_result(verdict)
+            return verdict
+        except asyncio.CancelledError:
+            # 不能取消共享的 future，否则其他等待者会收到并非针对它们的取消
+            future.set_result(None)
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # 没有其他等待者时避免 "exception was never retrieved" 警告
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
 
-    def check(self, content: str) -> tuple[bool, str]:
-        res = self.client.textCensorUserDefined(content)
+    @staticmethod
+    def _parse(res: dict) -> tuple[bool, str]:
         if "conclusionType" not in res:
             return False, ""
         if res["conclusionType"] == 1:
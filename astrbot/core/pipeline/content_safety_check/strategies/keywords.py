@@ -1,7 +1,67 @@
 import re
+from functools import lru_cache
+
+from astrbot import logger
+from astrbot.core.utils.aho_corasick import AhoCorasick
 
 from . import ContentSafetyStrategy
 
+_REGEX_META = frozenset(".^$*+?{}[]\\|()")
+_UNCOMBINABLE = re.compile(r"\(\?[aiLmsux]+\)|\\[1-9]|\(\?P=|\(\?\(\d")
+
+
+class KeywordMatcher:
+    """编译后的关键词匹配器。
+
+    不含正则元字符的关键词按字面匹配，使用 Aho-Corasick 自动机一次扫描完成；
+    其余关键词作为正则表达式合并为一个模式。无法编译的正则按字面匹配。
+    """
+
+    def __init__(self, keywords: tuple[str, ...]) -> None:
+        literals: list[str] = []
+        patterns: list[str] = []
+        for keyword in keywords:
+            if not keyword:
+                # 空关键词会匹配所有内容
+                continue
+            if _REGEX_META.isdisjoint(keyword):
+                literals.append(keyword)
+                continue
+            try:
+                re.compile(keyword)
+            except re.error as e:
+                logger.warning(
+                    f"敏感词 {keyword!r} 不是有效的正则表达式，按字面匹配: {e}"
+                )
+                literals.append(keyword)
+                continue
+            patterns.append(keyword)
+
+        self.literals = AhoCorasick(literals) if literals else None
+        # 全局内联标志、反向引用和按编号引用分组的条件在合并后会改变含义，这类正则单独匹配
+        combinable = [p for p in patterns if not _UNCOMBINABLE.search(p)]
+        self.patterns: list[re.Pattern] = [
+            re.compile(p) for p in patterns if _UNCOMBINABLE.search(p)
+        ]
+        if combinable:
+            try:
+                combined = [re.compile("|".join(f"(?:{p})" for p in combinable))]
+            except re.error:
+                # 例如不同关键词中出现了同名的命名分组
+                combined = [re.compile(p) for p in combinable]
+            self.patterns = combined + self.patterns
+
+    def search(self, content: str) -> bool:
+        if self.literals is not None and self.literals.search(content) is not None:
+            return True
+        return any(pattern.search(content) for pattern in self.patterns)
+
+
+@lru_cache(maxsize=16)
+def build_keyword_matcher(keywords: tuple[str, ...]) -> KeywordMatcher:
+    """同一组关键词只编译一次，配置变化后才会重新构建"""
+    return KeywordMatcher(keywords)
+
 
 class KeywordsStrategy(ContentSafetyStrategy):
     def __init__(self, extra_keywords: list) -> None:
@@ -16,9 +76,9 @@ class KeywordsStrategy(ContentSafetyStrategy):
         #         self.keywords.extend(
         #             json.loads(base64.b64decode(f.read()).decode("utf-8"))["keywords"]
         #         )
+        self.matcher = build_keyword_matcher(tuple(str(k) for k in self.keywords))
 
-    def check(self, content: str) -> tuple[bool, str]:
-        for keyword in self.keywords:
-            if re.search(keyword, content):
-                return False, "内容安全检查不通过，匹配到敏感词。"
+    async def check(self, content: str) -> tuple[bool, str]:
+        if self.matcher.search(content):
+            return False, "内容安全检查不通过，匹配到敏感词。"
         return True, ""
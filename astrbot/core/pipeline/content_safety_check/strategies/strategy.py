@@ -26,9 +26,10 @@ class StrategySelector:
                 ),
             )
 
-    def check(self, content: str) -> tuple[bool, str]:
+    async def check(self, content: str) -> tuple[bool, str]:
+        # 本地策略在前，命中时无需再请求远程审核服务
         for strategy in self.enabled_strategies:
-            ok, info = strategy.check(content)
+            ok, info = await strategy.check(content)
             if not ok:
                 return False, info
         return True, ""
@@ -1,6 +1,7 @@
 """本地 Agent 模式的 LLM 调用 Stage"""
 
 import asyncio
+import copy
 import json
 import os
 from collections.abc import AsyncGenerator
@@ -51,6 +52,9 @@ from ...utils import (
     retrieve_knowledge_base,
 )
 
+HISTORY_WINDOW_TOKEN_RATIO = 0.5
+"""读取的对话历史最多占模型上下文长度的比例"""
+
 
 class InternalAgentSubStage(Stage):
     async def initialize(self, ctx: PipelineContext) -> None:
@@ -63,6 +67,8 @@ class InternalAgentSubStage(Stage):
         ]
         self.max_step: int = settings.get("max_agent_step", 30)
         self.tool_call_timeout: int = settings.get("tool_call_timeout", 60)
+        self.parallel_tool_calls: bool = settings.get("parallel_tool_calls", False)
+        self.max_parallel_tool_calls: int = settings.get("max_parallel_tool_calls", 4)
         self.tool_schema_mode: str = settings.get("tool_schema_mode", "full")
         if self.tool_schema_mode not in ("skills_like", "full"):
             logger.warning(
@@ -98,6 +104,9 @@ class InternalAgentSubStage(Stage):
         self.llm_compress_provider_id: str = settings.get(
             "llm_compress_provider_id", ""
         )
+        self.context_token_counter: str = settings.get(
+            "context_token_counter", "estimate"
+        )
         self.max_context_length = settings["max_context_length"]  # int
         self.dequeue_context_length: int = min(
             max(1, settings["dequeue_context_length"]),
@@ -131,15 +140,32 @@ class InternalAgentSubStage(Stage):
             return None
         return prov
 
-    async def _get_session_conv(self, event: AstrMessageEvent) -> Conversation:
+    def _history_window(self, provider: Provider) -> tuple[int | None, int | None]:
+        """读取对话历史时的窗口 (last_turns, max_tokens)，更早的历史不会被读取"""
+        last_turns = self.max_context_length if self.max_context_length > 0 else None
+        max_tokens = None
+        # llm_compress 需要完整的历史来生成摘要
+        if self.context_limit_reached_strategy != "llm_compress":
+            max_context_tokens = provider.provider_config.get("max_context_tokens", 0)
+            if max_context_tokens > 0:
+                # 为系统提示词、工具定义和本轮消息留出空间，避免每轮都触发截断
+                max_tokens = int(max_context_tokens * HISTORY_WINDOW_TOKEN_RATIO)
+        return last_turns, max_tokens
+
+    async def _get_session_conv(
+        self, event: AstrMessageEvent, provider: Provider
+    ) -> Conversation:
         umo = event.unified_msg_origin
         conv_mgr = self.conv_manager
+        last_turns, max_tokens = self._history_window(provider)
 
-        # 获取对话上下文
+        # 获取对话上下文，只读取最近的一段历史
         cid = await conv_mgr.get_curr_conversation_id(umo)
         if not cid:
             cid = await conv_mgr.new_conversation(umo, event.get_platform_id())
-        conversation = await conv_mgr.get_conversation(umo, cid)
+        conversation = await conv_mgr.get_conversation(
+            umo, cid, last_turns=last_turns, max_tokens=max_tokens
+        )
         if not conversation:
             cid = await conv_mgr.new_conversation(umo, event.get_platform_id())
             conversation = await conv_mgr.get_conversation(umo, cid)
@@ -147,6 +173,14 @@ class InternalAgentSubStage(Stage):
             raise RuntimeError("无法创建新的对话。")
         return conversation
 
+    @staticmethod
+    def _conversation_contexts(conversation: Conversation) -> list[dict]:
+        # 由 ConversationManager 读取的对话带有结构化历史，无需再解析 history 字符串。
+        # 深拷贝一份，conversation.messages 保持读取时的内容，保存时据此判断历史是否被修改
+        if conversation.messages is not None:
+            return copy.deepcopy(conversation.messages)
+        return json.loads(conversation.history)
+
     async def _apply_kb(
         self,
         event: AstrMessageEvent,
@@ -229,7 +263,7 @@ class InternalAgentSubStage(Stage):
             provider_cfg = provider.provider_config.get("modalities", ["image"])
             if "image" not in provider_cfg:
                 logger.debug(
-                    f"用户设置提供商 {provider} 不支持图像，将图像替换为占位符。"
+                    "用户设置提供商 %s 不支持图像，将图像替换为占位符。", provider
                 )
                 # 为每个图片添加占位符到 prompt
                 image_count = len(req.image_urls)
@@ -244,7 +278,7 @@ class InternalAgentSubStage(Stage):
             # 如果模型不支持工具使用，但请求中包含工具列表，则清空。
             if "tool_use" not in provider_cfg:
                 logger.debug(
-                    f"用户设置提供商 {provider} 不支持工具使用，清空工具列表。",
+                    "用户设置提供商 %s 不支持工具使用，清空工具列表。", provider
                 )
                 req.func_tool = None
 
@@ -332,9 +366,11 @@ class InternalAgentSubStage(Stage):
         if removed_image_blocks or removed_tool_messages or removed_tool_calls:
             logger.debug(
                 "sanitize_context_by_modalities applied: "
-                f"removed_image_blocks={removed_image_blocks}, "
-                f"removed_tool_messages={removed_tool_messages}, "
-                f"removed_tool_calls={removed_tool_calls}"
+                "removed_image_blocks=%d, removed_tool_messages=%d, "
+                "removed_tool_calls=%d",
+                removed_image_blocks,
+                removed_tool_messages,
+                removed_tool_calls,
             )
 
         req.contexts = sanitized_contexts
@@ -398,7 +434,7 @@ class InternalAgentSubStage(Stage):
             if not title or "<None>" in title:
                 return
             logger.info(
-                f"Generated chatui title for session {chatui_session_id}: {title}"
+                "Generated chatui title for session %s: %s", chatui_session_id, title
             )
             await db_helper.update_platform_session(
                 session_id=chatui_session_id,
@@ -444,10 +480,20 @@ class InternalAgentSubStage(Stage):
         if runner_stats:
             token_usage = runner_stats.token_usage.total
 
-        await self.conv_manager.update_conversation(
-            event.unified_msg_origin,
+        window = req.conversation.messages
+        if window is None:
+            await self.conv_manager.update_conversation(
+                event.unified_msg_origin,
+                req.conversation.cid,
+                history=message_to_save,
+                token_usage=token_usage,
+            )
+            return
+        # 通常只需追加本轮新增的消息；截断或压缩时也只重写读取的那段历史
+        await self.conv_manager.update_history_window(
             req.conversation.cid,
-            history=message_to_save,
+            window,
+            message_to_save,
             token_usage=token_usage,
         )
 
@@ -551,6 +597,15 @@ class InternalAgentSubStage(Stage):
 
             async with session_lock_manager.acquire_lock(event.unified_msg_origin):
                 logger.debug("acquired session lock for llm request")
+
+                # inject model context length limit
+                if provider.provider_config.get("max_context_tokens", 0) <= 0:
+                    model = provider.get_model()
+                    if model_info := LLM_METADATAS.get(model):
+                        provider.provider_config["max_context_tokens"] = model_info[
+                            "limit"
+                        ]["context"]
+
                 if event.get_extra("provider_request"):
                     req = event.get_extra("provider_request")
                     assert isinstance(req, ProviderRequest), (
@@ -591,9 +646,9 @@ class InternalAgentSubStage(Stage):
                                 )
                             )
 
-                    conversation = await self._get_session_conv(event)
+                    conversation = await self._get_session_conv(event, provider)
                     req.conversation = conversation
-                    req.contexts = json.loads(conversation.history)
+                    req.contexts = self._conversation_contexts(conversation)
 
                     event.set_extra("provider_request", req)
 
@@ -656,21 +711,15 @@ class InternalAgentSubStage(Stage):
                 # run agent
                 agent_runner = AgentRunner()
                 logger.debug(
-                    f"handle provider[id: {provider.provider_config['id']}] request: {req}",
+                    "handle provider[id: %s] request: %s",
+                    provider.provider_config["id"],
+                    req,
                 )
                 astr_agent_ctx = AstrAgentContext(
                     context=self.ctx.plugin_manager.context,
                     event=event,
                 )
 
-                # inject model context length limit
-                if provider.provider_config.get("max_context_tokens", 0) <= 0:
-                    model = provider.get_model()
-                    if model_info := LLM_METADATAS.get(model):
-                        provider.provider_config["max_context_tokens"] = model_info[
-                            "limit"
-                        ]["context"]
-
                 # ChatUI 对话的标题生成
                 if event.get_platform_name() == "webchat":
                     asyncio.create_task(self._handle_webchat(event, req, provider))
@@ -707,7 +756,10 @@ class InternalAgentSubStage(Stage):
                     llm_compress_provider=self._get_compress_provider(),
                     truncate_turns=self.dequeue_context_length,
                     enforce_max_turns=self.max_context_length,
+                    token_counter=self.context_token_counter,
                     tool_schema_mode=self.tool_schema_mode,
+                    parallel_tool_calls=self.parallel_tool_calls,
+                    max_parallel_tool_calls=self.max_parallel_tool_calls,
                 )
 
                 # 检测 Live Mode
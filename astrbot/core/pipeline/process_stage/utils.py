@@ -111,6 +111,7 @@ class KnowledgeBaseQueryTool(FunctionTool[AstrAgentContext]):
             "required": ["query"],
         }
     )
+    concurrency_safe: bool = True
 
     async def call(
         self, context: ContextWrapper[AstrAgentContext], **kwargs
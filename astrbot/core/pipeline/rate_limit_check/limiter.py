@@ -0,0 +1,214 @@
+"""会话限流引擎。
+
+每个限流 key 只保存 O(1) 的状态：
+
+- token_bucket: (剩余令牌数, 上次更新时间)
+- gcra: 理论到达时间 (TAT)
+
+两种算法在相同的 count / time 参数下都允许 count 条消息的突发，并以 count / time 的
+速率恢复额度。状态完全恢复（令牌桶已满 / TAT 早于当前时间）的 key 与从未出现过的 key
+等价，可以直接丢弃，因此空闲会话不会长期占用内存。
+
+状态的读写由 `RateLimiterBackend` 负责，默认使用进程内的 `MemoryRateLimiterBackend`。
+多个 AstrBot 实例需要共享限流状态时，可以实现一个基于共享存储的后端（需保证单个 key
+的读-改-写是原子的），并通过 `set_shared_backend` 注册。
+"""
+
+from __future__ import annotations
+
+import abc
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+ALGORITHMS = ("token_bucket", "gcra")
+
+
+@dataclass(frozen=True)
+class RateLimitRule:
+    """在 period 秒内最多处理 count 条消息"""
+
+    count: int
+    period: float
+    algorithm: str = "token_bucket"
+
+    @property
+    def rate(self) -> float:
+        """每秒恢复的额度"""
+        return self.count / self.period
+
+
+def token_bucket_acquire(
+    state: tuple[float, float] | None,
+    rule: RateLimitRule,
+    now: float,
+    reserve: bool,
+) -> tuple[tuple[float, float] | None, float, float]:
+    """令牌桶算法。
+
+    Returns:
+        (新状态, 需要等待的秒数, 状态可以被丢弃的时间)。等待时间为 0 表示放行；
+        reserve 为 True 时即使需要等待也会预占一个令牌，调用方等待后即可放行。
+
+    """
+    capacity = float(rule.count)
+    if state is None:
+        tokens = capacity
+    else:
+        tokens, last = state
+        tokens = min(capacity, tokens + (now - last) * rule.rate)
+
+    if tokens >= 1:
+        tokens -= 1
+        delay = 0.0
+    else:
+        delay = (1 - tokens) / rule.rate
+        if reserve:
+            tokens -= 1
+    return (tokens, now), delay, now + (capacity - tokens) / rule.rate
+
+
+def gcra_acquire(
+    state: float | None,
+    rule: RateLimitRule,
+    now: float,
+    reserve: bool,
+) -> tuple[float | None, float, float]:
+    """GCRA (Generic Cell Rate Algorithm)，返回值的含义同 `token_bucket_acquire`。"""
+    interval = rule.period / rule.count
+    tolerance = rule.period - interval
+    tat = now if state is None else max(state, now)
+    delay = max(0.0, tat - tolerance - now)
+    if delay > 0 and not reserve:
+        return state, delay, tat
+    new_tat = tat + interval
+    return new_tat, delay, new_tat
+
+
+_ACQUIRE_FUNCS = {
+    "token_bucket": token_bucket_acquire,
+    "gcra": gcra_acquire,
+}
+
+
+@dataclass
+class RateLimitMetrics:
+    allowed: int = 0
+    stalled: int = 0
+    discarded: int = 0
+    stall_seconds: float = 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "allowed": self.allowed,
+            "stalled": self.stalled,
+            "discarded": self.discarded,
+            "stall_seconds": round(self.stall_seconds, 3),
+        }
+
+
+class RateLimiterBackend(abc.ABC):
+    """限流状态存储后端"""
+
+    @abc.abstractmethod
+    async def acquire(self, key: str, rule: RateLimitRule, reserve: bool) -> float:
+        """为 key 申请一次额度，返回需要等待的秒数，0 表示立即放行。
+
+        reserve 为 True 时，即使需要等待也会预占额度（用于 stall 策略）；否则只有放行时
+        才会消耗额度（用于 discard 策略）。共享后端需要保证该操作对单个 key 是原子的。
+        """
+        raise NotImplementedError
+
+    def stats(self) -> dict[str, Any]:
+        return {}
+
+
+class MemoryRateLimiterBackend(RateLimiterBackend):
+    """进程内的限流状态存储，基于 `time.monotonic`，并自动清理空闲的 key。"""
+
+    def __init__(self, max_keys: int = 100_000, sweep_batch: int = 4) -> None:
+        """Args:
+        max_keys: 最多保存的 key 数量，超出时丢弃最久未访问的 key（相当于重置其额度）
+        sweep_batch: 每次申请时最多检查多少个最久未访问的 key 是否已经空闲
+
+        """
+        self.max_keys = max_keys
+        self.sweep_batch = sweep_batch
+        # key -> (状态, 状态可以被丢弃的时间)，按最近访问顺序排列
+        self._states: OrderedDict[tuple[str, str], tuple[Any, float]] = OrderedDict()
+        self.evicted_keys = 0
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    async def acquire(self, key: str, rule: RateLimitRule, reserve: bool) -> float:
+        now = time.monotonic()
+        state_key = (rule.algorithm, key)
+        entry = self._states.get(state_key)
+        state = entry[0] if entry is not None and entry[1] > now else None
+
+        new_state, delay, expires_at = _ACQUIRE_FUNCS[rule.algorithm](
+            state,
+            rule,
+            now,
+            reserve,
+        )
+        self._states[state_key] = (new_state, expires_at)
+        self._states.move_to_end(state_key)
+        self._sweep(now)
+        return delay
+
+    def _sweep(self, now: float) -> None:
+        for _ in range(self.sweep_batch):
+            if not self._states:
+                return
+            state_key, (_, expires_at) = next(iter(self._states.items()))
+            if expires_at > now:
+                break
+            del self._states[state_key]
+            self.evicted_keys += 1
+        while len(self._states) > self.max_keys:
+            self._states.popitem(last=False)
+            self.evicted_keys += 1
+
+    def stats(self) -> dict[str, Any]:
+        return {"keys": len(self._states), "evicted_keys": self.evicted_keys}
+
+
+_shared_backend: RateLimiterBackend | None = None
+
+
+def set_shared_backend(backend: RateLimiterBackend | None) -> None:
+    """注册所有限流阶段共用的后端，传入 None 时恢复为各自的进程内后端。"""
+    global _shared_backend
+    _shared_backend = backend
+
+
+def get_shared_backend() -> RateLimiterBackend | None:
+    return _shared_backend
+
+
+def parse_rule_overrides(
+    overrides: list[str],
+    algorithm: str = "token_bucket",
+) -> dict[str, RateLimitRule]:
+    """解析形如 `<平台 ID 或会话 UMO>=<count>/<time>` 的覆盖规则，无法解析的条目会被忽略。"""
+    rules = {}
+    for item in overrides or []:
+        key, sep, value = str(item).rpartition("=")
+        count, _, period = value.partition("/")
+        key = key.strip()
+        if not sep or not key:
+            continue
+        try:
+            rule = RateLimitRule(
+                count=int(count),
+                period=float(period),
+                algorithm=algorithm,
+            )
+        except ValueError:
+            continue
+        if rule.count > 0 and rule.period > 0:
+            rules[key] = rule
+    return rules
@@ -1,7 +1,5 @@
 import asyncio
-from collections import defaultdict, deque
 from collections.abc import AsyncGenerator
-from datetime import datetime, timedelta
 
 from astrbot.core import logger
 from astrbot.core.config.astrbot_config import RateLimitStrategy
@@ -9,91 +7,99 @@ from astrbot.core.platform.astr_message_event import AstrMessageEvent
 
 from ..context import PipelineContext
 from ..stage import Stage, register_stage
+from .limiter import (
+    ALGORITHMS,
+    MemoryRateLimiterBackend,
+    RateLimiterBackend,
+    RateLimitMetrics,
+    RateLimitRule,
+    get_shared_backend,
+    parse_rule_overrides,
+)
 
 
 @register_stage
 class RateLimitStage(Stage):
     """检查是否需要限制消息发送的限流器。
 
-    使用 Fixed Window 算法。
-    如果触发限流，将 stall 流水线，直到下一个时间窗口来临时自动唤醒。
+    使用令牌桶或 GCRA 算法，每个会话只保存 O(1) 的状态，空闲会话的状态会被自动清理。
+    如果触发限流，stall 策略会预占额度后暂停流水线，直到额度恢复时自动唤醒；
+    discard 策略会直接丢弃该消息。
     """
 
     def __init__(self):
-        # 存储每个会话的请求时间队列
-        self.event_timestamps: defaultdict[str, deque[datetime]] = defaultdict(deque)
-        # 为每个会话设置一个锁，避免并发冲突
-        self.locks: defaultdict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+        self.backend: RateLimiterBackend = MemoryRateLimiterBackend()
+        self.metrics = RateLimitMetrics()
         # 限流参数
-        self.rate_limit_count: int = 0
-        self.rate_limit_time: timedelta = timedelta(0)
+        self.default_rule: RateLimitRule | None = None
+        self.rule_overrides: dict[str, RateLimitRule] = {}
+        """平台 ID 或会话 UMO 到限流规则的映射，会话 UMO 优先"""
 
     async def initialize(self, ctx: PipelineContext) -> None:
         """初始化限流器，根据配置设置限流参数。"""
-        self.rate_limit_count = ctx.astrbot_config["platform_settings"]["rate_limit"][
-            "count"
-        ]
-        self.rate_limit_time = timedelta(
-            seconds=ctx.astrbot_config["platform_settings"]["rate_limit"]["time"],
+        rl_config = ctx.astrbot_config["platform_settings"]["rate_limit"]
+        algorithm = rl_config.get("algorithm", "token_bucket")
+        if algorithm not in ALGORITHMS:
+            logger.warning(f"未知的限流算法 {algorithm}，将使用 token_bucket。")
+            algorithm = "token_bucket"
+        count, period = rl_config["count"], rl_config["time"]
+        if count > 0 and period > 0:
+            self.default_rule = RateLimitRule(count, period, algorithm)
+        self.rule_overrides = parse_rule_overrides(
+            rl_config.get("overrides", []),
+            algorithm,
         )
-        self.rl_strategy = ctx.astrbot_config["platform_settings"]["rate_limit"][
-            "strategy"
-        ]  # stall or discard
+        self.rl_strategy = rl_config["strategy"]  # stall or discard
+
+        shared_backend = get_shared_backend()
+        if shared_backend is not None:
+            self.backend = shared_backend
+
+    def get_rule(self, event: AstrMessageEvent) -> RateLimitRule | None:
+        umo = event.unified_msg_origin
+        rule = self.rule_overrides.get(umo)
+        if rule is None:
+            rule = self.rule_overrides.get(event.get_platform_id(), self.default_rule)
+        return rule
 
     async def process(
         self,
         event: AstrMessageEvent,
     ) -> None | AsyncGenerator[None, None]:
-        """检查并处理限流逻辑。如果触发限流，流水线会 stall 并在窗口期后自动恢复。
+        """检查并处理限流逻辑。如果触发限流，流水线会 stall 并在额度恢复后自动恢复。
 
         Args:
             event (AstrMessageEvent): 当前消息事件。
-            ctx (PipelineContext): 流水线上下文。
 
         Returns:
             MessageEventResult: 继续或停止事件处理的结果。
 
         """
-        session_id = event.session_id
-        now = datetime.now()
-
-        async with self.locks[session_id]:  # 确保同一会话不会并发修改队列
-            # 检查并处理限流，可能需要多次检查直到满足条件
-            while True:
-                timestamps = self.event_timestamps[session_id]
-                self._remove_expired_timestamps(timestamps, now)
-
-                if len(timestamps) < self.rate_limit_count:
-                    timestamps.append(now)
-                    break
-                next_window_time = timestamps[0] + self.rate_limit_time
-                stall_duration = (next_window_time - now).total_seconds() + 0.3
-
-                match self.rl_strategy:
-                    case RateLimitStrategy.STALL.value:
-                        logger.info(
-                            f"会话 {session_id} 被限流。根据限流策略，此会话处理将被暂停 {stall_duration:.2f} 秒。",
-                        )
-                        await asyncio.sleep(stall_duration)
-                        now = datetime.now()
-                    case RateLimitStrategy.DISCARD.value:
-                        logger.info(
-                            f"会话 {session_id} 被限流。根据限流策略，此请求已被丢弃，直到限额于 {stall_duration:.2f} 秒后重置。",
-                        )
-                        return event.stop_event()
-
-    def _remove_expired_timestamps(
-        self,
-        timestamps: deque[datetime],
-        now: datetime,
-    ) -> None:
-        """移除时间窗口外的时间戳。
-
-        Args:
-            timestamps (Deque[datetime]): 当前会话的时间戳队列。
-            now (datetime): 当前时间，用于计算过期时间。
+        rule = self.get_rule(event)
+        if rule is None:
+            return
+        umo = event.unified_msg_origin
+        stall = self.rl_strategy == RateLimitStrategy.STALL.value
+        delay = await self.backend.acquire(umo, rule, reserve=stall)
+        if delay <= 0:
+            self.metrics.allowed += 1
+            return
+
+        if stall:
+            self.metrics.stalled += 1
+            self.metrics.stall_seconds += delay
+            logger.info(
+                f"会话 {umo} 被限流。根据限流策略，此会话处理将被暂停 {delay:.2f} 秒。",
+            )
+            # 额度已经预占，等待期间不阻塞同一会话的其他消息申请额度
+            await asyncio.sleep(delay)
+            return
+
+        self.metrics.discarded += 1
+        logger.info(
+            f"会话 {umo} 被限流。根据限流策略，此请求已被丢弃，直到限额于 {delay:.2f} 秒后恢复。",
+        )
+        return event.stop_event()
 
-        """
-        expiry_threshold: datetime = now - self.rate_limit_time
-        while timestamps and timestamps[0] < expiry_threshold:
-            timestamps.popleft()
+    def stats(self) -> dict:
+        return {**self.metrics.to_dict(), **self.backend.stats()}
@@ -1,6 +1,5 @@
 import random
 import re
-import time
 import traceback
 from collections.abc import AsyncGenerator
 
@@ -13,6 +12,7 @@ from astrbot.core.platform.message_type import MessageType
 from astrbot.core.star.session_llm_manager import SessionServiceManager
 from astrbot.core.star.star import star_map
 from astrbot.core.star.star_handler import EventType, star_handlers_registry
+from astrbot.core.utils.t2i import RenderTiming
 
 from ..context import PipelineContext
 from ..stage import Stage, register_stage, registered_stages
@@ -38,6 +38,8 @@ class ResultDecorateStage(Stage):
         self.t2i_strategy = ctx.astrbot_config["t2i_strategy"]
         self.t2i_use_network = self.t2i_strategy == "remote"
         self.t2i_active_template = ctx.astrbot_config["t2i_active_template"]
+        self.last_t2i_timing: RenderTiming | None = None
+        """最近一次文转图的耗时"""
 
         self.forward_threshold = ctx.astrbot_config["platform_settings"][
             "forward_threshold"
@@ -339,20 +341,23 @@ class ResultDecorateStage(Stage):
                         break
                 plain_str = "".join(parts)
                 if plain_str and len(plain_str) > self.t2i_word_threshold:
-                    render_start = time.time()
+                    timing = RenderTiming()
                     try:
                         url = await html_renderer.render_t2i(
                             plain_str,
                             return_url=True,
                             use_network=self.t2i_use_network,
                             template_name=self.t2i_active_template,
+                            timing=timing,
                         )
                     except BaseException:
                         logger.error("文本转图片失败，使用文本发送。")
                         return
-                    if time.time() - render_start > 3:
+                    self.last_t2i_timing = timing
+                    logger.debug(f"文本转图片耗时: {timing.summary()}")
+                    if timing.total > 3:
                         logger.warning(
-                            "文本转图片耗时超过了 3 秒，如果觉得很慢可以使用 /t2i 关闭文本转图片模式。",
+                            f"文本转图片耗时超过了 3 秒（{timing.summary()}），如果觉得很慢可以使用 /t2i 关闭文本转图片模式。",
                         )
                     if url:
                         if url.startswith("http"):
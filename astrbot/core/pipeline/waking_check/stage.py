@@ -5,11 +5,11 @@ from astrbot.core.message.components import At, AtAll, Reply
 from astrbot.core.message.message_event_result import MessageChain, MessageEventResult
 from astrbot.core.platform.astr_message_event import AstrMessageEvent
 from astrbot.core.platform.message_type import MessageType
+from astrbot.core.star.command_dispatch import CommandDispatchIndex
 from astrbot.core.star.filter.command_group import CommandGroupFilter
 from astrbot.core.star.filter.permission import PermissionTypeFilter
 from astrbot.core.star.session_plugin_manager import SessionPluginManager
 from astrbot.core.star.star import star_map
-from astrbot.core.star.star_handler import EventType, star_handlers_registry
 
 from ..context import PipelineContext
 from ..stage import Stage, register_stage
@@ -72,6 +72,8 @@ class WakingCheckStage(Stage):
         )
         platform_settings = self.ctx.astrbot_config.get("platform_settings", {})
         self.unique_session = platform_settings.get("unique_session", False)
+        # 指令分发索引，在插件注册表变化时自动重建
+        self.dispatch_index = CommandDispatchIndex()
 
     async def process(
         self,
@@ -156,8 +158,8 @@ class WakingCheckStage(Stage):
             event.plugins_name = enabled_plugins_name
         logger.debug(f"enabled_plugins_name: {enabled_plugins_name}")
 
-        for handler in star_handlers_registry.get_handlers_by_event_type(
-            EventType.AdapterMessageEvent,
+        for handler in self.dispatch_index.get_candidate_handlers(
+            event,
             plugins_name=event.plugins_name,
         ):
             if (
@@ -171,8 +173,6 @@ class WakingCheckStage(Stage):
             passed = True
             permission_not_pass = False
             permission_filter_raise_error = False
-            if len(handler.event_filters) == 0:
-                continue
 
             for filter in handler.event_filters:
                 try:
@@ -26,46 +26,40 @@ from .webchat_queue_mgr import WebChatQueueMgr, webchat_queue_mgr
 
 
 class QueueListener:
-    def __init__(self, webchat_queue_mgr: WebChatQueueMgr, callback: Callable) -> None:
+    def __init__(
+        self,
+        webchat_queue_mgr: WebChatQueueMgr,
+        callback: Callable,
+        cleanup_interval: float = 60,
+    ) -> None:
         self.webchat_queue_mgr = webchat_queue_mgr
         self.callback = callback
-        self.running_tasks = set()
-
-    async def listen_to_queue(self, conversation_id: str):
-        """Listen to a specific conversation queue"""
-        queue = self.webchat_queue_mgr.get_or_create_queue(conversation_id)
-        while True:
-            try:
-                data = await queue.get()
-                await self.callback(data)
-            except Exception as e:
-                logger.error(
-                    f"Error processing message from conversation {conversation_id}: {e}",
-                )
-                break
+        self.cleanup_interval = cleanup_interval
+
+    @staticmethod
+    def _on_queue_created(conversation_id: str):
+        logger.debug(f"New webchat conversation: {conversation_id}")
 
     async def run(self):
-        """Monitor for new conversation queues and start listeners"""
-        monitored_conversations = set()
-
-        while True:
-            # Check for new conversations
-            current_conversations = set(self.webchat_queue_mgr.queues.keys())
-            new_conversations = current_conversations - monitored_conversations
-
-            # Start listeners for new conversations
-            for conversation_id in new_conversations:
-                task = asyncio.create_task(self.listen_to_queue(conversation_id))
-                self.running_tasks.add(task)
-                task.add_done_callback(self.running_tasks.discard)
-                monitored_conversations.add(conversation_id)
-                logger.debug(f"Started listener for conversation: {conversation_id}")
-
-            # Clean up monitored conversations that no longer exist
-            removed_conversations = monitored_conversations - current_conversations
-            monitored_conversations -= removed_conversations
-
-            await asyncio.sleep(1)  # Check for new conversations every second
+        """Consume the multiplexed inbound queue of all conversations"""
+        inbound = self.webchat_queue_mgr.inbound
+        self.webchat_queue_mgr.add_listener(self._on_queue_created)
+        next_cleanup = time.monotonic() + self.cleanup_interval
+        try:
+            while True:
+                data = await inbound.get()
+                try:
+                    await self.callback(data)
+                except Exception as e:
+                    logger.error(
+                        f"Error processing message from conversation {data[1]}: {e}",
+                    )
+                # 只在有消息时顺带清理闲置的响应队列，空闲时不产生额外唤醒
+                if time.monotonic() >= next_cleanup:
+                    self.webchat_queue_mgr.cleanup_idle_back_queues()
+                    next_cleanup = time.monotonic() + self.cleanup_interval
+        finally:
+            self.webchat_queue_mgr.remove_listener(self._on_queue_created)
 
 
 @register_platform_adapter("webchat", "webchat")
@@ -1,31 +1,108 @@
 import asyncio
+import time
+from collections.abc import Callable
+
+
+class ConversationInbox:
+    """A per-conversation handle to the multiplexed inbound queue."""
+
+    def __init__(self, conversation_id: str, mgr: "WebChatQueueMgr") -> None:
+        self.conversation_id = conversation_id
+        self._mgr = mgr
+
+    async def put(self, item: tuple) -> None:
+        await self._mgr.inbound.put(item)
+
+    def put_nowait(self, item: tuple) -> None:
+        self._mgr.inbound.put_nowait(item)
 
 
 class WebChatQueueMgr:
-    def __init__(self) -> None:
-        self.queues = {}
-        """Conversation ID to asyncio.Queue mapping"""
-        self.back_queues = {}
+    def __init__(self, back_queue_idle_ttl: float = 600) -> None:
+        self._inbound: asyncio.Queue | None = None
+        self.queues: dict[str, ConversationInbox] = {}
+        """Conversation ID to inbox mapping"""
+        self.back_queues: dict[str, asyncio.Queue] = {}
         """Conversation ID to asyncio.Queue mapping for responses"""
+        self.back_queue_idle_ttl = back_queue_idle_ttl
+        self._back_queue_used: dict[str, float] = {}
+        self._back_queue_readers: dict[str, int] = {}
+        self._listeners: list[Callable[[str], None]] = []
+
+    @property
+    def inbound(self) -> asyncio.Queue:
+        """Multiplexed queue of (username, conversation_id, payload) from all conversations"""
+        if self._inbound is None:
+            self._inbound = asyncio.Queue()
+        return self._inbound
+
+    def add_listener(self, listener: Callable[[str], None]) -> None:
+        """Register a callback invoked with the conversation ID when a queue is created"""
+        self._listeners.append(listener)
 
-    def get_or_create_queue(self, conversation_id: str) -> asyncio.Queue:
+    def remove_listener(self, listener: Callable[[str], None]) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def get_or_create_queue(self, conversation_id: str) -> ConversationInbox:
         """Get or create a queue for the given conversation ID"""
         if conversation_id not in self.queues:
-            self.queues[conversation_id] = asyncio.Queue()
+            self.queues[conversation_id] = ConversationInbox(conversation_id, self)
+            for listener in self._listeners:
+                listener(conversation_id)
         return self.queues[conversation_id]
 
     def get_or_create_back_queue(self, conversation_id: str) -> asyncio.Queue:
         """Get or create a back queue for the given conversation ID"""
         if conversation_id not in self.back_queues:
             self.back_queues[conversation_id] = asyncio.Queue()
+        self._back_queue_used[conversation_id] = time.monotonic()
         return self.back_queues[conversation_id]
 
+    def acquire_back_queue(self, conversation_id: str) -> asyncio.Queue:
+        """Get the back queue and mark it as being read, so it is not cleaned up"""
+        self._back_queue_readers[conversation_id] = (
+            self._back_queue_readers.get(conversation_id, 0) + 1
+        )
+        return self.get_or_create_back_queue(conversation_id)
+
+    def release_back_queue(self, conversation_id: str) -> None:
+        """Release a back queue acquired by `acquire_back_queue`.
+
+        The queue is removed once it has no readers and no pending responses.
+        """
+        readers = self._back_queue_readers.get(conversation_id, 0) - 1
+        if readers > 0:
+            self._back_queue_readers[conversation_id] = readers
+            return
+        self._back_queue_readers.pop(conversation_id, None)
+        queue = self.back_queues.get(conversation_id)
+        if queue is not None and queue.empty():
+            del self.back_queues[conversation_id]
+            self._back_queue_used.pop(conversation_id, None)
+
+    def cleanup_idle_back_queues(self) -> int:
+        """Remove back queues without readers that have been idle for longer than the TTL"""
+        now = time.monotonic()
+        idle = [
+            cid
+            for cid, used in self._back_queue_used.items()
+            if now - used > self.back_queue_idle_ttl
+            and not self._back_queue_readers.get(cid)
+        ]
+        for cid in idle:
+            self.back_queues.pop(cid, None)
+            self._back_queue_used.pop(cid, None)
+        return len(idle)
+
     def remove_queues(self, conversation_id: str):
         """Remove queues for the given conversation ID"""
         if conversation_id in self.queues:
             del self.queues[conversation_id]
         if conversation_id in self.back_queues:
             del self.back_queues[conversation_id]
+        self._back_queue_used.pop(conversation_id, None)
+        self._back_queue_readers.pop(conversation_id, None)
 
     def has_queue(self, conversation_id: str) -> bool:
         """Check if a queue exists for the given conversation ID"""
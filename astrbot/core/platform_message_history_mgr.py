@@ -1,10 +1,33 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+
 from astrbot.core.db import BaseDatabase
 from astrbot.core.db.po import PlatformMessageHistory
 
+logger = logging.getLogger("astrbot")
+
 
 class PlatformMessageHistoryManager:
-    def __init__(self, db_helper: BaseDatabase):
+    def __init__(
+        self,
+        db_helper: BaseDatabase,
+        retention_days: float = 0,
+        max_per_session: int = 0,
+        cleanup_interval: float = 3600,
+    ):
+        """Args:
+        db_helper: 数据库
+        retention_days: 消息历史的保留天数，<= 0 表示不按时间清理
+        max_per_session: 每个会话最多保留的消息条数，<= 0 表示不限制
+        cleanup_interval: 后台清理任务的执行间隔（秒）
+
+        """
         self.db = db_helper
+        self.retention_days = retention_days
+        self.max_per_session = max_per_session
+        self.cleanup_interval = cleanup_interval
+        self._cleaner: asyncio.Task | None = None
 
     async def insert(
         self,
@@ -40,6 +63,47 @@ class PlatformMessageHistoryManager:
         history.reverse()
         return history
 
+    async def get_page(
+        self,
+        platform_id: str,
+        user_id: str,
+        limit: int = 200,
+        cursor: str | None = None,
+    ) -> tuple[list[PlatformMessageHistory], str | None]:
+        """Get one page of platform message history in chronological order.
+
+        The first page holds the latest messages. Pass the returned cursor to get
+        the page of older messages before it; the cursor is None on the last page.
+        """
+        history, next_cursor = await self.db.list_platform_message_history(
+            platform_id=platform_id,
+            user_id=user_id,
+            limit=limit,
+            cursor=cursor,
+        )
+        history.reverse()
+        return history, next_cursor
+
+    async def search(
+        self,
+        query: str,
+        platform_id: str | None = None,
+        user_id: str | None = None,
+        limit: int = 20,
+        cursor: str | None = None,
+    ) -> tuple[list[dict], str | None]:
+        """Full-text search over platform message history, best matches first.
+
+        Returns the hits and a cursor for the next page (None on the last page).
+        """
+        return await self.db.search_platform_message_history(
+            query,
+            platform_id=platform_id,
+            user_id=user_id,
+            limit=limit,
+            cursor=cursor,
+        )
+
     async def delete(self, platform_id: str, user_id: str, offset_sec: int = 86400):
         """Delete platform message history records older than the specified offset."""
         await self.db.delete_platform_message_offset(
@@ -47,3 +111,46 @@ class PlatformMessageHistoryManager:
             user_id=user_id,
             offset_sec=offset_sec,
         )
+
+    @property
+    def retention_enabled(self) -> bool:
+        return self.retention_days > 0 or self.max_per_session > 0
+
+    async def prune(self) -> int:
+        """按保留策略清理消息历史，返回删除的记录数"""
+        before = None
+        if self.retention_days > 0:
+            # 与 created_at 一致，使用不带时区的 UTC 时间比较
+            before = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(
+                days=self.retention_days
+            )
+        removed = await self.db.prune_platform_message_history(
+            before=before,
+            max_per_session=self.max_per_session,
+        )
+        if removed:
+            logger.info(f"已清理 {removed} 条过期的平台消息历史。")
+        return removed
+
+    def ensure_cleaner(self) -> None:
+        """在当前事件循环中启动后台清理任务，未配置保留策略时不启动"""
+        if not self.retention_enabled:
+            return
+        if self._cleaner is not None and not self._cleaner.done():
+            return
+        self._cleaner = asyncio.get_running_loop().create_task(self._clean_loop())
+
+    async def _clean_loop(self) -> None:
+        while True:
+            try:
+                await self.prune()
+            except Exception as e:
+                logger.warning(f"清理平台消息历史失败: {e}")
+            await asyncio.sleep(self.cleanup_interval)
+
+    async def close(self) -> None:
+        """停止清理任务，并等待排队中的消息历史写入数据库"""
+        if self._cleaner is not None:
+            self._cleaner.cancel()
+            self._cleaner = None
+        await self.db.flush_platform_message_history()
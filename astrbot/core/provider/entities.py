@@ -188,7 +188,7 @@ class ProviderRequest:
         if self.image_urls:
             for image_url in self.image_urls:
                 if image_url.startswith("http"):
-                    image_path = await download_image_by_url(image_url)
+                    image_path = await download_image_by_url(image_url, cache=True)
                     image_data = await self._encode_image_bs64(image_path)
                 elif image_url.startswith("file:///"):
                     image_path = image_url.replace("file:///", "")
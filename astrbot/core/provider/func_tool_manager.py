@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import asyncio
 import copy
+import hashlib
 import json
 import os
 from collections.abc import AsyncGenerator, Awaitable, Callable
@@ -17,6 +18,9 @@ from astrbot.core.utils.astrbot_path import get_astrbot_data_path
 
 DEFAULT_MCP_CONFIG = {"mcpServers": {}}
 
+MCP_TOOLS_CACHE_KEY = "mcp_tools_cache"
+"""持久化的 MCP 工具列表缓存，启动时先注册缓存的工具，不必等待 MCP 服务连接完成"""
+
 SUPPORTED_TYPES = [
     "string",
     "number",
@@ -105,11 +109,49 @@ async def _quick_test_mcp_connection(config: dict) -> tuple[bool, str]:
 
 class FunctionToolManager:
     def __init__(self) -> None:
-        self.func_list: list[FuncTool] = []
+        self._func_list: list[FuncTool] = []
+        self._version = 0
+        self._index: dict[str, FuncTool] = {}
+        self._index_state: tuple | None = None
+        self._indexed_list: list[FuncTool] | None = None
+        self._active_tool_set: ToolSet | None = None
         self.mcp_client_dict: dict[str, MCPClient] = {}
         """MCP 服务列表"""
         self.mcp_client_event: dict[str, asyncio.Event] = {}
 
+    @property
+    def func_list(self) -> list[FuncTool]:
+        return self._func_list
+
+    @func_list.setter
+    def func_list(self, value: list[FuncTool]) -> None:
+        self._func_list = value
+        self.mark_changed()
+
+    @property
+    def version(self) -> int:
+        """工具列表的版本号，每次增删、启用、停用工具时递增"""
+        return self._version
+
+    def mark_changed(self) -> None:
+        """使工具索引和缓存的工具描述失效。直接修改工具（如 active 字段）后需要调用"""
+        self._version += 1
+        self._index_state = None
+        self._active_tool_set = None
+
+    def _ensure_index(self) -> dict[str, FuncTool]:
+        # func_list 可能被外部直接 append，因此同时检查列表对象和长度
+        state = (self._version, len(self._func_list))
+        if self._index_state != state or self._indexed_list is not self._func_list:
+            index = {}
+            for f in self._func_list:
+                index.setdefault(f.name, f)
+            self._index = index
+            self._index_state = state
+            self._indexed_list = self._func_list
+            self._active_tool_set = None
+        return self._index
+
     def empty(self) -> bool:
         return len(self.func_list) == 0
 
@@ -119,6 +161,7 @@ class FunctionToolManager:
         func_args: list[dict],
         desc: str,
         handler: Callable[..., Awaitable[Any] | AsyncGenerator[Any]],
+        concurrency_safe: bool = False,
     ) -> FuncTool:
         params = {
             "type": "object",  # hard-coded here
@@ -133,6 +176,7 @@ class FunctionToolManager:
             parameters=params,
             description=desc,
             handler=handler,
+            concurrency_safe=concurrency_safe,
         )
 
     def add_func(
@@ -141,6 +185,7 @@ class FunctionToolManager:
         func_args: list,
         desc: str,
         handler: Callable[..., Awaitable[Any] | AsyncGenerator[Any]],
+        concurrency_safe: bool = False,
     ) -> None:
         """添加函数调用工具
 
@@ -148,6 +193,7 @@ class FunctionToolManager:
         @param func_args: 函数参数列表，格式为 [{"type": "string", "name": "arg_name", "description": "arg_description"}, ...]
         @param desc: 函数描述
         @param func_obj: 处理函数
+        @param concurrency_safe: 是否允许与同一轮的其他工具调用并发执行
         """
         # check if the tool has been added before
         self.remove_func(name)
@@ -158,27 +204,40 @@ class FunctionToolManager:
                 func_args=func_args,
                 desc=desc,
                 handler=handler,
+                concurrency_safe=concurrency_safe,
             ),
         )
         logger.info(f"添加函数调用工具: {name}")
 
     def remove_func(self, name: str) -> None:
         """删除一个函数调用工具。"""
+        if name not in self._ensure_index():
+            return
         for i, f in enumerate(self.func_list):
             if f.name == name:
                 self.func_list.pop(i)
+                self.mark_changed()
                 break
 
     def get_func(self, name) -> FuncTool | None:
-        for f in self.func_list:
-            if f.name == name:
-                return f
+        return self._ensure_index().get(name)
 
     def get_full_tool_set(self) -> ToolSet:
         """获取完整工具集"""
         tool_set = ToolSet(self.func_list.copy())
         return tool_set
 
+    def _get_active_tool_set(self) -> ToolSet:
+        """已经激活的工具集，在工具列表变化前复用，调用方不应修改"""
+        self._ensure_index()
+        if self._active_tool_set is None:
+            self._active_tool_set = ToolSet([f for f in self.func_list if f.active])
+        return self._active_tool_set
+
+    def get_active_tool_set(self) -> ToolSet:
+        """获取所有已经激活的工具组成的新工具集"""
+        return ToolSet(self._get_active_tool_set().tools.copy())
+
     async def init_mcp_clients(self) -> None:
         """从项目根目录读取 mcp_server.json 文件，初始化 MCP 服务列表。文件格式如下：
         ```
@@ -212,26 +271,96 @@ class FunctionToolManager:
             open(mcp_json_file, encoding="utf-8"),
         )["mcpServers"]
 
+        tools_cache: dict = await sp.global_get(MCP_TOOLS_CACHE_KEY, {})
         for name in mcp_server_json_obj:
             cfg = mcp_server_json_obj[name]
             if cfg.get("active", True):
+                client = self._new_mcp_client(name, cfg)
+                cached = tools_cache.get(name)
+                if cached and cached.get("config_hash") == _mcp_config_hash(cfg):
+                    try:
+                        import mcp
+
+                        client.tools = [
+                            mcp.types.Tool.model_validate(t) for t in cached["tools"]
+                        ]
+                        self.mcp_client_dict[name] = client
+                        self._register_mcp_tools(name, client)
+                        logger.info(
+                            f"已从缓存载入 MCP 服务 {name} 的 {len(client.tools)} 个工具，正在后台连接。",
+                        )
+                    except Exception as e:
+                        logger.warning(f"载入 MCP 服务 {name} 的工具缓存失败: {e}")
                 event = asyncio.Event()
                 asyncio.create_task(
-                    self._init_mcp_client_task_wrapper(name, cfg, event),
+                    self._init_mcp_client_task_wrapper(name, cfg, event, client=client),
                 )
                 self.mcp_client_event[name] = event
 
+    def _new_mcp_client(self, name: str, cfg: dict) -> MCPClient:
+        mcp_client = MCPClient(max_concurrency=cfg.get("max_concurrency", 16))
+        mcp_client.name = name
+
+        async def on_tools_changed(client: MCPClient):
+            if self.mcp_client_dict.get(name) is client:
+                self._register_mcp_tools(name, client)
+                await self._save_mcp_tools_cache(name, cfg, client)
+
+        mcp_client.on_tools_changed = on_tools_changed
+        return mcp_client
+
+    def _register_mcp_tools(self, name: str, mcp_client: MCPClient) -> None:
+        """用 MCP 客户端当前的工具列表替换该服务已注册的工具"""
+        tools = [
+            f
+            for f in self.func_list
+            if not (isinstance(f, MCPTool) and f.mcp_server_name == name)
+        ]
+        for tool in mcp_client.tools:
+            tools.append(
+                MCPTool(
+                    mcp_tool=tool,
+                    mcp_client=mcp_client,
+                    mcp_server_name=name,
+                )
+            )
+        self.func_list = tools
+
+    async def _save_mcp_tools_cache(
+        self, name: str, cfg: dict, mcp_client: MCPClient
+    ) -> None:
+        try:
+            tools_cache: dict = await sp.global_get(MCP_TOOLS_CACHE_KEY, {})
+            tools_cache[name] = {
+                "config_hash": _mcp_config_hash(cfg),
+                "tools": [
+                    t.model_dump(mode="json", exclude_none=True)
+                    for t in mcp_client.tools
+                ],
+            }
+            await sp.global_put(MCP_TOOLS_CACHE_KEY, tools_cache)
+        except Exception as e:
+            logger.warning(f"保存 MCP 服务 {name} 的工具缓存失败: {e}")
+
+    def get_mcp_stats(self) -> dict[str, dict]:
+        """获取各 MCP 服务的工具调用延迟与错误统计"""
+        return {
+            name: client.stats.to_dict()
+            for name, client in self.mcp_client_dict.items()
+        }
+
     async def _init_mcp_client_task_wrapper(
         self,
         name: str,
         cfg: dict,
         event: asyncio.Event,
         ready_future: asyncio.Future | None = None,
+        client: MCPClient | None = None,
     ) -> None:
         """初始化 MCP 客户端的包装函数，用于捕获异常"""
         try:
-            await self._init_mcp_client(name, cfg)
-            tools = await self.mcp_client_dict[name].list_tools_and_save()
+            await self._init_mcp_client(name, cfg, client)
+            tools = self.mcp_client_dict[name].tools
             if ready_future and not ready_future.done():
                 # tell the caller we are ready
                 ready_future.set_result(tools)
@@ -245,35 +374,32 @@ class FunctionToolManager:
             # 无论如何都能清理
             await self._terminate_mcp_client(name)
 
-    async def _init_mcp_client(self, name: str, config: dict) -> None:
-        """初始化单个MCP客户端"""
+    async def _init_mcp_client(
+        self, name: str, config: dict, mcp_client: MCPClient | None = None
+    ) -> None:
+        """初始化单个MCP客户端
+
+        Args:
+            mcp_client: 启动时已用缓存的工具列表注册的客户端
+        """
         # 先清理之前的客户端，如果存在
-        if name in self.mcp_client_dict:
+        if (
+            name in self.mcp_client_dict
+            and self.mcp_client_dict[name] is not mcp_client
+        ):
             await self._terminate_mcp_client(name)
 
-        mcp_client = MCPClient()
-        mcp_client.name = name
+        if mcp_client is None:
+            mcp_client = self._new_mcp_client(name, config)
         self.mcp_client_dict[name] = mcp_client
         await mcp_client.connect_to_server(config, name)
         tools_res = await mcp_client.list_tools_and_save()
         logger.debug(f"MCP server {name} list tools response: {tools_res}")
         tool_names = [tool.name for tool in tools_res.tools]
 
-        # 移除该MCP服务之前的工具（如有）
-        self.func_list = [
-            f
-            for f in self.func_list
-            if not (isinstance(f, MCPTool) and f.mcp_server_name == name)
-        ]
-
-        # 将 MCP 工具转换为 FuncTool 并添加到 func_list
-        for tool in mcp_client.tools:
-            func_tool = MCPTool(
-                mcp_tool=tool,
-                mcp_client=mcp_client,
-                mcp_server_name=name,
-            )
-            self.func_list.append(func_tool)
+        # 将 MCP 工具转换为 FuncTool 并替换该MCP服务之前的工具（如有）
+        self._register_mcp_tools(name, mcp_client)
+        await self._save_mcp_tools_cache(name, config, mcp_client)
 
         logger.info(f"已连接 MCP 服务 {name}, Tools: {tool_names}")
 
@@ -403,23 +529,17 @@ class FunctionToolManager:
 
     def get_func_desc_openai_style(self, omit_empty_parameter_field=False) -> list:
         """获得 OpenAI API 风格的**已经激活**的工具描述"""
-        tools = [f for f in self.func_list if f.active]
-        toolset = ToolSet(tools)
-        return toolset.openai_schema(
+        return self._get_active_tool_set().openai_schema(
             omit_empty_parameter_field=omit_empty_parameter_field,
         )
 
     def get_func_desc_anthropic_style(self) -> list:
         """获得 Anthropic API 风格的**已经激活**的工具描述"""
-        tools = [f for f in self.func_list if f.active]
-        toolset = ToolSet(tools)
-        return toolset.anthropic_schema()
+        return self._get_active_tool_set().anthropic_schema()
 
     def get_func_desc_google_genai_style(self) -> dict:
         """获得 Google GenAI API 风格的**已经激活**的工具描述"""
-        tools = [f for f in self.func_list if f.active]
-        toolset = ToolSet(tools)
-        return toolset.google_schema()
+        return self._get_active_tool_set().google_schema()
 
     def deactivate_llm_tool(self, name: str) -> bool:
         """停用一个已经注册的函数调用工具。
@@ -431,6 +551,7 @@ class FunctionToolManager:
         func_tool = self.get_func(name)
         if func_tool is not None:
             func_tool.active = False
+            self.mark_changed()
 
             inactivated_llm_tools: list = sp.get(
                 "inactivated_llm_tools",
@@ -461,6 +582,7 @@ class FunctionToolManager:
                     )
 
             func_tool.active = True
+            self.mark_changed()
 
             inactivated_llm_tools: list = sp.get(
                 "inactivated_llm_tools",
@@ -584,3 +706,10 @@ class FunctionToolManager:
 
 # alias
 FuncCall = FunctionToolManager
+
+
+def _mcp_config_hash(cfg: dict) -> str:
+    cfg = {k: v for k, v in cfg.items() if k != "active"}
+    return hashlib.sha256(
+        json.dumps(cfg, sort_keys=True, default=str).encode()
+    ).hexdigest()
@@ -523,7 +523,7 @@ class ProviderAnthropic(Provider):
 
         async def resolve_image_url(image_url: str) -> dict | None:
             if image_url.startswith("http"):
-                image_path = await download_image_by_url(image_url)
+                image_path = await download_image_by_url(image_url, cache=True)
                 image_data, mime_type = await self.encode_image_bs64(image_path)
             elif image_url.startswith("file:///"):
                 image_path = image_url.replace("file:///", "")
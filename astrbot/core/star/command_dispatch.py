@@ -0,0 +1,133 @@
+"""指令分发索引。
+
+WakingCheckStage 过去会对每条消息遍历所有 AdapterMessageEvent Handler 并逐个执行过滤器，
+其中包括对每个指令过滤器的字符串匹配和参数解析。插件较多时，一条普通的群聊消息也要
+执行数百次过滤器调用。
+
+本模块在插件加载 / 卸载 / 启用 / 指令重命名（即注册表版本变化）时，将所有指令名与别名
+（包括指令组嵌套后的完整指令名）编译为一棵前缀树，并把不含指令过滤器的 Handler 单独
+放到一个列表中。处理消息时只需沿前缀树走一遍消息文本即可得到可能匹配的指令 Handler，
+候选集合的大小与命中的 Handler 数量相关，而与已安装的插件数量无关。
+
+索引只用于缩小候选范围，候选 Handler 仍然需要经过完整的过滤器检查，因此行为与逐个
+遍历完全一致。
+"""
+
+from __future__ import annotations
+
+import re
+
+from astrbot.core.platform.astr_message_event import AstrMessageEvent
+
+from .filter.command import CommandFilter
+from .filter.command_group import CommandGroupFilter
+from .star_handler import (
+    EventType,
+    StarHandlerMetadata,
+    StarHandlerRegistry,
+    star_handlers_registry,
+)
+
+
+class _TrieNode:
+    __slots__ = ("children", "handler_indexes")
+
+    def __init__(self):
+        self.children: dict[str, _TrieNode] = {}
+        self.handler_indexes: list[int] = []
+
+
+class CommandDispatchIndex:
+    """AdapterMessageEvent Handler 的指令分发索引。"""
+
+    def __init__(self, registry: StarHandlerRegistry | None = None):
+        self.registry = registry if registry is not None else star_handlers_registry
+        self._version: int | None = None
+        self._handlers: list[StarHandlerMetadata] = []
+        """按优先级排序的 Handler 列表，索引中保存的是它的下标"""
+        self._root = _TrieNode()
+        self._non_command_indexes: list[int] = []
+        """不包含指令 / 指令组过滤器的 Handler，每条消息都需要检查"""
+
+    @property
+    def command_handler_count(self) -> int:
+        return len(self._handlers) - len(self._non_command_indexes)
+
+    @property
+    def non_command_handler_count(self) -> int:
+        return len(self._non_command_indexes)
+
+    def rebuild(self):
+        """根据注册表重新编译索引"""
+        self._version = self.registry.version
+        self._handlers = [
+            handler
+            for handler in self.registry
+            if handler.event_type == EventType.AdapterMessageEvent
+            and handler.event_filters
+        ]
+        self._root = _TrieNode()
+        self._non_command_indexes = []
+
+        for idx, handler in enumerate(self._handlers):
+            command_names: set[str] = set()
+            for f in handler.event_filters:
+                if isinstance(f, CommandFilter | CommandGroupFilter):
+                    command_names.update(f.get_complete_command_names())
+            if not command_names:
+                self._non_command_indexes.append(idx)
+                continue
+            for name in command_names:
+                self._insert(name, idx)
+
+    def _insert(self, name: str, idx: int):
+        node = self._root
+        for ch in name:
+            child = node.children.get(ch)
+            if child is None:
+                child = node.children[ch] = _TrieNode()
+            node = child
+        node.handler_indexes.append(idx)
+
+    def _collect_prefix_matches(self, text: str, out: set[int]):
+        """收集所有指令名是 text 前缀的 Handler 下标"""
+        node = self._root
+        out.update(node.handler_indexes)
+        for ch in text:
+            node = node.children.get(ch)
+            if node is None:
+                return
+            out.update(node.handler_indexes)
+
+    def get_candidate_handlers(
+        self,
+        event: AstrMessageEvent,
+        plugins_name: list[str] | None = None,
+    ) -> list[StarHandlerMetadata]:
+        """获取可能处理该事件的 Handler，顺序与注册表中的优先级顺序一致。
+
+        指令名不是消息前缀的指令 Handler 一定无法通过其指令过滤器，因此被直接排除；
+        其余 Handler 仍需调用方执行完整的过滤器检查。
+        """
+        if self._version != self.registry.version:
+            self.rebuild()
+
+        indexes = set(self._non_command_indexes)
+        # 指令与指令组过滤器均要求消息处于唤醒状态
+        if event.is_at_or_wake_command:
+            message_str = event.message_str.strip()
+            self._collect_prefix_matches(message_str, indexes)
+            # CommandFilter 会先将连续空白折叠为一个空格再匹配
+            normalized = re.sub(r"\s+", " ", message_str)
+            if normalized != message_str:
+                self._collect_prefix_matches(normalized, indexes)
+
+        handlers = []
+        for idx in sorted(indexes):
+            handler = self._handlers[idx]
+            if self.registry.is_handler_available(
+                handler,
+                plugins_name=plugins_name,
+            ):
+                handlers.append(handler)
+        return handlers
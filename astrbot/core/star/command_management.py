@@ -436,6 +436,7 @@ def _set_filter_fragment(
     setattr(filter_ref, attr, fragment)
     if hasattr(filter_ref, "_cmpl_cmd_names"):
         filter_ref._cmpl_cmd_names = None
+    star_handlers_registry.bump_version()
 
 
 def _set_filter_aliases(
@@ -448,6 +449,7 @@ def _set_filter_aliases(
     setattr(filter_ref, "alias", set(aliases))
     if hasattr(filter_ref, "_cmpl_cmd_names"):
         filter_ref._cmpl_cmd_names = None
+    star_handlers_registry.bump_version()
 
 
 def _is_command_in_use(
@@ -0,0 +1,46 @@
+"""插件依赖的预检查。
+
+启动时先检查所有插件的 requirements.txt 是否已被满足，把缺失依赖的插件合并为一次 pip 调用安装，
+而不是在导入失败后逐个安装。已检查过的 requirements.txt 的哈希会被记录下来，
+文件未变化的插件在下次启动时跳过检查。
+"""
+
+import hashlib
+from importlib import metadata as importlib_metadata
+
+from packaging.requirements import InvalidRequirement, Requirement
+
+
+def hash_requirements(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def requirements_satisfied(path: str) -> bool:
+    """检查 requirements.txt 中的依赖是否都已安装且版本符合要求。
+
+    无法确定的情况（如 pip 选项、VCS 链接）一律视为未满足，交给 pip 处理。
+    """
+    with open(path, encoding="utf-8", errors="replace") as f:
+        lines = f.readlines()
+    for line in lines:
+        line = line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        if line.startswith("-"):
+            return False
+        try:
+            req = Requirement(line)
+        except InvalidRequirement:
+            return False
+        if req.url:
+            return False
+        if req.marker and not req.marker.evaluate():
+            continue
+        try:
+            version = importlib_metadata.version(req.name)
+        except importlib_metadata.PackageNotFoundError:
+            return False
+        if req.specifier and not req.specifier.contains(version, prereleases=True):
+            return False
+    return True
@@ -504,8 +504,12 @@ def register_llm_tool(name: str | None = None, **kwargs):
     yield
     ```
 
+    如果工具没有副作用（例如只读的搜索、查询），可以传入 `concurrency_safe=True`，
+    在开启并行工具调用时允许与同一轮的其他工具调用并发执行。
+
     """
     name_ = name
+    concurrency_safe = kwargs.get("concurrency_safe", False)
     registering_agent = None
     if kwargs.get("registering_agent"):
         registering_agent = kwargs["registering_agent"]
@@ -556,7 +560,13 @@ def register_llm_tool(name: str | None = None, **kwargs):
         if not registering_agent:
             doc_desc = docstring.description.strip() if docstring.description else ""
             md = get_handler_or_create(awaitable, EventType.OnCallingFuncToolEvent)
-            llm_tools.add_func(llm_tool_name, args, doc_desc, md.handler)
+            llm_tools.add_func(
+                llm_tool_name,
+                args,
+                doc_desc,
+                md.handler,
+                concurrency_safe=concurrency_safe,
+            )
         else:
             assert isinstance(registering_agent, RegisteringAgent)
             # print(f"Registering tool {llm_tool_name} for agent", registering_agent._agent.name)
@@ -564,7 +574,13 @@ def register_llm_tool(name: str | None = None, **kwargs):
                 registering_agent._agent.tools = []
 
             desc = docstring.description.strip() if docstring.description else ""
-            tool = llm_tools.spec_to_func(llm_tool_name, args, desc, awaitable)
+            tool = llm_tools.spec_to_func(
+                llm_tool_name,
+                args,
+                desc,
+                awaitable,
+                concurrency_safe=concurrency_safe,
+            )
             registering_agent._agent.tools.append(tool)
 
         return awaitable
@@ -15,6 +15,12 @@ class StarHandlerRegistry(Generic[T]):
     def __init__(self):
         self.star_handlers_map: dict[str, StarHandlerMetadata] = {}
         self._handlers: list[StarHandlerMetadata] = []
+        self.version = 0
+        """每次注册表内容或指令名变化时自增，用于使指令分发索引等派生缓存失效"""
+
+    def bump_version(self):
+        """标记注册表已发生变化"""
+        self.version += 1
 
     def append(self, handler: StarHandlerMetadata):
         """添加一个 Handler，并保持按优先级有序"""
@@ -24,6 +30,7 @@ class StarHandlerRegistry(Generic[T]):
         self.star_handlers_map[handler.handler_full_name] = handler
         self._handlers.append(handler)
         self._handlers.sort(key=lambda h: -h.extras_configs["priority"])
+        self.bump_version()
 
     def _print_handlers(self):
         for handler in self._handlers:
@@ -113,35 +120,43 @@ class StarHandlerRegistry(Generic[T]):
         only_activated=True,
         plugins_name: list[str] | None = None,
     ) -> list[StarHandlerMetadata]:
-        handlers = []
-        for handler in self._handlers:
-            # 过滤事件类型
-            if handler.event_type != event_type:
-                continue
-            if not handler.enabled:
-                continue
-            # 过滤启用状态
-            if only_activated:
-                plugin = star_map.get(handler.handler_module_path)
-                if not (plugin and plugin.activated):
-                    continue
-            # 过滤插件白名单
-            if plugins_name is not None and plugins_name != ["*"]:
-                plugin = star_map.get(handler.handler_module_path)
-                if not plugin:
-                    continue
-                if (
-                    plugin.name not in plugins_name
-                    and event_type
-                    not in (
-                        EventType.OnAstrBotLoadedEvent,
-                        EventType.OnPlatformLoadedEvent,
-                    )
-                    and not plugin.reserved
-                ):
-                    continue
-            handlers.append(handler)
-        return handlers
+        return [
+            handler
+            for handler in self._handlers
+            if handler.event_type == event_type
+            and self.is_handler_available(handler, only_activated, plugins_name)
+        ]
+
+    def is_handler_available(
+        self,
+        handler: StarHandlerMetadata,
+        only_activated=True,
+        plugins_name: list[str] | None = None,
+    ) -> bool:
+        """检查 Handler 自身、所属插件的启用状态以及插件白名单"""
+        if not handler.enabled:
+            return False
+        # 过滤启用状态
+        if only_activated:
+            plugin = star_map.get(handler.handler_module_path)
+            if not (plugin and plugin.activated):
+                return False
+        # 过滤插件白名单
+        if plugins_name is not None and plugins_name != ["*"]:
+            plugin = star_map.get(handler.handler_module_path)
+            if not plugin:
+                return False
+            if (
+                plugin.name not in plugins_name
+                and handler.event_type
+                not in (
+                    EventType.OnAstrBotLoadedEvent,
+                    EventType.OnPlatformLoadedEvent,
+                )
+                and not plugin.reserved
+            ):
+                return False
+        return True
 
     def get_handler_by_full_name(self, full_name: str) -> StarHandlerMetadata | None:
         return self.star_handlers_map.get(full_name, None)
@@ -159,10 +174,12 @@ class StarHandlerRegistry(Generic[T]):
     def clear(self):
         self.star_handlers_map.clear()
         self._handlers.clear()
+        self.bump_version()
 
     def remove(self, handler: StarHandlerMetadata):
         self.star_handlers_map.pop(handler.handler_full_name, None)
         self._handlers = [h for h in self._handlers if h != handler]
+        self.bump_version()
 
     def __iter__(self):
         return iter(self._handlers)
@@ -7,6 +7,7 @@ import json
 import logging
 import os
 import sys
+import time
 import traceback
 from types import ModuleType
 
@@ -28,6 +29,7 @@ from . import StarMetadata
 from .command_management import sync_command_configs
 from .context import Context
 from .filter.permission import PermissionType, PermissionTypeFilter
+from .plugin_requirements import hash_requirements, requirements_satisfied
 from .star import star_map, star_registry
 from .star_handler import star_handlers_registry
 from .updator import PluginUpdator
@@ -62,6 +64,8 @@ class PluginManager:
         """StarManager操作互斥锁"""
 
         self.failed_plugin_info = ""
+        self.load_report: list[dict] = []
+        """最近一次载入插件时每个插件的耗时"""
         if os.getenv("ASTRBOT_RELOAD", "0") == "1":
             asyncio.create_task(self._watch_plugins_changes())
 
@@ -189,6 +193,58 @@ class PluginManager:
                 except Exception as e:
                     logger.error(f"更新插件 {p} 的依赖失败。Code: {e!s}")
 
+    async def _ensure_plugin_requirements(self, plugin_modules: list[dict]):
+        """在导入插件前，一次性检查并安装所有插件缺失的依赖
+
+        requirements.txt 未变化且上次已满足的插件会跳过检查。
+        """
+        manifest: dict = await sp.global_get("plugin_requirements_manifest", {})
+        to_check: dict[str, tuple[str, str]] = {}
+        for plugin_module in plugin_modules:
+            if plugin_module.get("reserved"):
+                continue
+            root_dir_name = plugin_module["pname"]
+            req_path = os.path.join(
+                self.plugin_store_path, root_dir_name, "requirements.txt"
+            )
+            try:
+                req_hash = await asyncio.to_thread(hash_requirements, req_path)
+            except OSError:
+                # 插件没有 requirements.txt
+                continue
+            if manifest.get(root_dir_name) != req_hash:
+                to_check[root_dir_name] = (req_path, req_hash)
+        if not to_check:
+            return
+
+        results = await asyncio.gather(
+            *(
+                asyncio.to_thread(requirements_satisfied, req_path)
+                for req_path, _ in to_check.values()
+            ),
+            return_exceptions=True,
+        )
+        missing = []
+        for (root_dir_name, (req_path, req_hash)), ok in zip(to_check.items(), results):
+            if ok is True:
+                manifest[root_dir_name] = req_hash
+            else:
+                missing.append(root_dir_name)
+
+        if missing:
+            logger.info(f"正在安装插件 {', '.join(missing)} 所需的依赖库")
+            try:
+                await pip_installer.install(
+                    requirements_paths=[to_check[p][0] for p in missing],
+                )
+                for p in missing:
+                    manifest[p] = to_check[p][1]
+            except Exception as e:
+                # 导入失败时仍会逐个插件重试安装
+                logger.error(f"批量安装插件依赖失败: {e!s}")
+
+        await sp.global_put("plugin_requirements_manifest", manifest)
+
     @staticmethod
     def _load_plugin_metadata(plugin_path: str, plugin_obj=None) -> StarMetadata | None:
         """先寻找 metadata.yaml 文件，如果不存在，则使用插件对象的 info() 函数获取元数据。
@@ -370,10 +426,34 @@ class PluginManager:
         if plugin_modules is None:
             return False, "未找到任何插件模块"
 
+        # 筛选需要载入的插件
+        selected_modules = []
+        for plugin_module in plugin_modules:
+            root_dir_name = plugin_module["pname"]
+            path = (
+                "astrbot.builtin_stars."
+                if plugin_module.get("reserved", False)
+                else "data.plugins."
+            )
+            path += root_dir_name + "." + plugin_module["module"]
+            if specified_module_path and path != specified_module_path:
+                continue
+            if specified_dir_name and root_dir_name != specified_dir_name:
+                continue
+            selected_modules.append(plugin_module)
+
+        try:
+            await self._ensure_plugin_requirements(selected_modules)
+        except Exception as e:
+            logger.error(f"预检查插件依赖失败: {e!s}")
+
         fail_rec = ""
+        report: dict[str, dict] = {}
+        to_initialize: list[tuple[str, StarMetadata]] = []
 
-        # 导入插件模块，并尝试实例化插件类
-        for plugin_module in plugin_modules:
+        # 导入插件模块，并尝试实例化插件类。
+        # 插件在导入时会向全局注册表注册 Handler，为保证注册顺序确定，导入按顺序进行
+        for plugin_module in selected_modules:
             try:
                 module_str = plugin_module["module"]
                 # module_path = plugin_module['module_path']
@@ -386,13 +466,14 @@ class PluginManager:
                 path = "data.plugins." if not reserved else "astrbot.builtin_stars."
                 path += root_dir_name + "." + module_str
 
-                # 检查是否需要载入指定的插件
-                if specified_module_path and path != specified_module_path:
-                    continue
-                if specified_dir_name and root_dir_name != specified_dir_name:
-                    continue
-
                 logger.info(f"正在载入插件 {root_dir_name} ...")
+                entry = report[root_dir_name] = {
+                    "plugin": root_dir_name,
+                    "import_ms": 0.0,
+                    "initialize_ms": 0.0,
+                    "ok": False,
+                }
+                load_start = time.perf_counter()
 
                 # 尝试导入模块
                 try:
@@ -525,6 +606,7 @@ class PluginManager:
                                 )
                             if ft.name in inactivated_llm_tools:
                                 ft.active = False
+                    llm_tools.mark_changed()
 
                 else:
                     # v3.4.0 以前的方式注册插件
@@ -614,19 +696,41 @@ class PluginManager:
                         )
 
                 metadata.star_handler_full_names = full_names
+                entry["import_ms"] = (time.perf_counter() - load_start) * 1000
+                entry["ok"] = True
 
-                # 执行 initialize() 方法
+                # initialize() 在所有插件导入后并发执行
                 if hasattr(metadata.star_cls, "initialize") and metadata.star_cls:
-                    await metadata.star_cls.initialize()
+                    to_initialize.append((root_dir_name, metadata))
 
             except BaseException as e:
-                logger.error(f"----- 插件 {root_dir_name} 载入失败 -----")
-                errors = traceback.format_exc()
-                for line in errors.split("\n"):
-                    logger.error(f"| {line}")
-                logger.error("----------------------------------")
+                self._log_load_failure(root_dir_name)
                 fail_rec += f"加载 {root_dir_name} 插件时出现问题，原因 {e!s}。\n"
 
+        # 执行 initialize() 方法。各插件的初始化相互独立，并发执行以免慢插件拖慢启动
+        async def initialize(root_dir_name: str, metadata: StarMetadata):
+            start = time.perf_counter()
+            try:
+                await metadata.star_cls.initialize()  # type: ignore
+                return None
+            except BaseException as e:
+                report[root_dir_name]["ok"] = False
+                self._log_load_failure(root_dir_name)
+                return f"加载 {root_dir_name} 插件时出现问题，原因 {e!s}。\n"
+            finally:
+                report[root_dir_name]["initialize_ms"] = (
+                    time.perf_counter() - start
+                ) * 1000
+
+        for err in await asyncio.gather(
+            *(initialize(name, md) for name, md in to_initialize)
+        ):
+            if err:
+                fail_rec += err
+
+        self.load_report = list(report.values())
+        self._log_load_report()
+
         # 清除 pip.main 导致的多余的 logging handlers
         for handler in logging.root.handlers[:]:
             logging.root.removeHandler(handler)
@@ -641,6 +745,28 @@ class PluginManager:
         self.failed_plugin_info = fail_rec
         return False, fail_rec
 
+    @staticmethod
+    def _log_load_failure(root_dir_name: str):
+        logger.error(f"----- 插件 {root_dir_name} 载入失败 -----")
+        errors = traceback.format_exc()
+        for line in errors.split("\n"):
+            logger.error(f"| {line}")
+        logger.error("----------------------------------")
+
+    def _log_load_report(self):
+        if len(self.load_report) <= 1:
+            return
+        lines = [
+            f"  {r['plugin']}: 导入 {r['import_ms']:.0f}ms, 初始化 {r['initialize_ms']:.0f}ms"
+            + ("" if r["ok"] else " (失败)")
+            for r in sorted(
+                self.load_report,
+                key=lambda r: r["import_ms"] + r["initialize_ms"],
+                reverse=True,
+            )
+        ]
+        logger.info("插件载入耗时:\n" + "\n".join(lines))
+
     async def install_plugin(self, repo_url: str, proxy=""):
         """从仓库 URL 安装插件
 
@@ -896,6 +1022,7 @@ class PluginManager:
                     func_tool.active = False
                     if func_tool.name not in inactivated_llm_tools:
                         inactivated_llm_tools.append(func_tool.name)
+            llm_tools.mark_changed()
 
             await sp.global_put("inactivated_plugins", inactivated_plugins)
             await sp.global_put("inactivated_llm_tools", inactivated_llm_tools)
@@ -945,6 +1072,7 @@ class PluginManager:
             ):
                 inactivated_llm_tools.remove(func_tool.name)
                 func_tool.active = True
+        llm_tools.mark_changed()
         await sp.global_put("inactivated_llm_tools", inactivated_llm_tools)
 
         await self.reload(plugin_name)
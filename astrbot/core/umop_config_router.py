@@ -1,15 +1,103 @@
 import fnmatch
+import re
+from collections import OrderedDict
 
 from astrbot.core.utils.shared_preferences import SharedPreferences
 
+_WILDCARD_CHARS = frozenset("*?[")
+_NOT_FOUND = object()
+
+
+class _RouteNode:
+    """路由前缀树的节点，每一层对应 umo 的一个部分"""
+
+    __slots__ = ("literal", "wildcard", "route")
+
+    def __init__(self) -> None:
+        self.literal: dict[str, _RouteNode] = {}
+        self.wildcard: dict[str, tuple[re.Pattern | None, _RouteNode]] = {}
+        """通配符部分 -> (编译后的模式, 子节点)，空的部分匹配任意内容，模式为 None"""
+        self.route: tuple[int, str] | None = None
+        """(路由在路由表中的顺序, 配置文件 ID)"""
+
+    def child(self, part: str) -> "_RouteNode":
+        if part and _WILDCARD_CHARS.isdisjoint(part):
+            return self.literal.setdefault(part, _RouteNode())
+        if part not in self.wildcard:
+            pattern = re.compile(fnmatch.translate(part)) if part else None
+            self.wildcard[part] = (pattern, _RouteNode())
+        return self.wildcard[part][1]
+
+
+class UmopRoutingTable:
+    """编译后的路由表。
+
+    与逐条匹配的结果一致：多条路由同时匹配时，取路由表中最靠前的一条。
+    不含通配符的路由存放在字典中直接查找，其余路由按 umo 的三个部分组织为前缀树。
+    """
+
+    def __init__(self, routing: dict[str, str]) -> None:
+        self.exact: dict[str, tuple[int, str]] = {}
+        self.root = _RouteNode()
+        self.first_wildcard_order: int | None = None
+        for order, (umop, conf_id) in enumerate(routing.items()):
+            parts = umop.split(":")
+            if len(parts) != 3:
+                continue
+            if all(p and _WILDCARD_CHARS.isdisjoint(p) for p in parts):
+                self.exact.setdefault(umop, (order, conf_id))
+                continue
+            if self.first_wildcard_order is None:
+                self.first_wildcard_order = order
+            node = self.root
+            for part in parts:
+                node = node.child(part)
+            if node.route is None:
+                node.route = (order, conf_id)
+
+    def lookup(self, umo: str) -> str | None:
+        parts = umo.split(":")
+        if len(parts) != 3:
+            return None
+        best = self.exact.get(umo)
+        if self.first_wildcard_order is None or (
+            best is not None and best[0] < self.first_wildcard_order
+        ):
+            return best[1] if best else None
+        nodes = [self.root]
+        for part in parts:
+            matched = []
+            for node in nodes:
+                child = node.literal.get(part)
+                if child is not None:
+                    matched.append(child)
+                for pattern, child in node.wildcard.values():
+                    if pattern is None or pattern.match(part):
+                        matched.append(child)
+            if not matched:
+                return best[1] if best else None
+            nodes = matched
+        for node in nodes:
+            if node.route is not None and (best is None or node.route[0] < best[0]):
+                best = node.route
+        return best[1] if best else None
+
 
 class UmopConfigRouter:
     """UMOP 配置路由器"""
 
-    def __init__(self, sp: SharedPreferences):
+    def __init__(self, sp: SharedPreferences, cache_size: int = 4096):
         self.umop_to_conf_id: dict[str, str] = {}
         """UMOP 到配置文件 ID 的映射"""
         self.sp = sp
+        self.cache_size = cache_size
+        self._table: UmopRoutingTable | None = None
+        self._cache: OrderedDict[str, str | None] = OrderedDict()
+        """umo 到配置文件 ID 的查找结果缓存，路由表变化时清空"""
+
+    def _invalidate(self) -> None:
+        self._table = None
+        self._cache.clear()
 
     async def initialize(self):
         await self._load_routing_table()
@@ -24,6 +112,7 @@ class UmopConfigRouter:
             scope_id="global",
         )
         self.umop_to_conf_id = sp_data
+        self._invalidate()
 
     def _is_umo_match(self, p1: str, p2: str) -> bool:
         """判断 p2 umo 是否逻辑包含于 p1 umo"""
@@ -45,10 +134,17 @@ class UmopConfigRouter:
             str | None: 配置文件 ID，如果没有找到则返回 None
 
         """
-        for pattern, conf_id in self.umop_to_conf_id.items():
-            if self._is_umo_match(pattern, umo):
-                return conf_id
-        return None
+        conf_id = self._cache.get(umo, _NOT_FOUND)
+        if conf_id is not _NOT_FOUND:
+            self._cache.move_to_end(umo)
+            return conf_id  # type: ignore[return-value]
+        if self._table is None:
+            self._table = UmopRoutingTable(self.umop_to_conf_id)
+        conf_id = self._table.lookup(umo)
+        self._cache[umo] = conf_id
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return conf_id
 
     async def update_routing_data(self, new_routing: dict[str, str]):
         """更新路由表
@@ -68,6 +164,7 @@ class UmopConfigRouter:
                 )
 
         self.umop_to_conf_id = new_routing
+        self._invalidate()
         await self.sp.global_put("umop_config_routing", self.umop_to_conf_id)
 
     async def update_route(self, umo: str, conf_id: str):
@@ -87,6 +184,7 @@ class UmopConfigRouter:
             )
 
         self.umop_to_conf_id[umo] = conf_id
+        self._invalidate()
         await self.sp.global_put("umop_config_routing", self.umop_to_conf_id)
 
     async def delete_route(self, umo: str):
@@ -106,4 +204,5 @@ class UmopConfigRouter:
 
         if umo in self.umop_to_conf_id:
             del self.umop_to_conf_id[umo]
+            self._invalidate()
             await self.sp.global_put("umop_config_routing", self.umop_to_conf_id)
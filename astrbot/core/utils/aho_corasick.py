@@ -0,0 +1,59 @@
+"""Aho-Corasick 多模式字符串匹配。
+
+构建完成后，一次扫描即可找出文本中出现的任意关键词，耗时只与文本长度相关，
+与关键词数量无关。
+"""
+
+from collections import deque
+
+
+class AhoCorasick:
+    def __init__(self, words: list[str]) -> None:
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._output: list[str | None] = [None]
+        """以该状态结尾的关键词（包括经由失配链接可达的），没有则为 None"""
+        for word in words:
+            if word:
+                self._add(word)
+        self._build()
+
+    def _add(self, word: str) -> None:
+        state = 0
+        for ch in word:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(None)
+                self._goto[state][ch] = nxt
+            state = nxt
+        if self._output[state] is None:
+            self._output[state] = word
+
+    def _build(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                if self._output[nxt] is None:
+                    self._output[nxt] = self._output[self._fail[nxt]]
+
+    def search(self, text: str) -> str | None:
+        """返回文本中最先出现（以结束位置计）的关键词，没有则返回 None"""
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if output[state] is not None:
+                return output[state]
+        return None
@@ -1,7 +1,7 @@
 """Astrbot统一路径获取
 
 项目路径：固定为源码所在路径
-根目录路径：默认为当前工作目录，可通过环境变量 ASTRBOT_ROOT 指定
+根目录路径：默认为当前工作目录，可通过环境变量 ASTRBOT_ROOT 指定；当前工作目录位于源码包内时使用项目路径
 数据目录路径：固定为根目录下的 data 目录
 配置文件路径：固定为数据目录下的 config 目录
 插件目录路径：固定为数据目录下的 plugins 目录
@@ -26,7 +26,16 @@ def get_astrbot_root() -> str:
     """获取Astrbot根目录路径"""
     if path := os.environ.get("ASTRBOT_ROOT"):
         return os.path.realpath(path)
-    return os.path.realpath(os.getcwd())
+    cwd = os.path.realpath(os.getcwd())
+    # 在源码包的子目录中运行时，不要把数据目录建在包内
+    package_dir = os.path.join(get_astrbot_path(), "astrbot")
+    try:
+        if os.path.commonpath([cwd, package_dir]) == package_dir:
+            return get_astrbot_path()
+    except ValueError:
+        # Windows 下位于不同的盘符
+        pass
+    return cwd
 
 
 def get_astrbot_data_path() -> str:
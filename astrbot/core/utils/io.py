@@ -9,12 +9,13 @@ import uuid
 import zipfile
 from pathlib import Path
 
+import aiofiles
 import aiohttp
-import certifi
 import psutil
 from PIL import Image
 
-from .astrbot_path import get_astrbot_data_path
+from .astrbot_path import get_astrbot_data_path, get_astrbot_temp_path
+from .media_cache import get_http_session, media_cache, write_file
 
 logger = logging.getLogger("astrbot")
 
@@ -50,18 +51,8 @@ def port_checker(port: int, host: str = "localhost"):
 
 
 def save_temp_img(img: Image.Image | bytes) -> str:
+    # 过期临时文件由 media_cache 的后台任务统一清理
     temp_dir = os.path.join(get_astrbot_data_path(), "temp")
-    # 获得文件创建时间，清除超过 12 小时的
-    try:
-        for f in os.listdir(temp_dir):
-            path = os.path.join(temp_dir, f)
-            if os.path.isfile(path):
-                ctime = os.path.getctime(path)
-                if time.time() - ctime > 3600 * 12:
-                    os.remove(path)
-    except Exception as e:
-        print(f"清除临时文件失败: {e}")
-
     # 获得时间戳
     timestamp = f"{int(time.time())}_{uuid.uuid4().hex[:8]}"
     p = os.path.join(temp_dir, f"{timestamp}.jpg")
@@ -71,6 +62,7 @@ def save_temp_img(img: Image.Image | bytes) -> str:
     else:
         with open(p, "wb") as f:
             f.write(img)
+    media_cache.ensure_sweeper()
     return p
 
 
@@ -79,31 +71,32 @@ async def download_image_by_url(
     post: bool = False,
     post_data: dict | None = None,
     path: str | None = None,
+    cache: bool = False,
 ) -> str:
-    """下载图片, 返回 path"""
+    """下载图片, 返回 path
+
+    cache 为 True 且未指定 path 的 GET 请求会经过 media_cache，同一 URL 在有效期内只下载一次，
+    返回的文件由缓存管理，调用方不应修改或删除其内容。
+    """
+    if cache and not post and not path:
+        return await media_cache.fetch(url)
+    data = await _request_bytes(url, post, post_data)
+    if not path:
+        path = os.path.join(
+            get_astrbot_temp_path(), f"{int(time.time())}_{uuid.uuid4().hex[:8]}.jpg"
+        )
+        media_cache.ensure_sweeper()
+    await write_file(path, data)
+    return path
+
+
+async def _request_bytes(url: str, post: bool, post_data: dict | None) -> bytes:
+    session = await get_http_session()
+    method = session.post if post else session.get
+    kwargs = {"json": post_data} if post else {}
     try:
-        ssl_context = ssl.create_default_context(
-            cafile=certifi.where(),
-        )  # 使用 certifi 提供的 CA 证书
-        connector = aiohttp.TCPConnector(ssl=ssl_context)  # 使用 certifi 的根证书
-        async with aiohttp.ClientSession(
-            trust_env=True,
-            connector=connector,
-        ) as session:
-            if post:
-                async with session.post(url, json=post_data) as resp:
-                    if not path:
-                        return save_temp_img(await resp.read())
-                    with open(path, "wb") as f:
-                        f.write(await resp.read())
-                    return path
-            else:
-                async with session.get(url) as resp:
-                    if not path:
-                        return save_temp_img(await resp.read())
-                    with open(path, "wb") as f:
-                        f.write(await resp.read())
-                    return path
+        async with method(url, **kwargs) as resp:
+            return await resp.read()
     except (aiohttp.ClientConnectorSSLError, aiohttp.ClientConnectorCertificateError):
         # 关闭SSL验证（仅在证书验证失败时作为fallback）
         logger.warning(
@@ -115,62 +108,14 @@ async def download_image_by_url(
         ssl_context = ssl.create_default_context()
         ssl_context.check_hostname = False
         ssl_context.verify_mode = ssl.CERT_NONE
-        async with aiohttp.ClientSession() as session:
-            if post:
-                async with session.post(url, json=post_data, ssl=ssl_context) as resp:
-                    if not path:
-                        return save_temp_img(await resp.read())
-                    with open(path, "wb") as f:
-                        f.write(await resp.read())
-                    return path
-            else:
-                async with session.get(url, ssl=ssl_context) as resp:
-                    if not path:
-                        return save_temp_img(await resp.read())
-                    with open(path, "wb") as f:
-                        f.write(await resp.read())
-                    return path
-    except Exception as e:
-        raise e
+        async with method(url, ssl=ssl_context, **kwargs) as resp:
+            return await resp.read()
 
 
 async def download_file(url: str, path: str, show_progress: bool = False):
     """从指定 url 下载文件到指定路径 path"""
     try:
-        ssl_context = ssl.create_default_context(
-            cafile=certifi.where(),
-        )  # 使用 certifi 提供的 CA 证书
-        connector = aiohttp.TCPConnector(ssl=ssl_context)
-        async with aiohttp.ClientSession(
-            trust_env=True,
-            connector=connector,
-        ) as session:
-            async with session.get(url, timeout=1800) as resp:
-                if resp.status != 200:
-                    raise Exception(f"下载文件失败: {resp.status}")
-                total_size = int(resp.headers.get("content-length", 0))
-                downloaded_size = 0
-                start_time = time.time()
-                if show_progress:
-                    print(f"文件大小: {total_size / 1024:.2f} KB | 文件地址: {url}")
-                with open(path, "wb") as f:
-                    while True:
-                        chunk = await resp.content.read(8192)
-                        if not chunk:
-                            break
-                        f.write(chunk)
-                        downloaded_size += len(chunk)
-                        if show_progress:
-                            elapsed_time = (
-                                time.time() - start_time
-                                if time.time() - start_time > 0
-                                else 1
-                            )
-                            speed = downloaded_size / 1024 / elapsed_time  # KB/s
-                            print(
-                                f"\r下载进度: {downloaded_size / total_size:.2%} 速度: {speed:.2f} KB/s",
-                                end="",
-                            )
+        await _download_to(url, path, show_progress, timeout=1800)
     except (aiohttp.ClientConnectorSSLError, aiohttp.ClientConnectorCertificateError):
         # 关闭SSL验证（仅在证书验证失败时作为fallback）
         logger.warning(
@@ -185,31 +130,35 @@ async def download_file(url: str, path: str, show_progress: bool = False):
         ssl_context = ssl.create_default_context()
         ssl_context.check_hostname = False
         ssl_context.verify_mode = ssl.CERT_NONE
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, ssl=ssl_context, timeout=120) as resp:
-                total_size = int(resp.headers.get("content-length", 0))
-                downloaded_size = 0
-                start_time = time.time()
-                if show_progress:
-                    print(f"文件大小: {total_size / 1024:.2f} KB | 文件地址: {url}")
-                with open(path, "wb") as f:
-                    while True:
-                        chunk = await resp.content.read(8192)
-                        if not chunk:
-                            break
-                        f.write(chunk)
-                        downloaded_size += len(chunk)
-                        if show_progress:
-                            elapsed_time = time.time() - start_time
-                            speed = downloaded_size / 1024 / elapsed_time  # KB/s
-                            print(
-                                f"\r下载进度: {downloaded_size / total_size:.2%} 速度: {speed:.2f} KB/s",
-                                end="",
-                            )
+        await _download_to(url, path, show_progress, timeout=120, ssl=ssl_context)
     if show_progress:
         print()
 
 
+async def _download_to(
+    url: str, path: str, show_progress: bool, timeout: int, **kwargs
+):
+    async with (await get_http_session()).get(url, timeout=timeout, **kwargs) as resp:
+        if resp.status != 200:
+            raise Exception(f"下载文件失败: {resp.status}")
+        total_size = int(resp.headers.get("content-length", 0))
+        downloaded_size = 0
+        start_time = time.time()
+        if show_progress:
+            print(f"文件大小: {total_size / 1024:.2f} KB | 文件地址: {url}")
+        async with aiofiles.open(path, "wb") as f:
+            async for chunk in resp.content.iter_chunked(65536):
+                await f.write(chunk)
+                downloaded_size += len(chunk)
+                if show_progress and total_size:
+                    elapsed_time = max(time.time() - start_time, 1e-3)
+                    speed = downloaded_size / 1024 / elapsed_time  # KB/s
+                    print(
+                        f"\r下载进度: {downloaded_size / total_size:.2%} 速度: {speed:.2f} KB/s",
+                        end="",
+                    )
+
+
 def file_to_base64(file_path: str) -> str:
     with open(file_path, "rb") as f:
         data_bytes = f.read()
@@ -217,6 +166,11 @@ def file_to_base64(file_path: str) -> str:
     return "base64://" + base64_str
 
 
+async def file_to_base64_async(file_path: str) -> str:
+    """异步读取文件的 base64 编码，结果会被缓存，适合同一文件被反复编码的场景"""
+    return "base64://" + await media_cache.read_base64(file_path)
+
+
 def get_local_ip_addresses():
     net_interfaces = psutil.net_if_addrs()
     network_ips = []
@@ -0,0 +1,301 @@
+"""媒体文件缓存。
+
+- 进程内共享的 aiohttp 会话，复用连接池、DNS 缓存和 TLS 上下文，避免每下载一张图片
+  就新建一次会话和 TLS 握手；
+- 下载的内容按 SHA-256 存放在 data/temp/media_cache 下，同一 URL 在有效期内重复获取时
+  直接返回本地文件，并发获取同一 URL 只会下载一次；
+- 文件的 base64 编码按 (路径, 修改时间, 大小) 缓存在内存中，供模型请求组装 data URL 时复用；
+- 后台清理任务定期按 TTL 和总大小淘汰缓存文件，并清理 data/temp 下超过 12 小时的临时文件，
+  不再在每次保存临时图片时遍历整个目录。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import hashlib
+import logging
+import os
+import ssl
+import time
+import uuid
+from collections import OrderedDict
+
+import aiofiles
+import aiohttp
+import certifi
+
+from .astrbot_path import get_astrbot_temp_path
+
+logger = logging.getLogger("astrbot")
+
+_session: aiohttp.ClientSession | None = None
+_session_loop: asyncio.AbstractEventLoop | None = None
+
+
+async def get_http_session() -> aiohttp.ClientSession:
+    """获取当前事件循环中共享的 HTTP 会话。调用方不应关闭该会话。"""
+    global _session, _session_loop
+    loop = asyncio.get_running_loop()
+    if _session is not None and not _session.closed and _session_loop is loop:
+        return _session
+    stale, stale_loop = _session, _session_loop
+    ssl_context = ssl.create_default_context(cafile=certifi.where())
+    _session = aiohttp.ClientSession(
+        trust_env=True,
+        connector=aiohttp.TCPConnector(
+            ssl=ssl_context,
+            limit=100,
+            limit_per_host=16,
+            ttl_dns_cache=300,
+        ),
+    )
+    _session_loop = loop
+    session = _session
+    if stale is not None and not stale.closed:
+        await _close_stale_session(stale, stale_loop)
+    return session
+
+
+async def _close_stale_session(
+    session: aiohttp.ClientSession, loop: asyncio.AbstractEventLoop | None
+):
+    """关闭属于其他事件循环的旧会话，避免连接泄漏"""
+    try:
+        if loop is not None and loop.is_running():
+            # 旧会话所在的事件循环在其他线程中运行，交给它自己关闭
+            await asyncio.wrap_future(
+                asyncio.run_coroutine_threadsafe(session.close(), loop)
+            )
+        else:
+            await session.close()
+    except Exception as e:
+        logger.debug(f"关闭旧的 HTTP 会话失败: {e}")
+
+
+async def close_http_session():
+    global _session, _session_loop
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+    _session_loop = None
+
+
+async def write_file(path: str, data: bytes):
+    """异步写入文件。先写入临时文件再替换，避免读取到不完整的文件。"""
+    tmp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+    async with aiofiles.open(tmp_path, "wb") as f:
+        await f.write(data)
+    await asyncio.to_thread(os.replace, tmp_path, path)
+
+
+class MediaCache:
+    def __init__(
+        self,
+        cache_dir: str | None = None,
+        url_ttl: float = 3600,
+        file_ttl: float = 3600 * 12,
+        max_bytes: int = 512 * 1024 * 1024,
+        base64_cache_bytes: int = 64 * 1024 * 1024,
+        sweep_interval: float = 600,
+    ) -> None:
+        """Args:
+        cache_dir: 缓存目录，默认为 data/temp/media_cache
+        url_ttl: 同一 URL 的下载结果的复用时间
+        file_ttl: 缓存文件及 data/temp 下临时文件的保留时间
+        max_bytes: 缓存目录的最大总大小，超出时淘汰最久未使用的文件
+        base64_cache_bytes: 内存中 base64 缓存的最大总长度
+        sweep_interval: 后台清理的间隔
+
+        """
+        self._cache_dir = cache_dir
+        self.url_ttl = url_ttl
+        self.file_ttl = file_ttl
+        self.max_bytes = max_bytes
+        self.base64_cache_bytes = base64_cache_bytes
+        self.sweep_interval = sweep_interval
+
+        self._urls: dict[str, tuple[str, float]] = {}
+        """URL -> (缓存文件路径, 下载时间)"""
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._base64: OrderedDict[tuple[str, int, int], str] = OrderedDict()
+        self._base64_size = 0
+        self._sweeper: asyncio.Task | None = None
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def cache_dir(self) -> str:
+        if self._cache_dir is None:
+            self._cache_dir = os.path.join(get_astrbot_temp_path(), "media_cache")
+        return self._cache_dir
+
+    async def put_bytes(self, data: bytes, suffix: str = ".jpg") -> str:
+        """按内容哈希保存数据，返回文件路径。相同内容只会保存一份。"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = os.path.join(self.cache_dir, f"{digest}{suffix}")
+        if not await asyncio.to_thread(_touch_if_exists, path):
+            await asyncio.to_thread(os.makedirs, self.cache_dir, exist_ok=True)
+            await write_file(path, data)
+        self.ensure_sweeper()
+        return path
+
+    async def fetch(self, url: str, suffix: str = ".jpg") -> str:
+        """下载 URL 并返回本地缓存文件的路径"""
+        cached = self._urls.get(url)
+        if cached and time.time() - cached[1] < self.url_ttl:
+            # 调用方可能删除了返回的文件
+            if await asyncio.to_thread(_touch_if_exists, cached[0]):
+                self.hits += 1
+                return cached[0]
+        inflight = self._inflight.get(url)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[url] = future
+        try:
+            data = await _http_get(url)
+            path = await self.put_bytes(data, suffix)
+            self._urls[url] = (path, time.time())
+            future.set_result(path)
+            return path
+        except BaseException as e:
+            future.set_exception(e)
+            # 没有其他等待者时避免 "exception was never retrieved" 警告
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(url, None)
+
+    async def read_base64(self, path: str) -> str:
+        """读取文件的 base64 编码（不带前缀），结果按文件路径和修改时间缓存"""
+        key = await asyncio.to_thread(_file_key, path)
+        encoded = self._base64.get(key)
+        if encoded is not None:
+            self._base64.move_to_end(key)
+            return encoded
+        async with aiofiles.open(path, "rb") as f:
+            data = await f.read()
+        encoded = base64.b64encode(data).decode()
+        if len(encoded) <= self.base64_cache_bytes:
+            self._base64[key] = encoded
+            self._base64_size += len(encoded)
+            while self._base64_size > self.base64_cache_bytes:
+                _, old = self._base64.popitem(last=False)
+                self._base64_size -= len(old)
+        return encoded
+
+    async def get_data_url(self, path: str, mime_type: str = "image/jpeg") -> str:
+        return f"data:{mime_type};base64,{await self.read_base64(path)}"
+
+    def ensure_sweeper(self):
+        """在当前事件循环中启动后台清理任务"""
+        if self._sweeper is not None and not self._sweeper.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._sweeper = loop.create_task(self._sweep_loop())
+
+    async def _sweep_loop(self):
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                await asyncio.to_thread(self.sweep)
+            except Exception as e:
+                logger.warning(f"清理媒体缓存失败: {e}")
+
+    def sweep(self) -> int:
+        """淘汰过期或超出容量的缓存文件，并清理过期的临时文件。返回删除的文件数量。"""
+        now = time.time()
+        removed = 0
+        entries = []
+        total = 0
+        for base_dir in (get_astrbot_temp_path(), self.cache_dir):
+            if not os.path.isdir(base_dir):
+                continue
+            with os.scandir(base_dir) as it:
+                for entry in it:
+                    if not entry.is_file():
+                        continue
+                    st = entry.stat()
+                    # 缓存文件命中时会更新 mtime，因此 mtime 即最近使用时间
+                    if now - st.st_mtime > self.file_ttl:
+                        try:
+                            os.remove(entry.path)
+                            removed += 1
+                        except OSError:
+                            pass
+                    elif base_dir == self.cache_dir:
+                        entries.append((st.st_mtime, st.st_size, entry.path))
+                        total += st.st_size
+        if total > self.max_bytes:
+            for _, size, path in sorted(entries):
+                try:
+                    os.remove(path)
+                    removed += 1
+                    total -= size
+                except OSError:
+                    pass
+                if total <= self.max_bytes:
+                    break
+        if removed:
+            self._urls = {
+                url: item for url, item in self._urls.items() if os.path.exists(item[0])
+            }
+        return removed
+
+    async def close(self):
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            self._sweeper = None
+        await close_http_session()
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "urls": len(self._urls),
+            "base64_entries": len(self._base64),
+            "base64_bytes": self._base64_size,
+        }
+
+
+def _file_key(path: str) -> tuple[str, int, int]:
+    st = os.stat(path)
+    return os.path.abspath(path), st.st_mtime_ns, st.st_size
+
+
+def _touch_if_exists(path: str) -> bool:
+    try:
+        os.utime(path)
+        return True
+    except OSError:
+        return False
+
+
+async def _http_get(url: str) -> bytes:
+    try:
+        async with (await get_http_session()).get(url) as resp:
+            resp.raise_for_status()
+            return await resp.read()
+    except (aiohttp.ClientConnectorSSLError, aiohttp.ClientConnectorCertificateError):
+        # 关闭SSL验证（仅在证书验证失败时作为fallback）
+        logger.warning(
+            f"SSL certificate verification failed for {url}. "
+            "Disabling SSL verification (CERT_NONE) as a fallback. "
+            "This is insecure and exposes the application to man-in-the-middle attacks. "
+            "Please investigate and resolve certificate issues."
+        )
+        ssl_context = ssl.create_default_context()
+        ssl_context.check_hostname = False
+        ssl_context.verify_mode = ssl.CERT_NONE
+        async with (await get_http_session()).get(url, ssl=ssl_context) as resp:
+            resp.raise_for_status()
+            return await resp.read()
+
+
+media_cache = MediaCache()
@@ -3,6 +3,9 @@ import traceback
 from astrbot.core import astrbot_config, logger
 from astrbot.core.astrbot_config_mgr import AstrBotConfig, AstrBotConfigManager
 from astrbot.core.db.migration.migra_45_to_46 import migrate_45_to_46
+from astrbot.core.db.migration.migra_conversation_messages import (
+    migrate_conversation_messages,
+)
 from astrbot.core.db.migration.migra_token_usage import migrate_token_usage
 from astrbot.core.db.migration.migra_webchat_session import migrate_webchat_session
 
@@ -147,6 +150,13 @@ async def migra(
         logger.error(f"Migration for token_usage column failed: {e!s}")
         logger.error(traceback.format_exc())
 
+    # migration for append-only conversation messages
+    try:
+        await migrate_conversation_messages(db)
+    except Exception as e:
+        logger.error(f"Migration for conversation messages failed: {e!s}")
+        logger.error(traceback.format_exc())
+
     # migra third party agent runner configs
     _c = False
     providers = astrbot_config["provider"]
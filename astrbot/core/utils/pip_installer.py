@@ -34,12 +34,21 @@ class PipInstaller:
         package_name: str | None = None,
         requirements_path: str | None = None,
         mirror: str | None = None,
+        requirements_paths: list[str] | None = None,
     ):
+        """安装依赖。
+
+        Args:
+            requirements_paths: 多个 requirements 文件，会在一次 pip 调用中一并解析和安装
+        """
         args = ["install"]
         if package_name:
             args.append(package_name)
         elif requirements_path:
             args.extend(["-r", requirements_path])
+        elif requirements_paths:
+            for path in requirements_paths:
+                args.extend(["-r", path])
 
         index_url = mirror or self.pypi_index_url or "https://pypi.org/simple"
 
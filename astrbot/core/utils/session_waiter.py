@@ -13,6 +13,9 @@ from astrbot.core.platform import AstrMessageEvent
 
 USER_SESSIONS: dict[str, "SessionWaiter"] = {}  # 存储 SessionWaiter 实例
 FILTERS: list["SessionFilter"] = []  # 存储 SessionFilter 实例
+WAITING_ORIGINS: dict[str, int] = {}
+"""正在等待会话输入的事件来源 (unified_msg_origin) 及其等待数量。
+事件总线会让这些会话的新消息绕过会话内串行调度，否则等待中的 Handler 会阻塞后续消息。"""
 
 
 class SessionController:
@@ -197,7 +200,14 @@ def session_waiter(timeout: int = 30, record_history_chains: bool = False):
             FILTERS.append(session_filter)
 
             waiter = SessionWaiter(session_filter, session_id, record_history_chains)
-            return await waiter.register_wait(func, timeout)
+            origin = event.unified_msg_origin
+            WAITING_ORIGINS[origin] = WAITING_ORIGINS.get(origin, 0) + 1
+            try:
+                return await waiter.register_wait(func, timeout)
+            finally:
+                WAITING_ORIGINS[origin] -= 1
+                if WAITING_ORIGINS[origin] <= 0:
+                    WAITING_ORIGINS.pop(origin, None)
 
         return wrapper
 
@@ -1,7 +1,8 @@
 import asyncio
+import copy
 import os
 import threading
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
 from typing import Any, TypeVar, overload
 
 from apscheduler.schedulers.background import BackgroundScheduler
@@ -12,10 +13,19 @@ from astrbot.core.db.po import Preference
 from .astrbot_path import get_astrbot_data_path
 
 _VT = TypeVar("_VT")
+_CacheKey = tuple[str, str, str]
+
+_ABSENT = object()
+"""缓存中表示数据库里不存在该偏好设置"""
 
 
 class SharedPreferences:
-    def __init__(self, db_helper: BaseDatabase, json_storage_path=None):
+    def __init__(
+        self,
+        db_helper: BaseDatabase,
+        json_storage_path=None,
+        cache_size: int = 20000,
+    ):
         if json_storage_path is None:
             json_storage_path = os.path.join(
                 get_astrbot_data_path(),
@@ -26,6 +36,15 @@ class SharedPreferences:
         self.temorary_cache: dict[str, dict[str, Any]] = defaultdict(dict)
         """automatically clear per 24 hours. Might be helpful in some cases XD"""
 
+        self._cache: OrderedDict[_CacheKey, Any] = OrderedDict()
+        """(scope, scope_id, key) -> val 的 LRU 读缓存，写操作同步更新"""
+        self._cache_size = cache_size
+        self._cache_lock = threading.Lock()
+        self._cache_generation = 0
+        """每次写入递增，用于丢弃与写入并发的过期数据库读结果"""
+        self.cache_hits = 0
+        self.cache_misses = 0
+
         self._sync_loop = asyncio.new_event_loop()
         t = threading.Thread(target=self._sync_loop.run_forever, daemon=True)
         t.start()
@@ -39,6 +58,71 @@ class SharedPreferences:
     def _clear_temporary_cache(self):
         self.temorary_cache.clear()
 
+    @staticmethod
+    def _copy_val(value: Any) -> Any:
+        # 防止调用方修改返回的可变对象后污染缓存
+        if isinstance(value, (dict, list)):
+            return copy.deepcopy(value)
+        return value
+
+    def _cache_lookup(self, cache_key: _CacheKey) -> tuple[Any] | None:
+        """命中时返回 (val,)，未命中返回 None"""
+        with self._cache_lock:
+            if cache_key not in self._cache:
+                self.cache_misses += 1
+                return None
+            self._cache.move_to_end(cache_key)
+            self.cache_hits += 1
+            return (self._cache[cache_key],)
+
+    def _cache_store(
+        self,
+        cache_key: _CacheKey,
+        value: Any,
+        generation: int | None = None,
+    ):
+        with self._cache_lock:
+            if generation is not None and generation != self._cache_generation:
+                return
+            self._cache[cache_key] = value
+            self._cache.move_to_end(cache_key)
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+
+    def _cache_write(self, cache_key: _CacheKey, value: Any):
+        with self._cache_lock:
+            self._cache_generation += 1
+        self._cache_store(cache_key, value)
+
+    def invalidate_cache(self, scope: str | None = None, scope_id: str | None = None):
+        """使偏好设置缓存失效。不传参数时清空全部缓存。
+
+        直接修改 preferences 表（如备份导入）后需要调用此方法。
+        """
+        with self._cache_lock:
+            self._cache_generation += 1
+            if scope is None:
+                self._cache.clear()
+                return
+            stale = [
+                k
+                for k in self._cache
+                if k[0] == scope and (scope_id is None or k[1] == scope_id)
+            ]
+            for k in stale:
+                del self._cache[k]
+
+    def cache_stats(self) -> dict:
+        """偏好设置缓存的命中统计"""
+        total = self.cache_hits + self.cache_misses
+        return {
+            "size": len(self._cache),
+            "capacity": self._cache_size,
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "hit_rate": round(self.cache_hits / total, 4) if total else 0.0,
+        }
+
     async def get_async(
         self,
         scope: str,
@@ -48,12 +132,18 @@ class SharedPreferences:
     ) -> _VT:
         """获取指定范围和键的偏好设置"""
         if scope_id is not None and key is not None:
-            result = await self.db_helper.get_preference(scope, scope_id, key)
-            if result:
-                ret = result.value["val"]
+            cache_key = (scope, scope_id, key)
+            cached = self._cache_lookup(cache_key)
+            if cached is None:
+                generation = self._cache_generation
+                result = await self.db_helper.get_preference(scope, scope_id, key)
+                value = result.value["val"] if result else _ABSENT
+                self._cache_store(cache_key, self._copy_val(value), generation)
             else:
-                ret = default
-            return ret
+                value = cached[0]
+            if value is _ABSENT:
+                return default
+            return self._copy_val(value)
 
     async def range_get_async(
         self,
@@ -140,6 +230,7 @@ class SharedPreferences:
             key,
             {"val": value},
         )
+        self._cache_write((scope, scope_id, key), self._copy_val(value))
 
     async def session_put(self, umo: str, key: str, value: Any):
         await self.put_async("umo", umo, key, value)
@@ -150,6 +241,7 @@ class SharedPreferences:
     async def remove_async(self, scope: str, scope_id: str, key: str):
         """删除指定范围和键的偏好设置"""
         await self.db_helper.remove_preference(scope, scope_id, key)
+        self._cache_write((scope, scope_id, key), _ABSENT)
 
     async def session_remove(self, umo: str, key: str):
         await self.remove_async("umo", umo, key)
@@ -161,6 +253,7 @@ class SharedPreferences:
     async def clear_async(self, scope: str, scope_id: str):
         """清空指定范围的所有偏好设置"""
         await self.db_helper.clear_preferences(scope, scope_id)
+        self.invalidate_cache(scope, scope_id)
 
     # ====
     # DEPRECATED METHODS
@@ -1,4 +1,26 @@
 from abc import ABC, abstractmethod
+from dataclasses import dataclass
+
+
+@dataclass
+class RenderTiming:
+    """一次文转图的耗时，单位为秒"""
+
+    strategy: str = ""
+    cached: bool = False
+    parse: float = 0.0
+    draw: float = 0.0
+    save: float = 0.0
+    total: float = 0.0
+
+    def summary(self) -> str:
+        if self.cached:
+            return f"{self.strategy}, cached, total {self.total * 1000:.0f}ms"
+        return (
+            f"{self.strategy}, parse {self.parse * 1000:.0f}ms, "
+            f"draw {self.draw * 1000:.0f}ms, save {self.save * 1000:.0f}ms, "
+            f"total {self.total * 1000:.0f}ms"
+        )
 
 
 class RenderStrategy(ABC):
@@ -1,35 +1,66 @@
 import re
 import os
-import aiohttp
-import ssl
-import certifi
+import asyncio
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
 from typing import List, Tuple
 from abc import ABC, abstractmethod
 from astrbot.core.config import VERSION
 
-from . import RenderStrategy
+from . import RenderStrategy, RenderTiming
 from PIL import ImageFont, Image, ImageDraw
 from astrbot.core.utils.io import save_temp_img
 from astrbot.core.utils.astrbot_path import get_astrbot_data_path
+from astrbot.core.utils.media_cache import get_http_session
 
 
 class FontManager:
-    """字体管理类，负责加载和缓存字体"""
+    """字体管理类，负责加载和缓存字体
 
-    _font_cache = {}
+    FreeType 字体对象不是线程安全的，渲染在线程池中进行，因此每个线程各自缓存一份字体。
+    """
+
+    _local = threading.local()
+
+    @classmethod
+    def _cache(cls) -> dict:
+        cache = getattr(cls._local, "fonts", None)
+        if cache is None:
+            cache = cls._local.fonts = {}
+        return cache
+
+    @classmethod
+    def get_styled_font(cls, font_names: tuple[str, ...], size: int) -> ImageFont.FreeTypeFont|None:
+        """按顺序尝试加载粗体、斜体等样式字体，找不到时返回 None。结果会被缓存。"""
+        cache = cls._cache()
+        key = (font_names, size)
+        if key not in cache:
+            font = None
+            for font_name in font_names:
+                try:
+                    font = ImageFont.truetype(font_name, size)
+                    break
+                except Exception:
+                    continue
+            cache[key] = font
+        return cache[key]
 
     @classmethod
     def get_font(cls, size: int) -> ImageFont.FreeTypeFont|ImageFont.ImageFont:
         """获取指定大小的字体，优先从缓存获取"""
-        if size in cls._font_cache:
-            return cls._font_cache[size]
+        _font_cache = cls._cache()
+        if size in _font_cache:
+            return _font_cache[size]
 
         # 首先尝试加载自定义字体
         try:
             font_path = os.path.join(get_astrbot_data_path(), "font.ttf")
             font = ImageFont.truetype(font_path, size)
-            cls._font_cache[size] = font
+            _font_cache[size] = font
             return font
         except Exception:
             pass
@@ -48,7 +79,7 @@ class FontManager:
         for font_name in fonts:
             try:
                 font = ImageFont.truetype(font_name, size)
-                cls._font_cache[size] = font
+                _font_cache[size] = font
                 return font
             except Exception:
                 continue
@@ -65,43 +96,50 @@ class FontManager:
 class TextMeasurer:
     """测量文本尺寸的工具类"""
 
+    _advance_tables: dict[tuple, dict[str, float]] = {}
+    """字体 -> 字符宽度表。按字符累加宽度来断行，每行只需线性扫描一次"""
+
     @staticmethod
     def get_text_size(text: str, font: ImageFont.FreeTypeFont|ImageFont.ImageFont) -> tuple[int, int]:
-        """获取文本的尺寸"""
+        """获取文本的尺寸。宽度按实际文本测量，高度沿用固定样本的高度，保证各行行高一致"""
 
         # 依赖库Pillow>=11.2.1，不再需要考虑<9.0.0
-        left, top, right, bottom = font.getbbox("Hello world")
+        left, _, right, _ = font.getbbox(text)
+        _, top, _, bottom = font.getbbox("Hello world")
         return int(right - left), int(bottom - top)
 
-    @staticmethod
+    @classmethod
+    def _advance_table(cls, font: ImageFont.FreeTypeFont|ImageFont.ImageFont) -> dict[str, float]:
+        path = getattr(font, "path", None)
+        key = (path, getattr(font, "size", None)) if path else (id(font),)
+        table = cls._advance_tables.get(key)
+        if table is None:
+            table = cls._advance_tables[key] = {}
+        return table
+
+    @classmethod
     def split_text_to_fit_width(
-        text: str, font: ImageFont.FreeTypeFont|ImageFont.ImageFont, max_width: int
+        cls, text: str, font: ImageFont.FreeTypeFont|ImageFont.ImageFont, max_width: int
     ) -> list[str]:
         """将文本拆分为多行，确保每行不超过指定宽度"""
         lines = []
         if not text:
             return lines
 
-        remaining_text = text
-        while remaining_text:
-            # 如果文本宽度小于最大宽度，直接添加
-            text_width = TextMeasurer.get_text_size(remaining_text, font)[0]
-            if text_width <= max_width:
-                lines.append(remaining_text)
-                break
-
-            # 尝试逐字计算能放入当前行的最多字符
-            for i in range(len(remaining_text), 0, -1):
-                width = TextMeasurer.get_text_size(remaining_text[:i], font)[0]
-                if width <= max_width:
-                    lines.append(remaining_text[:i])
-                    remaining_text = remaining_text[i:]
-                    break
-            else:
-                # 如果单个字符都放不下，强制放一个字符
-                lines.append(remaining_text[0])
-                remaining_text = remaining_text[1:]
-
+        advances = cls._advance_table(font)
+        start = 0
+        width = 0.0
+        for i, char in enumerate(text):
+            advance = advances.get(char)
+            if advance is None:
+                advance = advances[char] = font.getlength(char)
+            if width + advance > max_width and i > start:
+                lines.append(text[start:i])
+                start = i
+                width = 0.0
+            # 单个字符都放不下时，强制放一个字符
+            width += advance
+        lines.append(text[start:])
         return lines
 
 
@@ -194,13 +232,7 @@ class BoldTextElement(MarkdownElement):
                 "DejaVuSans-Bold.ttf",  # Linux粗体
             ]
 
-            bold_font = None
-            for font_name in bold_fonts:
-                try:
-                    bold_font = ImageFont.truetype(font_name, font_size)
-                    break
-                except Exception:
-                    continue
+            bold_font = FontManager.get_styled_font(tuple(bold_fonts), font_size)
 
             if bold_font:
                 lines = TextMeasurer.split_text_to_fit_width(
@@ -259,13 +291,7 @@ class ItalicTextElement(MarkdownElement):
                 "DejaVuSans-Oblique.ttf",  # Linux斜体
             ]
 
-            italic_font = None
-            for font_name in italic_fonts:
-                try:
-                    italic_font = ImageFont.truetype(font_name, font_size)
-                    break
-                except Exception:
-                    continue
+            italic_font = FontManager.get_styled_font(tuple(italic_fonts), font_size)
 
             if italic_font:
                 lines = TextMeasurer.split_text_to_fit_width(
@@ -629,18 +655,12 @@ class ImageElement(MarkdownElement):
     async def load_image(self):
         """加载图片"""
         try:
-            ssl_context = ssl.create_default_context(cafile=certifi.where())
-            connector = aiohttp.TCPConnector(ssl=ssl_context)
-
-            async with aiohttp.ClientSession(
-                trust_env=True, connector=connector
-            ) as session:
-                async with session.get(self.image_url) as resp:
-                    if resp.status == 200:
-                        image_data = await resp.read()
-                        self.image = Image.open(BytesIO(image_data))
-                    else:
-                        print(f"Failed to load image: HTTP {resp.status}")
+            async with (await get_http_session()).get(self.image_url) as resp:
+                if resp.status == 200:
+                    image_data = await resp.read()
+                    self.image = Image.open(BytesIO(image_data))
+                else:
+                    print(f"Failed to load image: HTTP {resp.status}")
         except Exception as e:
             print(f"Failed to load image: {e}")
 
@@ -850,7 +870,10 @@ class MarkdownRenderer:
     async def render(self, markdown_text: str) -> Image.Image:
         # 解析Markdown文本
         elements = await MarkdownParser.parse(markdown_text)
+        return self.draw(elements)
 
+    def draw(self, elements: List[MarkdownElement]) -> Image.Image:
+        """将解析后的元素绘制为图像。该方法是 CPU 密集的同步操作，不应在事件循环中直接调用。"""
         # 计算总高度
         total_height = 20  # 初始边距
         for element in elements:
@@ -908,19 +931,70 @@ class MarkdownRenderer:
 
 
 class LocalRenderStrategy(RenderStrategy):
-    """本地渲染策略实现"""
+    """本地渲染策略实现
+
+    绘制在有界的线程池中进行，避免长文本阻塞事件循环；相同文本的渲染结果会被缓存。
+    """
+
+    def __init__(self, max_workers: int = 2, cache_size: int = 64, font_size: int = 26, width: int = 800):
+        self.max_workers = max_workers
+        self.cache_size = cache_size
+        self.font_size = font_size
+        self.width = width
+        self._executor: ThreadPoolExecutor | None = None
+        self._cache: OrderedDict[tuple[str, int, int], str] = OrderedDict()
+        """(文本哈希, 字号, 宽度) -> 图片路径"""
 
     async def render_custom_template(
         self, tmpl_str: str, tmpl_data: dict, return_url: bool = True
     ) -> str:
         raise NotImplementedError
 
-    async def render(self, text: str, return_url: bool = False) -> str:
+    async def render(self, text: str, return_url: bool = False, timing: RenderTiming | None = None) -> str:
+        if timing is None:
+            timing = RenderTiming()
+        timing.strategy = "local"
+        start = time.perf_counter()
+
+        key = (hashlib.sha256(text.encode("utf-8")).hexdigest(), self.font_size, self.width)
+        path = self._cache.get(key)
+        # 缓存的图片可能已被临时文件清理任务删除
+        if path and await asyncio.to_thread(os.path.exists, path):
+            self._cache.move_to_end(key)
+            timing.cached = True
+            timing.total = time.perf_counter() - start
+            return path
+
         # 创建渲染器
-        renderer = MarkdownRenderer(font_size=26, width=800)
+        renderer = MarkdownRenderer(font_size=self.font_size, width=self.width)
 
-        # 渲染Markdown文本
-        image = await renderer.render(text)
+        # 解析Markdown文本，其中的网络图片在事件循环中下载
+        elements = await MarkdownParser.parse(text)
+        timing.parse = time.perf_counter() - start
 
-        # 保存图像并返回路径/URL
-        return save_temp_img(image)
+        # 绘制并保存图像，返回路径/URL
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="t2i_render")
+        path = await asyncio.get_running_loop().run_in_executor(
+            self._executor, self._draw_and_save, renderer, elements, timing
+        )
+
+        self._cache[key] = path
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        timing.total = time.perf_counter() - start
+        return path
+
+    @staticmethod
+    def _draw_and_save(renderer: MarkdownRenderer, elements: List[MarkdownElement], timing: RenderTiming) -> str:
+        start = time.perf_counter()
+        image = renderer.draw(elements)
+        timing.draw = time.perf_counter() - start
+        path = save_temp_img(image)
+        timing.save = time.perf_counter() - start - timing.draw
+        return path
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
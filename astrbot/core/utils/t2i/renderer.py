@@ -1,5 +1,8 @@
+import time
+
 from astrbot.core.log import LogManager
 
+from . import RenderTiming
 from .local_strategy import LocalRenderStrategy
 from .network_strategy import NetworkRenderStrategy
 
@@ -43,19 +46,32 @@ class HtmlRenderer:
         use_network: bool = True,
         return_url: bool = False,
         template_name: str | None = None,
+        timing: RenderTiming | None = None,
     ):
-        """使用默认文转图模板。"""
+        """使用默认文转图模板。
+
+        @param timing: 可选，传入后会被填充本次渲染各阶段的耗时。
+        """
+        if timing is None:
+            timing = RenderTiming()
         if use_network:
+            start = time.perf_counter()
             try:
-                return await self.network_strategy.render(
+                url = await self.network_strategy.render(
                     text,
                     return_url=return_url,
                     template_name=template_name,
                 )
+                timing.strategy = "network"
+                timing.total = time.perf_counter() - start
+                return url
             except BaseException as e:
                 logger.error(
                     f"Failed to render image via AstrBot API: {e}. Falling back to local rendering.",
                 )
-                return await self.local_strategy.render(text)
+                return await self.local_strategy.render(text, timing=timing)
         else:
-            return await self.local_strategy.render(text)
+            return await self.local_strategy.render(text, timing=timing)
+
+    def close(self):
+        self.local_strategy.close()
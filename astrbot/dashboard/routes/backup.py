@@ -815,6 +815,7 @@ class BackupRoute(Route):
         JSON Body:
         - filename: 已上传的备份文件名（必填）
         - confirmed: 用户已确认（必填，必须为 true）
+        - resume: 从上次中断的位置继续导入（可选，默认 false）
 
         返回:
         - task_id: 任务ID，用于查询导入进度
@@ -823,6 +824,7 @@ class BackupRoute(Route):
             data = await request.json
             filename = data.get("filename")
             confirmed = data.get("confirmed", False)
+            resume = bool(data.get("resume", False))
 
             if not filename:
                 return Response().error("缺少 filename 参数").__dict__
@@ -849,7 +851,7 @@ class BackupRoute(Route):
             self._init_task(task_id, "import", "pending")
 
             # 启动后台导入任务
-            asyncio.create_task(self._background_import_task(task_id, zip_path))
+            asyncio.create_task(self._background_import_task(task_id, zip_path, resume))
 
             return (
                 Response()
@@ -866,7 +868,9 @@ class BackupRoute(Route):
             logger.error(traceback.format_exc())
             return Response().error(f"导入备份失败: {e!s}").__dict__
 
-    async def _background_import_task(self, task_id: str, zip_path: str):
+    async def _background_import_task(
+        self, task_id: str, zip_path: str, resume: bool = False
+    ):
         """后台导入任务"""
         try:
             self._update_progress(task_id, status="processing", message="正在初始化...")
@@ -888,6 +892,7 @@ class BackupRoute(Route):
                 zip_path=zip_path,
                 mode="replace",
                 progress_callback=progress_callback,
+                resume=resume,
             )
 
             # 设置结果
@@ -912,12 +917,22 @@ class BackupRoute(Route):
         """获取任务进度
 
         Query 参数:
-        - task_id: 任务 ID (必填)
+        - task_id: 任务 ID（可选，不提供时返回所有未结束的任务，便于页面刷新后继续查询进度）
         """
         try:
             task_id = request.args.get("task_id")
             if not task_id:
-                return Response().error("缺少参数 task_id").__dict__
+                running = [
+                    {
+                        "task_id": tid,
+                        "type": info["type"],
+                        "status": info["status"],
+                        "progress": self.backup_progress.get(tid),
+                    }
+                    for tid, info in self.backup_tasks.items()
+                    if info["status"] in ("pending", "processing")
+                ]
+                return Response().ok({"tasks": running}).__dict__
 
             if task_id not in self.backup_tasks:
                 return Response().error("找不到该任务").__dict__
@@ -353,7 +353,7 @@ class ChatRoute(Route):
             return Response().error("session_id is empty").__dict__
 
         webchat_conv_id = session_id
-        back_queue = webchat_queue_mgr.get_or_create_back_queue(webchat_conv_id)
+        back_queue = webchat_queue_mgr.acquire_back_queue(webchat_conv_id)
 
         # 构建用户消息段（包含 path 用于传递给 adapter）
         message_parts = await self._build_user_message_parts(message)
@@ -372,9 +372,7 @@ class ChatRoute(Route):
                 async with track_conversation(self.running_convs, webchat_conv_id):
                     while True:
                         try:
-                            result = await asyncio.wait_for(back_queue.get(), timeout=1)
-                        except asyncio.TimeoutError:
-                            continue
+                            result = await back_queue.get()
                         except asyncio.CancelledError:
                             logger.debug(f"[WebChat] 用户 {username} 断开聊天长连接。")
                             client_disconnected = True
@@ -531,6 +529,8 @@ class ChatRoute(Route):
                             refs = {}
             except BaseException as e:
                 logger.exception(f"WebChat stream unexpected error: {e}", exc_info=True)
+            finally:
+                webchat_queue_mgr.release_back_queue(webchat_conv_id)
 
         # 将消息放入会话特定的队列
         chat_queue = webchat_queue_mgr.get_or_create_queue(webchat_conv_id)
@@ -748,17 +748,21 @@ class ChatRoute(Route):
         )
 
         # Get platform message history using session_id
-        history_ls = await self.platform_history_mgr.get(
+        # cursor 为空时返回最新的消息，传入 next_cursor 加载更早的消息
+        limit = request.args.get("limit", 1000, type=int)
+        limit = min(max(limit, 1), 1000)
+        history_ls, next_cursor = await self.platform_history_mgr.get_page(
             platform_id=platform_id,
             user_id=session_id,
-            page=1,
-            page_size=1000,
+            limit=limit,
+            cursor=request.args.get("cursor") or None,
         )
 
         history_res = [history.model_dump() for history in history_ls]
 
         response_data = {
             "history": history_res,
+            "next_cursor": next_cursor,
             "is_running": self.running_convs.get(session_id, False),
         }
 
@@ -22,6 +22,7 @@ class ConversationRoute(Route):
         super().__init__(context)
         self.routes = {
             "/conversation/list": ("GET", self.list_conversations),
+            "/conversation/search": ("GET", self.search_messages),
             "/conversation/detail": (
                 "POST",
                 self.get_conv_detail,
@@ -105,6 +106,28 @@ class ConversationRoute(Route):
             logger.error(error_msg)
             return Response().error(f"获取对话列表失败: {e!s}").__dict__
 
+    async def search_messages(self):
+        """全文搜索对话消息，按相关度排序，使用游标分页"""
+        try:
+            query = request.args.get("q", "").strip()
+            if not query:
+                return Response().error("缺少参数 q").__dict__
+            platforms = request.args.get("platforms", "")
+            limit = request.args.get("limit", 20, type=int)
+            limit = min(max(limit, 1), 100)
+            cursor = request.args.get("cursor") or None
+
+            hits, next_cursor = await self.db_helper.search_conversation_messages(
+                query,
+                platform_ids=platforms.split(",") if platforms else None,
+                limit=limit,
+                cursor=cursor,
+            )
+            return Response().ok({"results": hits, "next_cursor": next_cursor}).__dict__
+        except Exception as e:
+            logger.error(f"搜索对话消息失败: {e!s}\n{traceback.format_exc()}")
+            return Response().error(f"搜索对话消息失败: {e!s}").__dict__
+
     async def get_conv_detail(self):
         """获取指定对话详情（通过POST请求）"""
         try:
@@ -396,14 +419,10 @@ class ConversationRoute(Route):
                 else:
                     history_parsed = json.loads(history)
                 if not isinstance(history_parsed, list):
-                    return (
-                        Response()
-                        .error("history 必须是有效的 JSON 数组").__dict__
-                    )
+                    return Response().error("history 必须是有效的 JSON 数组").__dict__
             except json.JSONDecodeError:
                 return (
-                    Response()
-                    .error("history 必须是有效的 JSON 字符串或数组").__dict__
+                    Response().error("history 必须是有效的 JSON 字符串或数组").__dict__
                 )
 
             conversation = await self.conv_mgr.get_conversation(
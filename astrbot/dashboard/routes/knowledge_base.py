@@ -45,6 +45,7 @@ class KnowledgeBaseRoute(Route):
             "/kb/update": ("POST", self.update_kb),
             "/kb/delete": ("POST", self.delete_kb),
             "/kb/stats": ("GET", self.get_kb_stats),
+            "/kb/index/rebuild": ("POST", self.rebuild_kb_index),
             # 文档管理
             "/kb/document/list": ("GET", self.list_documents),
             "/kb/document/upload": ("POST", self.upload_document),
@@ -340,6 +341,8 @@ class KnowledgeBaseRoute(Route):
         - top_k_dense: 密集检索数量 (可选, 默认50)
         - top_k_sparse: 稀疏检索数量 (可选, 默认50)
         - top_m_final: 最终返回数量 (可选, 默认5)
+        - index_type: 向量索引类型 flat/hnsw/ivf_flat/ivf_pq (可选, 默认flat)
+        - index_params: 向量索引参数 (可选)
         """
         try:
             kb_manager = self._get_kb_manager()
@@ -357,6 +360,8 @@ class KnowledgeBaseRoute(Route):
             top_k_dense = data.get("top_k_dense")
             top_k_sparse = data.get("top_k_sparse")
             top_m_final = data.get("top_m_final")
+            index_type = data.get("index_type")
+            index_params = data.get("index_params")
 
             # pre-check embedding dim
             if not embedding_provider_id:
@@ -411,6 +416,8 @@ class KnowledgeBaseRoute(Route):
                 top_k_dense=top_k_dense,
                 top_k_sparse=top_k_sparse,
                 top_m_final=top_m_final,
+                index_type=index_type,
+                index_params=index_params,
             )
             kb = kb_helper.kb
 
@@ -464,6 +471,8 @@ class KnowledgeBaseRoute(Route):
         - top_k_dense: 密集检索数量 (可选)
         - top_k_sparse: 稀疏检索数量 (可选)
         - top_m_final: 最终返回数量 (可选)
+        - index_type: 向量索引类型 (可选, 修改后在后台切换索引)
+        - index_params: 向量索引参数 (可选)
         """
         try:
             kb_manager = self._get_kb_manager()
@@ -483,6 +492,8 @@ class KnowledgeBaseRoute(Route):
             top_k_dense = data.get("top_k_dense")
             top_k_sparse = data.get("top_k_sparse")
             top_m_final = data.get("top_m_final")
+            index_type = data.get("index_type")
+            index_params = data.get("index_params")
 
             # 检查是否至少提供了一个更新字段
             if all(
@@ -498,6 +509,8 @@ class KnowledgeBaseRoute(Route):
                     top_k_dense,
                     top_k_sparse,
                     top_m_final,
+                    index_type,
+                    index_params,
                 ]
             ):
                 return Response().error("至少需要提供一个更新字段").__dict__
@@ -514,6 +527,8 @@ class KnowledgeBaseRoute(Route):
                 top_k_dense=top_k_dense,
                 top_k_sparse=top_k_sparse,
                 top_m_final=top_m_final,
+                index_type=index_type,
+                index_params=index_params,
             )
 
             if not kb_helper:
@@ -580,6 +595,7 @@ class KnowledgeBaseRoute(Route):
                 "chunk_count": kb.chunk_count,
                 "created_at": kb.created_at.isoformat(),
                 "updated_at": kb.updated_at.isoformat(),
+                "index": kb_helper.vec_db.index_stats(),  # type: ignore
             }
 
             return Response().ok(stats).__dict__
@@ -591,6 +607,39 @@ class KnowledgeBaseRoute(Route):
             logger.error(traceback.format_exc())
             return Response().error(f"获取知识库统计失败: {e!s}").__dict__
 
+    async def rebuild_kb_index(self):
+        """重建并压缩知识库的向量索引
+
+        Body:
+        - kb_id: 知识库 ID (必填)
+        - index_type: 新的向量索引类型 (可选)
+        - index_params: 新的向量索引参数 (可选)
+        """
+        try:
+            kb_manager = self._get_kb_manager()
+            data = await request.json
+
+            kb_id = data.get("kb_id")
+            if not kb_id:
+                return Response().error("缺少参数 kb_id").__dict__
+
+            stats = await kb_manager.rebuild_kb_index(
+                kb_id,
+                index_type=data.get("index_type"),
+                index_params=data.get("index_params"),
+            )
+            if stats is None:
+                return Response().error("知识库不存在").__dict__
+
+            return Response().ok(stats, "重建索引成功").__dict__
+
+        except ValueError as e:
+            return Response().error(str(e)).__dict__
+        except Exception as e:
+            logger.error(f"重建知识库索引失败: {e}")
+            logger.error(traceback.format_exc())
+            return Response().error(f"重建知识库索引失败: {e!s}").__dict__
+
     # ===== 文档管理 API =====
 
     async def list_documents(self):
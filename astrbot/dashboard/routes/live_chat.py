@@ -203,6 +203,7 @@ class LiveChatRoute(Route):
         self, session: LiveChatSession, audio_path: str, assemble_duration: float
     ):
         """处理音频：STT -> LLM -> 流式 TTS"""
+        back_queue_cid = None
         try:
             # 发送 WAV 组装耗时
             await websocket.send_json(
@@ -252,11 +253,14 @@ class LiveChatRoute(Route):
                 "action_type": "live",  # 标记为 live mode
             }
 
+            # 先标记回复队列正在被读取，避免在等待响应期间被清理
+            back_queue = webchat_queue_mgr.acquire_back_queue(cid)
+            back_queue_cid = cid
+
             # 将消息放入队列
             await queue.put((session.username, cid, payload))
 
             # 3. 等待响应并流式发送 TTS 音频
-            back_queue = webchat_queue_mgr.get_or_create_back_queue(cid)
 
             bot_text = ""
             audio_playing = False
@@ -399,6 +403,8 @@ class LiveChatRoute(Route):
             await websocket.send_json({"t": "error", "data": f"处理失败: {str(e)}"})
 
         finally:
+            if back_queue_cid is not None:
+                webchat_queue_mgr.release_back_queue(back_queue_cid)
             session.is_processing = False
             session.should_interrupt = False
 
@@ -9,13 +9,15 @@ import aiohttp
 import psutil
 from quart import request
 
-from astrbot.core import DEMO_MODE, logger
+from astrbot.core import DEMO_MODE, logger, sp
 from astrbot.core.config import VERSION
 from astrbot.core.core_lifecycle import AstrBotCoreLifecycle
 from astrbot.core.db import BaseDatabase
 from astrbot.core.db.migration.helper import check_migration_needed_v4
+from astrbot.core.pipeline.rate_limit_check.stage import RateLimitStage
 from astrbot.core.utils.astrbot_path import get_astrbot_path
 from astrbot.core.utils.io import get_dashboard_version
+from astrbot.core.utils.media_cache import media_cache
 from astrbot.core.utils.version_comparator import VersionComparator
 
 from .route import Response, Route, RouteContext
@@ -87,11 +89,21 @@ class StatRoute(Route):
     async def get_start_time(self):
         return Response().ok({"start_time": self.core_lifecycle.start_time}).__dict__
 
+    def _get_rate_limit_stats(self) -> dict:
+        """各配置文件对应流水线的限流指标"""
+        stats = {}
+        mapping = getattr(self.core_lifecycle, "pipeline_scheduler_mapping", {})
+        for conf_id, scheduler in mapping.items():
+            for stage in scheduler.stages:
+                if isinstance(stage, RateLimitStage):
+                    stats[conf_id] = stage.stats()
+        return stats
+
     async def get_stat(self):
         offset_sec = request.args.get("offset_sec", 86400)
         offset_sec = int(offset_sec)
         try:
-            stat = self.db_helper.get_base_stats(offset_sec)
+            stat = await self.db_helper.get_hourly_platform_stats(offset_sec)
             now = int(time.time())
             start_time = now - offset_sec
             message_time_based_stats = []
@@ -130,10 +142,10 @@ class StatRoute(Route):
 
             stat_dict.update(
                 {
-                    "platform": self.db_helper.get_grouped_base_stats(
-                        offset_sec,
+                    "platform": (
+                        await self.db_helper.get_grouped_platform_stats(offset_sec)
                     ).platform,
-                    "message_count": self.db_helper.get_total_message_count() or 0,
+                    "message_count": await self.db_helper.get_platform_message_total(),
                     "platform_count": len(
                         self.core_lifecycle.platform_manager.get_insts(),
                     ),
@@ -148,6 +160,10 @@ class StatRoute(Route):
                     "cpu_percent": round(cpu_percent, 1),
                     "thread_count": thread_count,
                     "start_time": self.core_lifecycle.start_time,
+                    "sp_cache": sp.cache_stats(),
+                    "rate_limit": self._get_rate_limit_stats(),
+                    "event_bus": self.core_lifecycle.event_bus.stats(),
+                    "media_cache": media_cache.stats(),
                 },
             )
 
@@ -26,6 +26,7 @@ class ToolsRoute(Route):
             "/tools/mcp/update": ("POST", self.update_mcp_server),
             "/tools/mcp/delete": ("POST", self.delete_mcp_server),
             "/tools/mcp/test": ("POST", self.test_mcp_connection),
+            "/tools/mcp/stats": ("GET", self.get_mcp_stats),
             "/tools/list": ("GET", self.get_tool_list),
             "/tools/toggle-tool": ("POST", self.toggle_tool),
             "/tools/mcp/sync-provider": ("POST", self.sync_provider),
@@ -58,6 +59,7 @@ class ToolsRoute(Route):
                     if name_key == name:
                         server_info["tools"] = [tool.name for tool in mcp_client.tools]
                         server_info["errlogs"] = mcp_client.server_errlogs
+                        server_info["stats"] = mcp_client.stats.to_dict()
                         break
                 else:
                     server_info["tools"] = []
@@ -85,7 +87,13 @@ class ToolsRoute(Route):
 
             # 复制所有配置字段
             for key, value in server_data.items():
-                if key not in ["name", "active", "tools", "errlogs"]:  # 排除特殊字段
+                if key not in [
+                    "name",
+                    "active",
+                    "tools",
+                    "errlogs",
+                    "stats",
+                ]:  # 排除特殊字段
                     if key == "mcpServers":
                         key_0 = list(server_data["mcpServers"].keys())[
                             0
@@ -153,7 +161,13 @@ class ToolsRoute(Route):
 
             # 复制所有配置字段
             for key, value in server_data.items():
-                if key not in ["name", "active", "tools", "errlogs"]:  # 排除特殊字段
+                if key not in [
+                    "name",
+                    "active",
+                    "tools",
+                    "errlogs",
+                    "stats",
+                ]:  # 排除特殊字段
                     if key == "mcpServers":
                         key_0 = list(server_data["mcpServers"].keys())[
                             0
@@ -293,6 +307,14 @@ class ToolsRoute(Route):
             logger.error(traceback.format_exc())
             return Response().error(f"测试 MCP 连接失败: {e!s}").__dict__
 
+    async def get_mcp_stats(self):
+        """获取各 MCP 服务的工具调用延迟与错误统计"""
+        try:
+            return Response().ok(data=self.tool_mgr.get_mcp_stats()).__dict__
+        except Exception as e:
+            logger.error(traceback.format_exc())
+            return Response().error(f"获取 MCP 统计信息失败: {e!s}").__dict__
+
     async def get_tool_list(self):
         """获取所有注册的工具列表"""
         try:
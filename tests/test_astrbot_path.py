@@ -0,0 +1,18 @@
+import os
+
+from astrbot.core.utils import astrbot_path
+
+
+def test_data_path_never_inside_package(monkeypatch, tmp_path):
+    monkeypatch.delenv("ASTRBOT_ROOT", raising=False)
+    project = astrbot_path.get_astrbot_path()
+
+    monkeypatch.chdir(os.path.join(project, "astrbot", "core", "knowledge_base"))
+    assert astrbot_path.get_astrbot_root() == project
+    assert astrbot_path.get_astrbot_data_path() == os.path.join(project, "data")
+
+    monkeypatch.chdir(tmp_path)
+    assert astrbot_path.get_astrbot_root() == os.path.realpath(tmp_path)
+
+    monkeypatch.setenv("ASTRBOT_ROOT", str(tmp_path / "root"))
+    assert astrbot_path.get_astrbot_root() == os.path.realpath(tmp_path / "root")
@@ -57,13 +57,25 @@ def temp_data_dir(tmp_path):
     return data_dir
 
 
+def empty_stream_session() -> AsyncMock:
+    """模拟数据库会话，流式导出时每张表都没有记录"""
+
+    async def empty_partitions(size):
+        return
+        yield
+
+    session = AsyncMock()
+    session.stream_scalars.return_value = MagicMock(partitions=empty_partitions)
+    return session
+
+
 @pytest.fixture
 def mock_main_db():
     """创建模拟的主数据库"""
     db = MagicMock()
 
     # 模拟异步上下文管理器
-    session = AsyncMock()
+    session = empty_stream_session()
     db.get_db = MagicMock(
         return_value=AsyncMock(__aenter__=AsyncMock(return_value=session))
     )
@@ -177,10 +189,10 @@ class TestAstrBotExporter:
             kb_manager=mock_kb_manager,
         )
 
-        main_data = {
-            "platform_stats": [{"id": 1}],
-            "conversations": [],
-            "attachments": [],
+        main_stats = {
+            "platform_stats": 1,
+            "conversations": 0,
+            "attachments": 0,
         }
         kb_meta_data = {
             "knowledge_bases": [],
@@ -191,7 +203,7 @@ class TestAstrBotExporter:
             "plugin_data": {"files": 5, "size": 512},
         }
 
-        manifest = exporter._generate_manifest(main_data, kb_meta_data, dir_stats)
+        manifest = exporter._generate_manifest(main_stats, kb_meta_data, dir_stats)
 
         assert manifest["version"] == BACKUP_MANIFEST_VERSION
         assert manifest["astrbot_version"] == VERSION
@@ -201,6 +213,7 @@ class TestAstrBotExporter:
         assert "statistics" in manifest
         assert "directories" in manifest
         assert manifest["statistics"]["main_db"]["platform_stats"] == 1
+        assert manifest["formats"]["main_db"] == "ndjson"
         assert manifest["statistics"]["directories"] == dir_stats
 
     @pytest.mark.asyncio
@@ -209,7 +222,7 @@ class TestAstrBotExporter:
     ):
         """测试导出创建 ZIP 文件"""
         # 设置模拟数据库返回空数据
-        session = AsyncMock()
+        session = empty_stream_session()
         result = MagicMock()
         result.scalars.return_value.all.return_value = []
         session.execute = AsyncMock(return_value=result)
@@ -235,7 +248,7 @@ class TestAstrBotExporter:
         with zipfile.ZipFile(zip_path, "r") as zf:
             namelist = zf.namelist()
             assert "manifest.json" in namelist
-            assert "databases/main_db.json" in namelist
+            assert "databases/main_db/platform_stats.ndjson" in namelist
             assert "config/cmd_config.json" in namelist
 
 
@@ -734,7 +747,7 @@ class TestBackupIntegration:
 
         # 创建模拟数据库
         mock_db = MagicMock()
-        session = AsyncMock()
+        session = empty_stream_session()
         result = MagicMock()
         result.scalars.return_value.all.return_value = []
         session.execute = AsyncMock(return_value=result)
@@ -766,5 +779,5 @@ class TestBackupIntegration:
             assert config["setting"] == "value"
 
             # 读取主数据库
-            main_db = json.loads(zf.read("databases/main_db.json"))
-            assert "platform_stats" in main_db
+            assert "platform_stats" in manifest["tables"]["main_db"]
+            assert "databases/main_db/platform_stats.ndjson" in zf.namelist()
@@ -0,0 +1,291 @@
+import asyncio
+import os
+import zipfile
+from datetime import datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import numpy as np
+import pytest
+import pytest_asyncio
+from sqlalchemy import func, select
+
+from astrbot.core.backup import exporter as exporter_module
+from astrbot.core.backup import importer as importer_module
+from astrbot.core.backup.exporter import AstrBotExporter
+from astrbot.core.backup.importer import AstrBotImporter
+from astrbot.core.db.po import PlatformStat, Preference
+from astrbot.core.db.sqlite import SQLiteDatabase
+from astrbot.core.db.vec_db.faiss_impl.embedding_storage import EmbeddingStorage
+
+ROWS = 25
+
+
+async def make_db(path) -> SQLiteDatabase:
+    db = SQLiteDatabase(str(path))
+    await db.initialize()
+    db.stats_aggregator.flush_interval = 3600
+    return db
+
+
+async def close_db(db: SQLiteDatabase) -> None:
+    await db.stats_aggregator.close()
+    await db.engine.dispose()
+
+
+async def count_stats(db: SQLiteDatabase) -> int:
+    async with db.get_db() as session:
+        result = await session.execute(select(func.count()).select_from(PlatformStat))
+        return result.scalar_one()
+
+
+@pytest_asyncio.fixture
+async def backup(tmp_path, monkeypatch):
+    # 使用很小的批次，确保流式读写跨越多个批次；不备份真实的数据目录
+    monkeypatch.setattr(exporter_module, "STREAM_BATCH_SIZE", 4)
+    monkeypatch.setattr(importer_module, "STREAM_BATCH_SIZE", 4)
+    monkeypatch.setattr(exporter_module, "get_backup_directories", lambda: {})
+
+    source = await make_db(tmp_path / "source.db")
+    base = datetime(2025, 1, 1)
+    async with source.get_db() as session:
+        async with session.begin():
+            session.add_all(
+                [
+                    PlatformStat(
+                        timestamp=base + timedelta(hours=i),
+                        platform_id="qq",
+                        platform_type="aiocqhttp",
+                        count=i,
+                    )
+                    for i in range(ROWS)
+                ]
+            )
+            # 旧版本只在偏好设置中记录会话当前的对话
+            session.add(
+                Preference(
+                    scope="umo",
+                    scope_id="qq:FriendMessage:1",
+                    key="sel_conv_id",
+                    value={"val": "legacy-conv"},
+                )
+            )
+
+    config_path = tmp_path / "cmd_config.json"
+    config_path.write_text("{}", encoding="utf-8")
+    progress = []
+
+    async def on_progress(stage, current, total, message=""):
+        progress.append((stage, current, total))
+
+    exporter = AstrBotExporter(main_db=source, config_path=str(config_path))
+    zip_path = await exporter.export_all(
+        output_dir=str(tmp_path / "backups"), progress_callback=on_progress
+    )
+    await close_db(source)
+
+    target = await make_db(tmp_path / "target.db")
+    yield zip_path, target, str(config_path), progress
+    await close_db(target)
+
+
+@pytest.mark.asyncio
+async def test_export_writes_ndjson_per_table(backup):
+    zip_path, _, _, progress = backup
+    with zipfile.ZipFile(zip_path) as zf:
+        assert "databases/main_db.json" not in zf.namelist()
+        lines = zf.read("databases/main_db/platform_stats.ndjson").splitlines()
+    assert len(lines) == ROWS
+    # 按批次报告了表内进度
+    table_progress = [p for p in progress if p[0] == "main_db" and p[1] not in (0, 100)]
+    assert (ROWS, ROWS) in [(c, t) for _, c, t in table_progress]
+
+
+@pytest.mark.asyncio
+async def test_streaming_import_roundtrip(backup):
+    zip_path, target, config_path, _ = backup
+    importer = AstrBotImporter(main_db=target, config_path=config_path)
+    result = await importer.import_all(zip_path)
+    assert result.success, result.errors
+    assert result.imported_tables["platform_stats"] == ROWS
+    assert await count_stats(target) == ROWS
+    # 各平台消息总数根据导入的 platform_stats 重新计算
+    assert await target.get_platform_message_total() == sum(range(ROWS))
+    assert (
+        await target.get_session_conversation_id("qq:FriendMessage:1") == "legacy-conv"
+    )
+    assert not await asyncio.to_thread(os.path.exists, f"{zip_path}.import_state.json")
+
+
+@pytest.mark.asyncio
+async def test_checksum_mismatch_rejected_before_clearing(backup, tmp_path):
+    zip_path, target, config_path, _ = backup
+    async with target.get_db() as session:
+        async with session.begin():
+            session.add(
+                PlatformStat(
+                    timestamp=datetime(2024, 1, 1),
+                    platform_id="existing",
+                    platform_type="telegram",
+                )
+            )
+
+    tampered = tmp_path / "tampered.zip"
+    with zipfile.ZipFile(zip_path) as src, zipfile.ZipFile(tampered, "w") as dst:
+        for item in src.infolist():
+            data = src.read(item.filename)
+            if item.filename == "databases/main_db/platform_stats.ndjson":
+                data = data.replace(b'"qq"', b'"xx"', 1)
+            dst.writestr(item, data)
+
+    importer = AstrBotImporter(main_db=target, config_path=config_path)
+    result = await importer.import_all(str(tampered))
+    assert not result.success
+    assert "校验失败" in result.errors[0]
+    # 现有数据未被清空
+    assert await count_stats(target) == 1
+
+
+@pytest.mark.asyncio
+async def test_interrupted_import_resumes(backup, monkeypatch):
+    zip_path, target, config_path, _ = backup
+    importer = AstrBotImporter(main_db=target, config_path=config_path)
+
+    original = AstrBotImporter._insert_batch
+    calls = 0
+
+    async def flaky_insert(self, table_name, model_class, rows, **kwargs):
+        nonlocal calls
+        if table_name == "platform_stats":
+            calls += 1
+            if calls == 3:
+                raise RuntimeError("disk full")
+        return await original(self, table_name, model_class, rows, **kwargs)
+
+    monkeypatch.setattr(AstrBotImporter, "_insert_batch", flaky_insert)
+    result = await importer.import_all(zip_path)
+    assert not result.success
+    assert await count_stats(target) == 8
+    assert importer.pre_check(zip_path).resumable
+
+    result = await importer.import_all(zip_path, resume=True)
+    assert result.success, result.errors
+    assert result.imported_tables["platform_stats"] == ROWS
+    assert await count_stats(target) == ROWS
+    assert not importer.pre_check(zip_path).resumable
+
+
+@pytest.mark.asyncio
+async def test_resume_after_crash_before_saving_state(backup, monkeypatch):
+    zip_path, target, config_path, _ = backup
+    importer = AstrBotImporter(main_db=target, config_path=config_path)
+
+    original = AstrBotImporter._save_import_state
+    saves = 0
+
+    def crash_after_commit(zip_path, state):
+        nonlocal saves
+        saves += 1
+        if saves == 2:
+            # 第二批已经提交，但断点仍停留在第一批
+            raise RuntimeError("killed")
+        original(zip_path, state)
+
+    monkeypatch.setattr(
+        AstrBotImporter, "_save_import_state", staticmethod(crash_after_commit)
+    )
+    result = await importer.import_all(zip_path)
+    assert not result.success
+    assert await count_stats(target) == 8
+
+    result = await importer.import_all(zip_path, resume=True)
+    assert result.success, result.errors
+    assert await count_stats(target) == ROWS
+
+
+@pytest.mark.asyncio
+async def test_export_fails_when_a_table_fails(tmp_path, monkeypatch):
+    monkeypatch.setattr(exporter_module, "get_backup_directories", lambda: {})
+    db = await make_db(tmp_path / "source.db")
+    async with db.get_db() as session:
+        async with session.begin():
+            session.add(
+                PlatformStat(
+                    timestamp=datetime(2025, 1, 1),
+                    platform_id="qq",
+                    platform_type="aiocqhttp",
+                )
+            )
+
+    def broken(self, record):
+        if isinstance(record, PlatformStat):
+            raise ValueError("bad row")
+        return original(self, record)
+
+    original = AstrBotExporter._model_to_dict
+    monkeypatch.setattr(AstrBotExporter, "_model_to_dict", broken)
+    config_path = tmp_path / "cmd_config.json"
+    config_path.write_text("{}", encoding="utf-8")
+    exporter = AstrBotExporter(main_db=db, config_path=str(config_path))
+    output_dir = tmp_path / "backups"
+    try:
+        with pytest.raises(RuntimeError, match="platform_stats"):
+            await exporter.export_all(output_dir=str(output_dir))
+    finally:
+        await close_db(db)
+    # 不会留下缺少数据却带有校验和的备份
+    assert not await asyncio.to_thread(os.listdir, output_dir)
+
+
+@pytest.mark.asyncio
+async def test_ivf_pq_index_roundtrip_keeps_original_vectors(tmp_path):
+    source_dir = tmp_path / "source_kb"
+    source_dir.mkdir()
+    storage = EmbeddingStorage(
+        16,
+        str(source_dir / "index.faiss"),
+        index_type="ivf_pq",
+        index_params={"train_threshold": 256, "m": 4, "nbits": 8},
+        save_delay=3600,
+    )
+    rng = np.random.default_rng(0)
+    vectors = rng.random((300, 16), dtype=np.float32)
+    await storage.insert_batch(vectors, list(range(300)))
+    await storage._rebuild_task
+    assert storage.active_type == "ivf_pq"
+
+    zip_path = tmp_path / "kb.zip"
+    kb_helper = SimpleNamespace(
+        kb_dir=source_dir, vec_db=SimpleNamespace(embedding_storage=storage)
+    )
+    with zipfile.ZipFile(zip_path, "w") as zf:
+        await AstrBotExporter(main_db=MagicMock())._export_faiss_index(
+            zf, kb_helper, "kb1"
+        )
+    await storage.close()
+
+    kb_manager = MagicMock()
+    kb_manager.load_kbs = AsyncMock()
+    kb_session = MagicMock()
+    kb_manager.kb_db.get_db.return_value.__aenter__.return_value = kb_session
+    importer = AstrBotImporter(
+        main_db=MagicMock(), kb_manager=kb_manager, kb_root_dir=str(tmp_path / "kb")
+    )
+    with zipfile.ZipFile(zip_path) as zf:
+        result = importer_module.ImportResult()
+        await importer._import_knowledge_bases(
+            zf, {"knowledge_bases": [{"kb_id": "kb1"}]}, result
+        )
+    assert not result.warnings
+
+    # 恢复后重建索引使用的是原始向量，而不是 PQ 的有损重建
+    target = Path(tmp_path / "kb" / "kb1")
+    assert (target / "index.faiss.raw").exists()
+    restored = EmbeddingStorage(16, str(target / "index.faiss"), index_type="ivf_pq")
+    assert restored.active_type == "ivf_pq"
+    await restored.rebuild(index_type="flat")
+    extracted, ids = restored._extract_vectors()
+    order = np.argsort(ids)
+    np.testing.assert_allclose(extracted[order], vectors, rtol=1e-6)
+    await restored.close()
@@ -0,0 +1,95 @@
+from types import SimpleNamespace
+
+import pytest
+
+import astrbot.api  # noqa: F401  # 先完成插件包的初始化，避免循环导入
+from astrbot.core.star import StarMetadata, star_map
+from astrbot.core.star.command_dispatch import CommandDispatchIndex
+from astrbot.core.star.filter.command import CommandFilter
+from astrbot.core.star.filter.command_group import CommandGroupFilter
+from astrbot.core.star.filter.regex import RegexFilter
+from astrbot.core.star.star_handler import (
+    EventType,
+    StarHandlerMetadata,
+    StarHandlerRegistry,
+)
+
+MODULE_PATH = "tests.fake_dispatch_plugin"
+
+
+async def _handler(self, event):
+    pass
+
+
+def _make_handler(name: str, filters, priority: int = 0) -> StarHandlerMetadata:
+    md = StarHandlerMetadata(
+        event_type=EventType.AdapterMessageEvent,
+        handler_full_name=f"{MODULE_PATH}_{name}",
+        handler_name=name,
+        handler_module_path=MODULE_PATH,
+        handler=_handler,
+        event_filters=filters,
+        extras_configs={"priority": priority},
+    )
+    for f in filters:
+        if isinstance(f, CommandFilter):
+            f.init_handler_md(md)
+    return md
+
+
+def _event(message_str: str, wake: bool = True):
+    return SimpleNamespace(message_str=message_str, is_at_or_wake_command=wake)
+
+
+def _names(handlers) -> list[str]:
+    return [h.handler_name for h in handlers]
+
+
+@pytest.fixture
+def registry():
+    star_map[MODULE_PATH] = StarMetadata(name="fake", module_path=MODULE_PATH)
+    registry = StarHandlerRegistry()
+    group = CommandGroupFilter("math", alias={"m"})
+    registry.append(_make_handler("group", [group]))
+    registry.append(
+        _make_handler("add", [CommandFilter("add", parent_command_names=["math", "m"])])
+    )
+    registry.append(_make_handler("help", [CommandFilter("help", alias={"h"})]))
+    registry.append(_make_handler("regex", [RegexFilter(r"^hi")], priority=10))
+    yield registry
+    star_map.pop(MODULE_PATH, None)
+
+
+def test_candidates_only_include_matching_commands(registry):
+    index = CommandDispatchIndex(registry)
+
+    assert _names(index.get_candidate_handlers(_event("m  add 1 2"))) == [
+        "regex",
+        "group",
+        "add",
+    ]
+    assert _names(index.get_candidate_handlers(_event("h"))) == ["regex", "help"]
+    assert _names(index.get_candidate_handlers(_event("hello there"))) == [
+        "regex",
+        "help",
+    ]
+    # 未唤醒时指令 Handler 不会通过过滤器，只需检查非指令 Handler
+    assert _names(index.get_candidate_handlers(_event("help", wake=False))) == ["regex"]
+    assert index.command_handler_count == 3
+    assert index.non_command_handler_count == 1
+
+
+def test_index_follows_registry_changes(registry):
+    index = CommandDispatchIndex(registry)
+    assert _names(index.get_candidate_handlers(_event("ping"))) == ["regex"]
+
+    ping = _make_handler("ping", [CommandFilter("ping")])
+    registry.append(ping)
+    assert _names(index.get_candidate_handlers(_event("ping"))) == ["regex", "ping"]
+
+    ping.enabled = False
+    assert _names(index.get_candidate_handlers(_event("ping"))) == ["regex"]
+
+    registry.remove(ping)
+    star_map[MODULE_PATH].activated = False
+    assert index.get_candidate_handlers(_event("ping")) == []
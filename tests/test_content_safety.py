@@ -0,0 +1,160 @@
+import asyncio
+import sys
+import threading
+import types
+
+import pytest
+
+import astrbot.api  # noqa: F401  # 先完成插件包的初始化，避免循环导入
+from astrbot.core.pipeline.content_safety_check.strategies import VerdictCache
+from astrbot.core.pipeline.content_safety_check.strategies.keywords import (
+    KeywordsStrategy,
+    build_keyword_matcher,
+)
+from astrbot.core.pipeline.content_safety_check.strategies.strategy import (
+    StrategySelector,
+)
+from astrbot.core.utils.aho_corasick import AhoCorasick
+
+
+def test_aho_corasick_overlapping_keywords():
+    ac = AhoCorasick(["he", "she", "his", "hers", "敏感词"])
+    assert ac.search("ushers") == "she"
+    assert ac.search("ahishers") == "his"
+    assert ac.search("这里有敏感词汇") == "敏感词"
+    assert ac.search("nothing to see") is None
+    assert AhoCorasick([]).search("anything") is None
+    # 失配后需要沿失配链接回退
+    assert AhoCorasick(["abcd", "bcx"]).search("abcx") == "bcx"
+
+
+@pytest.mark.asyncio
+async def test_keywords_literal_and_regex():
+    strategy = KeywordsStrategy(["badword", r"\d{11}", "a(b", "", r"(?i)spam"])
+    assert (await strategy.check("call 13800138000"))[0] is False
+    assert (await strategy.check("this is a badword"))[0] is False
+    # 无效的正则按字面匹配
+    assert (await strategy.check("xa(bx"))[0] is False
+    assert (await strategy.check("SPAM"))[0] is False
+    # 空关键词不会屏蔽所有内容，全局标志不影响其他正则
+    assert await strategy.check("hello 123") == (True, "")
+
+
+def test_matcher_built_once_per_keyword_set():
+    first = KeywordsStrategy(["foo", "ba+r"])
+    second = KeywordsStrategy(["foo", "ba+r"])
+    assert first.matcher is second.matcher
+    assert KeywordsStrategy(["foo"]).matcher is not first.matcher
+    matcher = build_keyword_matcher(("(?P<n>x)y", "(?P<n>z)w"))
+    assert matcher.search("zw")
+    # 按编号引用分组的条件在合并后会指向其他关键词的分组
+    matcher = build_keyword_matcher(("x(y)", "(a)(?(1)b|c)"))
+    assert matcher.search("ab")
+    assert not matcher.search("ac")
+
+
+def test_verdict_cache_bounded_lru():
+    cache = VerdictCache(max_entries=2)
+    cache.put("a", (True, ""))
+    cache.put("b", (False, "bad"))
+    assert cache.get("a") == (True, "")
+    cache.put("c", (True, ""))
+    assert cache.get("b") is None
+    assert len(cache) == 2
+
+    expired = VerdictCache(ttl=-1)
+    expired.put("a", (True, ""))
+    assert expired.get("a") is None
+
+
+@pytest.mark.asyncio
+async def test_baidu_strategy_runs_off_loop_and_caches(monkeypatch):
+    calls = []
+    loop_thread = threading.current_thread()
+
+    class FakeCensor:
+        def __init__(self, *args):
+            pass
+
+        def textCensorUserDefined(self, content):
+            assert threading.current_thread() is not loop_thread
+            calls.append(content)
+            if content == "error":
+                return {"error_code": 18}
+            if content == "bad":
+                return {
+                    "conclusionType": 2,
+                    "conclusion": "不合规",
+                    "data": [{"msg": "存在辱骂内容"}],
+                }
+            return {"conclusionType": 1}
+
+    monkeypatch.setitem(
+        sys.modules, "aip", types.SimpleNamespace(AipContentCensor=FakeCensor)
+    )
+    selector = StrategySelector(
+        {
+            "internal_keywords": {"enable": True, "extra_keywords": ["blocked"]},
+            "baidu_aip": {
+                "enable": True,
+                "app_id": "id",
+                "api_key": "ak",
+                "secret_key": "sk",
+            },
+        }
+    )
+
+    results = await asyncio.gather(*(selector.check("fine") for _ in range(3)))
+    assert results == [(True, "")] * 3
+    assert await selector.check("fine") == (True, "")
+    ok, info = await selector.check("bad")
+    assert not ok
+    assert "存在辱骂内容" in info
+    # 关键词命中时不请求远程服务
+    assert (await selector.check("blocked"))[0] is False
+    # 出错的结果不缓存
+    assert (await selector.check("error"))[0] is False
+    assert (await selector.check("error"))[0] is False
+    assert calls == ["fine", "bad", "error", "error"]
+
+
+@pytest.mark.asyncio
+async def test_baidu_owner_cancel_does_not_cancel_waiters(monkeypatch):
+    calls = []
+    release = threading.Event()
+
+    class FakeCensor:
+        def __init__(self, *args):
+            pass
+
+        def textCensorUserDefined(self, content):
+            calls.append(content)
+            if len(calls) == 1:
+                release.wait(5)
+            return {"conclusionType": 1}
+
+    monkeypatch.setitem(
+        sys.modules, "aip", types.SimpleNamespace(AipContentCensor=FakeCensor)
+    )
+    from astrbot.core.pipeline.content_safety_check.strategies.baidu_aip import (
+        BaiduAipStrategy,
+    )
+
+    strategy = BaiduAipStrategy("id", "ak", "sk")
+    # 模块可能已在其他测试中导入，直接替换客户端
+    strategy.client = FakeCensor()
+    owner = asyncio.create_task(strategy.check("text"))
+    for _ in range(500):
+        if calls:
+            break
+        await asyncio.sleep(0.01)
+    waiter = asyncio.create_task(strategy.check("text"))
+    await asyncio.sleep(0)
+    owner.cancel()
+    try:
+        # 等待者重新发起请求，而不是收到取消
+        assert await asyncio.wait_for(waiter, 5) == (True, "")
+        assert owner.cancelled()
+        assert calls == ["text", "text"]
+    finally:
+        release.set()
@@ -0,0 +1,214 @@
+from types import SimpleNamespace
+
+import pytest
+import pytest_asyncio
+from sqlmodel import col, select, update
+
+import astrbot.api  # noqa: F401  # 先完成插件包的初始化，避免循环导入
+from astrbot.core.agent.message import Message
+from astrbot.core.conversation_mgr import ConversationManager
+from astrbot.core.db.po import ConversationMessage, ConversationV2
+from astrbot.core.db.sqlite import SQLiteDatabase
+from astrbot.core.pipeline.process_stage.method.agent_sub_stages.internal import (
+    InternalAgentSubStage,
+)
+
+
+def _turn(i: int) -> list[dict]:
+    return [
+        {"role": "user", "content": f"question {i}"},
+        {"role": "assistant", "content": f"answer {i}"},
+    ]
+
+
+@pytest_asyncio.fixture
+async def db(tmp_path):
+    db = SQLiteDatabase(str(tmp_path / "data_v4.db"))
+    await db.initialize()
+    yield db
+    await db.engine.dispose()
+
+
+async def _message_ids(db: SQLiteDatabase, cid: str) -> list[int]:
+    async with db.get_db() as session:
+        result = await session.execute(
+            select(ConversationMessage.id)
+            .where(col(ConversationMessage.conversation_id) == cid)
+            .order_by(col(ConversationMessage.seq)),
+        )
+        return list(result.scalars().all())
+
+
+@pytest.mark.asyncio
+async def test_update_appends_only_new_messages(db):
+    conv = await db.create_conversation("p:FriendMessage:u", "p", content=_turn(0))
+    cid = conv.conversation_id
+    ids_before = await _message_ids(db, cid)
+
+    await db.update_conversation(cid, content=_turn(0) + _turn(1))
+    ids_after = await _message_ids(db, cid)
+    assert ids_after[:2] == ids_before
+    assert len(ids_after) == 4
+    assert await db.get_conversation_messages(cid) == _turn(0) + _turn(1)
+
+    # 截断后的历史会整体重写
+    await db.update_conversation(cid, content=_turn(1))
+    assert await db.get_conversation_messages(cid) == _turn(1)
+
+
+@pytest.mark.asyncio
+async def test_update_rewrites_from_first_edited_message(db):
+    history = _turn(0) + _turn(1) + _turn(2)
+    conv = await db.create_conversation("p:FriendMessage:u", "p", content=history)
+    cid = conv.conversation_id
+    ids_before = await _message_ids(db, cid)
+
+    # 编辑中间的消息，长度不变
+    edited = [dict(m) for m in history]
+    edited[2]["content"] = "edited question"
+    await db.update_conversation(cid, content=edited)
+    assert await db.get_conversation_messages(cid) == edited
+    ids_after = await _message_ids(db, cid)
+    assert ids_after[:2] == ids_before[:2]
+
+    # 同长度的整体改写
+    rewritten = _turn(7) + _turn(8) + _turn(9)
+    await db.update_conversation(cid, content=rewritten)
+    assert await db.get_conversation_messages(cid) == rewritten
+
+    # 编辑中间的消息并追加新消息
+    rewritten[3]["content"] = "changed answer"
+    await db.update_conversation(cid, content=rewritten + _turn(10))
+    assert await db.get_conversation_messages(cid) == rewritten + _turn(10)
+
+
+@pytest.mark.asyncio
+async def test_search_matches_stored_messages_without_fts(db):
+    db.fts_enabled = False
+    conv = await db.create_conversation(
+        "p:FriendMessage:u", "p", content=[{"role": "user", "content": "天气怎么样"}]
+    )
+    convs, total = await db.get_filtered_conversations(search_query="天气")
+    assert total == 1
+    assert convs[0].conversation_id == conv.conversation_id
+
+
+@pytest.mark.asyncio
+async def test_history_window(db):
+    history = []
+    for i in range(5):
+        history += _turn(i)
+    history.insert(3, {"role": "tool", "content": "tool result", "tool_call_id": "x"})
+    conv = await db.create_conversation("p:FriendMessage:u", "p", content=history)
+    cid = conv.conversation_id
+
+    window = await db.get_conversation_messages(cid, last_turns=2)
+    assert window == _turn(3) + _turn(4)
+
+    window = await db.get_conversation_messages(cid, max_tokens=1)
+    assert window == _turn(4)
+
+
+@pytest.mark.asyncio
+async def test_manager_reads_legacy_content_and_appends(db):
+    conv = await db.create_conversation("p:FriendMessage:u", "p")
+    cid = conv.conversation_id
+    async with db.get_db() as session, session.begin():
+        await session.execute(
+            update(ConversationV2)
+            .where(col(ConversationV2.conversation_id) == cid)
+            .values(content=_turn(0)),
+        )
+
+    mgr = ConversationManager(db)
+    loaded = await mgr.get_conversation("p:FriendMessage:u", cid)
+    assert loaded is not None
+    assert loaded.messages == _turn(0)
+
+    await mgr.add_message_pair(cid, *_turn(1))
+    assert await mgr.get_history_window(cid) == _turn(0) + _turn(1)
+    stored = await db.get_conversation_by_id(cid)
+    assert stored.content == []
+
+    convs = await mgr.get_conversations("p:FriendMessage:u")
+    assert [c.messages for c in convs] == [_turn(0) + _turn(1)]
+
+
+@pytest.mark.asyncio
+async def test_update_history_window_only_touches_window(db):
+    history = []
+    for i in range(5):
+        history += _turn(i)
+    conv = await db.create_conversation("p:FriendMessage:u", "p", content=history)
+    cid = conv.conversation_id
+    ids_before = await _message_ids(db, cid)
+    mgr = ConversationManager(db)
+
+    window = await mgr.get_history_window(cid, last_turns=2)
+    assert window == _turn(3) + _turn(4)
+    # 窗口未被修改，只追加本轮的消息
+    await mgr.update_history_window(cid, window, window + _turn(5), token_usage=42)
+    ids_after = await _message_ids(db, cid)
+    assert ids_after[:10] == ids_before
+    assert await db.get_conversation_messages(cid) == history + _turn(5)
+    assert (await db.get_conversation_by_id(cid)).token_usage == 42
+
+    # 窗口被截断时只重写窗口对应的记录，更早的历史保持不变
+    window = await mgr.get_history_window(cid, last_turns=3)
+    await mgr.update_history_window(cid, window, _turn(4) + _turn(5) + _turn(6))
+    ids_truncated = await _message_ids(db, cid)
+    assert ids_truncated[:6] == ids_before[:6]
+    assert await db.get_conversation_messages(cid) == (
+        _turn(0) + _turn(1) + _turn(2) + _turn(4) + _turn(5) + _turn(6)
+    )
+
+
+@pytest.mark.asyncio
+async def test_update_compares_hashes_not_content(db):
+    conv = await db.create_conversation("p:FriendMessage:u", "p", content=_turn(0))
+    cid = conv.conversation_id
+    # 存储的内容只有在哈希不同时才会被重写
+    async with db.get_db() as session, session.begin():
+        await session.execute(
+            update(ConversationMessage)
+            .where(col(ConversationMessage.conversation_id) == cid)
+            .values(content={"role": "user", "content": "stale"}),
+        )
+    await db.update_conversation(cid, content=_turn(0) + _turn(1))
+    messages = await db.get_conversation_messages(cid)
+    assert messages[0] == {"role": "user", "content": "stale"}
+    assert messages[2:] == _turn(1)
+
+
+@pytest.mark.asyncio
+async def test_agent_stage_reads_window_and_appends_turn(db):
+    umo = "p:FriendMessage:u"
+    history = []
+    for i in range(5):
+        history += _turn(i)
+    conv = await db.create_conversation(umo, "p", content=history)
+    cid = conv.conversation_id
+    await db.set_session_conversation_id(umo, cid)
+    ids_before = await _message_ids(db, cid)
+
+    stage = InternalAgentSubStage.__new__(InternalAgentSubStage)
+    stage.conv_manager = ConversationManager(db)
+    stage.max_context_length = 2
+    stage.context_limit_reached_strategy = "truncate_by_turns"
+    provider = SimpleNamespace(provider_config={"max_context_tokens": 0})
+    event = SimpleNamespace(unified_msg_origin=umo, get_platform_id=lambda: "p")
+
+    conversation = await stage._get_session_conv(event, provider)  # type: ignore[arg-type]
+    contexts = stage._conversation_contexts(conversation)
+    assert contexts == _turn(3) + _turn(4)
+
+    all_messages = [
+        Message(role="system", content="system prompt"),
+        *(Message(**m) for m in contexts + _turn(5)),
+    ]
+    req = SimpleNamespace(conversation=conversation, tool_calls_result=None)
+    llm_response = SimpleNamespace(role="assistant", completion_text="answer 5")
+    await stage._save_to_history(event, req, llm_response, all_messages, None)  # type: ignore[arg-type]
+
+    assert (await _message_ids(db, cid))[:10] == ids_before
+    assert await db.get_conversation_messages(cid) == history + _turn(5)
@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+
+from astrbot.core.event_dispatcher import SessionEventDispatcher
+
+
+class Recorder:
+    def __init__(self):
+        self.started: list[str] = []
+        self.running = 0
+        self.max_running = 0
+        self.gate = asyncio.Event()
+
+    def job(self, name: str):
+        async def run():
+            self.started.append(name)
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+            await self.gate.wait()
+            self.running -= 1
+
+        return run
+
+
+async def _drain(dispatcher: SessionEventDispatcher):
+    while dispatcher._tasks:
+        await asyncio.gather(*list(dispatcher._tasks))
+
+
+@pytest.mark.asyncio
+async def test_serial_per_session_and_round_robin():
+    dispatcher = SessionEventDispatcher(max_concurrency=2)
+    rec = Recorder()
+    for i in range(3):
+        dispatcher.submit("group:a", rec.job(f"a{i}"))
+    dispatcher.submit("group:b", rec.job("b0"))
+    dispatcher.submit("group:c", rec.job("c0"))
+    await asyncio.sleep(0)
+
+    # 同一会话同时只有一个事件在处理，另一个并发名额给了其他会话
+    assert rec.started == ["a0", "b0"]
+    assert dispatcher.stats()["queued"] == 3
+
+    rec.gate.set()
+    await _drain(dispatcher)
+    assert rec.max_running == 2
+    # 会话 a 处理完一个事件后排到队尾，c 先于 a1 执行
+    assert rec.started.index("c0") < rec.started.index("a1")
+    assert [n for n in rec.started if n.startswith("a")] == ["a0", "a1", "a2"]
+    assert dispatcher.stats()["processed"] == 5
+    assert dispatcher._queues == {}
+
+
+@pytest.mark.asyncio
+async def test_priority_and_overflow():
+    dispatcher = SessionEventDispatcher(
+        max_concurrency=1,
+        max_session_queue=2,
+        max_total_queue=3,
+    )
+    rec = Recorder()
+    dispatcher.submit("group:busy", rec.job("busy0"))
+    for i in range(1, 4):
+        dispatcher.submit("group:busy", rec.job(f"busy{i}"))
+    dispatcher.submit("group:other", rec.job("other"))
+    dispatcher.submit("friend:admin", rec.job("admin"), priority=True)
+    # 高优先级事件不受全局队列上限限制，普通事件会挤掉最长队列中最早的事件
+    dispatcher.submit("group:late", rec.job("late"))
+    await asyncio.sleep(0)
+
+    stats = dispatcher.stats()
+    assert stats["dropped"] == 2
+    assert stats["queued"] == 4
+
+    rec.gate.set()
+    await _drain(dispatcher)
+    assert rec.started[:2] == ["busy0", "admin"]
+    assert "busy1" not in rec.started and "busy2" not in rec.started
+    assert set(rec.started) == {"busy0", "busy3", "other", "admin", "late"}
+
+    dispatcher.overflow_policy = "drop_newest"
+    dispatcher.max_concurrency = 0
+    assert dispatcher.submit("group:x", rec.job("x0"))
+    assert dispatcher.submit("group:x", rec.job("x1"))
+    assert not dispatcher.submit("group:x", rec.job("x2"))
+    # 绕过串行调度的事件会立即执行
+    assert dispatcher.submit("group:x", rec.job("waiter"), bypass=True)
+    await _drain(dispatcher)
+    assert rec.started[-1] == "waiter"
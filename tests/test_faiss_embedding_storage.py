@@ -0,0 +1,127 @@
+import numpy as np
+import pytest
+
+from astrbot.core.db.vec_db.faiss_impl.embedding_storage import EmbeddingStorage
+
+DIM = 16
+
+
+def _vectors(n: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    vectors = rng.random((n, DIM), dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+async def _top1(storage: EmbeddingStorage, vector: np.ndarray) -> int:
+    _, indices = await storage.search(vector.reshape(1, -1).copy(), 1)
+    return int(indices[0][0])
+
+
+@pytest.mark.asyncio
+async def test_writes_are_logged_and_replayed(tmp_path):
+    path = str(tmp_path / "index.faiss")
+    storage = EmbeddingStorage(DIM, path, save_delay=3600)
+    vectors = _vectors(10)
+    await storage.insert_batch(vectors, list(range(10)))
+    await storage.delete([3])
+
+    # 索引文件尚未写入, 修改只存在于 WAL 中
+    assert storage.stats()["pending_ops"] == 2
+    assert (tmp_path / "index.faiss.wal").stat().st_size > 0
+
+    recovered = EmbeddingStorage(DIM, path)
+    assert recovered.ntotal == 9
+    assert await _top1(recovered, vectors[5]) == 5
+
+    await storage.close()
+    assert (tmp_path / "index.faiss.wal").stat().st_size == 0
+    assert EmbeddingStorage(DIM, path).ntotal == 9
+
+
+@pytest.mark.asyncio
+async def test_hnsw_tombstones_and_compaction(tmp_path):
+    storage = EmbeddingStorage(
+        DIM,
+        str(tmp_path / "index.faiss"),
+        index_type="hnsw",
+        save_delay=3600,
+        compact_ratio=0.5,
+    )
+    vectors = _vectors(20)
+    await storage.insert_batch(vectors, list(range(20)))
+    await storage.delete([4])
+    assert storage.stats()["deleted"] == 1
+    assert await _top1(storage, vectors[4]) != 4
+
+    stats = await storage.rebuild()
+    assert stats["active_type"] == "hnsw"
+    assert stats["deleted"] == 0 and stats["ntotal"] == 19
+    assert await _top1(storage, vectors[7]) == 7
+    await storage.close()
+
+
+@pytest.mark.asyncio
+async def test_ivf_trains_in_background_after_threshold(tmp_path):
+    storage = EmbeddingStorage(
+        DIM,
+        str(tmp_path / "index.faiss"),
+        index_type="ivf_flat",
+        index_params={"train_threshold": 200, "nprobe": 8},
+        save_delay=3600,
+    )
+    vectors = _vectors(300, seed=1)
+    await storage.insert_batch(vectors[:100], list(range(100)))
+    assert storage.active_type == "flat"
+
+    await storage.insert_batch(vectors[100:], list(range(100, 300)))
+    # 训练期间的写入会在切换索引后重放
+    await storage.delete([10])
+    assert storage.stats()["rebuilding"]
+    await storage._rebuild_task
+
+    assert storage.active_type == "ivf_flat"
+    assert storage.ntotal == 299
+    assert await _top1(storage, vectors[42]) == 42
+
+    stats = await storage.rebuild(index_type="flat")
+    assert stats["active_type"] == "flat" and stats["ntotal"] == 299
+    await storage.close()
+
+
+@pytest.mark.asyncio
+async def test_ivf_pq_rebuilds_from_original_vectors(tmp_path):
+    path = str(tmp_path / "index.faiss")
+    storage = EmbeddingStorage(
+        DIM,
+        path,
+        index_type="ivf_pq",
+        # 低于 PQ 训练所需的 256 个样本，会被提高到 256
+        index_params={"train_threshold": 50, "m": 4, "nbits": 8},
+        save_delay=3600,
+    )
+    vectors = _vectors(400, seed=2)
+    await storage.insert_batch(vectors[:200], list(range(200)))
+    assert storage.active_type == "flat"
+    assert not storage.stats()["rebuilding"]
+
+    await storage.insert_batch(vectors[200:300], list(range(200, 300)))
+    await storage._rebuild_task
+    assert storage.active_type == "ivf_pq"
+    await storage.insert_batch(vectors[300:], list(range(300, 400)))
+
+    # 滞后：降到阈值以下但未低于一半时仍保持 ivf_pq
+    await storage.delete(list(range(150)))
+    assert storage._rebuild_task.done()
+    assert storage.active_type == "ivf_pq"
+    await storage.close()
+
+    # 重新打开后切换为 flat，得到的是原始向量而不是有损重建
+    reopened = EmbeddingStorage(DIM, path, index_type="ivf_pq")
+    stats = await reopened.rebuild(index_type="flat")
+    assert stats["active_type"] == "flat" and stats["ntotal"] == 250
+    extracted, ids = reopened._extract_vectors()
+    order = np.argsort(ids)
+    np.testing.assert_array_equal(ids[order], np.arange(150, 400))
+    np.testing.assert_allclose(extracted[order], vectors[150:], rtol=1e-6)
+    assert not (tmp_path / "index.faiss.raw").exists()
+    await reopened.close()
@@ -0,0 +1,236 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy import text
+
+from astrbot.core.db import fts
+from astrbot.core.db.sqlite import SQLiteDatabase
+
+pytestmark = pytest.mark.skipif(
+    not fts.trigram_supported(), reason="SQLite without the trigram tokenizer"
+)
+
+
+@pytest_asyncio.fixture
+async def db(tmp_path):
+    db = SQLiteDatabase(str(tmp_path / "data_v4.db"))
+    await db.initialize()
+    yield db
+    await db.stats_aggregator.close()
+    await db.engine.dispose()
+
+
+async def _create(db, user_id, platform_id, messages, title=None):
+    conv = await db.create_conversation(
+        user_id, platform_id, content=messages, title=title
+    )
+    return conv.conversation_id
+
+
+@pytest.mark.asyncio
+async def test_conversation_search_ranked_with_snippets(db):
+    assert db.fts_enabled
+    weather = await _create(
+        db,
+        "qq:FriendMessage:1",
+        "qq",
+        [
+            {"role": "user", "content": "明天的天气预报是什么"},
+            {
+                "role": "assistant",
+                "content": [{"type": "text", "text": "明天天气预报：晴转多云"}],
+            },
+            {"role": "tool", "content": "天气预报 raw payload"},
+        ],
+    )
+    await _create(
+        db,
+        "tg:GroupMessage:2",
+        "telegram",
+        [{"role": "user", "content": "unrelated chat"}],
+    )
+
+    hits, cursor = await db.search_conversation_messages("天气预报")
+    assert cursor is None
+    # 只索引 user 和 assistant 消息
+    assert sorted(h["role"] for h in hits) == ["assistant", "user"]
+    assert all(h["conversation_id"] == weather for h in hits)
+    assert all("<mark>天气预报</mark>" in h["snippet"] for h in hits)
+    assert hits[0]["rank"] <= hits[1]["rank"]
+
+    hits, _ = await db.search_conversation_messages("天气预报", platform_ids=["qq"])
+    assert len(hits) == 2
+    hits, _ = await db.search_conversation_messages(
+        "天气预报", platform_ids=["telegram"]
+    )
+    assert hits == []
+
+    # 少于三个字符的查询退化为 instr
+    hits, _ = await db.search_conversation_messages("多云")
+    assert [h["seq"] for h in hits] == [1]
+
+    convs, total = await db.get_filtered_conversations(search_query="晴转多云")
+    assert total == 1
+    assert convs[0].conversation_id == weather
+
+
+@pytest.mark.asyncio
+async def test_index_follows_rewrites_and_deletes(db):
+    cid = await _create(db, "qq:FriendMessage:1", "qq", [])
+    await db.update_conversation(cid, content=[{"role": "user", "content": "apple"}])
+    assert len((await db.search_conversation_messages("apple"))[0]) == 1
+
+    # 改写历史后旧消息从索引中移除
+    await db.update_conversation(
+        cid, content=[{"role": "user", "content": "banana split"}]
+    )
+    assert (await db.search_conversation_messages("apple"))[0] == []
+    assert len((await db.search_conversation_messages("banana"))[0]) == 1
+
+    await db.delete_conversation(cid)
+    assert (await db.search_conversation_messages("banana"))[0] == []
+
+
+@pytest.mark.asyncio
+async def test_keyset_pagination(db):
+    cid = await _create(
+        db,
+        "qq:FriendMessage:1",
+        "qq",
+        [{"role": "user", "content": f"keyword message {i}"} for i in range(7)],
+    )
+    seen = []
+    cursor = None
+    while True:
+        hits, cursor = await db.search_conversation_messages(
+            "keyword", limit=3, cursor=cursor
+        )
+        seen.extend(h["message_id"] for h in hits)
+        assert all(h["conversation_id"] == cid for h in hits)
+        if cursor is None:
+            break
+    assert len(seen) == 7
+    assert len(set(seen)) == 7
+
+
+@pytest.mark.asyncio
+async def test_platform_message_history_search(db):
+    await db.insert_platform_message_history(
+        "webchat",
+        "conv-1",
+        {"type": "user", "message": [{"type": "plain", "text": "写一首关于春天的诗"}]},
+        sender_id="alice",
+        sender_name="alice",
+    )
+    await db.insert_platform_message_history(
+        "webchat",
+        "conv-2",
+        {"type": "bot", "message": [{"type": "plain", "text": "春天的诗已经写好"}]},
+        sender_id="bot",
+        sender_name="bot",
+    )
+
+    hits, _ = await db.search_platform_message_history("春天的诗")
+    assert {h["user_id"] for h in hits} == {"conv-1", "conv-2"}
+    hits, _ = await db.search_platform_message_history("春天的诗", user_id="conv-1")
+    assert [h["sender_name"] for h in hits] == ["alice"]
+    hits, _ = await db.search_platform_message_history("alice")
+    assert len(hits) == 1
+
+    await db.delete_platform_message_offset("webchat", "conv-1")
+    hits, _ = await db.search_platform_message_history("春天的诗")
+    assert [h["user_id"] for h in hits] == ["conv-2"]
+
+
+@pytest.mark.asyncio
+async def test_existing_rows_backfilled(tmp_path):
+    path = str(tmp_path / "data_v4.db")
+    db = SQLiteDatabase(path)
+    await db.initialize()
+    await _create(
+        db, "qq:FriendMessage:1", "qq", [{"role": "user", "content": "hello"}]
+    )
+    async with db.engine.begin() as conn:
+        await conn.execute(text(f"DROP TABLE {fts.CONVERSATION_FTS}"))
+    await db.stats_aggregator.close()
+    await db.engine.dispose()
+
+    reopened = SQLiteDatabase(path)
+    await reopened.initialize()
+    try:
+        hits, _ = await reopened.search_conversation_messages("hello")
+        assert len(hits) == 1
+    finally:
+        await reopened.stats_aggregator.close()
+        await reopened.engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_non_object_message_parts_are_indexed_without_errors(db):
+    await db.insert_platform_message_history(
+        "webchat", "conv-1", {"type": "user", "message": "plain string message"}
+    )
+    await db.insert_platform_message_history(
+        "webchat",
+        "conv-2",
+        {"type": "user", "message": ["loose part", {"type": "plain", "text": "mixed"}]},
+    )
+    hits, _ = await db.search_platform_message_history("plain string")
+    assert [h["user_id"] for h in hits] == ["conv-1"]
+    hits, _ = await db.search_platform_message_history("mixed")
+    assert [h["user_id"] for h in hits] == ["conv-2"]
+
+    cid = await _create(
+        db,
+        "qq:FriendMessage:1",
+        "qq",
+        [
+            {
+                "role": "user",
+                "content": ["loose", {"type": "text", "text": "structured"}],
+            }
+        ],
+    )
+    hits, _ = await db.search_conversation_messages("structured")
+    assert [h["conversation_id"] for h in hits] == [cid]
+
+
+@pytest.mark.asyncio
+async def test_failed_backfill_leaves_no_partial_index(tmp_path, monkeypatch):
+    path = str(tmp_path / "data_v4.db")
+    db = SQLiteDatabase(path)
+    await db.initialize()
+    await _create(
+        db, "qq:FriendMessage:1", "qq", [{"role": "user", "content": "hello"}]
+    )
+    async with db.engine.begin() as conn:
+        await conn.execute(text(f"DROP TABLE {fts.CONVERSATION_FTS}"))
+    await db.stats_aggregator.close()
+    await db.engine.dispose()
+
+    monkeypatch.setitem(
+        fts.FTS_BACKFILL, fts.CONVERSATION_FTS, "SELECT no_such_function()"
+    )
+    broken = SQLiteDatabase(path)
+    await broken.initialize()
+    try:
+        assert not broken.fts_enabled
+        async with broken.engine.connect() as conn:
+            result = await conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE name = :name"),
+                {"name": fts.CONVERSATION_FTS},
+            )
+            assert result.first() is None
+    finally:
+        await broken.stats_aggregator.close()
+        await broken.engine.dispose()
+    monkeypatch.undo()
+
+    reopened = SQLiteDatabase(path)
+    await reopened.initialize()
+    try:
+        assert reopened.fts_enabled
+        hits, _ = await reopened.search_conversation_messages("hello")
+        assert len(hits) == 1
+    finally:
+        await reopened.stats_aggregator.close()
+        await reopened.engine.dispose()
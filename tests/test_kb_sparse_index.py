@@ -0,0 +1,71 @@
+import pytest
+from rank_bm25 import BM25Okapi
+
+from astrbot.core.knowledge_base.retrieval.sparse_index import (
+    SparseChunk,
+    SparseIndex,
+    tokenize,
+)
+
+CORPUS = [
+    "AstrBot 是一个多平台的聊天机器人框架",
+    "知识库支持稠密检索和稀疏检索",
+    "稀疏检索使用 BM25 算法对关键词打分",
+    "插件可以通过装饰器注册指令",
+    "向量数据库使用 FAISS 存储向量",
+]
+
+
+def _chunks(doc_id: str, start: int = 1) -> list[SparseChunk]:
+    return [
+        SparseChunk(
+            id=start + i,
+            chunk_id=f"{doc_id}-{i}",
+            kb_doc_id=doc_id,
+            chunk_index=i,
+            text=content,
+        )
+        for i, content in enumerate(CORPUS)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_search_matches_bm25_ranking(tmp_path):
+    index = SparseIndex(str(tmp_path / "sparse_index.db"))
+    await index.initialize()
+    await index.add_chunks(_chunks("doc"))
+    assert index.doc_count == len(CORPUS)
+
+    query = "稀疏检索 BM25"
+    hits = await index.search(query, top_k=3)
+    bm25 = BM25Okapi([tokenize(c) for c in CORPUS])
+    scores = bm25.get_scores(tokenize(query))
+    expected = sorted(range(len(CORPUS)), key=lambda i: scores[i], reverse=True)
+
+    assert [hit.chunk_index for hit in hits][:2] == expected[:2]
+    assert hits[0].chunk_id == f"doc-{expected[0]}"
+    assert all(hit.score > 0 for hit in hits)
+    await index.close()
+
+
+@pytest.mark.asyncio
+async def test_incremental_delete_and_persistence(tmp_path):
+    path = str(tmp_path / "sparse_index.db")
+    index = SparseIndex(path)
+    await index.initialize()
+    await index.add_chunks(_chunks("doc-a", start=1))
+    await index.add_chunks(_chunks("doc-b", start=100))
+    assert index.doc_count == 2 * len(CORPUS)
+
+    await index.remove_document("doc-a")
+    await index.remove_chunk("doc-b-2")
+    await index.close()
+
+    reopened = SparseIndex(path)
+    await reopened.initialize()
+    assert reopened.doc_count == len(CORPUS) - 1
+    hits = await reopened.search("BM25 算法", top_k=5)
+    assert all(hit.kb_doc_id == "doc-b" for hit in hits)
+    assert "doc-b-2" not in {hit.chunk_id for hit in hits}
+    assert await reopened.search("不存在的词语组合", top_k=5) == []
+    await reopened.close()
@@ -0,0 +1,92 @@
+import asyncio
+import logging
+import threading
+import uuid
+
+import pytest
+
+from astrbot.core.log import LogBroker, LogManager, LogRateLimiter
+
+
+class RecordingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records: list[logging.LogRecord] = []
+        self.threads: set[str] = set()
+
+    def emit(self, record):
+        self.records.append(record)
+        self.threads.add(threading.current_thread().name)
+
+
+@pytest.fixture
+def pipeline():
+    name = f"test-{uuid.uuid4().hex}"
+    # 不向 pytest 安装在根日志器上的处理器传播
+    logging.getLogger(name).propagate = False
+    logger = LogManager.GetLogger(log_name=name)
+    sink = RecordingHandler()
+    LogManager.add_sink(logger, sink)
+    yield logger, sink
+    LogManager._listeners.pop(name).stop()
+
+
+def test_sinks_run_in_background_with_deferred_formatting(pipeline):
+    logger, sink = pipeline
+    logger.info("hello %s %d", "world", 42, extra={"umo": "qq:Friend:1"})
+    LogManager.flush()
+
+    (record,) = sink.records
+    assert threading.current_thread().name not in sink.threads
+    # 参数均为不可变类型，格式化推迟到输出端
+    assert record.args == ("world", 42)
+    assert record.getMessage() == "hello world 42"
+    assert record.umo == "qq:Friend:1"
+    assert record.plugin_tag == "[Core]"
+
+
+def test_mutable_args_formatted_at_call_time(pipeline):
+    logger, sink = pipeline
+    items = ["a"]
+    logger.info("items: %s", items)
+    items.append("b")
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logger.exception("failed")
+    LogManager.flush()
+
+    first, second = sink.records
+    assert first.getMessage() == "items: ['a']"
+    assert second.exc_info is None
+    assert "ValueError: boom" in second.exc_text
+
+
+@pytest.mark.asyncio
+async def test_broker_receives_structured_entries(pipeline):
+    logger, _ = pipeline
+    broker = LogBroker()
+    LogManager.set_queue_handler(logger, broker)
+    q = broker.register()
+
+    logger.warning("disk %s", "full", extra={"sender_id": "10001"})
+    entry = await asyncio.wait_for(q.get(), 2)
+    assert entry["level"] == "WARNING"
+    assert entry["message"] == "disk full"
+    assert "disk full" in entry["data"]
+    assert entry["fields"] == {"sender_id": "10001"}
+    assert entry["lineno"] > 0
+    assert list(broker.log_cache) == [entry]
+
+    broker.unregister(q)
+    assert broker.subscribers == []
+
+
+def test_rate_limiter_counts_suppressed():
+    limiter = LogRateLimiter(rate=0, burst=2)
+    assert limiter.allow()
+    assert limiter.allow()
+    assert not limiter.allow()
+    assert not limiter.allow()
+    assert limiter.take_suppressed() == 2
+    assert limiter.take_suppressed() == 0
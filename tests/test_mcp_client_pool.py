@@ -0,0 +1,171 @@
+import asyncio
+import json
+from datetime import timedelta
+
+import anyio
+import mcp
+import pytest
+
+from astrbot.core.agent.mcp_client import MCPCallStats, MCPClient, MCPTool
+from astrbot.core.provider import func_tool_manager
+from astrbot.core.provider.func_tool_manager import FunctionToolManager
+
+
+class FakeSP:
+    def __init__(self):
+        self.data = {}
+
+    async def global_get(self, key, default=None):
+        return self.data.get(key, default)
+
+    async def global_put(self, key, value):
+        self.data[key] = value
+
+
+class FakeSession:
+    def __init__(self, tools, closed: bool = False):
+        self.tools = tools
+        self.closed = closed
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def call_tool(self, name, arguments, read_timeout_seconds):
+        if self.closed:
+            raise anyio.ClosedResourceError
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.05)
+        self.in_flight -= 1
+        return mcp.types.CallToolResult(
+            content=[mcp.types.TextContent(type="text", text=name)]
+        )
+
+    async def list_tools(self):
+        return mcp.types.ListToolsResult(tools=self.tools)
+
+
+def make_tool(name: str) -> mcp.types.Tool:
+    return mcp.types.Tool(
+        name=name,
+        description=f"{name} tool",
+        inputSchema={"type": "object", "properties": {}},
+    )
+
+
+def test_call_stats_histogram():
+    stats = MCPCallStats()
+    stats.record(10)
+    stats.record(300, "TimeoutError")
+    stats.record(60000)
+    data = stats.to_dict()
+    assert data["calls"] == 3
+    assert data["errors"] == 1
+    assert data["latency_histogram"]["<=50ms"] == 1
+    assert data["latency_histogram"]["<=500ms"] == 1
+    assert data["latency_histogram"][">30000ms"] == 1
+    assert data["error_histogram"] == {"TimeoutError": 1}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_reconnect():
+    client = MCPClient(max_concurrency=8)
+    client._mcp_server_config = {"command": "fake"}
+    client._server_name = "fake"
+    # 连接已断开，所有并发调用都会失败，但只应重连一次
+    sessions = [FakeSession([make_tool("a")], closed=True)]
+    client.session = sessions[0]
+    client._generation = 1
+    client.connected_event.set()
+
+    reconnects = 0
+
+    async def fake_connect(config, name):
+        nonlocal reconnects
+        reconnects += 1
+        sessions.append(FakeSession([make_tool("a")]))
+        client.session = sessions[-1]
+        client._generation += 1
+        client.connected_event.set()
+
+    client.connect_to_server = fake_connect
+
+    results = await asyncio.gather(
+        *(
+            client.call_tool_with_reconnect("a", {}, timedelta(seconds=5))
+            for _ in range(4)
+        )
+    )
+    assert all(r.content[0].text == "a" for r in results)
+    assert reconnects == 1
+    assert sessions[-1].max_in_flight > 1
+    stats = client.stats.to_dict()
+    assert stats["calls"] == 4
+    assert stats["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_tool_list_changed_refreshes_in_background():
+    client = MCPClient()
+    client.session = FakeSession([make_tool("a"), make_tool("b")])
+    changed = asyncio.Event()
+
+    async def on_tools_changed(c):
+        changed.set()
+
+    client.on_tools_changed = on_tools_changed
+    await client._message_handler(
+        mcp.types.ServerNotification(
+            mcp.types.ToolListChangedNotification(
+                method="notifications/tools/list_changed"
+            )
+        )
+    )
+    await asyncio.wait_for(changed.wait(), 1)
+    assert [t.name for t in client.tools] == ["a", "b"]
+
+
+@pytest.mark.asyncio
+async def test_cached_tools_registered_before_connection(tmp_path, monkeypatch):
+    cfg = {"command": "slow-server"}
+    (tmp_path / "mcp_server.json").write_text(
+        json.dumps({"mcpServers": {"slow": cfg}}), encoding="utf-8"
+    )
+    fake_sp = FakeSP()
+    fake_sp.data[func_tool_manager.MCP_TOOLS_CACHE_KEY] = {
+        "slow": {
+            "config_hash": func_tool_manager._mcp_config_hash(cfg),
+            "tools": [make_tool("cached").model_dump(mode="json")],
+        }
+    }
+    monkeypatch.setattr(func_tool_manager, "sp", fake_sp)
+    monkeypatch.setattr(func_tool_manager, "get_astrbot_data_path", lambda: tmp_path)
+
+    connect_called = asyncio.Event()
+    release = asyncio.Event()
+
+    async def slow_connect(self, config, name):
+        connect_called.set()
+        await release.wait()
+        self.session = FakeSession([make_tool("cached"), make_tool("new")])
+        self.connected_event.set()
+
+    monkeypatch.setattr(MCPClient, "connect_to_server", slow_connect)
+
+    mgr = FunctionToolManager()
+    await mgr.init_mcp_clients()
+    tool = mgr.get_func("cached")
+    assert isinstance(tool, MCPTool)
+
+    await asyncio.wait_for(connect_called.wait(), 1)
+    release.set()
+    for _ in range(50):
+        if mgr.get_func("new"):
+            break
+        await asyncio.sleep(0.01)
+    assert mgr.get_func("new") is not None
+    cached = fake_sp.data[func_tool_manager.MCP_TOOLS_CACHE_KEY]["slow"]
+    assert [t["name"] for t in cached["tools"]] == ["cached", "new"]
+    assert "slow" in mgr.get_mcp_stats()
+
+    await mgr.disable_mcp_server("slow", timeout=1)
+    assert mgr.get_func("cached") is None
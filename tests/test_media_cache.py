@@ -0,0 +1,121 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+from astrbot.core.utils import io as io_module
+from astrbot.core.utils import media_cache as media_cache_module
+from astrbot.core.utils.media_cache import MediaCache
+
+
+@pytest.mark.asyncio
+async def test_fetch_is_single_flight_and_cached(tmp_path, monkeypatch):
+    calls = []
+
+    async def fake_get(url: str) -> bytes:
+        calls.append(url)
+        await asyncio.sleep(0.01)
+        return b"image:" + url.encode()
+
+    monkeypatch.setattr(media_cache_module, "_http_get", fake_get)
+    cache = MediaCache(cache_dir=str(tmp_path))
+
+    paths = await asyncio.gather(*(cache.fetch("http://a/1.jpg") for _ in range(5)))
+    assert len(set(paths)) == 1
+    assert calls == ["http://a/1.jpg"]
+    assert await cache.fetch("http://a/1.jpg") == paths[0]
+    assert cache.hits == 1
+
+    # 内容相同的不同 URL 只保存一份
+    same = await cache.put_bytes(b"image:http://a/1.jpg")
+    assert same == paths[0]
+
+    # 文件被删除后会重新下载
+    os.remove(paths[0])
+    assert await cache.fetch("http://a/1.jpg") == paths[0]
+    assert len(calls) == 2
+    await cache.close()
+
+
+@pytest.mark.asyncio
+async def test_base64_is_memoized_by_mtime(tmp_path):
+    cache = MediaCache(cache_dir=str(tmp_path))
+    path = tmp_path / "a.jpg"
+    path.write_bytes(b"hello")
+    assert await cache.get_data_url(str(path)) == "data:image/jpeg;base64,aGVsbG8="
+    assert len(cache._base64) == 1
+    assert await cache.read_base64(str(path)) == "aGVsbG8="
+    assert len(cache._base64) == 1
+
+    path.write_bytes(b"world!")
+    assert await cache.read_base64(str(path)) == "d29ybGQh"
+    assert len(cache._base64) == 2
+
+
+def test_sweep_evicts_expired_and_oversized(tmp_path, monkeypatch):
+    temp_dir = tmp_path / "temp"
+    cache_dir = temp_dir / "media_cache"
+    cache_dir.mkdir(parents=True)
+    monkeypatch.setattr(
+        media_cache_module, "get_astrbot_temp_path", lambda: str(temp_dir)
+    )
+    cache = MediaCache(cache_dir=str(cache_dir), file_ttl=100, max_bytes=10)
+
+    now = time.time()
+    old_temp = temp_dir / "old.jpg"
+    old_temp.write_bytes(b"x")
+    os.utime(old_temp, (now - 200, now - 200))
+    fresh_temp = temp_dir / "fresh.jpg"
+    fresh_temp.write_bytes(b"x")
+    for i, age in enumerate((50, 40, 30)):
+        f = cache_dir / f"{i}.jpg"
+        f.write_bytes(b"x" * 5)
+        os.utime(f, (now - age, now - age))
+
+    assert cache.sweep() == 2
+    assert not old_temp.exists() and fresh_temp.exists()
+    # 超出容量时淘汰最久未使用的文件
+    assert sorted(os.listdir(cache_dir)) == ["1.jpg", "2.jpg"]
+
+
+@pytest.mark.asyncio
+async def test_download_image_caches_only_when_requested(tmp_path, monkeypatch):
+    fetched = []
+
+    async def fake_fetch(url, suffix=".jpg"):
+        fetched.append(url)
+        return str(tmp_path / "cached.jpg")
+
+    async def fake_request(url, post, post_data):
+        return b"image"
+
+    monkeypatch.setattr(io_module.media_cache, "fetch", fake_fetch)
+    monkeypatch.setattr(io_module, "_request_bytes", fake_request)
+    monkeypatch.setattr(io_module, "get_astrbot_temp_path", lambda: str(tmp_path))
+
+    path = await io_module.download_image_by_url("http://a/1.jpg")
+    assert path != str(tmp_path / "cached.jpg")
+    with open(path, "rb") as f:
+        assert f.read() == b"image"
+    assert fetched == []
+
+    cached = await io_module.download_image_by_url("http://a/1.jpg", cache=True)
+    assert cached == str(tmp_path / "cached.jpg")
+    assert fetched == ["http://a/1.jpg"]
+
+
+@pytest.mark.asyncio
+async def test_http_session_from_other_loop_is_closed():
+    old = await media_cache_module.get_http_session()
+    assert await media_cache_module.get_http_session() is old
+
+    # 模拟会话属于一个已经结束的事件循环
+    stale_loop = asyncio.new_event_loop()
+    stale_loop.close()
+    media_cache_module._session_loop = stale_loop
+    new = await media_cache_module.get_http_session()
+    assert new is not old
+    assert old.closed
+    await media_cache_module.close_http_session()
+    assert new.closed
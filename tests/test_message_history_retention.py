@@ -0,0 +1,163 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import text, update
+
+from astrbot.core.db.po import PlatformMessageHistory
+from astrbot.core.db.sqlite import SQLiteDatabase
+from astrbot.core.platform_message_history_mgr import PlatformMessageHistoryManager
+
+
+@pytest_asyncio.fixture
+async def db(tmp_path):
+    db = SQLiteDatabase(str(tmp_path / "data_v4.db"))
+    await db.initialize()
+    yield db
+    await db.flush_platform_message_history()
+    await db.stats_aggregator.close()
+    await db.engine.dispose()
+
+
+def _content(i: int) -> dict:
+    return {"type": "user", "message": [{"type": "plain", "text": f"msg {i}"}]}
+
+
+async def _insert_many(db, user_id, n, platform_id="webchat"):
+    return await asyncio.gather(
+        *(
+            db.insert_platform_message_history(platform_id, user_id, _content(i))
+            for i in range(n)
+        )
+    )
+
+
+@pytest.mark.asyncio
+async def test_concurrent_inserts_share_a_transaction(db):
+    records = await _insert_many(db, "conv-1", 30)
+    assert all(r.id is not None for r in records)
+    assert len({r.id for r in records}) == 30
+    assert db.message_history_writer.batch_count == 1
+
+    record = await db.insert_platform_message_history("webchat", "conv-1", {})
+    assert (await db.get_platform_message_history_by_id(record.id)) is not None
+    assert db.message_history_writer.batch_count == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_record_does_not_fail_its_batch(db):
+    results = await asyncio.gather(
+        *(
+            db.insert_platform_message_history("webchat", "conv-1", _content(i))
+            for i in range(3)
+        ),
+        # 无法序列化为 JSON，写入时出错
+        db.insert_platform_message_history("webchat", "conv-1", {"bad": object()}),
+        return_exceptions=True,
+    )
+    assert isinstance(results[-1], Exception)
+    records = results[:-1]
+    assert all(isinstance(r, PlatformMessageHistory) for r in records)
+    for record in records:
+        assert (await db.get_platform_message_history_by_id(record.id)) is not None
+    async with db.get_db() as session:
+        count = await session.execute(
+            text("SELECT COUNT(*) FROM platform_message_history")
+        )
+        assert count.scalar_one() == 3
+
+
+@pytest.mark.asyncio
+async def test_keyset_pages_cover_history_once(db):
+    for i in range(7):
+        await db.insert_platform_message_history("webchat", "conv-1", _content(i))
+    await _insert_many(db, "conv-2", 3)
+    mgr = PlatformMessageHistoryManager(db)
+
+    pages = []
+    cursor = None
+    while True:
+        page, cursor = await mgr.get_page("webchat", "conv-1", limit=3, cursor=cursor)
+        pages.append([r.content["message"][0]["text"] for r in page])
+        if cursor is None:
+            break
+    # 第一页是最新的消息，每页内部按时间正序
+    assert pages == [
+        ["msg 4", "msg 5", "msg 6"],
+        ["msg 1", "msg 2", "msg 3"],
+        ["msg 0"],
+    ]
+    assert (await mgr.get_page("webchat", "conv-1", cursor="garbage"))[0]
+    for limit in (0, -2):
+        with pytest.raises(ValueError):
+            await mgr.get_page("webchat", "conv-1", limit=limit)
+
+
+@pytest.mark.asyncio
+async def test_session_history_uses_composite_index(db):
+    async with db.engine.connect() as conn:
+        plan = (
+            await conn.execute(
+                text(
+                    "EXPLAIN QUERY PLAN SELECT * FROM platform_message_history "
+                    "WHERE platform_id = 'webchat' AND user_id = 'u' "
+                    "ORDER BY created_at DESC, id DESC LIMIT 20"
+                )
+            )
+        ).all()
+    details = " ".join(row[-1] for row in plan)
+    assert "idx_platform_message_history_session" in details
+    assert "TEMP B-TREE" not in details
+
+
+@pytest.mark.asyncio
+async def test_prune_by_age_and_per_session_cap(db):
+    await _insert_many(db, "old", 5)
+    await _insert_many(db, "busy", 12)
+    await _insert_many(db, "quiet", 2, platform_id="qq")
+    async with db.get_db() as session, session.begin():
+        await session.execute(
+            update(PlatformMessageHistory)
+            .where(PlatformMessageHistory.user_id == "old")
+            .values(created_at=datetime(2020, 1, 1)),
+        )
+
+    mgr = PlatformMessageHistoryManager(db, retention_days=30, max_per_session=10)
+    assert mgr.retention_enabled
+    assert await mgr.prune() == 5 + 2
+    assert (await mgr.get("webchat", "old")) == []
+    busy = await mgr.get("webchat", "busy", page_size=100)
+    assert len(busy) == 10
+    # 保留最新的记录
+    assert min(r.id for r in busy) == max(r.id for r in busy) - 9
+    assert len(await mgr.get("qq", "quiet")) == 2
+    assert await mgr.prune() == 0
+
+
+@pytest.mark.asyncio
+async def test_prune_deletes_in_batches(db):
+    await _insert_many(db, "old", 7)
+    removed = await db.prune_platform_message_history(
+        before=datetime.now() + timedelta(days=1), batch_size=3
+    )
+    assert removed == 7
+    assert await db.get_platform_message_history("webchat", "old") == []
+
+
+@pytest.mark.asyncio
+async def test_cleaner_not_started_without_policy(db):
+    mgr = PlatformMessageHistoryManager(db)
+    mgr.ensure_cleaner()
+    assert mgr._cleaner is None
+
+    mgr = PlatformMessageHistoryManager(db, max_per_session=1, cleanup_interval=3600)
+    await _insert_many(db, "conv", 3)
+    mgr.ensure_cleaner()
+    for _ in range(50):
+        if len(await mgr.get("webchat", "conv")) == 1:
+            break
+        await asyncio.sleep(0.01)
+    assert len(await mgr.get("webchat", "conv")) == 1
+    await mgr.close()
+    assert mgr._cleaner is None
@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+from sqlmodel import delete
+
+from astrbot.core.db.po import PlatformStatRollup
+from astrbot.core.db.sqlite import SQLiteDatabase
+
+
+@pytest_asyncio.fixture
+async def db(tmp_path):
+    db = SQLiteDatabase(str(tmp_path / "data_v4.db"))
+    await db.initialize()
+    db.stats_aggregator.flush_interval = 3600
+    yield db
+    await db.stats_aggregator.close()
+    await db.engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_counts_are_buffered_and_flushed_in_batch(db):
+    last_hour = datetime.now() - timedelta(hours=1)
+    for _ in range(5):
+        await db.insert_platform_stats("qq", "aiocqhttp")
+    await db.insert_platform_stats("tg", "telegram", count=2, timestamp=last_hour)
+
+    # 未写入数据库前查询结果已包含内存中的计数
+    assert await db.count_platform_stats() == 0
+    assert await db.get_platform_message_total() == 7
+    grouped = await db.get_grouped_platform_stats(7200)
+    assert {p.name: p.count for p in grouped.platform} == {"qq": 5, "tg": 2}
+
+    await db.flush_platform_stats()
+    assert db.stats_aggregator.flush_count == 1
+    assert db.stats_aggregator.pending_count == 0
+    assert await db.count_platform_stats() == 2
+
+    await db.insert_platform_stats("qq", "aiocqhttp")
+    assert await db.get_platform_message_total() == 8
+    hourly = await db.get_hourly_platform_stats(7200)
+    assert [(p.name, p.count) for p in hourly.platform] == [("tg", 2), ("qq", 6)]
+
+
+@pytest.mark.asyncio
+async def test_flush_when_pending_buckets_reach_limit(db):
+    db.stats_aggregator.max_pending = 3
+    now = datetime.now()
+    for i in range(3):
+        await db.insert_platform_stats(
+            "qq", "aiocqhttp", timestamp=now - timedelta(hours=i)
+        )
+    await db.stats_aggregator._flush_task
+    assert await db.count_platform_stats() == 3
+
+
+@pytest.mark.asyncio
+async def test_rollup_is_rebuilt_from_existing_rows(db):
+    await db.insert_platform_stats("qq", "aiocqhttp", count=3)
+    await db.flush_platform_stats()
+    # 模拟没有 rollup 数据的旧版数据库
+    async with db.get_db() as session, session.begin():
+        await session.execute(delete(PlatformStatRollup))
+
+    reopened = SQLiteDatabase(db.db_path)
+    await reopened.initialize()
+    assert await reopened.get_platform_message_total() == 3
+    await reopened.rebuild_platform_stats_rollup()
+    assert await reopened.get_platform_message_total() == 3
+    await reopened.engine.dispose()
@@ -0,0 +1,81 @@
+import pytest
+
+import astrbot.api  # noqa: F401  # 先完成插件包的初始化，避免循环导入
+from astrbot.core.star import star_manager
+from astrbot.core.star.plugin_requirements import requirements_satisfied
+from astrbot.core.star.star_manager import PluginManager
+
+
+class FakeSP:
+    def __init__(self):
+        self.data = {}
+
+    async def global_get(self, key, default=None):
+        return self.data.get(key, default)
+
+    async def global_put(self, key, value):
+        self.data[key] = value
+
+
+class FakePip:
+    def __init__(self):
+        self.calls = []
+
+    async def install(self, requirements_paths=None, **kwargs):
+        self.calls.append(requirements_paths)
+
+
+def test_requirements_satisfied(tmp_path):
+    req = tmp_path / "requirements.txt"
+    req.write_text("# comment\npytest>=1.0\n\nPyYAML  # inline\n")
+    assert requirements_satisfied(str(req))
+
+    req.write_text("pytest>=999\n")
+    assert not requirements_satisfied(str(req))
+    req.write_text("surely-not-installed-package-xyz\n")
+    assert not requirements_satisfied(str(req))
+    req.write_text("pytest; python_version < '3'\n-e git+https://x/y.git\n")
+    assert not requirements_satisfied(str(req))
+    req.write_text("not-installed-xyz; python_version < '3'\n")
+    assert requirements_satisfied(str(req))
+
+
+@pytest.mark.asyncio
+async def test_missing_requirements_installed_in_one_batch(tmp_path, monkeypatch):
+    fake_sp, fake_pip = FakeSP(), FakePip()
+    monkeypatch.setattr(star_manager, "sp", fake_sp)
+    monkeypatch.setattr(star_manager, "pip_installer", fake_pip)
+
+    modules = []
+    for name, reqs in (
+        ("a", "missing-package-aaa\n"),
+        ("b", "missing-package-bbb>=2\n"),
+        ("c", "pytest\n"),
+        ("d", None),
+    ):
+        (tmp_path / name).mkdir()
+        if reqs:
+            (tmp_path / name / "requirements.txt").write_text(reqs)
+        modules.append({"pname": name, "module": "main"})
+    modules.append({"pname": "builtin", "module": "main", "reserved": True})
+
+    pm = PluginManager.__new__(PluginManager)
+    pm.plugin_store_path = str(tmp_path)
+    await pm._ensure_plugin_requirements(modules)
+
+    assert fake_pip.calls == [
+        [
+            str(tmp_path / "a" / "requirements.txt"),
+            str(tmp_path / "b" / "requirements.txt"),
+        ]
+    ]
+    manifest = fake_sp.data["plugin_requirements_manifest"]
+    assert set(manifest) == {"a", "b", "c"}
+
+    # requirements.txt 未变化的插件不再检查
+    await pm._ensure_plugin_requirements(modules)
+    assert len(fake_pip.calls) == 1
+
+    (tmp_path / "a" / "requirements.txt").write_text("missing-package-aaa>=3\n")
+    await pm._ensure_plugin_requirements(modules)
+    assert fake_pip.calls[-1] == [str(tmp_path / "a" / "requirements.txt")]
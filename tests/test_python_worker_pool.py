@@ -0,0 +1,119 @@
+import pytest
+
+from astrbot.core.computer.booters.local import LocalPythonComponent
+from astrbot.core.computer.booters.python_pool import PythonWorkerPool
+
+
+@pytest.mark.asyncio
+async def test_session_namespace_persists():
+    pool = PythonWorkerPool(size=2)
+    try:
+        _, _, error = await pool.execute("x = 41", session_id="a")
+        assert error == ""
+        stdout, _, error = await pool.execute("print(x + 1)", session_id="a")
+        assert stdout == "42\n"
+        assert error == ""
+
+        # 其他会话看不到该变量
+        _, _, error = await pool.execute("print(x)", session_id="b")
+        assert "NameError" in error
+
+        await pool.reset_session("a")
+        _, _, error = await pool.execute("print(x)", session_id="a")
+        assert "NameError" in error
+    finally:
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_streaming_output_and_silent():
+    pool = PythonWorkerPool(size=1)
+    chunks = []
+    try:
+        stdout, _, _ = await pool.execute(
+            "for i in range(3):\n    print(i)",
+            on_output=chunks.append,
+        )
+        assert stdout == "0\n1\n2\n"
+        assert "".join(chunks) == stdout
+        assert len(chunks) == 3
+
+        stdout, _, _ = await pool.execute("print('hidden')", silent=True)
+        assert stdout == ""
+    finally:
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_timeout_replaces_worker():
+    pool = PythonWorkerPool(size=1)
+    try:
+        await pool.execute("y = 1", session_id="s")
+        _, _, error = await pool.execute(
+            "import time\ntime.sleep(10)", session_id="s", timeout=0.5
+        )
+        assert "timed out" in error
+        assert pool.recycled == 1
+
+        stdout, _, error = await pool.execute("print('alive')", session_id="s")
+        assert stdout == "alive\n"
+        _, _, error = await pool.execute("print(y)", session_id="s")
+        assert "NameError" in error
+    finally:
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_worker_recycled_after_max_executions():
+    pool = PythonWorkerPool(size=1, max_executions=2)
+    try:
+        await pool.execute("pass")
+        pids = set()
+        for _ in range(4):
+            stdout, _, _ = await pool.execute("import os\nprint(os.getpid())")
+            pids.add(stdout.strip())
+        assert len(pids) >= 2
+        assert pool.recycled >= 2
+    finally:
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_local_python_component_result_shape():
+    component = LocalPythonComponent(pool=PythonWorkerPool(size=1))
+    try:
+        result = await component.exec("print('hi')", kernel_id="k")
+        assert result["data"]["output"] == {"text": "hi\n", "images": []}
+        assert result["data"]["error"] == ""
+
+        result = await component.exec("raise ValueError('boom')", kernel_id="k")
+        assert "ValueError: boom" in result["data"]["error"]
+    finally:
+        await component.pool.close()
+
+
+@pytest.mark.asyncio
+async def test_user_input_and_stderr():
+    pool = PythonWorkerPool(size=1)
+    try:
+        # input() 读到 EOF，不会读走后续的执行请求
+        _, _, error = await pool.execute("input()", session_id="s")
+        assert "EOFError" in error
+        stdout, _, error = await pool.execute(
+            "import sys\nprint(sys.stdin.read() == '')", session_id="s"
+        )
+        assert stdout == "True\n"
+        assert error == ""
+
+        stdout, stderr, error = await pool.execute(
+            "import sys\nprint('out')\nprint('warn', file=sys.stderr)"
+        )
+        assert (stdout, stderr, error) == ("out\n", "warn\n", "")
+
+        _, stderr, error = await pool.execute(
+            "import sys\nsys.stderr.write('before\\n')\n1 / 0"
+        )
+        assert stderr == "before\n"
+        assert "ZeroDivisionError" in error
+    finally:
+        await pool.close()
@@ -0,0 +1,70 @@
+import pytest
+
+import astrbot.api  # noqa: F401  # 先完成插件包的初始化，避免循环导入
+from astrbot.core.pipeline.rate_limit_check import limiter
+from astrbot.core.pipeline.rate_limit_check.limiter import (
+    MemoryRateLimiterBackend,
+    RateLimitRule,
+    gcra_acquire,
+    parse_rule_overrides,
+    token_bucket_acquire,
+)
+
+
+@pytest.mark.parametrize("acquire", [token_bucket_acquire, gcra_acquire])
+def test_burst_then_steady_rate(acquire):
+    rule = RateLimitRule(count=3, period=3)
+    state = None
+    for _ in range(3):
+        state, delay, _ = acquire(state, rule, 0.0, reserve=False)
+        assert delay == 0
+
+    # 额度耗尽后不预占时状态不变
+    rejected, delay, _ = acquire(state, rule, 0.0, reserve=False)
+    assert delay == pytest.approx(1.0)
+    assert rejected == state
+
+    # stall 策略会预占额度，后续请求需要排在其后
+    state, delay, _ = acquire(state, rule, 0.0, reserve=True)
+    assert delay == pytest.approx(1.0)
+    _, delay, _ = acquire(state, rule, 0.0, reserve=True)
+    assert delay == pytest.approx(2.0)
+
+    # 额度完全恢复后状态可以丢弃
+    state, _, expires_at = acquire(None, rule, 10.0, reserve=False)
+    assert expires_at == pytest.approx(11.0)
+
+
+@pytest.mark.asyncio
+async def test_memory_backend_evicts_idle_keys(monkeypatch):
+    now = 0.0
+    monkeypatch.setattr(limiter.time, "monotonic", lambda: now)
+    backend = MemoryRateLimiterBackend(max_keys=100)
+    rule = RateLimitRule(count=2, period=10, algorithm="gcra")
+
+    for i in range(50):
+        assert await backend.acquire(f"group:{i}", rule, reserve=False) == 0
+    assert len(backend) == 50
+
+    now = 100.0
+    for _ in range(20):
+        await backend.acquire("active", rule, reserve=True)
+    # 每次申请都会顺带清理最久未访问且额度已恢复的 key
+    assert len(backend) == 1
+    assert backend.stats()["evicted_keys"] == 50
+
+    backend.max_keys = 5
+    for i in range(10):
+        await backend.acquire(f"user:{i}", rule, reserve=False)
+    assert len(backend) == 5
+
+
+def test_parse_rule_overrides():
+    rules = parse_rule_overrides(
+        ["aiocqhttp:GroupMessage:123=5/60", "telegram = 1/2", "broken", "x=a/1"],
+        "gcra",
+    )
+    assert rules == {
+        "aiocqhttp:GroupMessage:123": RateLimitRule(5, 60.0, "gcra"),
+        "telegram": RateLimitRule(1, 2.0, "gcra"),
+    }
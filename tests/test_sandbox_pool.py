@@ -0,0 +1,221 @@
+import asyncio
+
+import pytest
+
+from astrbot.core.computer import computer_client
+from astrbot.core.computer.booters.local import LocalBooter
+from astrbot.core.computer.booters.shipyard import ShipyardBooter
+from astrbot.core.computer.sandbox_pool import PooledSandbox, SandboxPool
+
+
+class StandInBooter(LocalBooter):
+    """以本地环境代替远程沙箱，记录调用情况"""
+
+    def __init__(self, boot_delay: float = 0) -> None:
+        super().__init__(pool_size=1)
+        self.boot_delay = boot_delay
+        self.booted = False
+        self.healthy = True
+        self.available_calls = 0
+        self.shutdown_called = False
+        self.boot_id: str | None = None
+
+    async def boot(self, session_id: str) -> None:
+        await asyncio.sleep(self.boot_delay)
+        self.booted = True
+        self.boot_id = session_id
+
+    async def shutdown(self) -> None:
+        self.shutdown_called = True
+        await super().shutdown()
+
+    async def available(self) -> bool:
+        self.available_calls += 1
+        return self.healthy
+
+
+def make_pool(**kwargs) -> tuple[SandboxPool, list[StandInBooter], list]:
+    booters: list[StandInBooter] = []
+    prepared = []
+
+    def factory():
+        booter = StandInBooter()
+        booters.append(booter)
+        return booter
+
+    async def prepare(booter):
+        prepared.append(booter)
+
+    kwargs.setdefault("health_check_interval", 3600)
+    return SandboxPool(factory, prepare, **kwargs), booters, prepared
+
+
+@pytest.mark.asyncio
+async def test_warm_sandbox_handed_out_and_session_affinity():
+    pool, booters, prepared = make_pool(warm_size=1)
+    try:
+        await pool.refill()
+        assert len(booters) == 1
+        assert prepared == booters
+
+        sb = await pool.acquire("s1")
+        assert sb is booters[0]
+        assert pool.warm_hits == 1
+        assert pool.cold_boots == 0
+
+        # 会话再次获取时直接复用，不在请求路径上检查可用性
+        assert await pool.acquire("s1") is sb
+        assert sb.available_calls == 0
+
+        await asyncio.sleep(0)
+        await pool._refill_task
+        assert pool.stats()["idle"] == 1
+
+        sb2 = await pool.acquire("s2")
+        assert sb2 is not sb
+        assert pool.warm_hits == 2
+    finally:
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_cold_boot_when_pool_empty_is_single_flight():
+    pool, booters, prepared = make_pool(warm_size=0)
+    try:
+        results = await asyncio.gather(*(pool.acquire("s") for _ in range(5)))
+        assert all(r is results[0] for r in results)
+        assert len(booters) == 1
+        assert pool.cold_boots == 1
+        assert prepared == booters
+    finally:
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_maintain_evicts_idle_and_unhealthy():
+    pool, booters, _ = make_pool(warm_size=1, idle_ttl=0.05)
+    try:
+        await pool.refill()
+        idle_sb = await pool.acquire("idle")
+        await pool._refill_task
+        await asyncio.sleep(0.1)
+
+        fresh_sb = await pool.acquire("fresh")
+        await pool._refill_task
+        fresh_sb.healthy = False
+
+        await pool.maintain()
+        assert idle_sb.shutdown_called
+        assert fresh_sb.shutdown_called
+        assert pool.stats()["sessions"] == 0
+        assert pool.evicted == 2
+        # 预热池被补充
+        assert pool.stats()["idle"] == 1
+
+        sb = await pool.acquire("fresh")
+        assert sb is not fresh_sb
+    finally:
+        await pool.close()
+    assert all(b.shutdown_called for b in booters)
+
+
+@pytest.mark.asyncio
+async def test_failed_boot_does_not_leak_session_lock():
+    attempts = []
+
+    def factory():
+        booter = StandInBooter()
+        attempts.append(booter)
+        if len(attempts) == 1:
+
+            async def fail(session_id):
+                raise RuntimeError("boot failed")
+
+            booter.boot = fail
+        return booter
+
+    pool = SandboxPool(factory, warm_size=0, health_check_interval=3600)
+    try:
+        with pytest.raises(RuntimeError):
+            await pool.acquire("s")
+        assert pool._session_locks == {}
+        assert await pool.acquire("s") is attempts[1]
+        assert pool._session_locks == {}
+    finally:
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_pools_keyed_by_config_and_replaced_on_change():
+    cfg = {"booter": "boxlite", "pool_size": 0}
+    try:
+        pool = computer_client.get_sandbox_pool("conf-a", cfg)
+        assert computer_client.get_sandbox_pool("conf-a", dict(cfg)) is pool
+        # 不同配置文件即使沙箱配置相同也使用各自的预热池
+        assert computer_client.get_sandbox_pool("conf-b", cfg) is not pool
+
+        booter = StandInBooter()
+        pool._sessions["s"] = PooledSandbox(booter=booter, boot_id="x", session_id="s")
+        new_pool = computer_client.get_sandbox_pool("conf-a", {**cfg, "idle_ttl": 60})
+        assert new_pool is not pool
+        assert computer_client.sandbox_pools["conf-a"] is new_pool
+        await asyncio.gather(*computer_client._closing_pools)
+        assert booter.shutdown_called
+    finally:
+        await computer_client.shutdown_sandbox_pools()
+    assert computer_client.sandbox_pools == {}
+
+
+@pytest.mark.asyncio
+async def test_boot_ids_derived_from_pool_key_and_session():
+    async def boot_ids(key: str) -> list[str | None]:
+        pool, booters, _ = make_pool(warm_size=2, key=key)
+        try:
+            await pool.refill()
+            cold = await pool._boot("s1")
+            await cold.booter.shutdown()
+            return [b.boot_id for b in booters]
+        finally:
+            await pool.close()
+
+    first = await boot_ids("conf-a")
+    # 重启后相同的预热池会使用相同的启动 ID，从而重新连接到仍在运行的沙箱
+    assert await boot_ids("conf-a") == first
+    assert len(set(first)) == 3
+    assert set(await boot_ids("conf-b")).isdisjoint(first)
+
+
+@pytest.mark.asyncio
+async def test_shipyard_shutdown_deletes_ship():
+    deleted = []
+
+    class FakeResponse:
+        status = 204
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+    class FakeSession:
+        def delete(self, url):
+            deleted.append(url)
+            return FakeResponse()
+
+    class FakeClient:
+        endpoint_url = "http://bay"
+        closed = False
+
+        async def _get_session(self):
+            return FakeSession()
+
+        async def close(self):
+            self.closed = True
+
+    booter = ShipyardBooter.__new__(ShipyardBooter)
+    booter._sandbox_client = FakeClient()  # type: ignore[assignment]
+    booter._ship = type("Ship", (), {"id": "ship-1"})()  # type: ignore[assignment]
+    await booter.shutdown()
+    assert deleted == ["http://bay/ship/ship-1"]
+    assert booter._sandbox_client.closed
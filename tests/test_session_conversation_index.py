@@ -0,0 +1,126 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy import text
+
+from astrbot.core import conversation_mgr
+from astrbot.core.conversation_mgr import ConversationManager
+from astrbot.core.db.po import Preference
+from astrbot.core.db.sqlite import SQLiteDatabase
+
+
+class FakeSP:
+    def __init__(self):
+        self.data: dict[tuple[str, str], str] = {}
+
+    async def session_get(self, umo, key, default=None):
+        return self.data.get((umo, key), default)
+
+    async def session_remove(self, umo, key):
+        self.data.pop((umo, key), None)
+
+
+async def make_db(path) -> SQLiteDatabase:
+    db = SQLiteDatabase(str(path))
+    await db.initialize()
+    return db
+
+
+async def close_db(db: SQLiteDatabase) -> None:
+    await db.stats_aggregator.close()
+    await db.engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def db(tmp_path):
+    db = await make_db(tmp_path / "data_v4.db")
+    yield db
+    await close_db(db)
+
+
+@pytest.fixture
+def fake_sp(monkeypatch):
+    fake = FakeSP()
+    monkeypatch.setattr(conversation_mgr, "sp", fake)
+    return fake
+
+
+@pytest.mark.asyncio
+async def test_backfill_from_preferences(tmp_path):
+    path = tmp_path / "data_v4.db"
+    db = await make_db(path)
+    await db.set_session_conversation_id("qq:FriendMessage:2", "conv-2")
+    async with db.get_db() as session, session.begin():
+        for umo, cid in (("qq:FriendMessage:1", "conv-1"), ("qq:FriendMessage:2", "x")):
+            session.add(
+                Preference(
+                    scope="umo", scope_id=umo, key="sel_conv_id", value={"val": cid}
+                )
+            )
+    await close_db(db)
+
+    # 表中已有其他会话的记录时也会补齐，已有的记录不会被覆盖
+    db = await make_db(path)
+    try:
+        assert await db.get_session_conversation_id("qq:FriendMessage:1") == "conv-1"
+        assert await db.get_session_conversation_id("qq:FriendMessage:2") == "conv-2"
+        async with db.get_db() as session, session.begin():
+            await session.execute(text("DELETE FROM session_conversations"))
+        await db.backfill_session_conversations()
+        assert await db.get_session_conversation_id("qq:FriendMessage:1") == "conv-1"
+    finally:
+        await close_db(db)
+
+
+@pytest.mark.asyncio
+async def test_manager_switch_new_delete(db, fake_sp):
+    umo = "qq:FriendMessage:1"
+    mgr = ConversationManager(db)
+    first = await mgr.new_conversation(umo, "qq")
+    assert await db.get_session_conversation_id(umo) == first
+
+    second = await mgr.new_conversation(umo, "qq")
+    await mgr.switch_conversation(umo, first)
+    assert await db.get_session_conversation_id(umo) == first
+    # 新实例没有内存缓存，从数据库读取
+    assert await ConversationManager(db).get_curr_conversation_id(umo) == first
+
+    sessions, total = await db.get_session_conversations(platform="qq")
+    assert total == 1
+    assert sessions[0]["conversation_id"] == first
+    assert (await db.get_session_conversations(platform="q"))[1] == 0
+
+    await mgr.delete_conversation(umo, first)
+    assert await db.get_session_conversation_id(umo) is None
+    await mgr.switch_conversation(umo, second)
+    await mgr.delete_conversations_by_user_id(umo)
+    assert await db.get_session_conversation_id(umo) is None
+
+
+@pytest.mark.asyncio
+async def test_legacy_preference_migrated_on_read(db, fake_sp):
+    umo = "tg:GroupMessage:2"
+    fake_sp.data[(umo, "sel_conv_id")] = "legacy-conv"
+    mgr = ConversationManager(db)
+    assert await mgr.get_curr_conversation_id(umo) == "legacy-conv"
+    assert await db.get_session_conversation_id(umo) == "legacy-conv"
+    assert fake_sp.data == {}
+
+
+@pytest.mark.asyncio
+async def test_session_list_uses_indexes(db):
+    query = SQLiteDatabase._session_conversations_query(platform="qq")
+    sql = str(
+        query.compile(db.engine.sync_engine, compile_kwargs={"literal_binds": True})
+    )
+    async with db.engine.connect() as conn:
+        plan = [
+            row[-1]
+            for row in (await conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"))).all()
+        ]
+    conversations = [p for p in plan if " conversations " in f" {p} "]
+    assert conversations, plan
+    assert all(p.startswith("SEARCH") and "INDEX" in p for p in conversations), plan
+    assert not any("json_extract" in p for p in plan)
+    # 平台筛选走主键范围
+    sessions = [p for p in plan if "session_conversations" in p]
+    assert sessions and sessions[0].startswith("SEARCH"), plan
@@ -0,0 +1,73 @@
+from types import SimpleNamespace
+
+import pytest
+
+from astrbot.core.utils.shared_preferences import SharedPreferences
+
+
+class FakePreferenceDB:
+    def __init__(self):
+        self.rows: dict[tuple[str, str, str], dict] = {}
+        self.reads = 0
+
+    async def get_preference(self, scope, scope_id, key):
+        self.reads += 1
+        value = self.rows.get((scope, scope_id, key))
+        return SimpleNamespace(value=value) if value is not None else None
+
+    async def insert_preference_or_update(self, scope, scope_id, key, value):
+        self.rows[(scope, scope_id, key)] = value
+
+    async def remove_preference(self, scope, scope_id, key):
+        self.rows.pop((scope, scope_id, key), None)
+
+    async def clear_preferences(self, scope, scope_id):
+        for k in [k for k in self.rows if k[:2] == (scope, scope_id)]:
+            del self.rows[k]
+
+
+@pytest.fixture
+def sp(tmp_path):
+    db = FakePreferenceDB()
+    return SharedPreferences(db, str(tmp_path / "sp.json"), cache_size=2), db
+
+
+@pytest.mark.asyncio
+async def test_reads_are_served_from_cache(sp):
+    prefs, db = sp
+    await prefs.session_put("umo", "sel_conv_id", "conv-1")
+
+    assert await prefs.session_get("umo", "sel_conv_id") == "conv-1"
+    assert await prefs.session_get("umo", "kb_config", {}) == {}
+    assert await prefs.session_get("umo", "kb_config", {}) == {}
+    assert db.reads == 1  # 仅 kb_config 的首次未命中访问数据库
+
+    stats = prefs.cache_stats()
+    assert stats["hits"] == 2 and stats["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_writes_keep_cache_consistent(sp):
+    prefs, db = sp
+    await prefs.session_put("umo", "cfg", {"a": [1]})
+    value = await prefs.session_get("umo", "cfg")
+    value["a"].append(2)
+    assert await prefs.session_get("umo", "cfg") == {"a": [1]}
+
+    await prefs.session_remove("umo", "cfg")
+    assert await prefs.session_get("umo", "cfg", "default") == "default"
+
+    await prefs.session_put("umo", "x", 1)
+    await prefs.clear_async("umo", "umo")
+    assert await prefs.session_get("umo", "x") is None
+    assert db.reads == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_is_bounded(sp):
+    prefs, db = sp
+    for i in range(3):
+        await prefs.global_put(f"k{i}", i)
+    assert prefs.cache_stats()["size"] == 2
+    assert await prefs.global_get("k0") == 0
+    assert db.reads == 1
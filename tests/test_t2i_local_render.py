@@ -0,0 +1,59 @@
+import asyncio
+import os
+
+import pytest
+
+from astrbot.core.utils.t2i import RenderTiming
+from astrbot.core.utils.t2i.local_strategy import (
+    FontManager,
+    LocalRenderStrategy,
+    TextMeasurer,
+)
+
+
+def test_split_text_to_fit_width():
+    font = FontManager.get_font(26)
+    text = "AstrBot 文转图" * 50
+    lines = TextMeasurer.split_text_to_fit_width(text, font, 300)
+    assert "".join(lines) == text
+    assert len(lines) > 1
+    for line in lines:
+        assert font.getlength(line) <= 300 or len(line) == 1
+    # 每一行都已尽量填满
+    for line, nxt in zip(lines, lines[1:]):
+        assert font.getlength(line + nxt[0]) > 300
+
+    assert TextMeasurer.split_text_to_fit_width("", font, 300) == []
+    assert TextMeasurer.split_text_to_fit_width("短", font, 1) == ["短"]
+
+
+def test_text_size_keeps_fixed_line_height():
+    font = FontManager.get_font(26)
+    width, height = TextMeasurer.get_text_size("Hello world", font)
+    # 行高不随文本内容变化，宽度按实际文本测量
+    assert TextMeasurer.get_text_size("...", font)[1] == height
+    assert TextMeasurer.get_text_size("gjpqy", font)[1] == height
+    assert TextMeasurer.get_text_size("Hello world" * 3, font)[0] > width
+
+
+@pytest.mark.asyncio
+async def test_local_render_runs_off_loop_and_is_cached():
+    strategy = LocalRenderStrategy(max_workers=1)
+    text = "# 标题\n\n" + "很长的一段回答 " * 200 + "\n- 列表项\n```\ncode\n```"
+    timing = RenderTiming()
+    path = await strategy.render(text, timing=timing)
+    assert await asyncio.to_thread(os.path.exists, path)
+    assert timing.strategy == "local"
+    assert not timing.cached
+    assert timing.draw > 0
+
+    cached = RenderTiming()
+    assert await strategy.render(text, timing=cached) == path
+    assert cached.cached
+
+    # 图片被清理后会重新渲染
+    os.remove(path)
+    again = await strategy.render(text)
+    assert await asyncio.to_thread(os.path.exists, again)
+    os.remove(again)
+    strategy.close()
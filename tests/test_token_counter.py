@@ -0,0 +1,83 @@
+import base64
+
+import pytest
+
+from astrbot.core.agent.context.token_counter import (
+    BPETokenizer,
+    EstimateTokenCounter,
+    MemoizedTokenCounter,
+    get_token_counter,
+)
+from astrbot.core.agent.message import Message, TextPart, ToolCall
+
+
+def _history(n: int) -> list[Message]:
+    messages = []
+    for i in range(n):
+        messages.append(Message(role="user", content=f"问题 {i} hello"))
+        messages.append(
+            Message(
+                role="assistant",
+                content=None,
+                tool_calls=[
+                    ToolCall(
+                        id=f"call_{i}",
+                        function=ToolCall.FunctionBody(name="search", arguments="{}"),
+                    ),
+                ],
+            ),
+        )
+        messages.append(
+            Message(role="tool", content=f"结果 {i}", tool_call_id=f"call_{i}")
+        )
+    return messages
+
+
+def test_estimate_is_memoized_per_message():
+    counter = EstimateTokenCounter()
+    history = _history(3)
+    first = counter.count_tokens(history)
+    assert counter.misses == 9
+
+    # 下一轮只会新增消息，已计算过的消息直接命中缓存
+    history += _history(4)[-3:]
+    second = counter.count_tokens(history)
+    assert counter.misses == 12
+    assert counter.hits == 9
+    assert second > first
+
+    multimodal = Message(role="user", content=[TextPart(text="问题 0 hello")])
+    assert counter.count_tokens([multimodal]) == counter.count_tokens(history[:1])
+    assert counter.count_tokens(history, trusted_token_usage=42) == 42
+
+
+def test_estimate_matches_character_ratio():
+    counter = EstimateTokenCounter()
+    text = "你好世界" + "a" * 10
+    assert counter.count_dict_tokens({"role": "user", "content": text}) == int(
+        4 * 0.6 + 10 * 0.3
+    )
+
+
+def test_bpe_tokenizer_from_local_vocab(tmp_path):
+    pytest.importorskip("tiktoken")
+    tokens = [bytes([i]) for i in range(256)] + [b"he", b"ll", b"hell", b"hello"]
+    vocab = tmp_path / "cl100k_base.tiktoken"
+    vocab.write_text(
+        "\n".join(
+            f"{base64.b64encode(token).decode()} {rank}"
+            for rank, token in enumerate(tokens)
+        ),
+    )
+    tokenizer = BPETokenizer("cl100k_base", str(vocab))
+    assert tokenizer.count("hello") == 1
+    assert tokenizer.count("hello hi") == 4
+
+    counter = MemoizedTokenCounter(tokenizer)
+    assert counter.count_tokens([Message(role="user", content="hello")]) == 1
+
+
+def test_missing_vocab_falls_back_to_estimate():
+    counter = get_token_counter("o200k_base")
+    assert counter is get_token_counter("o200k_base")
+    assert counter.tokenizer.name in ("estimate", "o200k_base")
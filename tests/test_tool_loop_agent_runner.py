@@ -1,3 +1,4 @@
+import asyncio
 import os
 import sys
 from unittest.mock import AsyncMock
@@ -324,3 +325,151 @@ async def test_hooks_called_with_max_step(
 if __name__ == "__main__":
     # 运行测试
     pytest.main([__file__, "-v"])
+
+
+class SleepToolExecutor:
+    """按工具名休眠不同时间的执行器，用于测试并行工具调用"""
+
+    def __init__(self, delays: dict[str, float]):
+        self.delays = delays
+        self.running = 0
+        self.max_running = 0
+
+    def execute(self, tool, run_context, **tool_args):
+        async def generator():
+            import asyncio
+
+            from mcp.types import CallToolResult, TextContent
+
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+            try:
+                await asyncio.sleep(self.delays[tool.name])
+            finally:
+                self.running -= 1
+            yield CallToolResult(
+                content=[TextContent(type="text", text=f"{tool.name} 结果")]
+            )
+
+        return generator()
+
+
+@pytest.mark.asyncio
+async def test_parallel_tool_calls_keep_call_order(mock_provider):
+    from astrbot.core.agent.message import ToolCallMessageSegment
+    from astrbot.core.message.message_event_result import MessageChain
+
+    tools = [
+        FunctionTool(
+            name=name,
+            description=name,
+            parameters={"type": "object", "properties": {}},
+            concurrency_safe=safe,
+        )
+        for name, safe in [("slow", True), ("fast", True), ("hang", True)]
+    ]
+    tools.append(
+        FunctionTool(
+            name="write",
+            description="write",
+            parameters={"type": "object", "properties": {}},
+        )
+    )
+    request = ProviderRequest(prompt="hi", func_tool=ToolSet(tools=tools), contexts=[])
+    executor = SleepToolExecutor({"slow": 0.2, "fast": 0.01, "hang": 10, "write": 0})
+    hooks = AsyncMock(spec=BaseAgentRunHooks)
+
+    runner = ToolLoopAgentRunner()
+    await runner.reset(
+        provider=mock_provider,
+        request=request,
+        run_context=ContextWrapper(context=None),
+        tool_executor=executor,
+        agent_hooks=hooks,
+        parallel_tool_calls=True,
+        max_parallel_tool_calls=3,
+        parallel_tool_call_timeout=0.5,
+    )
+    llm_resp = LLMResponse(
+        role="assistant",
+        tools_call_name=["slow", "fast", "hang", "write"],
+        tools_call_args=[{}, {}, {}, {}],
+        tools_call_ids=["c1", "c2", "c3", "c4"],
+    )
+
+    events, blocks = [], []
+    async for item in runner._handle_function_tools(request, llm_resp):
+        if isinstance(item, MessageChain):
+            events.append((item.type, item.chain[0].data.get("id")))
+        else:
+            blocks = item
+
+    assert events[:4] == [
+        ("tool_call", "c1"),
+        ("tool_call", "c2"),
+        ("tool_call", "c3"),
+        ("tool_call", "c4"),
+    ]
+    assert all(isinstance(b, ToolCallMessageSegment) for b in blocks)
+    assert [b.tool_call_id for b in blocks] == ["c1", "c2", "c3", "c4"]
+    assert blocks[0].content == "slow 结果"
+    assert "timeout" in blocks[2].content
+    assert executor.max_running == 3
+    assert hooks.on_tool_start.await_count == 4
+    assert hooks.on_tool_end.await_count == 4
+
+
+@pytest.mark.asyncio
+async def test_parallel_tool_calls_share_limiter_and_skip_finished(mock_provider):
+    from astrbot.core.agent.message import ToolCallMessageSegment
+    from astrbot.core.message.message_event_result import MessageChain
+
+    tools = [
+        FunctionTool(
+            name=name,
+            description=name,
+            parameters={"type": "object", "properties": {}},
+            concurrency_safe=True,
+        )
+        for name in ["a", "b"]
+    ]
+    request = ProviderRequest(prompt="hi", func_tool=ToolSet(tools=tools), contexts=[])
+    executor = SleepToolExecutor({"a": 0.05, "b": 0.05})
+
+    class SlowEndHooks(BaseAgentRunHooks):
+        async def on_tool_end(self, *args, **kwargs):
+            await asyncio.sleep(10)
+
+    async def run(hooks, timeout):
+        runner = ToolLoopAgentRunner()
+        await runner.reset(
+            provider=mock_provider,
+            request=request,
+            run_context=ContextWrapper(context=None),
+            tool_executor=executor,
+            agent_hooks=hooks,
+            parallel_tool_calls=True,
+            max_parallel_tool_calls=2,
+            parallel_tool_call_timeout=timeout,
+        )
+        llm_resp = LLMResponse(
+            role="assistant",
+            tools_call_name=["a", "b"],
+            tools_call_args=[{}, {}],
+            tools_call_ids=["c1", "c2"],
+        )
+        blocks = []
+        async for item in runner._handle_function_tools(request, llm_resp):
+            if not isinstance(item, MessageChain):
+                blocks = item
+        return blocks
+
+    # 不同 Agent 的批次共享同一个并发上限
+    await asyncio.gather(*(run(AsyncMock(spec=BaseAgentRunHooks), 1) for _ in range(3)))
+    assert executor.max_running == 2
+
+    # 结果产出后在钩子中超时，不会再追加一条错误结果
+    blocks = await run(SlowEndHooks(), 0.2)
+    assert all(isinstance(b, ToolCallMessageSegment) for b in blocks)
+    assert [b.tool_call_id for b in blocks] == ["c1", "c2"]
+    assert [b.content for b in blocks] == ["a 结果", "b 结果"]
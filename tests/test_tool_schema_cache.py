@@ -0,0 +1,109 @@
+from astrbot.core.agent.tool import FunctionTool, ToolSet
+from astrbot.core.provider.func_tool_manager import FunctionToolManager
+
+
+def make_tool(name: str, desc: str = "desc") -> FunctionTool:
+    return FunctionTool(
+        name=name,
+        description=desc,
+        parameters={
+            "type": "object",
+            "properties": {"q": {"type": "string", "description": "query"}},
+        },
+    )
+
+
+def test_tool_set_index_and_version():
+    tool_set = ToolSet([make_tool("a"), make_tool("b")])
+    assert tool_set.get_tool("b").name == "b"
+    assert tool_set.get_tool("c") is None
+
+    version = tool_set.version
+    replacement = make_tool("a", "new desc")
+    tool_set.add_tool(replacement)
+    assert tool_set.version > version
+    assert len(tool_set) == 2
+    assert tool_set.get_tool("a") is replacement
+
+    version = tool_set.version
+    tool_set.remove_tool("missing")
+    assert tool_set.version == version
+    tool_set.remove_tool("a")
+    assert tool_set.get_tool("a") is None
+    assert tool_set.names() == ["b"]
+
+    # 直接修改 tools 列表也能被索引感知
+    tool_set.tools.append(make_tool("c"))
+    assert tool_set.get_tool("c") is not None
+    tool_set.tools = [make_tool("d")]
+    assert tool_set.get_tool("b") is None
+    assert tool_set.get_tool("d") is not None
+
+
+def test_tool_set_schemas_are_cached_and_invalidated():
+    tool_set = ToolSet([make_tool("a"), make_tool("b")])
+    first = tool_set.openai_schema()
+    assert [t["function"]["name"] for t in first] == ["a", "b"]
+    second = tool_set.openai_schema()
+    assert second == first
+    assert second is not first
+    assert second[0] is first[0]
+
+    # 不同的参数分别缓存
+    omitted = tool_set.openai_schema(omit_empty_parameter_field=True)
+    assert omitted[0] is not first[0]
+
+    tool_set.add_tool(make_tool("c"))
+    assert [t["function"]["name"] for t in tool_set.openai_schema()] == [
+        "a",
+        "b",
+        "c",
+    ]
+    # 未变化的工具复用已生成的描述
+    assert tool_set.openai_schema()[0] is first[0]
+
+    anthropic = tool_set.anthropic_schema()
+    assert anthropic[0]["input_schema"]["properties"] == {
+        "q": {"type": "string", "description": "query"}
+    }
+    google = tool_set.google_schema()
+    assert len(google["function_declarations"]) == 3
+    cached = tool_set.google_schema()["function_declarations"]
+    assert cached[1] is google["function_declarations"][1]
+    assert ToolSet().google_schema() == {}
+
+
+def test_tool_schema_rebuilt_when_tool_changes():
+    tool = make_tool("a")
+    tool_set = ToolSet([tool])
+    assert tool_set.openai_schema()[0]["function"]["description"] == "desc"
+    tool.description = "changed"
+    tool_set.mark_changed()
+    assert tool_set.openai_schema()[0]["function"]["description"] == "changed"
+
+
+def test_function_tool_manager_active_schema_cache():
+    mgr = FunctionToolManager()
+    mgr.func_list.append(make_tool("a"))
+    mgr.func_list.append(make_tool("b"))
+    assert mgr.get_func("a").name == "a"
+
+    assert len(mgr.get_func_desc_openai_style()) == 2
+    mgr.get_func("a").active = False
+    mgr.mark_changed()
+    assert [t["function"]["name"] for t in mgr.get_func_desc_openai_style()] == ["b"]
+    assert mgr.get_active_tool_set().names() == ["b"]
+
+    mgr.add_func("c", [], "c desc", handler=None)
+    assert [t["name"] for t in mgr.get_func_desc_anthropic_style()] == ["b", "c"]
+
+    mgr.remove_func("b")
+    assert mgr.get_func("b") is None
+    assert (
+        mgr.get_func_desc_google_genai_style()["function_declarations"][0]["name"]
+        == "c"
+    )
+
+    mgr.func_list = []
+    assert mgr.get_func("c") is None
+    assert mgr.get_func_desc_openai_style() == []
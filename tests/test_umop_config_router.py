@@ -0,0 +1,92 @@
+import itertools
+import random
+
+import pytest
+
+from astrbot.core.umop_config_router import UmopConfigRouter, UmopRoutingTable
+
+
+class FakeSP:
+    def __init__(self, routing=None):
+        self.data = {"umop_config_routing": routing or {}}
+
+    async def get_async(self, key, default=None, scope=None, scope_id=None):
+        return self.data.get(key, default)
+
+    async def global_put(self, key, value):
+        self.data[key] = value
+
+
+def _linear_lookup(router: UmopConfigRouter, umo: str) -> str | None:
+    for pattern, conf_id in router.umop_to_conf_id.items():
+        if router._is_umo_match(pattern, umo):
+            return conf_id
+    return None
+
+
+@pytest.mark.asyncio
+async def test_first_matching_route_wins():
+    router = UmopConfigRouter(
+        FakeSP(
+            {
+                "qq::": "qq-all",
+                "qq:GroupMessage:123": "group-123",
+                "tg:*Message:1?": "tg-short",
+                "::": "fallback",
+            }
+        )
+    )
+    await router.initialize()
+    # 靠前的通配路由优先于靠后的精确路由
+    assert router.get_conf_id_for_umop("qq:GroupMessage:123") == "qq-all"
+    assert router.get_conf_id_for_umop("tg:FriendMessage:12") == "tg-short"
+    assert router.get_conf_id_for_umop("tg:FriendMessage:123") == "fallback"
+    assert router.get_conf_id_for_umop("bad-umo") is None
+    assert router.get_conf_id_for_umop("a:b:c:d") is None
+
+
+@pytest.mark.asyncio
+async def test_cache_invalidated_on_updates():
+    sp = FakeSP({"qq:GroupMessage:1": "a"})
+    router = UmopConfigRouter(sp, cache_size=2)
+    await router.initialize()
+    assert router.get_conf_id_for_umop("qq:GroupMessage:1") == "a"
+    assert router.get_conf_id_for_umop("qq:GroupMessage:2") is None
+
+    await router.update_route("qq:GroupMessage:2", "b")
+    assert router.get_conf_id_for_umop("qq:GroupMessage:2") == "b"
+    await router.update_routing_data({"qq::": "c"})
+    assert router.get_conf_id_for_umop("qq:GroupMessage:1") == "c"
+    await router.delete_route("qq::")
+    assert router.get_conf_id_for_umop("qq:GroupMessage:1") is None
+    assert sp.data["umop_config_routing"] == {}
+
+    for i in range(5):
+        router.get_conf_id_for_umop(f"qq:GroupMessage:{i}")
+    assert len(router._cache) == 2
+
+
+@pytest.mark.asyncio
+async def test_compiled_table_matches_linear_scan():
+    rng = random.Random(0)
+    platforms = ["qq", "tg", "webchat"]
+    types = ["GroupMessage", "FriendMessage"]
+    sessions = ["1", "12", "123", "abc"]
+    segment_patterns = [
+        ["", "*", "q*", *platforms],
+        ["", "*", "Group*", "*Message", *types],
+        ["", "*", "1*", "?", "[12]*", *sessions],
+    ]
+    umos = [":".join(parts) for parts in itertools.product(platforms, types, sessions)]
+    for _ in range(50):
+        routing = {}
+        for i in range(rng.randint(1, 8)):
+            umop = ":".join(rng.choice(segs) for segs in segment_patterns)
+            routing[umop] = f"conf-{i}"
+        router = UmopConfigRouter(FakeSP(routing))
+        await router.initialize()
+        table = UmopRoutingTable(routing)
+        for umo in umos:
+            expected = _linear_lookup(router, umo)
+            assert table.lookup(umo) == expected, (routing, umo)
+            assert router.get_conf_id_for_umop(umo) == expected
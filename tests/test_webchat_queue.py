@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+
+import astrbot.api  # noqa: F401  # 先完成插件包的初始化，避免循环导入
+from astrbot.core.platform.sources.webchat.webchat_adapter import QueueListener
+from astrbot.core.platform.sources.webchat.webchat_queue_mgr import WebChatQueueMgr
+
+
+@pytest.mark.asyncio
+async def test_new_conversation_is_delivered_without_polling():
+    mgr = WebChatQueueMgr()
+    created = []
+    mgr.add_listener(created.append)
+    received = asyncio.Queue()
+
+    async def callback(data):
+        await received.put(data)
+
+    listener = asyncio.create_task(QueueListener(mgr, callback).run())
+    await asyncio.sleep(0)
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    await mgr.get_or_create_queue("conv-1").put(("alice", "conv-1", {}))
+    await mgr.get_or_create_queue("conv-2").put(("bob", "conv-2", {}))
+    assert (await asyncio.wait_for(received.get(), 1))[1] == "conv-1"
+    assert (await asyncio.wait_for(received.get(), 1))[1] == "conv-2"
+    assert loop.time() - start < 0.5
+    assert created == ["conv-1", "conv-2"]
+    assert mgr.get_or_create_queue("conv-1") is mgr.queues["conv-1"]
+
+    listener.cancel()
+    await asyncio.gather(listener, return_exceptions=True)
+    assert not mgr._listeners[1:]
+
+
+def test_back_queue_cleanup():
+    mgr = WebChatQueueMgr(back_queue_idle_ttl=0)
+    queue = mgr.acquire_back_queue("a")
+    assert mgr.cleanup_idle_back_queues() == 0
+
+    queue.put_nowait({"type": "end"})
+    mgr.release_back_queue("a")
+    # 仍有未读取的响应时保留队列
+    assert mgr.back_queues["a"] is queue
+    queue.get_nowait()
+    assert mgr.cleanup_idle_back_queues() == 1
+    assert "a" not in mgr.back_queues
+
+    mgr.acquire_back_queue("b")
+    mgr.release_back_queue("b")
+    assert "b" not in mgr.back_queues